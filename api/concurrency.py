@@ -0,0 +1,95 @@
+"""
+Calistirma modeli.
+Route handler'lari event loop'ta calisir; bloklayan isler (SQLAlchemy, Fernet,
+PIL, CLIP, import pipeline) alt sistem basina ayri kapasiteli thread pool'lara
+gonderilir. Boylece bir thumbnail decode'u veya CLIP cagrisi diger istekleri
+(ornegin SSE import stream'ini) bekletmez; bir alt sistemdeki yogunluk da
+digerlerinin thread'lerini tuketmez.
+
+Alt sistemler (kapasiteler config.py'de):
+    db     -> SQLAlchemy sorgulari ve kucuk disk I/O
+    image  -> sifre cozme + PIL decode/resize
+    ml     -> CLIP metin/gorsel encode
+    import -> import pipeline iterasyonu (kendi pool'larini yonetir)
+
+PIL, OpenSSL ve torch agir islerde GIL'i birakir; bu yuzden thread'ler
+gercek paralellik saglar ve process pool'a veri kopyalamaya gerek kalmaz.
+"""
+
+import functools
+from typing import AsyncIterator, Callable, Dict, Iterator, TypeVar
+
+import anyio
+import anyio.to_thread
+
+from config import Config
+
+T = TypeVar("T")
+
+_CAPACITIES = {
+    "db": Config.API_DB_CONCURRENCY,
+    "image": Config.API_IMAGE_CONCURRENCY,
+    "ml": Config.API_ML_CONCURRENCY,
+    "import": Config.API_IMPORT_CONCURRENCY,
+}
+
+# Limiter'lar event loop icinde olusturulmali; ilk kullanimda yaratilir
+_limiters: Dict[str, anyio.CapacityLimiter] = {}
+
+
+def get_limiter(subsystem: str) -> anyio.CapacityLimiter:
+    """Alt sistemin kapasite limiter'ini doner (bilinmeyen ad -> KeyError)."""
+    limiter = _limiters.get(subsystem)
+    if limiter is None:
+        limiter = _limiters[subsystem] = anyio.CapacityLimiter(_CAPACITIES[subsystem])
+    return limiter
+
+
+async def run_blocking(subsystem: str, func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Bloklayan fonksiyonu alt sistemin thread pool'unda calistirir.
+    Kapasite doluysa istek thread tutmadan event loop'ta bekler.
+    """
+    return await anyio.to_thread.run_sync(
+        functools.partial(func, *args, **kwargs), limiter=get_limiter(subsystem)
+    )
+
+
+def offload(subsystem: str):
+    """
+    Senkron route handler'ini alt sistemin pool'unda calisan async handler'a cevirir.
+
+    Kullanim:
+        @router.get("/items")
+        @offload("db")
+        def get_items(db: Session = Depends(get_db_session)):
+            ...
+    """
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await run_blocking(subsystem, func, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+async def iterate_blocking(subsystem: str, iterator: Iterator[T]) -> AsyncIterator[T]:
+    """
+    Bloklayan bir iterator'u her adimi pool'da ilerleterek async olarak tuketir.
+    Tuketici erken birakirsa (SSE istemcisi koptu, iptal) iterator de pool'da
+    kapatilir: uretecin finally blogu (thread join, pool shutdown) event loop'u
+    bloklamaz.
+    """
+    done = object()
+    try:
+        while True:
+            value = await run_blocking(subsystem, next, iterator, done)
+            if value is done:
+                return
+            yield value
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            # Iptal sirasinda da kapatma tamamlanmali
+            with anyio.CancelScope(shield=True):
+                await run_blocking(subsystem, close)
@@ -53,14 +53,16 @@ def get_encryption_manager():
 
 
 def get_privacy_manager(db: Session = Depends(get_db_session)):
-    """PrivacyManager instance dondurur (her request icin yeni — DB session gerektirir)."""
+    """PrivacyManager instance dondurur (her request icin yeni — DB session gerektirir).
+    Silme / riza iptalinde vektorlerin de cikarilmasi icin FaissManager ve EmbeddingStore verilir."""
     from security.security_manager import PrivacyManager
-    return PrivacyManager(db)
+    return PrivacyManager(db, faiss_manager=get_faiss_manager(), embedding_store=get_embedding_store())
 
 
-# --- CLIP & FAISS Singleton'lari ---
+# --- CLIP, FAISS & Embedding Deposu Singleton'lari ---
 _clip_embedder = None
 _faiss_manager = None
+_embedding_store = None
 
 
 def get_clip_embedder():
@@ -68,22 +70,203 @@ def get_clip_embedder():
     global _clip_embedder
     if _clip_embedder is None:
         from src.embedding.clip_embedder import CLIPEmbedder
-        _clip_embedder = CLIPEmbedder()
+        from src.embedding.query_cache import QueryEmbeddingCache
+        _clip_embedder = CLIPEmbedder(query_cache=QueryEmbeddingCache(disk_path=Config.QUERY_CACHE_PATH))
         logger.info("CLIPEmbedder olusturuldu.")
     return _clip_embedder
 
 
+def get_query_cache():
+    """CLIPEmbedder olusturulduysa sorgu embedding cache'ini dondurur (model yuklemez)."""
+    return _clip_embedder.query_cache if _clip_embedder is not None else None
+
+
 def get_faiss_manager():
-    """FaissManager singleton dondurur."""
+    """
+    FaissManager singleton dondurur. IVF-PQ rebuild'leri orijinal vektorleri
+    EmbeddingStore'dan okur (yalnizca index'te canli item'lar icin).
+    """
     global _faiss_manager
     if _faiss_manager is None:
         from src.embedding.faiss_manager import FaissManager
-        _faiss_manager = FaissManager("database/clip_image_index.faiss", dimension=512, index_type="flat")
+        _faiss_manager = FaissManager("database/clip_image_index.faiss", dimension=512,
+                                      index_type=Config.FAISS_INDEX_TYPE,
+                                      vector_source=get_embedding_store().load)
         logger.info("FaissManager olusturuldu.")
     return _faiss_manager
 
 
+def flush_faiss_manager():
+    """Bekleyen FAISS degisikliklerini diske yazar (uygulama kapanirken cagrilir)."""
+    if _faiss_manager is not None:
+        _faiss_manager.flush()
+
+
+def get_embedding_store():
+    """EmbeddingStore singleton dondurur (dosya hash'i anahtarli kalici CLIP vektorleri)."""
+    global _embedding_store
+    if _embedding_store is None:
+        from src.embedding.embedding_store import EmbeddingStore
+        _embedding_store = EmbeddingStore(Config.EMBEDDING_STORE_PATH, dimension=512)
+        logger.info("EmbeddingStore olusturuldu.")
+    return _embedding_store
+
+
+# --- Thumbnail Deposu ---
+_thumbnail_store = None
+
+
+def get_thumbnail_store():
+    """ThumbnailStore singleton dondurur (sifreli, icerik adresli thumbnail/onizleme dosyalari)."""
+    global _thumbnail_store
+    if _thumbnail_store is None:
+        from src.ingestion.thumbnail_store import ThumbnailStore
+        _thumbnail_store = ThumbnailStore(Config.THUMBNAIL_STORE_PATH, get_encryption_manager())
+        logger.info("ThumbnailStore olusturuldu.")
+    return _thumbnail_store
+
+
+_thumbnail_cache = None
+
+
+def get_thumbnail_cache():
+    """ThumbnailCache singleton dondurur (bayt butceli LRU, ham JPEG)."""
+    global _thumbnail_cache
+    if _thumbnail_cache is None:
+        from src.ingestion.thumbnail_cache import ThumbnailCache
+        _thumbnail_cache = ThumbnailCache(Config.THUMBNAIL_CACHE_MAX_BYTES)
+    return _thumbnail_cache
+
+
+# --- Cografi Kodlayici ---
+_geocoder = None
+
+
+def get_geocoder():
+    """Geocoder singleton dondurur (yerel gazetteer + kalici geocode cache'i)."""
+    global _geocoder
+    if _geocoder is None:
+        from src.geo import Geocoder, GeocodeCache
+        _geocoder = Geocoder(cache=GeocodeCache(Config.GEOCODE_CACHE_PATH))
+        logger.info("Geocoder olusturuldu.")
+    return _geocoder
+
+
 def get_photo_importer(db: Session = Depends(get_db_session)):
     """PhotoImporter instance dondurur."""
     from src.ingestion.photo_importer import PhotoImporter
-    return PhotoImporter(db, clip_embedder=get_clip_embedder(), faiss_manager=get_faiss_manager())
+    return PhotoImporter(db, clip_embedder=get_clip_embedder(), faiss_manager=get_faiss_manager(),
+                         embedding_store=get_embedding_store(), thumbnail_store=get_thumbnail_store())
+
+
+# --- Arka Plan Isleri ---
+_job_manager = None
+
+
+def get_job_manager():
+    """JobManager singleton dondurur (reindex gibi uzun isler)."""
+    global _job_manager
+    if _job_manager is None:
+        from api.jobs import JobManager
+        _job_manager = JobManager()
+    return _job_manager
+
+
+def run_reindex_job(cancel):
+    """
+    Reindex isinin govdesi (arka plan thread'inde calisir).
+    Request session'i thread'ler arasi paylasilamadigi icin kendi session'ini acar.
+    """
+    from src.ingestion.reindexer import Reindexer
+    session = _db_schema.SessionLocal()
+    try:
+        reindexer = Reindexer(session, get_clip_embedder(), get_faiss_manager(),
+                              embedding_store=get_embedding_store())
+        yield from reindexer.run(cancel)
+    finally:
+        session.close()
+
+
+def _run_maintenance_job(task: str, cancel):
+    from src.ingestion.maintenance import LibraryMaintenance
+    session = _db_schema.SessionLocal()
+    try:
+        maintenance = LibraryMaintenance(session, get_encryption_manager(),
+                                         thumbnail_store=get_thumbnail_store(),
+                                         thumbnail_cache=get_thumbnail_cache(),
+                                         faiss_manager=get_faiss_manager(),
+                                         embedding_store=get_embedding_store())
+        yield from getattr(maintenance, task)(cancel)
+    finally:
+        session.close()
+
+
+def run_repair_job(cancel):
+    """Cift sifreleme onarimi isinin govdesi (arka plan thread'inde calisir)."""
+    yield from _run_maintenance_job("repair", cancel)
+
+
+def run_cleanup_job(cancel):
+    """Orphan kayit temizligi isinin govdesi (arka plan thread'inde calisir)."""
+    yield from _run_maintenance_job("cleanup", cancel)
+
+
+def run_cluster_job(cancel):
+    """
+    Tum kutuphanenin yeniden olay kumelemesi (istek uzerine, arka plan thread'inde).
+    Import sonrasi kumeleme artimlidir; bu is sadece elle tetiklenir.
+    """
+    from src.clustering import EventClusterer
+    session = _db_schema.SessionLocal()
+    try:
+        events = EventClusterer(session, geocoder=get_geocoder()).cluster_all_items()
+        progress = {"created": 0, "updated": 0, "deleted": 0}
+        for event in events:
+            progress[event["status"]] += 1
+        yield progress
+    finally:
+        session.close()
+
+
+def run_faiss_migration_job(cancel):
+    """
+    Eski L2 FAISS index'inin ic carpim index'ine tek seferlik donusumu (arka plan
+    thread'inde). Iptal (kapanis) vektor parcalari arasinda kontrol edilir; yarida
+    kalan donusum sonraki acilista yeniden baslar.
+    """
+    yield get_faiss_manager().migrate_metric(cancel)
+
+
+def prepare_faiss_manager():
+    """
+    Baslangicta "db" pool'unda calisir: FAISS singleton'i event loop disinda
+    olusturulur (index diskten yuklenir, journal oynatilir). Eski L2 index
+    varsa donusumu arka plan isi olarak baslatilir (is doner); bu surede
+    arama L2 skorlarini cosine'e cevirerek calisir.
+    """
+    try:
+        faiss_manager = get_faiss_manager()
+    except Exception as e:
+        logger.warning(f"FAISS index yuklenemedi, semantik arama devre disi: {e}")
+        return None
+    if not faiss_manager.needs_migration():
+        return None
+    logger.info("Eski L2 FAISS index'i bulundu, donusum arka planda baslatiliyor.")
+    return get_job_manager().start("faiss_migrate", run_faiss_migration_job)
+
+
+def resume_interrupted_jobs():
+    """
+    Yarida kalmis reindex varsa (cokme/kapanis) arka planda devam ettirir.
+    Kullanicinin iptal ettigi reindex otomatik surdurulmez.
+    """
+    from src.ingestion.reindexer import load_interrupted_state
+    if load_interrupted_state(Config.REINDEX_STATE_PATH) is not None:
+        logger.info("Yarida kalmis reindex bulundu, devam ettiriliyor.")
+        get_job_manager().start("reindex", run_reindex_job)
+
+
+def shutdown_jobs():
+    """Calisan isleri durdurur; devam noktalari korunur."""
+    if _job_manager is not None:
+        _job_manager.cancel_all(timeout=30)
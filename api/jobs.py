@@ -0,0 +1,119 @@
+"""
+Arka plan isleri.
+Uzun suren islemleri (reindex vb.) ayri bir thread'de calistirir; API hemen
+job id doner, ilerleme SSE stream'i veya durum endpoint'i ile izlenir.
+"""
+
+import uuid
+import time
+import logging
+import threading
+from typing import Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Is fonksiyonu: iptal event'ini alir, ilerleme sozlukleri uretir
+JobTarget = Callable[[threading.Event], Iterator[dict]]
+
+
+class CancelEvent(threading.Event):
+    """
+    Isin iptal bayragi. shutdown True ise is kullanici tarafindan degil API
+    kapanisi nedeniyle durduruldu; devam noktasi olan isler acilista surdurulur.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.shutdown = False
+
+
+class Job:
+    """Tek bir arka plan isi: durum, son ilerleme ve iptal bayragi."""
+
+    def __init__(self, kind: str, target: JobTarget):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.status = "pending"  # pending | running | completed | cancelled | failed
+        self.progress: dict = {}
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.cancel_event = CancelEvent()
+        self._target = target
+        self._thread = threading.Thread(target=self._run, name=f"job-{kind}-{self.id}", daemon=True)
+
+    def start(self):
+        self.status = "running"
+        self._thread.start()
+
+    def _run(self):
+        try:
+            for progress in self._target(self.cancel_event):
+                self.progress = progress
+            self.status = "cancelled" if self.cancel_event.is_set() else "completed"
+        except Exception as e:
+            logger.exception(f"Arka plan isi basarisiz ({self.kind} {self.id})")
+            self.status = "failed"
+            self.error = str(e)
+        finally:
+            self.finished_at = time.time()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "cancelled", "failed")
+
+    def cancel(self, shutdown: bool = False):
+        """Isin mevcut adimi bitirip durmasini ister (ilk iptalin nedeni korunur)."""
+        if not self.cancel_event.is_set():
+            self.cancel_event.shutdown = shutdown
+        self.cancel_event.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        self._thread.join(timeout)
+        return self.done
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """
+    Isleri id ile tutar. Ayni turden bir is zaten calisiyorsa yenisi
+    baslatilmaz, calisan is doner (ornegin iki reindex ayni anda kosmasin).
+    """
+
+    def __init__(self):
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def start(self, kind: str, target: JobTarget) -> Job:
+        with self._lock:
+            running = self.active(kind)
+            if running is not None:
+                return running
+            job = Job(kind, target)
+            self._jobs[job.id] = job
+            job.start()
+        logger.info(f"Arka plan isi basladi: {kind} ({job.id})")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def active(self, kind: str) -> Optional[Job]:
+        """Verilen turde calisan is (yoksa None)."""
+        return next((j for j in self._jobs.values() if j.kind == kind and not j.done), None)
+
+    def cancel_all(self, timeout: Optional[float] = None):
+        """Calisan tum islere iptal gonderir ve bitmelerini bekler (kapanista)."""
+        running = [j for j in self._jobs.values() if not j.done]
+        for job in running:
+            job.cancel(shutdown=True)
+        for job in running:
+            job.wait(timeout)
@@ -31,10 +31,27 @@ async def lifespan(app: FastAPI):
     db = DatabaseSchema()
     db.create_all_tables()
 
+    # FAISS index'ini event loop disinda yukle; eski L2 index donusumu arka plan isi olur
+    from api.concurrency import run_blocking
+    from api.dependencies import prepare_faiss_manager
+    await run_blocking("db", prepare_faiss_manager)
+
+    # Cokme/kapanis nedeniyle yarida kalan reindex'i kaldigi yerden surdur
+    from api.dependencies import resume_interrupted_jobs
+    resume_interrupted_jobs()
+
     logger.info(f"API hazir: http://{Config.API_HOST}:{Config.API_PORT}")
     yield
     logger.info("API kapatiliyor...")
 
+    # Calisan arka plan islerini durdur (devam noktalari diske yazili kalir)
+    from api.dependencies import shutdown_jobs
+    shutdown_jobs()
+
+    # Write-behind FAISS index'inde bekleyen vektorleri diske yaz
+    from api.dependencies import flush_faiss_manager
+    flush_faiss_manager()
+
 
 def setup_cors(app: FastAPI) -> None:
     """CORS middleware yapilandirmasi — Flutter desktop client icin gerekli."""
@@ -29,6 +29,7 @@ class ItemListResponse(BaseModel):
     total: int
     page: int
     size: int
+    next_cursor: Optional[str] = None  # Sonraki sayfa icin; None ise liste bitti
 
 
 class ThumbnailResponse(BaseModel):
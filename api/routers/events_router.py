@@ -3,7 +3,9 @@ Olay (Event) endpoint'leri.
 Olay listeleme, detay, kumeleme, guncelleme, silme.
 """
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
+
+from api.dependencies import get_job_manager, run_cluster_job
 
 router = APIRouter(prefix="/api/events", tags=["Events"])
 
@@ -23,12 +25,23 @@ async def get_event(event_id: int):
     pass
 
 
+@router.post("/cluster")
 async def trigger_clustering():
     """POST /api/events/cluster
-    DBSCAN kumeleme baslatma (SSE stream ile ilerleme).
-    Uzun islem — background task.
+    Tum kutuphaneyi arka planda yeniden kumeler, hemen job bilgisini doner.
+    Import sonrasi yeni item'lar zaten artimli yerlestirilir; bu sadece istek uzerinedir.
+    Durum: GET /api/events/cluster/{job_id}
     """
-    pass
+    return get_job_manager().start("cluster", run_cluster_job).to_dict()
+
+
+@router.get("/cluster/{job_id}")
+async def clustering_status(job_id: str):
+    """GET /api/events/cluster/{job_id} — Kumeleme isinin durumu ve sonucu."""
+    job = get_job_manager().get(job_id)
+    if job is None or job.kind != "cluster":
+        raise HTTPException(status_code=404, detail="Kumeleme isi bulunamadi")
+    return job.to_dict()
 
 
 async def update_event(event_id: int):
@@ -1,49 +1,131 @@
 """
 Galeri endpoint'leri.
 Fotograf listeleme, detay, thumbnail ve tam boyut gosterim.
-Thumbnail'lar LRU cache ile bellekte tutulur.
+Thumbnail ve onizlemeler import sirasinda sifreli depoya yazilir (ThumbnailStore);
+cozulen JPEG'ler bayt butceli LRU cache'te (ThumbnailCache) tutulur.
+DB sorgulari, sifre cozme ve PIL islemleri api/concurrency pool'larinda calisir.
 """
 
 import io
+import json
 import base64
+import time
+import struct
+import asyncio
 import logging
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from functools import lru_cache
-from typing import Optional
+from datetime import datetime
+from typing import AsyncGenerator, Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
 from fastapi.responses import StreamingResponse
+from sse_starlette.sse import EventSourceResponse
+from sqlalchemy import extract, tuple_
 from sqlalchemy.orm import Session
-from PIL import Image
+from PIL import Image, ExifTags
 
-from api.dependencies import get_db_session, get_encryption_manager, get_clip_embedder, get_faiss_manager
+from api.concurrency import offload, run_blocking, iterate_blocking
+from api.dependencies import (
+    get_db_session, get_encryption_manager, get_thumbnail_store, get_thumbnail_cache,
+    get_job_manager, run_reindex_job, run_repair_job, run_cleanup_job,
+)
 from api.models.item_models import ItemResponse, ItemListResponse, ThumbnailResponse
-from api.models.common_models import SuccessResponse
 from database.schema import Item
 from security.encryption_manager import EncryptionManager
+from src.ingestion.thumbnail_store import ThumbnailStore
+from src.ingestion.thumbnail_cache import ThumbnailCache
 from config import Config
 
 router = APIRouter(prefix="/api/items", tags=["Gallery"])
 logger = logging.getLogger(__name__)
 
-# Thumbnail LRU cache — max 500 item bellekte tutulur
-_thumbnail_cache: dict[int, str] = {}
-_CACHE_MAX = Config.THUMBNAIL_CACHE_MAX_SIZE
+# Arka plan isi SSE stream'lerinin is durumunu yoklama araligi (saniye)
+_JOB_POLL_INTERVAL = 0.5
 
+# Toplu thumbnail cercevesi: item_id (int64) + JPEG uzunlugu (uint32), big-endian
+_FRAME_HEADER = struct.Struct(">qI")
+
+# Dogrulanmis filtre -> (hesaplanma zamani, toplam); bkz. _gallery_total
+_total_cache: "OrderedDict[tuple, Tuple[float, int]]" = OrderedDict()
+_total_lock = threading.Lock()
+
+# Item.type degerleri (filtre bunlardan birine normalize edilir)
+_ITEM_TYPES = {name.lower(): name for name in ("Photo", "Audio", "Note")}
+
+# Fullsize yanitinin JPEG kalitesi (ETag'in parcasi)
+_FULLSIZE_QUALITY = 95
+
+
+def _render_variant(kind: str) -> str:
+    """Yanitin uretim parametreleri; degisirse ETag da degisir."""
+    if kind == "fullsize":
+        # "nogeo": konum etiketli orijinaller artik aynen gonderilmiyor; onceki
+        # (GPS'li) yanitlarin ETag'i eslesmesin, istemci yeniden indirsin
+        return f"full-{Config.IMAGE_MAX_SIZE}q{_FULLSIZE_QUALITY}-nogeo"
+    (width, height), quality = ThumbnailStore.SIZES[kind]
+    return f"{kind}-{width}x{height}q{quality}"
+
+
+def _cache_headers(item: Item, variant: str) -> dict:
+    """
+    Guclu ETag (dosya hash'i + uretim parametreleri) ve Cache-Control.
+    Icerik hash'e bagli oldugu icin ayni ETag her zaman ayni baytlardir.
+    """
+    return {
+        "ETag": f'"{item.file_hash}-{variant}"',
+        "Cache-Control": f"private, max-age={Config.IMAGE_CACHE_MAX_AGE}",
+    }
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    """If-None-Match istemcideki kopyanin guncel oldugunu soyluyor mu (zayif karsilastirma)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+async def _get_item_or_404(db: Session, item_id: int) -> Item:
+    item = await run_blocking("db", _get_consented_item, db, item_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Item bulunamadi veya riza yok")
+    return item
+
+
+async def _load_image(item: Item, kind: str, store: ThumbnailStore,
+                      enc: EncryptionManager, cache: ThumbnailCache) -> bytes:
+    """Thumbnail/onizlemeyi cache'ten, yoksa depodan yukleyip cache'leyerek doner."""
+    data = cache.get(item.item_id, kind)
+    if data is None:
+        data = await run_blocking("image", _load_stored_image, item, kind, store, enc)
+        cache.put(item.item_id, data, kind)
+    return data
+
+
+def _load_stored_image(item: Item, kind: str, store: ThumbnailStore, enc: EncryptionManager) -> bytes:
+    """
+    Depodaki thumbnail/onizlemeyi (JPEG) doner. Depoda yoksa (eski import'lar)
+    orijinal bir kez cozulur, tum turler uretilip depoya yazilir.
+    """
+    data = store.get(item.file_hash, kind)
+    if data is not None:
+        return data
 
-def _make_thumbnail(image_bytes: bytes) -> bytes:
-    """Ham goruntu verisinden 200x200 JPEG thumbnail olusturur."""
     try:
-        img = Image.open(io.BytesIO(image_bytes))
-        img.thumbnail(Config.THUMBNAIL_SIZE)
-        if img.mode != "RGB":
-            img = img.convert("RGB")
-        buf = io.BytesIO()
-        img.save(buf, format="JPEG", quality=Config.THUMBNAIL_QUALITY)
-        return buf.getvalue()
+        decrypted = enc.decrypt_file(item.file_path)
     except Exception as e:
-        logger.error(f"Thumbnail olusturulamadi: {e}")
-        return None
+        logger.error(f"Thumbnail decrypt hatasi (item {item.item_id}): {e}")
+        raise HTTPException(status_code=422, detail="Dosya cozulemedi — sifreleme hatasi")
+    if not decrypted:
+        raise HTTPException(status_code=500, detail="Dosya cozulemedi")
+    if not store.generate(item.file_hash, decrypted):
+        raise HTTPException(status_code=422, detail="Goruntu isleme hatasi — dosya bozuk olabilir")
+    return store.get(item.file_hash, kind)
 
 
 def _resize_fullsize(image_bytes: bytes) -> bytes:
@@ -56,175 +138,400 @@ def _resize_fullsize(image_bytes: bytes) -> bytes:
         if img.mode != "RGB":
             img = img.convert("RGB")
         buf = io.BytesIO()
-        img.save(buf, format="JPEG", quality=95)
+        img.save(buf, format="JPEG", quality=_FULLSIZE_QUALITY)
         return buf.getvalue()
     except Exception as e:
         logger.error(f"Fullsize goruntu islenemedi: {e}")
         return None
 
 
-@router.get("")
-async def get_items(
-    page: int = Query(1, ge=1),
-    size: int = Query(40, ge=1, le=100),
-    year: Optional[int] = None,
-    month: Optional[int] = None,
-    sort: str = Query("desc", pattern="^(asc|desc)$"),
-    type: Optional[str] = None,
-    db: Session = Depends(get_db_session),
-):
+def _is_servable_original(enc: EncryptionManager, file_path: str) -> bool:
     """
-    GET /api/items
-    Sayfalanmis item listesi. Sadece has_consent=True doner.
+    Orijinal zaten boyut sinirini asmayan bir RGB JPEG ise ve konum bilgisi
+    tasimiyorsa yeniden kodlanmadan gonderilebilir. EXIF GPS'i (veya GPS
+    alanlari tasiyabilen XMP'si) olan dosyalar yeniden kodlanir; Pillow
+    metadata'yi kopyalamadigi icin konum yanita girmez.
+    Sadece goruntu basligi okunur (ilk segment cozulur).
+    """
+    with enc.open_decrypted(file_path) as f:
+        try:
+            with Image.open(f) as img:
+                return (img.format == "JPEG" and img.mode == "RGB"
+                        and max(img.size) <= Config.IMAGE_MAX_SIZE
+                        and not _has_location_metadata(img))
+        except Exception:
+            return False
+
+
+def _has_location_metadata(img: Image.Image) -> bool:
+    """Goruntu EXIF GPS IFD'si veya XMP paketi iceriyor mu."""
+    return ExifTags.IFD.GPSInfo in img.getexif() or "xmp" in img.info
+
+
+def _get_consented_item(db: Session, item_id: int) -> Optional[Item]:
+    return db.query(Item).filter(Item.item_id == item_id, Item.has_consent == True).first()
+
+
+def _gallery_query(db: Session, year: Optional[int], month: Optional[int], type: Optional[str]):
+    """
+    Galeri filtreleri (riza + yil/ay/tur) uygulanmis item sorgusu.
+    Yil/ay, (has_consent, creation_datetime) index'ini kullanabilen tarih
+    araligina cevrilir.
     """
     query = db.query(Item).filter(Item.has_consent == True)
 
     if year:
-        from sqlalchemy import extract
-        query = query.filter(extract("year", Item.creation_datetime) == year)
-    if month:
-        from sqlalchemy import extract
+        start = datetime(year, month or 1, 1)
+        if month:
+            end = datetime(year + month // 12, month % 12 + 1, 1)
+        else:
+            end = datetime(year + 1, 1, 1)
+        query = query.filter(Item.creation_datetime >= start, Item.creation_datetime < end)
+    elif month:
+        # Yilsiz ay filtresi (tum yillarin o ayi) tek bir aralikla ifade edilemez
         query = query.filter(extract("month", Item.creation_datetime) == month)
     if type:
         query = query.filter(Item.type == type)
+    return query
 
-    total = query.count()
 
+def _order(query, sort: str):
+    # item_id esit tarihli item'lar arasinda kesin sira saglar (keyset icin gerekli)
     if sort == "desc":
-        query = query.order_by(Item.creation_datetime.desc())
+        return query.order_by(Item.creation_datetime.desc(), Item.item_id.desc())
+    return query.order_by(Item.creation_datetime.asc(), Item.item_id.asc())
+
+
+def _encode_cursor(item: Item) -> str:
+    raw = f"{item.creation_datetime.isoformat()}|{item.item_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _after_cursor(query, cursor: str, sort: str):
+    """
+    Cursor'daki (creation_datetime, item_id) konumundan sonraki item'lar (OFFSET yok).
+    Satir degeri karsilastirmasi SQLite'a index uzerinde aralik verir; OR'lu
+    esdegeri (has_consent=?) onekinin tamamini tarardi.
+    """
+    try:
+        stamp, item_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        stamp, item_id = datetime.fromisoformat(stamp), int(item_id)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Gecersiz cursor")
+
+    position = tuple_(Item.creation_datetime, Item.item_id)
+    if sort == "desc":
+        return query.filter(position < tuple_(stamp, item_id))
+    return query.filter(position > tuple_(stamp, item_id))
+
+
+def _page(query, page: int, size: int, sort: str, cursor: Optional[str]) -> Tuple[List[Item], Optional[str]]:
+    """
+    Bir sayfa item ve sonraki sayfanin cursor'i. Cursor verilirse keyset,
+    verilmezse (eski istemciler) page ile OFFSET kullanilir.
+    """
+    query = _order(query, sort)
+    if cursor:
+        query = _after_cursor(query, cursor, sort)
     else:
-        query = query.order_by(Item.creation_datetime.asc())
+        query = query.offset((page - 1) * size)
+    items = query.limit(size + 1).all()
+    next_cursor = _encode_cursor(items[size - 1]) if len(items) > size else None
+    return items[:size], next_cursor
+
 
-    items = query.offset((page - 1) * size).limit(size).all()
+def _normalize_type(type: Optional[str]) -> Optional[str]:
+    """Tur filtresini Item.type degerine cevirir (buyuk/kucuk harf duyarsiz)."""
+    if type is None:
+        return None
+    name = _ITEM_TYPES.get(type.strip().lower())
+    if name is None:
+        raise HTTPException(status_code=422, detail="Gecersiz tur")
+    return name
 
-    # Dosyasi diskten silinmis item'lari filtrele
-    valid_items = [item for item in items if Path(item.file_path).exists()]
-    orphan_count = len(items) - len(valid_items)
-    if orphan_count > 0:
-        logger.warning(f"{orphan_count} item'in dosyasi diskten silinmis — galeriden gizleniyor")
+
+def _gallery_total(query, key: tuple, refresh: bool) -> int:
+    """
+    Filtreye uyan item sayisi. Ilk sayfada hesaplanir, cursor'li sayfalar
+    GALLERY_TOTAL_CACHE_TTL boyunca ayni degeri kullanir (derin sayfalarda COUNT yok).
+    Eklemede suresi dolan girisler atilir; en fazla GALLERY_TOTAL_CACHE_SIZE
+    filtre tutulur (en uzun suredir kullanilmayan atilir).
+    """
+    now = time.monotonic()
+    with _total_lock:
+        cached = _total_cache.get(key)
+        if not refresh and cached is not None and now - cached[0] <= Config.GALLERY_TOTAL_CACHE_TTL:
+            _total_cache.move_to_end(key)
+            return cached[1]
+
+    total = query.count()
+    with _total_lock:
+        _total_cache[key] = (now, total)
+        _total_cache.move_to_end(key)
+        for stale in [k for k, (stamp, _) in _total_cache.items()
+                      if now - stamp > Config.GALLERY_TOTAL_CACHE_TTL]:
+            del _total_cache[stale]
+        while len(_total_cache) > Config.GALLERY_TOTAL_CACHE_SIZE:
+            _total_cache.popitem(last=False)
+    return total
+
+
+@router.get("")
+@offload("db")
+def get_items(
+    page: int = Query(1, ge=1),
+    size: int = Query(40, ge=1, le=100),
+    year: Optional[int] = Query(None, ge=1, le=9998),
+    month: Optional[int] = Query(None, ge=1, le=12),
+    sort: str = Query("desc", pattern="^(asc|desc)$"),
+    type: Optional[str] = None,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db_session),
+):
+    """
+    GET /api/items
+    Sayfalanmis item listesi. Sadece has_consent=True doner.
+    Sonraki sayfa icin yanittaki next_cursor gonderilir; derinlikten bagimsiz
+    olarak (creation_datetime, item_id) index'inden okunur. Dosya varligi satir
+    basina kontrol edilmez: dosyasi silinmis kayitlari cleanup isi temizler.
+    """
+    type = _normalize_type(type)
+    query = _gallery_query(db, year, month, type)
+    total = _gallery_total(query, (year, month, type), refresh=cursor is None)
+    items, next_cursor = _page(query, page, size, sort, cursor)
 
     return ItemListResponse(
-        items=[ItemResponse.model_validate(item) for item in valid_items],
-        total=total - orphan_count,
+        items=[ItemResponse.model_validate(item) for item in items],
+        total=total,
         page=page,
         size=size,
+        next_cursor=next_cursor,
     )
 
 
 @router.post("/repair")
-async def repair_double_encrypted(
-    db: Session = Depends(get_db_session),
-    enc: EncryptionManager = Depends(get_encryption_manager),
-):
+async def repair_double_encrypted():
     """
     POST /api/items/repair
-    Cift sifrelenmis dosyalari tespit edip tek katmana dusurur.
+    Cift sifrelenmis dosyalari arka planda, item_id sirasiyla parca parca
+    tespit edip tek katmana dusurur ve hemen job bilgisini doner.
+    Ilerleme: GET /api/items/repair/{job_id}/events (SSE)
     """
-    from cryptography.fernet import InvalidToken
+    return get_job_manager().start("repair", run_repair_job).to_dict()
 
-    all_items = db.query(Item).all()
-    repaired = 0
-    failed = 0
 
-    for item in all_items:
-        path = Path(item.file_path)
-        if not path.exists():
-            continue
+@router.get("/repair/{job_id}")
+async def repair_status(job_id: str):
+    """GET /api/items/repair/{job_id} — Onarim isinin durumu ve son ilerlemesi."""
+    return _get_job(job_id, "repair").to_dict()
+
+
+@router.post("/repair/{job_id}/cancel")
+async def cancel_repair(job_id: str):
+    """POST /api/items/repair/{job_id}/cancel — Mevcut parca bitince durur."""
+    job = _get_job(job_id, "repair")
+    job.cancel()
+    return job.to_dict()
 
-        try:
-            data = path.read_bytes()
-            # Ilk decrypt — dis katman
-            inner = enc.cipher.decrypt(data)
-            # Ikinci decrypt — ic katman (eger basariliysa cift sifrelidir)
-            try:
-                original = enc.cipher.decrypt(inner)
-                # Cift sifreli! Tek katman olarak yeniden yaz
-                path.write_bytes(enc.cipher.encrypt(original))
-                repaired += 1
-                logger.info(f"Cift sifreleme duzeltildi: item {item.item_id} ({item.file_path})")
-            except InvalidToken:
-                pass  # Tek katman, sorun yok
-        except InvalidToken:
-            failed += 1
-            logger.warning(f"Dosya decrypt edilemedi: item {item.item_id} ({item.file_path})")
-
-    return SuccessResponse(message=f"{repaired} dosya onarildi, {failed} dosya okunamadi")
+
+@router.get("/repair/{job_id}/events")
+async def repair_events(job_id: str):
+    """GET /api/items/repair/{job_id}/events — Onarim ilerlemesi (SSE stream)."""
+    return EventSourceResponse(_job_stream(_get_job(job_id, "repair")))
 
 
 @router.delete("/cleanup")
-async def cleanup_orphans(db: Session = Depends(get_db_session)):
+async def cleanup_orphans():
     """
     DELETE /api/items/cleanup
-    Dosyasi diskten silinmis DB kayitlarini temizler.
+    Dosyasi diskten silinmis DB kayitlarini arka planda parca parca temizler
+    ve hemen job bilgisini doner.
+    Ilerleme: GET /api/items/cleanup/{job_id}/events (SSE)
     """
-    all_items = db.query(Item).all()
-    deleted = 0
-    for item in all_items:
-        if not Path(item.file_path).exists():
-            logger.info(f"Orphan temizlendi: item {item.item_id} ({item.file_path})")
-            db.delete(item)
-            deleted += 1
+    return get_job_manager().start("cleanup", run_cleanup_job).to_dict()
+
 
-    db.commit()
-    logger.info(f"Toplam {deleted} orphan kayit temizlendi")
-    return SuccessResponse(message=f"{deleted} orphan kayit temizlendi")
+@router.get("/cleanup/{job_id}")
+async def cleanup_status(job_id: str):
+    """GET /api/items/cleanup/{job_id} — Temizlik isinin durumu ve son ilerlemesi."""
+    return _get_job(job_id, "cleanup").to_dict()
+
+
+@router.post("/cleanup/{job_id}/cancel")
+async def cancel_cleanup(job_id: str):
+    """POST /api/items/cleanup/{job_id}/cancel — Mevcut parca bitince durur."""
+    job = _get_job(job_id, "cleanup")
+    job.cancel()
+    return job.to_dict()
+
+
+@router.get("/cleanup/{job_id}/events")
+async def cleanup_events(job_id: str):
+    """GET /api/items/cleanup/{job_id}/events — Temizlik ilerlemesi (SSE stream)."""
+    return EventSourceResponse(_job_stream(_get_job(job_id, "cleanup")))
 
 
 @router.post("/reindex")
-async def reindex_embeddings(db: Session = Depends(get_db_session)):
+async def reindex_embeddings():
     """
     POST /api/items/reindex
-    faiss_index_id'si NULL olan item'lari bulur, CLIP embedding uretir,
-    FAISS'e ekler ve DB'yi gunceller.
+    faiss_index_id'si NULL olan item'lari arka planda batch'ler halinde
+    yeniden index'ler ve hemen job bilgisini doner. Calisan bir reindex
+    varsa yenisi baslatilmaz; yarida kalmis reindex kaldigi yerden surer.
+    Ilerleme: GET /api/items/reindex/{job_id}/events (SSE)
     """
-    clip = get_clip_embedder()
-    faiss_mgr = get_faiss_manager()
+    job = get_job_manager().start("reindex", run_reindex_job)
+    return job.to_dict()
 
-    # faiss_index_id'si olmayan item'lari bul
-    items = db.query(Item).filter(
-        Item.faiss_index_id.is_(None),
-        Item.has_consent == True,
-    ).all()
 
-    if not items:
-        return {"reindexed": 0, "failed": 0, "message": "Reindex edilecek item yok"}
+def _get_job(job_id: str, kind: str):
+    job = get_job_manager().get(job_id)
+    if job is None or job.kind != kind:
+        raise HTTPException(status_code=404, detail=f"{kind.capitalize()} isi bulunamadi")
+    return job
 
-    reindexed = 0
-    failed = 0
 
-    for item in items:
-        if not Path(item.file_path).exists():
-            failed += 1
-            continue
+@router.get("/reindex/{job_id}")
+async def reindex_status(job_id: str):
+    """GET /api/items/reindex/{job_id} — Reindex isinin durumu ve son ilerlemesi."""
+    return _get_job(job_id, "reindex").to_dict()
 
-        try:
-            embedding = clip.encode_image(Path(item.file_path))
-            if embedding is None:
-                failed += 1
-                continue
-
-            faiss_ids = faiss_mgr.add_embeddings(embedding, [item.item_id])
-            if faiss_ids:
-                item.faiss_index_id = faiss_ids[0]
-                db.commit()
-                reindexed += 1
-                logger.info(f"Reindex basarili: item {item.item_id} -> faiss_id {faiss_ids[0]}")
-            else:
-                failed += 1
-        except Exception as e:
-            logger.warning(f"Reindex hatasi (item {item.item_id}): {e}")
-            failed += 1
-
-    logger.info(f"Reindex tamamlandi: {reindexed} basarili, {failed} basarisiz")
-    return {
-        "reindexed": reindexed,
-        "failed": failed,
-        "message": f"{reindexed} item reindex edildi",
+
+@router.post("/reindex/{job_id}/cancel")
+async def cancel_reindex(job_id: str):
+    """
+    POST /api/items/reindex/{job_id}/cancel
+    Mevcut batch bitince durur; devam noktasi korunur, elle baslatilan sonraki
+    reindex oradan surer (API acilisinda otomatik surdurulmez).
+    """
+    job = _get_job(job_id, "reindex")
+    job.cancel()
+    return job.to_dict()
+
+
+async def _job_stream(job) -> AsyncGenerator[dict, None]:
+    """Is bitene kadar her yeni batch ilerlemesini progress event'i olarak yayinlar."""
+    last = None
+    while True:
+        done = job.done
+        if job.progress and job.progress != last:
+            last = job.progress
+            yield {"event": "progress", "data": json.dumps({**last, "status": job.status})}
+        if done:
+            break
+        await asyncio.sleep(_JOB_POLL_INTERVAL)
+
+    # Son sayaclar (reindexed/repaired/deleted, failed, total ...) isin turune gore degisir
+    yield {
+        "event": "error" if job.status == "failed" else "complete",
+        "data": json.dumps({**job.progress, "status": job.status, "detail": job.error}),
     }
 
 
+@router.get("/reindex/{job_id}/events")
+async def reindex_events(job_id: str):
+    """GET /api/items/reindex/{job_id}/events — Reindex ilerlemesi (SSE stream)."""
+    return EventSourceResponse(_job_stream(_get_job(job_id, "reindex")))
+
+
+def _consented_items(db: Session, item_ids: List[int]) -> Dict[int, Item]:
+    """Rizasi olan item'lari tek sorguda yukler."""
+    items = db.query(Item).filter(Item.item_id.in_(item_ids), Item.has_consent == True).all()
+    return {item.item_id: item for item in items}
+
+
+def _page_item_ids(db: Session, page: int, size: int, year: Optional[int], month: Optional[int],
+                   sort: str, type: Optional[str], cursor: Optional[str]) -> List[int]:
+    """get_items ile ayni sayfadaki item_id'ler."""
+    items, _ = _page(_gallery_query(db, year, month, type), page, size, sort, cursor)
+    return [item.item_id for item in items]
+
+
+@router.get("/thumbnails")
+async def get_thumbnails(
+    ids: Optional[str] = Query(None, description="Virgulle ayrilmis item_id listesi"),
+    page: int = Query(1, ge=1),
+    size: int = Query(40, ge=1, le=100),
+    year: Optional[int] = Query(None, ge=1, le=9998),
+    month: Optional[int] = Query(None, ge=1, le=12),
+    sort: str = Query("desc", pattern="^(asc|desc)$"),
+    type: Optional[str] = None,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db_session),
+    enc: EncryptionManager = Depends(get_encryption_manager),
+    store: ThumbnailStore = Depends(get_thumbnail_store),
+    cache: ThumbnailCache = Depends(get_thumbnail_cache),
+):
+    """
+    GET /api/items/thumbnails?ids=1,2,3  veya  ?size=40&cursor=... (get_items parametreleri)
+    Bir galeri sayfasinin tum thumbnail'larini tek istekte, binary cerceveler halinde stream eder:
+
+        [item_id: int64][uzunluk: uint32][JPEG baytlari]   (big-endian, tekrar eder)
+
+    Riza once kontrol edilir; cache'teki thumbnail'lar hemen, digerleri "image"
+    pool'unda paralel uretilip hazir oldukca gonderilir (sira garanti degildir). Uzunlugu 0 olan cerceve,
+    o item icin thumbnail olmadigini (bulunamadi / riza yok / bozuk) bildirir.
+    """
+    if ids is not None:
+        try:
+            item_ids = list(dict.fromkeys(int(i) for i in ids.split(",") if i.strip()))
+        except ValueError:
+            raise HTTPException(status_code=422, detail="ids virgulle ayrilmis tam sayilar olmali")
+        if len(item_ids) > Config.THUMBNAIL_BATCH_MAX_ITEMS:
+            raise HTTPException(status_code=422,
+                                detail=f"En fazla {Config.THUMBNAIL_BATCH_MAX_ITEMS} item istenebilir")
+    else:
+        item_ids = await run_blocking("db", _page_item_ids, db, page, size, year, month, sort, type, cursor)
+
+    return StreamingResponse(
+        _thumbnail_frames(item_ids, db, store, enc, cache),
+        media_type="application/octet-stream",
+        headers={"X-Thumbnail-Count": str(len(item_ids))},
+    )
+
+
+async def _thumbnail_frames(item_ids: List[int], db: Session, store: ThumbnailStore,
+                            enc: EncryptionManager, cache: ThumbnailCache) -> AsyncGenerator[bytes, None]:
+    """
+    Toplu thumbnail cercevelerini uretir; cache disindakileri paralel yukler.
+    Riza, cache'e bakilmadan once tum id'ler icin tek sorguda kontrol edilir
+    (tekil thumbnail endpoint'iyle ayni sira): rizasi kaldirilan item'in
+    cache'te kalan thumbnail'i gonderilmez.
+    """
+    items = await run_blocking("db", _consented_items, db, item_ids)
+    missing = []
+    for item_id in item_ids:
+        data = cache.get(item_id, "thumb") if item_id in items else b""
+        if data is None:
+            missing.append(item_id)
+        else:
+            yield _FRAME_HEADER.pack(item_id, len(data)) + data
+    if not missing:
+        return
+
+    async def load(item_id: int):
+        item = items[item_id]
+        try:
+            data = await run_blocking("image", _load_stored_image, item, "thumb", store, enc)
+        except HTTPException:
+            return item_id, b""
+        cache.put(item_id, data, "thumb")
+        return item_id, data
+
+    tasks = [asyncio.ensure_future(load(item_id)) for item_id in missing]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            item_id, data = await next_done
+            yield _FRAME_HEADER.pack(item_id, len(data)) + data
+    finally:
+        # Istemci koptuysa kalan isleri iptal et
+        for task in tasks:
+            task.cancel()
+
+
 @router.get("/{item_id}")
-async def get_item(
+@offload("db")
+def get_item(
     item_id: int,
     db: Session = Depends(get_db_session),
 ):
@@ -238,48 +545,58 @@ async def get_item(
 @router.get("/{item_id}/thumbnail")
 async def get_thumbnail(
     item_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db_session),
     enc: EncryptionManager = Depends(get_encryption_manager),
+    store: ThumbnailStore = Depends(get_thumbnail_store),
+    cache: ThumbnailCache = Depends(get_thumbnail_cache),
 ):
     """
     GET /api/items/{id}/thumbnail
-    200x200 JPEG base64 thumbnail. LRU cache (max 500 item).
+    200x200 JPEG base64 thumbnail. Sifreli depodan okunur; bellekte LRU cache'lenir.
+    If-None-Match guncelse 304 doner (sifre cozme yapilmaz).
     """
-    # Cache kontrol
-    if item_id in _thumbnail_cache:
-        return ThumbnailResponse(item_id=item_id, thumbnail=_thumbnail_cache[item_id])
+    item = await _get_item_or_404(db, item_id)
+    headers = _cache_headers(item, _render_variant("thumb") + "-b64")
+    if _not_modified(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
 
-    item = db.query(Item).filter(Item.item_id == item_id, Item.has_consent == True).first()
-    if not item:
-        raise HTTPException(status_code=404, detail="Item bulunamadi veya riza yok")
+    thumb_bytes = await _load_image(item, "thumb", store, enc, cache)
+    response.headers.update(headers)
+    return ThumbnailResponse(item_id=item_id, thumbnail=base64.b64encode(thumb_bytes).decode())
 
-    # Sifreli dosyayi coz
-    try:
-        decrypted = enc.decrypt_file(item.file_path)
-    except Exception as e:
-        logger.error(f"Thumbnail decrypt hatasi (item {item_id}): {e}")
-        raise HTTPException(status_code=422, detail="Dosya cozulemedi — sifreleme hatasi")
-    if not decrypted:
-        raise HTTPException(status_code=500, detail="Dosya cozulemedi")
-
-    # Thumbnail olustur ve base64'e cevir
-    thumb_bytes = _make_thumbnail(decrypted)
-    if not thumb_bytes:
-        raise HTTPException(status_code=422, detail="Goruntu isleme hatasi — dosya bozuk olabilir")
-    b64 = base64.b64encode(thumb_bytes).decode()
 
-    # Cache'e kaydet (max boyut kontrolu)
-    if len(_thumbnail_cache) >= _CACHE_MAX:
-        # En eski entry'yi sil (FIFO)
-        oldest_key = next(iter(_thumbnail_cache))
-        del _thumbnail_cache[oldest_key]
-    _thumbnail_cache[item_id] = b64
+@router.get("/{item_id}/preview")
+async def get_preview(
+    item_id: int,
+    request: Request,
+    db: Session = Depends(get_db_session),
+    enc: EncryptionManager = Depends(get_encryption_manager),
+    store: ThumbnailStore = Depends(get_thumbnail_store),
+    cache: ThumbnailCache = Depends(get_thumbnail_cache),
+):
+    """
+    GET /api/items/{id}/preview
+    Orta boy (max 1024px) binary JPEG onizleme; sifreli depodan okunur.
+    Detay ekrani icin fullsize'dan cok daha ucuzdur.
+    """
+    item = await _get_item_or_404(db, item_id)
+    headers = _cache_headers(item, _render_variant("preview"))
+    if _not_modified(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
 
-    return ThumbnailResponse(item_id=item_id, thumbnail=b64)
+    jpeg_bytes = await _load_image(item, "preview", store, enc, cache)
+    return StreamingResponse(
+        io.BytesIO(jpeg_bytes),
+        media_type="image/jpeg",
+        headers={**headers, "Content-Length": str(len(jpeg_bytes))},
+    )
 
 
 @router.get("/{item_id}/debug")
-async def debug_item(
+@offload("db")
+def debug_item(
     item_id: int,
     db: Session = Depends(get_db_session),
 ):
@@ -311,6 +628,7 @@ async def debug_item(
 @router.get("/{item_id}/fullsize")
 async def get_fullsize(
     item_id: int,
+    request: Request,
     db: Session = Depends(get_db_session),
     enc: EncryptionManager = Depends(get_encryption_manager),
 ):
@@ -318,27 +636,38 @@ async def get_fullsize(
     GET /api/items/{id}/fullsize
     Orijinal cozunurluk (max 2000px) binary JPEG stream.
     Base64 KULLANILMAZ — buyuk dosyalarda %33 overhead olur.
+    Yanit hicbir zaman konum metadata'si (EXIF GPS / XMP) tasimaz.
+    If-None-Match guncelse 304 doner (sifre cozme ve resize yapilmaz).
     """
-    item = db.query(Item).filter(Item.item_id == item_id, Item.has_consent == True).first()
-    if not item:
-        raise HTTPException(status_code=404, detail="Item bulunamadi veya riza yok")
+    item = await _get_item_or_404(db, item_id)
+    headers = _cache_headers(item, _render_variant("fullsize"))
+    if _not_modified(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
 
     try:
-        decrypted = enc.decrypt_file(item.file_path)
+        passthrough = await run_blocking("image", _is_servable_original, enc, item.file_path)
+        if passthrough:
+            # Yeniden kodlamaya gerek yok: segment'ler cozuldukce akitilir
+            return StreamingResponse(
+                iterate_blocking("image", enc.iter_decrypt_file(item.file_path)),
+                media_type="image/jpeg",
+                headers=headers,
+            )
+        decrypted = await run_blocking("image", enc.decrypt_file, item.file_path)
     except Exception as e:
         logger.error(f"Fullsize decrypt hatasi (item {item_id}): {e}")
         raise HTTPException(status_code=422, detail="Dosya cozulemedi — sifreleme hatasi")
     if not decrypted:
         raise HTTPException(status_code=500, detail="Dosya cozulemedi")
 
-    jpeg_bytes = _resize_fullsize(decrypted)
+    jpeg_bytes = await run_blocking("image", _resize_fullsize, decrypted)
     if not jpeg_bytes:
         raise HTTPException(status_code=422, detail="Goruntu isleme hatasi — dosya bozuk olabilir")
 
     return StreamingResponse(
         io.BytesIO(jpeg_bytes),
         media_type="image/jpeg",
-        headers={"Content-Length": str(len(jpeg_bytes))},
+        headers={**headers, "Content-Length": str(len(jpeg_bytes))},
     )
 
 
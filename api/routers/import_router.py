@@ -2,43 +2,71 @@
 Import endpoint'leri.
 Fotograf ve ses dosyalarinin ice aktarilmasi.
 SSE (Server-Sent Events) ile gercek zamanli ilerleme bildirimi.
+Pipeline adimlari "import" pool'unda ilerletilir; event loop bloklanmaz.
 """
 
 import json
-import asyncio
 import logging
 from pathlib import Path
-from typing import AsyncGenerator
+from typing import AsyncGenerator, List
 
 from fastapi import APIRouter, Depends
 from fastapi.responses import JSONResponse
 from sse_starlette.sse import EventSourceResponse
 from sqlalchemy.orm import Session
 
-from api.dependencies import get_db_session, get_clip_embedder, get_faiss_manager
+from api.concurrency import offload, run_blocking, iterate_blocking
+from api.dependencies import (
+    get_db_session, get_clip_embedder, get_faiss_manager, get_embedding_store,
+    get_thumbnail_store, get_geocoder,
+)
 from api.models.item_models import ImportFolderRequest, ImportPhotoRequest, ImportPhotoResponse
+from database.schema import Item
+from config import Config
 
 router = APIRouter(prefix="/api/import", tags=["Import"])
 logger = logging.getLogger(__name__)
 
 
+def _cluster_imported(db: Session, paths: List[str]):
+    """
+    Yeni item'lari komsu olaylara artimli yerlestirir (EVENT_CLUSTER_ON_IMPORT).
+    Kumeleme hatasi import sonucunu etkilemez; tam kumeleme ile telafi edilebilir.
+    """
+    if not Config.EVENT_CLUSTER_ON_IMPORT or not paths:
+        return
+    from src.clustering import EventClusterer
+    try:
+        item_ids = []
+        for i in range(0, len(paths), 500):
+            item_ids += [row.item_id for row in
+                         db.query(Item.item_id).filter(Item.file_path.in_(paths[i:i + 500]))]
+        events = EventClusterer(db, geocoder=get_geocoder()).cluster_new_items(item_ids)
+        logger.info(f"Import sonrasi kumeleme: {len(item_ids)} item, {len(events)} olay guncellendi")
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Import sonrasi kumeleme basarisiz: {e}")
+
+
 async def _import_folder_stream(
     folder_path: str, consent: bool, recursive: bool, db: Session
 ) -> AsyncGenerator[dict, None]:
     """
     Klasor import islemini SSE stream olarak yayinlar.
-    Her dosya islendikten sonra progress event'i gonderir.
+    Her dosya pipeline'dan ciktiginda progress event'i gonderir
+    (siralama dosya bitis sirasidir, bulunma sirasi degil).
     """
     from src.ingestion.photo_importer import PhotoImporter
 
-    importer = PhotoImporter(db, clip_embedder=get_clip_embedder(), faiss_manager=get_faiss_manager())
+    importer = PhotoImporter(db, clip_embedder=get_clip_embedder(), faiss_manager=get_faiss_manager(),
+                             embedding_store=get_embedding_store(), thumbnail_store=get_thumbnail_store())
     folder = Path(folder_path)
 
     if not folder.exists() or not folder.is_dir():
         yield {"event": "error", "data": json.dumps({"detail": "Klasor bulunamadi"})}
         return
 
-    files = importer.find_image_files(folder, recursive)
+    files = await run_blocking("import", importer.find_image_files, folder, recursive)
     total = len(files)
 
     if total == 0:
@@ -48,16 +76,15 @@ async def _import_folder_stream(
         return
 
     stats = {"imported": 0, "skipped_duplicates": 0, "errors": 0}
+    imported_paths = []
 
-    for i, file_path in enumerate(files, 1):
-        try:
-            result = importer.import_single_photo(file_path, consent)
-        except Exception as e:
-            logger.error(f"Import hatasi ({file_path.name}): {e}")
-            result = "error"
-
+    # Dosyalar paralel pipeline'da islenir; her dosya bittikce sonucu gelir
+    i = 0
+    async for file_path, result in iterate_blocking("import", importer.import_files(files, consent)):
+        i += 1
         if result == "imported":
             stats["imported"] += 1
+            imported_paths.append(str(file_path))
         elif result == "duplicate":
             stats["skipped_duplicates"] += 1
         else:
@@ -74,8 +101,7 @@ async def _import_folder_stream(
             }),
         }
 
-        # Event loop'un nefes almasina izin ver (UI donmasin)
-        await asyncio.sleep(0)
+    await run_blocking("import", _cluster_imported, db, imported_paths)
 
     # Tamamlandi event'i
     yield {
@@ -103,14 +129,16 @@ async def import_folder(request: ImportFolderRequest, db: Session = Depends(get_
 
 
 @router.post("/photo")
-async def import_photo(request: ImportPhotoRequest, db: Session = Depends(get_db_session)):
+@offload("import")
+def import_photo(request: ImportPhotoRequest, db: Session = Depends(get_db_session)):
     """
     POST /api/import/photo
     Tekil fotograf import.
     """
     from src.ingestion.photo_importer import PhotoImporter
 
-    importer = PhotoImporter(db, clip_embedder=get_clip_embedder(), faiss_manager=get_faiss_manager())
+    importer = PhotoImporter(db, clip_embedder=get_clip_embedder(), faiss_manager=get_faiss_manager(),
+                             embedding_store=get_embedding_store(), thumbnail_store=get_thumbnail_store())
     file_path = Path(request.path)
 
     if not file_path.exists():
@@ -118,5 +146,7 @@ async def import_photo(request: ImportPhotoRequest, db: Session = Depends(get_db
 
     result = importer.import_single_photo(file_path, request.consent)
     logger.info(f"Tekil import: {file_path.name} -> {result}")
+    if result == "imported":
+        _cluster_imported(db, [str(file_path)])
 
     return ImportPhotoResponse(status=result)
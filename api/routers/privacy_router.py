@@ -1,6 +1,7 @@
 """
 Gizlilik yonetimi endpoint'leri.
 Riza kontrolu, toplu islemler, guvenli silme, denetim logu.
+Handler'lar DB ve disk islemi yaptigi icin "db" pool'unda calisir.
 """
 
 import logging
@@ -10,7 +11,10 @@ from fastapi import APIRouter, Depends, Query, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
-from api.dependencies import get_db_session, get_privacy_manager, get_encryption_manager
+from api.concurrency import offload
+from api.dependencies import (
+    get_db_session, get_privacy_manager, get_encryption_manager, get_thumbnail_store, get_thumbnail_cache,
+)
 from api.models.item_models import ItemResponse, ItemListResponse
 from api.models.common_models import StatsResponse, SuccessResponse
 from database.schema import Item
@@ -44,7 +48,8 @@ class AuditLogEntry(BaseModel):
 # --- Endpoints ---
 
 @router.get("/stats")
-async def get_privacy_stats(db: Session = Depends(get_db_session)):
+@offload("db")
+def get_privacy_stats(db: Session = Depends(get_db_session)):
     """
     GET /api/privacy/stats
     Riza istatistikleri: consented, non_consented, total
@@ -61,7 +66,8 @@ async def get_privacy_stats(db: Session = Depends(get_db_session)):
 
 
 @router.get("/items")
-async def get_privacy_items(
+@offload("db")
+def get_privacy_items(
     consent: Optional[str] = Query("all", pattern="^(all|true|false)$"),
     page: int = Query(1, ge=1),
     size: int = Query(50, ge=1, le=200),
@@ -92,7 +98,8 @@ async def get_privacy_items(
 
 
 @router.put("/{item_id}/consent")
-async def set_consent(
+@offload("db")
+def set_consent(
     item_id: int,
     request: ConsentUpdateRequest,
     db: Session = Depends(get_db_session),
@@ -107,37 +114,47 @@ async def set_consent(
         raise HTTPException(status_code=404, detail="Item bulunamadi")
 
     privacy.set_consent(item_id, request.status)
+    if not request.status:
+        # Rizasi kaldirilan item'in cozulmus thumbnail'lari bellekte kalmasin
+        get_thumbnail_cache().invalidate([item_id])
     logger.info(f"Riza guncellendi: item {item_id} -> {request.status}")
     return SuccessResponse(message=f"Riza {'verildi' if request.status else 'kaldirildi'}")
 
 
 @router.delete("/{item_id}")
-async def delete_item(
+@offload("db")
+def delete_item(
     item_id: int,
     db: Session = Depends(get_db_session),
     privacy: PrivacyManager = Depends(get_privacy_manager),
 ):
     """
     DELETE /api/privacy/{id}
-    Guvenli silme (secure_delete + DB kayit silme).
+    Guvenli silme (secure_delete + thumbnail'lar + DB kayit silme + FAISS vektorunu cikarma).
     """
     item = db.query(Item).filter(Item.item_id == item_id).first()
     if not item:
         raise HTTPException(status_code=404, detail="Item bulunamadi")
 
-    # Dosyayi diskten guvenli sil
+    # Dosyayi ve sifreli thumbnail'larini diskten sil
     privacy.secure_delete(item.file_path)
+    get_thumbnail_store().remove(item.file_hash)
+    get_thumbnail_cache().invalidate([item_id])
 
     # DB kaydini sil
     db.delete(item)
     db.commit()
 
+    # Vektoru aramadan cikar
+    privacy.remove_embeddings([item_id], purge=True)
+
     logger.info(f"Item guvenli silindi: {item_id}")
     return SuccessResponse(message="Item guvenli sekilde silindi")
 
 
 @router.post("/bulk-consent")
-async def bulk_consent(
+@offload("db")
+def bulk_consent(
     request: BulkConsentRequest,
     db: Session = Depends(get_db_session),
     privacy: PrivacyManager = Depends(get_privacy_manager),
@@ -152,13 +169,16 @@ async def bulk_consent(
         if item:
             privacy.set_consent(item_id, request.status)
             updated += 1
+    if not request.status:
+        get_thumbnail_cache().invalidate(request.item_ids)
 
     logger.info(f"Toplu riza guncellendi: {updated} item -> {request.status}")
     return SuccessResponse(message=f"{updated} item guncellendi")
 
 
 @router.post("/bulk-delete")
-async def bulk_delete(
+@offload("db")
+def bulk_delete(
     request: BulkDeleteRequest,
     db: Session = Depends(get_db_session),
     privacy: PrivacyManager = Depends(get_privacy_manager),
@@ -167,21 +187,26 @@ async def bulk_delete(
     POST /api/privacy/bulk-delete
     Toplu guvenli silme.
     """
-    deleted = 0
+    deleted_ids = []
     for item_id in request.item_ids:
         item = db.query(Item).filter(Item.item_id == item_id).first()
         if item:
             privacy.secure_delete(item.file_path)
+            get_thumbnail_store().remove(item.file_hash)
             db.delete(item)
-            deleted += 1
+            deleted_ids.append(item_id)
     db.commit()
+    get_thumbnail_cache().invalidate(deleted_ids)
+    privacy.remove_embeddings(deleted_ids, purge=True)
+    deleted = len(deleted_ids)
 
     logger.info(f"Toplu guvenli silme: {deleted} item")
     return SuccessResponse(message=f"{deleted} item guvenli sekilde silindi")
 
 
 @router.get("/audit-log")
-async def get_audit_log(limit: int = Query(50, ge=1, le=200)):
+@offload("db")
+def get_audit_log(limit: int = Query(50, ge=1, le=200)):
     """
     GET /api/privacy/audit-log
     Denetim logu kayitlari.
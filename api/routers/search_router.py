@@ -8,14 +8,17 @@ import logging
 from typing import Optional, List
 from datetime import date, datetime
 
-from fastapi import APIRouter, Depends
+import numpy as np
+from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import extract, func
 
-from api.dependencies import get_db_session, get_clip_embedder, get_faiss_manager
+from api.concurrency import offload, run_blocking
+from api.dependencies import get_db_session, get_clip_embedder, get_faiss_manager, get_geocoder
 from api.models.item_models import ItemResponse
 from database.schema import Item
+from src.geo import bounding_box_filter, within_radius
 
 router = APIRouter(prefix="/api/search", tags=["Search"])
 logger = logging.getLogger(__name__)
@@ -55,20 +58,22 @@ class SearchResponse(BaseModel):
     filters_applied: dict
 
 
-# --- Endpoints ---
+class PlaceResponse(BaseModel):
+    name: str
+    label: str
+    latitude: float
+    longitude: float
+    country_code: str
 
-def _db_fallback_search(request: SearchRequest, db: Session) -> SearchResponse:
-    """FAISS kullanilamadiginda dosya adi / transcription LIKE aramasina duser."""
-    query = db.query(Item).filter(Item.has_consent == True)
-    filters_applied = {"text": False, "time": False, "location": False}
 
-    if request.query:
-        filters_applied["text"] = True
-        search_term = f"%{request.query}%"
-        query = query.filter(
-            Item.file_path.ilike(search_term) |
-            Item.transcription.ilike(search_term)
-        )
+# --- Endpoints ---
+
+def _apply_filters(query, request: SearchRequest, filters_applied: dict, db: Session):
+    """
+    Riza + tarih + konum (sinir kutusu) filtrelerini sorguya uygular. Kutu
+    yaricapi icine alir; kesin mesafe elemesi _within_radius ile yapilir.
+    """
+    query = query.filter(Item.has_consent == True)
 
     if request.start_date and request.end_date:
         filters_applied["time"] = True
@@ -81,18 +86,58 @@ def _db_fallback_search(request: SearchRequest, db: Session) -> SearchResponse:
 
     if request.lat is not None and request.lng is not None:
         filters_applied["location"] = True
-        delta = request.radius_km / 111.0
         query = query.filter(
             Item.latitude.isnot(None),
             Item.longitude.isnot(None),
-            Item.latitude >= request.lat - delta,
-            Item.latitude <= request.lat + delta,
-            Item.longitude >= request.lng - delta,
-            Item.longitude <= request.lng + delta,
+            bounding_box_filter(db, request.lat, request.lng, request.radius_km),
+        )
+
+    return query
+
+
+def _within_radius(rows: list, lat: Optional[float], lng: Optional[float], radius_km: float) -> list:
+    """(item_id, latitude, longitude) satirlarindan yaricap disindakileri atar (sira korunur)."""
+    if lat is None or lng is None or not rows:
+        return rows
+    inside, _ = within_radius(
+        lat, lng,
+        np.array([row.latitude for row in rows], dtype=float),
+        np.array([row.longitude for row in rows], dtype=float),
+        radius_km,
+    )
+    return [rows[i] for i in inside]
+
+
+def _newest_page(query, db: Session, k: int, center: Optional[tuple] = None):
+    """
+    Sorguyu yeniden eskiye siralayip (toplam, ilk k item) dondurur. center
+    (lat, lng, radius_km) verilirse sayim ve sayfa kesin yaricap elemesinden sonra yapilir.
+    """
+    query = query.order_by(Item.creation_datetime.desc())
+    if center is None:
+        return query.count(), query.limit(k).all()
+    rows = _within_radius(
+        query.with_entities(Item.item_id, Item.latitude, Item.longitude).all(), *center)
+    page_ids = [row.item_id for row in rows[:k]]
+    by_id = {item.item_id: item for item in db.query(Item).filter(Item.item_id.in_(page_ids))}
+    return len(rows), [by_id[item_id] for item_id in page_ids if item_id in by_id]
+
+
+def _db_fallback_search(request: SearchRequest, db: Session) -> SearchResponse:
+    """FAISS kullanilamadiginda dosya adi / transcription LIKE aramasina duser."""
+    filters_applied = {"text": False, "time": False, "location": False}
+    query = _apply_filters(db.query(Item), request, filters_applied, db)
+
+    if request.query:
+        filters_applied["text"] = True
+        search_term = f"%{request.query}%"
+        query = query.filter(
+            Item.file_path.ilike(search_term) |
+            Item.transcription.ilike(search_term)
         )
 
-    total = query.count()
-    items = query.order_by(Item.creation_datetime.desc()).limit(request.k).all()
+    center = (request.lat, request.lng, request.radius_km) if filters_applied["location"] else None
+    total, items = _newest_page(query, db, request.k, center)
 
     results = [
         SearchResultItem(
@@ -106,6 +151,51 @@ def _db_fallback_search(request: SearchRequest, db: Session) -> SearchResponse:
     return SearchResponse(results=results, total=total, filters_applied=filters_applied)
 
 
+def _semantic_search(request: SearchRequest, text_embedding, faiss_mgr, db: Session) -> SearchResponse:
+    """CLIP metin vektoruyle FAISS'te arar, sonuclari DB'den item'lara cevirir."""
+    filters_applied = {"text": True, "time": False, "location": False}
+    eligible = _apply_filters(
+        db.query(Item.item_id, Item.latitude, Item.longitude).filter(Item.faiss_index_id.isnot(None)),
+        request, filters_applied, db,
+    )
+    # Tarih/konum filtresi varsa SQL'den izin listesi olusur; FAISS yalnizca bu
+    # item'lari skorlar, secici filtrelerde de k sonuc doner. Filtre yoksa liste
+    # kurulmaz (her sorguda tum item_id'leri okumak O(N) olurdu): riza iptal
+    # edilen vektorler index'te tombstone'lidir, k sonuc ayrica has_consent ile suzulur.
+    allowed_ids = None
+    if filters_applied["time"] or filters_applied["location"]:
+        allowed_ids = [row.item_id for row in
+                       _within_radius(eligible.all(), request.lat, request.lng, request.radius_km)]
+
+    faiss_results = faiss_mgr.search(text_embedding, k=request.k, allowed_ids=allowed_ids)
+    score_map = dict(faiss_results)
+    items = db.query(Item).filter(
+        Item.item_id.in_(list(score_map)), Item.has_consent == True,
+    ).all() if score_map else []
+
+    # FAISS skoru dogrudan cosine benzerlik; sirala
+    # min_score esigi: dusuk benzerlikli sonuclari filtrele
+    MIN_SCORE = 0.24
+    results = []
+    for item in items:
+        score = max(0.0, score_map.get(item.item_id, 0.0))
+        if score >= MIN_SCORE:
+            results.append(SearchResultItem(
+                item=ItemResponse.model_validate(item),
+                score=round(score, 4),
+                source="semantic",
+            ))
+
+    results.sort(key=lambda r: r.score, reverse=True)
+
+    logger.info(f"Semantik arama: query='{request.query}', {len(results)} sonuc")
+    return SearchResponse(
+        results=results,
+        total=len(results),
+        filters_applied=filters_applied,
+    )
+
+
 @router.post("")
 async def search(request: SearchRequest, db: Session = Depends(get_db_session)):
     """
@@ -113,6 +203,7 @@ async def search(request: SearchRequest, db: Session = Depends(get_db_session)):
     Birlesik arama (metin + zaman + konum).
     Query varsa ve FAISS index doluysa semantik arama yapar,
     aksi halde DB-based LIKE aramasina duser.
+    CLIP encode "ml", SQL + FAISS "db" pool'unda calisir (event loop bloklanmaz).
     """
     # Semantik arama: query + dolu FAISS index gerekli
     if request.query:
@@ -122,87 +213,40 @@ async def search(request: SearchRequest, db: Session = Depends(get_db_session)):
 
             if faiss_mgr.get_index_size() > 0:
                 # Metin -> CLIP vektoru
-                text_embedding = clip.encode_text(request.query)
+                text_embedding = await run_blocking("ml", clip.encode_text, request.query)
                 if text_embedding is not None:
-                    # FAISS'te ara (en yakin 200 sonuc al, threshold ile filtrele)
-                    faiss_results = faiss_mgr.search(text_embedding, k=min(200, faiss_mgr.get_index_size()))
-
-                    if faiss_results:
-                        item_ids = [item_id for item_id, _ in faiss_results if item_id is not None]
-                        score_map = {item_id: dist for item_id, dist in faiss_results if item_id is not None}
-
-                        # DB'den item bilgilerini cek (consent + varlik kontrolu)
-                        db_query = db.query(Item).filter(
-                            Item.has_consent == True,
-                            Item.item_id.in_(item_ids),
-                        )
-
-                        # Ek tarih filtresi
-                        if request.start_date and request.end_date:
-                            start_dt = datetime.combine(request.start_date, datetime.min.time())
-                            end_dt = datetime.combine(request.end_date, datetime.max.time())
-                            db_query = db_query.filter(
-                                Item.creation_datetime >= start_dt,
-                                Item.creation_datetime <= end_dt,
-                            )
-
-                        # Ek konum filtresi
-                        if request.lat is not None and request.lng is not None:
-                            delta = request.radius_km / 111.0
-                            db_query = db_query.filter(
-                                Item.latitude.isnot(None),
-                                Item.longitude.isnot(None),
-                                Item.latitude >= request.lat - delta,
-                                Item.latitude <= request.lat + delta,
-                                Item.longitude >= request.lng - delta,
-                                Item.longitude <= request.lng + delta,
-                            )
-
-                        items = db_query.all()
-
-                        # Skor hesapla ve sirala (dusuk distance = yuksek benzerlik)
-                        # min_score esigi: dusuk benzerlikli sonuclari filtrele
-                        MIN_SCORE = 0.24
-                        results = []
-                        for item in items:
-                            dist = score_map.get(item.item_id, 2.0)
-                            score = max(0.0, 1.0 - dist / 2.0)
-                            if score >= MIN_SCORE:
-                                results.append(SearchResultItem(
-                                    item=ItemResponse.model_validate(item),
-                                    score=round(score, 4),
-                                    source="semantic",
-                                ))
-
-                        results.sort(key=lambda r: r.score, reverse=True)
-
-                        filters_applied = {
-                            "text": True,
-                            "time": bool(request.start_date and request.end_date),
-                            "location": request.lat is not None and request.lng is not None,
-                        }
-
-                        logger.info(f"Semantik arama: query='{request.query}', {len(results)} sonuc")
-                        return SearchResponse(
-                            results=results,
-                            total=len(results),
-                            filters_applied=filters_applied,
-                        )
+                    return await run_blocking("db", _semantic_search, request, text_embedding, faiss_mgr, db)
         except Exception as e:
             logger.warning(f"Semantik arama basarisiz, DB fallback: {e}")
 
     # Fallback: DB-based LIKE aramasi
-    return _db_fallback_search(request, db)
+    return await run_blocking("db", _db_fallback_search, request, db)
 
 
 @router.post("/advanced")
-async def advanced_search(request: AdvancedSearchRequest, db: Session = Depends(get_db_session)):
+@offload("db")
+def advanced_search(request: AdvancedSearchRequest, db: Session = Depends(get_db_session)):
     """
     POST /api/search/advanced
     Gelismis arama (yil, ay, sehir, tur destekli).
+    Sehir yerel gazetteer'den cozulur (ag yok); bulunamazsa sonuc bos doner.
     """
     query = db.query(Item).filter(Item.has_consent == True)
     filters_applied = {"text": False, "time": False, "location": False, "type": False}
+    center = None
+
+    # Sehir
+    if request.city:
+        filters_applied["location"] = True
+        place = get_geocoder().geocode(request.city)
+        if place is None:
+            return SearchResponse(results=[], total=0, filters_applied=filters_applied)
+        center = (place.latitude, place.longitude, request.radius_km)
+        query = query.filter(
+            Item.latitude.isnot(None),
+            Item.longitude.isnot(None),
+            bounding_box_filter(db, *center),
+        )
 
     # Metin
     if request.query:
@@ -226,8 +270,7 @@ async def advanced_search(request: AdvancedSearchRequest, db: Session = Depends(
         filters_applied["type"] = True
         query = query.filter(Item.type == request.type)
 
-    total = query.count()
-    items = query.order_by(Item.creation_datetime.desc()).limit(request.k).all()
+    total, items = _newest_page(query, db, request.k, center)
 
     results = [
         SearchResultItem(
@@ -243,3 +286,15 @@ async def advanced_search(request: AdvancedSearchRequest, db: Session = Depends(
         total=total,
         filters_applied=filters_applied,
     )
+
+
+@router.get("/places", response_model=List[PlaceResponse])
+async def suggest_places(q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=50)):
+    """
+    GET /api/search/places?q=...
+    Sehir adi otomatik tamamlama (yerel gazetteer onek index'i, ag yok).
+    Bellek ici arama mikrosaniyeler surer; pool'a gonderilmez.
+    """
+    return [PlaceResponse(name=place.name, label=place.label, latitude=place.latitude,
+                          longitude=place.longitude, country_code=place.country_code)
+            for place in get_geocoder().suggest(q, limit)]
@@ -3,7 +3,11 @@ Ayarlar endpoint'leri.
 Sistem bilgisi, anahtar yedekleme, cache yonetimi.
 """
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+
+from api.dependencies import get_thumbnail_cache, get_query_cache
+from api.models.common_models import SuccessResponse
+from src.ingestion.thumbnail_cache import ThumbnailCache
 
 router = APIRouter(prefix="/api/settings", tags=["Settings"])
 
@@ -24,8 +28,23 @@ async def backup_key():
     pass
 
 
-async def clear_cache():
+@router.get("/cache")
+async def get_cache_stats(cache: ThumbnailCache = Depends(get_thumbnail_cache)):
+    """GET /api/settings/cache
+    Cache metrikleri: doluluk (giris/bayt), hit, miss, eviction, hit_rate.
+    Sorgu embedding cache'i henuz olusturulmadiysa null doner.
+    """
+    query_cache = get_query_cache()
+    return {
+        "thumbnails": cache.stats(),
+        "query_embeddings": query_cache.stats() if query_cache is not None else None,
+    }
+
+
+@router.post("/clear-cache")
+async def clear_cache(cache: ThumbnailCache = Depends(get_thumbnail_cache)):
     """POST /api/settings/clear-cache
-    Thumbnail cache temizle.
+    Thumbnail cache temizle (sifreli thumbnail deposu korunur).
     """
-    pass
+    cache.clear()
+    return SuccessResponse(message="Thumbnail cache temizlendi")
@@ -14,6 +14,7 @@ Logging başlatma (uygulama giriş noktasında bir kez çağrılır):
     setup_logging()
 """
 
+import os
 import logging
 import sys
 from pathlib import Path
@@ -44,6 +45,8 @@ class Config:
     # Güvenlik
     # -----------------------------------------------------------------
     SECRET_KEY_PATH = "secret.key"
+    # Dosya şifrelemede segment boyutu (security/stream_cipher.py); her segment ayrı doğrulanır
+    ENCRYPTION_SEGMENT_SIZE = 64 * 1024
     PRIVACY_AUDIT_LOG = "privacy_audit.log"
 
     # -----------------------------------------------------------------
@@ -51,6 +54,18 @@ class Config:
     # -----------------------------------------------------------------
     GEOCODER_USER_AGENT = "MemoryManager_App_v1"
 
+    # -----------------------------------------------------------------
+    # Cografi Kodlama (yerel gazetteer)
+    # -----------------------------------------------------------------
+    # GeoNames "cities" duzeninde sehir tablosu; cities15000.txt gibi buyugu ile degistirilebilir
+    GAZETTEER_PATH = str(BASE_DIR / "data" / "gazetteer" / "cities.tsv")
+    # Ters kodlamada en yakin yer bundan uzaksa konum adi verilmez (km)
+    REVERSE_GEOCODE_MAX_KM = 50.0
+    # Gazetteer'de bulunmayan isimler Nominatim'e sorulsun mu (varsayilan: sadece yerel)
+    GEOCODER_ONLINE_FALLBACK = False
+    # Cevrimici sonuclarin kalici cache'i; her isim agdan en fazla bir kez sorulur
+    GEOCODE_CACHE_PATH = "database/geocode_cache.db"
+
     # -----------------------------------------------------------------
     # Desteklenen Dosya Formatları
     # -----------------------------------------------------------------
@@ -64,10 +79,87 @@ class Config:
     SBERT_BATCH_SIZE = 32
     CLIP_BATCH_SIZE = 32
     HNSW_NEIGHBORS = 32
+    # FAISS write-behind: bu kadar yeni vektor birikince veya bu kadar saniye
+    # gecince index diske yazilir (arada vektorler journal'da tutulur)
+    FAISS_SAVE_EVERY = 1000
+    FAISS_SAVE_INTERVAL = 60.0
+    # Silinmis (tombstone) vektor orani bunu gecince index arka planda yeniden kurulur
+    FAISS_COMPACT_RATIO = 0.2
+    # Filtreli aramada izin listesi bundan kucukse index taranmaz, dogrudan skorlanir
+    FAISS_EXACT_FILTER_LIMIT = 2048
+    # Index katmanlari ("auto": koleksiyon buyudukce Flat -> HNSW -> IVF-PQ)
+    FAISS_INDEX_TYPE = "auto"
+    FAISS_HNSW_THRESHOLD = 100_000
+    FAISS_IVFPQ_THRESHOLD = 1_000_000
+    FAISS_IVF_NPROBE = 16
+    FAISS_PQ_SUBVECTOR_DIM = 8
+    # Katman degisiminde Flat'e gore recall@k olcumu
+    FAISS_RECALL_K = 10
+    FAISS_RECALL_QUERIES = 100
+    # Rebuild'de vektorler bu buyuklukte parcalarla eklenir; iptal parca arasinda kontrol edilir
+    FAISS_REBUILD_BATCH_SIZE = 50_000
     DEFAULT_SEARCH_RADIUS_KM = 5.0
     CITY_SEARCH_RADIUS_KM = 20.0
     DEFAULT_SEARCH_K = 10
 
+    # -----------------------------------------------------------------
+    # Import Pipeline (paralel ice aktarma)
+    # -----------------------------------------------------------------
+    # Hash/EXIF/yon duzeltme ve sifreleme icin process pool boyutu
+    IMPORT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+    # Writer asamasinda tek seferde commit edilen DB satiri / FAISS vektoru
+    IMPORT_BATCH_SIZE = 64
+    # Asamalar arasi kuyruk kapasitesi (bellek kullanimini sinirlar)
+    IMPORT_QUEUE_SIZE = 128
+    # CLIP batch'i dolmadan once yeni dosya icin beklenen en uzun sure (saniye)
+    CLIP_BATCH_LINGER = 0.05
+
+    # -----------------------------------------------------------------
+    # Reindex (arka plan isi)
+    # -----------------------------------------------------------------
+    # Tek seferde encode edilip FAISS'e ve DB'ye yazilan item sayisi
+    REINDEX_BATCH_SIZE = 256
+    # Sifre cozme + decode icin thread pool boyutu
+    REINDEX_WORKERS = min(8, os.cpu_count() or 2)
+    # Yarida kalan reindex'in devam noktasi (cokme sonrasi kaldigi yerden surer)
+    REINDEX_STATE_PATH = "database/reindex_state.json"
+    # Bakim isleri (repair / cleanup): parca basina item sayisi ve dosya I/O thread'leri
+    MAINTENANCE_BATCH_SIZE = 500
+    MAINTENANCE_WORKERS = min(8, os.cpu_count() or 2)
+
+    # -----------------------------------------------------------------
+    # Sorgu Embedding Cache'i
+    # -----------------------------------------------------------------
+    # Bellekte tutulan en fazla sorgu vektoru (LRU)
+    QUERY_CACHE_SIZE = 1024
+    # Bir sorgu vektorunun gecerlilik suresi (saniye)
+    QUERY_CACHE_TTL = 7 * 24 * 3600
+    # Disk katmani (yeniden baslatmalar arasinda korunur); None ise sadece bellek
+    QUERY_CACHE_PATH = "database/query_cache.db"
+    # Disk katmaninda tutulan en fazla sorgu vektoru (LRU; 512D vektor ~2 KB)
+    QUERY_CACHE_DISK_SIZE = 20000
+
+    # -----------------------------------------------------------------
+    # Embedding Deposu (dosya hash'i anahtarli kalici CLIP vektorleri)
+    # -----------------------------------------------------------------
+    # Uzantisiz yol: .vectors (memory-mapped matris) + .db (satir tablosu)
+    EMBEDDING_STORE_PATH = "database/clip_embeddings"
+    EMBEDDING_STORE_DTYPE = "float16"
+
+    # -----------------------------------------------------------------
+    # Olay Kumeleme (DBSCAN)
+    # -----------------------------------------------------------------
+    # Ayni olay sayilmak icin iki oge arasindaki en fazla zaman ve konum farki
+    CLUSTER_TIME_THRESHOLD_HOURS = 3.0
+    CLUSTER_LOCATION_THRESHOLD_KM = 1.0
+    # Cekirdek nokta icin gereken komsu sayisi (kendisi dahil); komsusuz ogeler gurultudur
+    CLUSTER_MIN_SAMPLES = 2
+    # Komsu taramasinda bir seferde islenen oge sayisi; bellek blok x zaman penceresiyle sinirli
+    CLUSTER_BLOCK_SIZE = 256
+    # Import sonrasi yeni item'lar mevcut olaylara artimli yerlestirilir
+    # (sadece o gunlerin cevresindeki olaylar yeniden kumelenir)
+    EVENT_CLUSTER_ON_IMPORT = True
+
     # -----------------------------------------------------------------
     # API Ayarlari
     # -----------------------------------------------------------------
@@ -76,9 +168,30 @@ class Config:
     API_CORS_ORIGINS = ["http://localhost:*"]
     THUMBNAIL_SIZE = (200, 200)
     THUMBNAIL_QUALITY = 80
-    THUMBNAIL_CACHE_MAX_SIZE = 500
+    # Bellekteki thumbnail/onizleme LRU cache'inin bayt butcesi (ham JPEG)
+    THUMBNAIL_CACHE_MAX_BYTES = 64 * 1024 * 1024
+    # /api/items/thumbnails toplu isteginde en fazla item sayisi
+    THUMBNAIL_BATCH_MAX_ITEMS = 200
+    # Detay ekrani icin orta boy onizleme (import sirasinda uretilir)
+    PREVIEW_SIZE = (1024, 1024)
+    PREVIEW_QUALITY = 85
+    # Sifreli, icerik adresli thumbnail/onizleme deposu (<kok>/<tur>/<hash[:2]>/<hash>.enc)
+    THUMBNAIL_STORE_PATH = "database/thumbnails"
+    # Gorsel yanitlarinin istemci cache suresi (saniye). Icerik hash'e bagli oldugu
+    # icin degismez; sure dolunca ETag ile dogrulanir (304, sifre cozme yok) ve
+    # rizasi kaldirilan item'lar istemcide de en gec bu surede duser.
+    IMAGE_CACHE_MAX_AGE = 7 * 24 * 3600
     GALLERY_PAGE_SIZE = 40
+    # Galeri toplam sayisinin cursor'li sayfalarda yeniden kullanilma suresi (saniye)
+    GALLERY_TOTAL_CACHE_TTL = 60
+    # Toplam sayisi cache'lenen en fazla filtre kombinasyonu (LRU)
+    GALLERY_TOTAL_CACHE_SIZE = 64
     SEARCH_RESULTS_PAGE_SIZE = 20
+    # Bloklayan isler icin alt sistem basina es zamanli thread sayisi (api/concurrency.py)
+    API_DB_CONCURRENCY = 8
+    API_IMAGE_CONCURRENCY = os.cpu_count() or 2
+    API_ML_CONCURRENCY = 1
+    API_IMPORT_CONCURRENCY = 2
 
     # -----------------------------------------------------------------
     # Logging
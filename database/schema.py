@@ -3,7 +3,7 @@
 import logging
 from typing import List, Optional
 from datetime import datetime
-from sqlalchemy import create_engine, event, Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import create_engine, event, Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean, Index, column, table, text
 from sqlalchemy.orm import declarative_base, relationship, Mapped, mapped_column, Session, sessionmaker
 from config import Config
 
@@ -85,6 +85,11 @@ class Event(Base):
 # ----------------- Items Tablosu (Ana Veri Girişi) -----------------
 class Item(Base):
     __tablename__ = 'items'
+    __table_args__ = (
+        # Galeri listesi: riza filtresi + tarih sirasi/araligi tek index'ten okunur
+        # (SQLite her index'e rowid'i (item_id) ekler; keyset sayfalama da bunu kullanir)
+        Index('ix_items_consent_datetime', 'has_consent', 'creation_datetime'),
+    )
     
     # Anahtar ve Dosya Bilgileri
     item_id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -113,6 +118,58 @@ class Item(Base):
         return f"<Item(id={self.item_id}, type='{self.type}', consent={self.has_consent})>"
 
 
+# ----------------- Konum Index'i (SQLite R*Tree) -----------------
+# items tablosunun enlem/boylamlarini tutan sanal tablo; konum aramasi yaricapin
+# sinir kutusundaki aday item'lari tam tablo taramadan buradan alir. Trigger'lar
+# ile items tablosuyla senkron tutulur (ORM tarafinda bakim gerekmez).
+items_geo = table('items_geo', column('id'), column('min_lat'), column('max_lat'),
+                  column('min_lng'), column('max_lng'))
+
+_SPATIAL_INDEX_DDL = [
+    "CREATE VIRTUAL TABLE items_geo USING rtree(id, min_lat, max_lat, min_lng, max_lng)",
+    """CREATE TRIGGER items_geo_insert AFTER INSERT ON items
+       WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL BEGIN
+           INSERT INTO items_geo VALUES (new.item_id, new.latitude, new.latitude, new.longitude, new.longitude);
+       END""",
+    """CREATE TRIGGER items_geo_update AFTER UPDATE OF latitude, longitude ON items BEGIN
+           DELETE FROM items_geo WHERE id = old.item_id;
+           INSERT INTO items_geo SELECT new.item_id, new.latitude, new.latitude, new.longitude, new.longitude
+           WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL;
+       END""",
+    """CREATE TRIGGER items_geo_delete AFTER DELETE ON items BEGIN
+           DELETE FROM items_geo WHERE id = old.item_id;
+       END""",
+    # Mevcut veritabanlarinda index sonradan eklenirse konumlu item'lari doldur
+    """INSERT INTO items_geo SELECT item_id, latitude, latitude, longitude, longitude
+       FROM items WHERE latitude IS NOT NULL AND longitude IS NOT NULL""",
+]
+
+
+def create_spatial_index(connection):
+    """items_geo R*Tree index'ini (yoksa) olusturur. Sadece SQLite'ta."""
+    if connection.dialect.name != 'sqlite':
+        return
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'items_geo'").first()
+    if exists:
+        return
+    for statement in _SPATIAL_INDEX_DDL:
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Item.__table__, "after_create")
+def _create_spatial_index_with_items(target, connection, **kw):
+    create_spatial_index(connection)
+
+
+def has_spatial_index(session: Session) -> bool:
+    """Oturumun veritabaninda items_geo index'i var mi (SQLite disinda hep False)."""
+    if session.get_bind().dialect.name != 'sqlite':
+        return False
+    return session.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'items_geo'")).first() is not None
+
+
 # ----------------- DB Yönetimi -----------------
 class DatabaseSchema:
     def __init__(self, db_url: str = Config.DATABASE_URL):
@@ -128,6 +185,12 @@ class DatabaseSchema:
 
     def create_all_tables(self):
         Base.metadata.create_all(self.engine)
+        # create_all mevcut tablolara sonradan eklenen index'leri olusturmaz
+        for mapped_table in Base.metadata.tables.values():
+            for index in mapped_table.indexes:
+                index.create(self.engine, checkfirst=True)
+        with self.engine.begin() as connection:
+            create_spatial_index(connection)
         logger.info("Veritabanı şeması başarıyla güncellendi.")
 
 if __name__ == '__main__':
@@ -13,12 +13,22 @@ final galleryServiceProvider = Provider((ref) {
 /// Thumbnail bellekte cache — API tekrar cagirilmaz
 final thumbnailCacheProvider = Provider((ref) => <int, Uint8List>{});
 
+/// Toplu istekle yolda olan thumbnail'lar (sayfa yuklenirken doldurulur)
+final thumbnailBatchProvider = Provider((ref) => <int, Future<Uint8List?>>{});
+
 /// Thumbnail provider — item_id bazli, otomatik cache
 final thumbnailProvider = FutureProvider.family<Uint8List, int>((ref, itemId) async {
   // Once bellekteki cache'e bak
   final cache = ref.read(thumbnailCacheProvider);
   if (cache.containsKey(itemId)) return cache[itemId]!;
 
+  // Sayfanin toplu istegi yoldaysa onu bekle
+  final pending = ref.read(thumbnailBatchProvider).remove(itemId);
+  if (pending != null) {
+    final bytes = await pending;
+    if (bytes != null) return bytes;
+  }
+
   // Cache'de yoksa API'den cek
   final service = ref.read(galleryServiceProvider);
   final base64Str = await service.getThumbnail(itemId);
@@ -35,6 +45,7 @@ class GalleryState {
   final bool isLoading;
   final bool hasMore;
   final int currentPage;
+  final String? nextCursor;
   final int? selectedYear;
   final int? selectedMonth;
   final String sortOrder;
@@ -45,6 +56,7 @@ class GalleryState {
     this.isLoading = false,
     this.hasMore = true,
     this.currentPage = 0,
+    this.nextCursor,
     this.selectedYear,
     this.selectedMonth,
     this.sortOrder = 'desc',
@@ -56,6 +68,7 @@ class GalleryState {
     bool? isLoading,
     bool? hasMore,
     int? currentPage,
+    String? nextCursor,
     int? selectedYear,
     int? selectedMonth,
     String? sortOrder,
@@ -66,6 +79,7 @@ class GalleryState {
       isLoading: isLoading ?? this.isLoading,
       hasMore: hasMore ?? this.hasMore,
       currentPage: currentPage ?? this.currentPage,
+      nextCursor: nextCursor ?? this.nextCursor,
       selectedYear: selectedYear,
       selectedMonth: selectedMonth,
       sortOrder: sortOrder ?? this.sortOrder,
@@ -97,11 +111,15 @@ class GalleryNotifier extends Notifier<GalleryState> {
         year: state.selectedYear,
         month: state.selectedMonth,
         sort: state.sortOrder,
+        cursor: state.nextCursor,
       );
 
+      _prefetchThumbnails(page.items.map((i) => i.itemId).toList());
+
       state = state.copyWith(
         items: [...state.items, ...page.items],
         currentPage: nextPage,
+        nextCursor: page.nextCursor,
         hasMore: page.hasMore,
         total: page.total,
         isLoading: false,
@@ -111,6 +129,27 @@ class GalleryNotifier extends Notifier<GalleryState> {
     }
   }
 
+  /// Sayfanin thumbnail'larini tek istekle ceker; tile'lar bu istegi bekler.
+  void _prefetchThumbnails(List<int> itemIds) {
+    final cache = ref.read(thumbnailCacheProvider);
+    final missing = itemIds.where((id) => !cache.containsKey(id)).toList();
+    if (missing.isEmpty) return;
+
+    final batch = ref
+        .read(galleryServiceProvider)
+        .getThumbnails(missing)
+        .then((thumbs) {
+      cache.addAll(thumbs);
+      return thumbs;
+    }).catchError((_) => <int, Uint8List>{});
+
+    // Gelmeyen item'lar tekil thumbnail istegine duser
+    final pending = ref.read(thumbnailBatchProvider);
+    for (final id in missing) {
+      pending[id] = batch.then((thumbs) => thumbs[id]);
+    }
+  }
+
   void setYearFilter(int? year) {
     state = GalleryState(
       selectedYear: year,
@@ -314,8 +314,17 @@ class _PrivacyScreenState extends ConsumerState<PrivacyScreen> {
   Future<void> _cleanupOrphans() async {
     try {
       final api = ref.read(apiClientProvider);
+      // Temizlik arka plan isi olarak calisir; bitene kadar durumu yokla
       final response = await api.delete('/api/items/cleanup');
-      final msg = response.data['message'] ?? 'Temizlendi';
+      var job = response.data as Map<String, dynamic>;
+      while (job['status'] == 'pending' || job['status'] == 'running') {
+        await Future.delayed(const Duration(milliseconds: 500));
+        job = (await api.get('/api/items/cleanup/${job['job_id']}')).data;
+      }
+      final deleted = (job['progress'] as Map?)?['deleted'] ?? 0;
+      final msg = job['status'] == 'failed'
+          ? 'Temizleme hatasi: ${job['error']}'
+          : '$deleted orphan kayit temizlendi';
       await _loadAll();
       if (mounted) {
         ScaffoldMessenger.of(context).showSnackBar(
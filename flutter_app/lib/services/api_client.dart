@@ -63,10 +63,14 @@ class ApiClient {
     return _dio.delete(path);
   }
 
-  /// GET — binary response (fullsize foto icin)
-  Future<Response<List<int>>> getBytes(String path) async {
+  /// GET — binary response (fullsize foto, toplu thumbnail icin)
+  Future<Response<List<int>>> getBytes(
+    String path, {
+    Map<String, dynamic>? queryParams,
+  }) async {
     return _dio.get<List<int>>(
       path,
+      queryParameters: queryParams,
       options: Options(responseType: ResponseType.bytes),
     );
   }
@@ -9,7 +9,8 @@ class GalleryService {
 
   GalleryService(this._api);
 
-  /// Sayfalanmis item listesi
+  /// Sayfalanmis item listesi.
+  /// Sonraki sayfa icin bir onceki sayfanin nextCursor'i verilir (keyset).
   Future<GalleryPage> getItems({
     int page = 1,
     int size = 40,
@@ -17,6 +18,7 @@ class GalleryService {
     int? month,
     String sort = 'desc',
     String? type,
+    String? cursor,
   }) async {
     final params = <String, dynamic>{
       'page': page,
@@ -26,6 +28,7 @@ class GalleryService {
     if (year != null) params['year'] = year;
     if (month != null) params['month'] = month;
     if (type != null) params['type'] = type;
+    if (cursor != null) params['cursor'] = cursor;
 
     final response = await _api.get('/api/items', queryParams: params);
     final data = response.data as Map<String, dynamic>;
@@ -35,6 +38,7 @@ class GalleryService {
       total: data['total'],
       page: data['page'],
       size: data['size'],
+      nextCursor: data['next_cursor'],
     );
   }
 
@@ -50,6 +54,31 @@ class GalleryService {
     return response.data['thumbnail'] as String;
   }
 
+  /// Toplu thumbnail — tek istekte bir sayfanin tum thumbnail'lari.
+  /// Yanit cerceveleri: [item_id int64][uzunluk uint32][JPEG], big-endian.
+  /// Uzunlugu 0 olan item'lar (bulunamadi / riza yok) sonuca eklenmez.
+  Future<Map<int, Uint8List>> getThumbnails(List<int> itemIds) async {
+    final response = await _api.getBytes(
+      '/api/items/thumbnails',
+      queryParams: {'ids': itemIds.join(',')},
+    );
+    final bytes = Uint8List.fromList(response.data!);
+    final view = ByteData.sublistView(bytes);
+    final result = <int, Uint8List>{};
+
+    var offset = 0;
+    while (offset + 12 <= bytes.length) {
+      final itemId = view.getInt64(offset, Endian.big);
+      final length = view.getUint32(offset + 8, Endian.big);
+      offset += 12;
+      if (length > 0) {
+        result[itemId] = Uint8List.sublistView(bytes, offset, offset + length);
+      }
+      offset += length;
+    }
+    return result;
+  }
+
   /// Fullsize binary (JPEG bytes)
   Future<Uint8List> getFullsize(int itemId) async {
     final response = await _api.getBytes('/api/items/$itemId/fullsize');
@@ -63,13 +92,15 @@ class GalleryPage {
   final int total;
   final int page;
   final int size;
+  final String? nextCursor;
 
   GalleryPage({
     required this.items,
     required this.total,
     required this.page,
     required this.size,
+    this.nextCursor,
   });
 
-  bool get hasMore => page * size < total;
+  bool get hasMore => nextCursor != null;
 }
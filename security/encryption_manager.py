@@ -1,10 +1,14 @@
 # encryption_manager.py
 
+import io
 import os
 import stat
 import logging
+import tempfile
 from cryptography.fernet import Fernet, InvalidToken
 from pathlib import Path
+from typing import BinaryIO, Iterator
+from security.stream_cipher import StreamCipher, MAGIC, is_container
 from config import Config
 
 logger = logging.getLogger(__name__)
@@ -12,12 +16,21 @@ logger = logging.getLogger(__name__)
 class EncryptionManager:
     """
     Dosya ve veritabanı verilerini şifreleme/şifre çözme işlemlerini yönetir.
+
+    Metinler ve küçük veriler Fernet token'ı olarak, dosyalar ise segment'li
+    formatta (security/stream_cipher.py) şifrelenir. Eski (tek Fernet token'lı)
+    dosyalar okunmaya devam eder.
     """
 
+    # Fernet token'ları 0x80 sürüm baytı + zaman damgası ile başlar (base64).
+    # Segment'li format MAGIC ile başlar; ikisi de şifreleme durumunu O(1) belirler.
+    _FERNET_PREFIX = b"gAAAAA"
+
     def __init__(self, key_path: str = Config.SECRET_KEY_PATH):
         self.key_path = Path(key_path)
         self.key = self._load_or_generate_key()
         self.cipher = Fernet(self.key)
+        self.stream = StreamCipher(self.key)
 
     def _load_or_generate_key(self) -> bytes:
         """Anahtarı yükler veya yoksa yeni bir tane oluşturur."""
@@ -43,19 +56,32 @@ class EncryptionManager:
         return self.cipher.decrypt(encrypted_text.encode()).decode()
 
     def encrypt_file(self, file_path: str):
-        """Diskteki bir dosyayı (fotoğraf, ses vb.) yerinde şifreler."""
+        """
+        Diskteki bir dosyayı (fotoğraf, ses vb.) yerinde şifreler. Dosya
+        segment segment okunur; bellekte hiçbir zaman tamamı tutulmaz.
+        """
         path = Path(file_path)
         if path.exists():
-            data = path.read_bytes()
-            # Çift şifreleme koruması: zaten şifreli mi kontrol et
-            try:
-                self.cipher.decrypt(data)
+            # Çift şifreleme koruması: başlıktan bakılır, deneme çözmesi yapılmaz
+            if self.is_encrypted(file_path):
                 logger.warning(f"Dosya zaten şifreli, tekrar şifrelenmedi: {file_path}")
                 return
-            except InvalidToken:
-                pass  # Şifreli değil, şifrelemeye devam
-            encrypted_data = self.cipher.encrypt(data)
-            path.write_bytes(encrypted_data)
+            with open(path, "rb") as src:
+                self._write_atomic(path, src)
+
+    def is_encrypted(self, file_path: str) -> bool:
+        """Dosyanın şifreli olup olmadığını ilk baytlarından söyler (dosya okunmaz)."""
+        with open(file_path, "rb") as f:
+            return self.is_encrypted_data(f.read(len(self._FERNET_PREFIX)))
+
+    @classmethod
+    def is_encrypted_data(cls, data: bytes) -> bool:
+        """Verinin (en az ilk 6 baytı) şifreli formatlardan biriyle başlayıp başlamadığı."""
+        return is_container(data) or data[:len(cls._FERNET_PREFIX)] == cls._FERNET_PREFIX
+
+    def write_encrypted(self, file_path: str, data: bytes):
+        """Bellekteki veriyi şifreleyip dosyaya yazar (düz hali diske hiç yazılmaz)."""
+        self._write_atomic(Path(file_path), io.BytesIO(data))
 
     def decrypt_file(self, file_path: str) -> bytes:
         """Şifreli dosyanın verisini okur ve şifresini çözer."""
@@ -63,9 +89,55 @@ class EncryptionManager:
         if not path.exists():
             logger.error(f"Dosya bulunamadı: {file_path}")
             return b""
+        return b"".join(self.iter_decrypt_file(file_path))
+
+    def iter_decrypt_file(self, file_path: str, start_segment: int = 0) -> Iterator[bytes]:
+        """
+        Şifreli dosyayı segment segment çözerek üretir (akış için). Eski Fernet
+        dosyaları tek parça halinde döner.
+        """
+        path = Path(file_path)
         try:
-            encrypted_data = path.read_bytes()
-            return self.cipher.decrypt(encrypted_data)
+            with open(path, "rb") as f:
+                if is_container(f.read(len(MAGIC))):
+                    yield from self.stream.decrypt_iter(f, start_segment)
+                else:
+                    f.seek(0)
+                    yield self.cipher.decrypt(f.read())
         except InvalidToken:
             logger.error(f"Şifre çözme başarısız (anahtar uyumsuz veya dosya bozuk): {file_path}")
+            raise
+
+    def open_decrypted(self, file_path: str) -> BinaryIO:
+        """
+        Şifreli dosyayı seek edilebilir, okunabilir bir nesne olarak açar.
+        Segment'li dosyalarda yalnızca okunan kısım çözülür.
+        """
+        f = open(file_path, "rb")
+        try:
+            if is_container(f.read(len(MAGIC))):
+                return self.stream.open(f)
+            f.seek(0)
+            data = self.cipher.decrypt(f.read())
+        except BaseException:
+            f.close()
+            raise
+        f.close()
+        return io.BytesIO(data)
+
+    def decrypt_bytes(self, data: bytes) -> bytes:
+        """Bellekteki şifreli veriyi (her iki format) çözer."""
+        if is_container(data):
+            return b"".join(self.stream.decrypt_iter(io.BytesIO(data)))
+        return self.cipher.decrypt(data)
+
+    def _write_atomic(self, path: Path, src: BinaryIO):
+        """Şifreli çıktıyı geçici dosyaya yazıp yerine taşır (yarım dosya kalmasın)."""
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as dst:
+                self.stream.encrypt_stream(src, dst)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
             raise
\ No newline at end of file
@@ -4,6 +4,7 @@ import os
 import logging
 from pathlib import Path
 from datetime import datetime
+from typing import List
 from sqlalchemy.orm import Session
 from database.schema import Item  # Güncellediğimiz şemadan Item modelini alıyoruz
 
@@ -12,10 +13,15 @@ logger = logging.getLogger(__name__)
 class PrivacyManager:
     """
     Kullanıcı rızası, güvenli silme ve denetim kayıtlarını yönetir. 
+    faiss_manager verilirse silinen / rızası geri çekilen item'ların
+    vektörleri de aramadan çıkarılır; embedding_store verilirse silinen
+    item'ların kalıcı vektörleri de yok edilir.
     """
     
-    def __init__(self, db_session: Session):
+    def __init__(self, db_session: Session, faiss_manager=None, embedding_store=None):
         self.db = db_session
+        self.faiss_manager = faiss_manager
+        self.embedding_store = embedding_store
 
     def check_consent(self, item_id: int) -> bool:
         """
@@ -37,10 +43,33 @@ class PrivacyManager:
         item = self.db.query(Item).filter(Item.item_id == item_id).first()
         if item:
             item.has_consent = status
+            if not status and item.faiss_index_id is not None:
+                # Rızası olmayan içerik aranamaz: vektörü çıkar, rıza geri gelince reindex ekler
+                self.remove_embeddings([item_id])
+                item.faiss_index_id = None
             self.db.commit()
             action = "CONSENT_GRANTED" if status else "CONSENT_REVOKED"
             self._log_action(action, f"Item {item_id} rıza durumu {status} olarak güncellendi.")
 
+    def remove_embeddings(self, item_ids: List[int], purge: bool = False) -> int:
+        """
+        Item'ların vektörlerini FAISS index'inden çıkarır (silme / rıza iptali).
+        purge=True ise (item silindi) kalıcı embedding deposundan da silinir.
+        Index'ten çıkarılan vektör sayısını döner.
+        """
+        if not item_ids:
+            return 0
+        if purge and self.embedding_store is not None:
+            purged = self.embedding_store.remove_items(item_ids)
+            if purged:
+                self._log_action("EMBEDDING_PURGED", f"{purged} vektör depodan silindi: {list(item_ids)}")
+        if self.faiss_manager is None:
+            return 0
+        removed = self.faiss_manager.remove_embeddings(item_ids)
+        if removed:
+            self._log_action("EMBEDDING_REMOVED", f"{removed} vektör index'ten çıkarıldı: {list(item_ids)}")
+        return removed
+
     def secure_delete(self, file_path: str):
         """
         Dosyayı diskten güvenli bir şekilde siler. [cite: 11, 12]
@@ -0,0 +1,206 @@
+# stream_cipher.py
+"""
+Parçalı (segment'li) dosya şifreleme formatı.
+
+Büyük dosyalar (video, uzun ses) tek bir Fernet token'ına sığdırılınca hem
+şifreleme hem çözme tüm dosyayı (base64 ile ~2.3 kat) bellekte tutar. Bu
+format dosyayı sabit boyutlu segment'lere böler; her segment ayrı ayrı
+AES-256-GCM ile doğrulanır. Böylece dosya akış halinde şifrelenip çözülebilir
+ve herhangi bir segment'e doğrudan erişilebilir.
+
+Dosya düzeni:
+
+    başlık  : MAGIC (4) | sürüm (1) | segment boyutu (uint32) | tuz (16) | nonce öneki (7)
+    segment : AES-GCM(segment verisi) + 16 bayt etiket   (tekrar eder)
+
+Nonce = önek (7) | segment no (uint32) | son segment bayrağı (1). Başlık her
+segment'e ek veri (AAD) olarak bağlanır: segment'ler yer değiştiremez, dosya
+kesilirse son segment bayrağı tutmaz ve çözme hata verir.
+
+Segment anahtarı her dosya için Fernet anahtarından, başlıktaki rastgele
+tuzla HKDF ile türetilir (Tink streaming AEAD'deki gibi). Böylece dosyalar
+ortak bir AES-GCM anahtarı paylaşmaz; nonce çakışması 7 baytlık önekin
+kütüphane genelinde tekrarlanmamasına bağlı kalmaz. Ayrı bir anahtar dosyası
+gerekmez.
+"""
+
+import io
+import os
+import base64
+import struct
+from typing import BinaryIO, Iterator, NamedTuple, Tuple
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from config import Config
+
+MAGIC = b"MMEF"
+VERSION = 2
+TAG_SIZE = 16
+SALT_SIZE = 16
+
+_HEADER = struct.Struct(">4sBI16s7s")
+HEADER_SIZE = _HEADER.size
+_HKDF_INFO = b"memory-manager/stream-cipher/v2"
+
+
+def is_container(prefix: bytes) -> bool:
+    """Verinin (ilk baytları) bu formatta şifrelenmiş olup olmadığını söyler."""
+    return prefix[:len(MAGIC)] == MAGIC
+
+
+def _nonce(prefix: bytes, index: int, last: bool) -> bytes:
+    return prefix + struct.pack(">IB", index, 1 if last else 0)
+
+
+class _Layout(NamedTuple):
+    """Okunan başlıktan çıkan, segment çözmek için gereken her şey."""
+    header: bytes
+    segment_size: int
+    prefix: bytes
+    count: int
+    aead: AESGCM
+
+
+class StreamCipher:
+    """
+    Segment'li şifreleme/çözme. Dosya nesneleri üzerinde çalışır; doğrulama
+    hatalarında Fernet ile aynı şekilde InvalidToken fırlatır.
+    """
+
+    def __init__(self, fernet_key: bytes, segment_size: int = Config.ENCRYPTION_SEGMENT_SIZE):
+        self._master = base64.urlsafe_b64decode(fernet_key)
+        self.segment_size = segment_size
+
+    def _derive(self, salt: bytes) -> AESGCM:
+        """Dosyanın segment anahtarı: HKDF(Fernet anahtarı, tuz)."""
+        hkdf = HKDF(algorithm=hashes.SHA256(), length=32, salt=salt, info=_HKDF_INFO)
+        return AESGCM(hkdf.derive(self._master))
+
+    def encrypt_stream(self, src: BinaryIO, dst: BinaryIO) -> int:
+        """src'yi segment segment şifreleyip dst'ye yazar; segment sayısını döner."""
+        salt = os.urandom(SALT_SIZE)
+        prefix = os.urandom(7)
+        header = _HEADER.pack(MAGIC, VERSION, self.segment_size, salt, prefix)
+        aead = self._derive(salt)
+        dst.write(header)
+
+        index = 0
+        chunk = src.read(self.segment_size)
+        while True:
+            # Son segment'i bilmek için bir sonrakini önceden oku
+            following = src.read(self.segment_size)
+            last = not following
+            dst.write(aead.encrypt(_nonce(prefix, index, last), chunk, header))
+            if last:
+                return index + 1
+            chunk = following
+            index += 1
+
+    def decrypt_iter(self, f: BinaryIO, start_segment: int = 0) -> Iterator[bytes]:
+        """Çözülmüş segment'leri sırayla üretir (start_segment'ten başlayarak)."""
+        layout = self._read_header(f)
+        for index in range(start_segment, layout.count):
+            yield self._decrypt_segment(f, layout, index)
+
+    def read_segment(self, f: BinaryIO, index: int) -> bytes:
+        """Tek bir segment'i çözer (rastgele erişim)."""
+        layout = self._read_header(f)
+        if not 0 <= index < layout.count:
+            raise IndexError(f"Segment {index} yok (toplam {layout.count})")
+        return self._decrypt_segment(f, layout, index)
+
+    def plaintext_size(self, f: BinaryIO) -> int:
+        """Çözülmüş verinin bayt sayısı (çözmeden hesaplanır)."""
+        return _plaintext_size(f, self._read_header(f))
+
+    def open(self, f: BinaryIO) -> "DecryptingReader":
+        """Şifreli dosyayı okunabilir, seek edilebilir bir nesne olarak açar."""
+        return DecryptingReader(self, f)
+
+    def _read_header(self, f: BinaryIO) -> _Layout:
+        """Başlığı okur ve dosyanın segment anahtarını türetir."""
+        f.seek(0)
+        header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            raise InvalidToken
+        magic, version, segment_size, salt, nonce_prefix = _HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION or segment_size <= 0:
+            raise InvalidToken
+        aead = self._derive(salt)
+        stride = segment_size + TAG_SIZE
+        count = -(-(_file_size(f) - len(header)) // stride)
+        if count == 0:
+            raise InvalidToken
+        return _Layout(header, segment_size, nonce_prefix, count, aead)
+
+    def _decrypt_segment(self, f: BinaryIO, layout: _Layout, index: int) -> bytes:
+        stride = layout.segment_size + TAG_SIZE
+        f.seek(len(layout.header) + index * stride)
+        block = f.read(stride)
+        try:
+            return layout.aead.decrypt(_nonce(layout.prefix, index, index == layout.count - 1),
+                                       block, layout.header)
+        except InvalidTag:
+            raise InvalidToken
+
+
+class DecryptingReader(io.RawIOBase):
+    """
+    Şifreli dosyanın çözülmüş içeriğini dosya gibi okutur. Yalnızca okunan
+    konumun segment'i çözülür; PIL gibi başlığı okuyup seek eden kütüphaneler
+    tüm dosyayı belleğe almadan çalışabilir.
+    """
+
+    def __init__(self, cipher: StreamCipher, f: BinaryIO):
+        super().__init__()
+        self._f = f
+        self._cipher = cipher
+        self._layout = cipher._read_header(f)
+        self._size = _plaintext_size(f, self._layout)
+        self._pos = 0
+        self._cached: Tuple[int, bytes] = (-1, b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self._size}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        # Segment sınırında kısa okuma yapma: istenen boyutu (veya dosya sonunu) doldur
+        written = 0
+        while written < len(buffer) and self._pos < self._size:
+            index, offset = divmod(self._pos, self._layout.segment_size)
+            if self._cached[0] != index:
+                self._cached = (index, self._cipher._decrypt_segment(self._f, self._layout, index))
+            data = self._cached[1]
+            n = min(len(buffer) - written, len(data) - offset)
+            buffer[written:written + n] = data[offset:offset + n]
+            written += n
+            self._pos += n
+        return written
+
+    def close(self):
+        if not self.closed:
+            self._f.close()
+        super().close()
+
+
+def _plaintext_size(f: BinaryIO, layout: _Layout) -> int:
+    return _file_size(f) - len(layout.header) - layout.count * TAG_SIZE
+
+
+def _file_size(f: BinaryIO) -> int:
+    f.seek(0, io.SEEK_END)
+    return f.tell()
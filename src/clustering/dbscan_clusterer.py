@@ -2,93 +2,280 @@
 DBSCAN Kümeleme (Aşama 6.1)
 
 Zaman ve konum bazlı ön-kümeleme yapar.
+
+İki öğe, zaman farkı time_threshold_hours ve konum farkı
+location_threshold_km içindeyse komşudur. Yoğun N x N mesafe matrisi hiç
+kurulmaz:
+
+    1. Öğeler zamana göre sıralanır; her öğenin komşu adayları yalnızca
+       kendisinden sonraki time_threshold_hours'luk penceredekilerdir
+    2. Pencereler blok blok taranır; konum mesafesi sadece zaman koşulunu
+       geçen çiftler için (vektörel, src/geo/distance.py) hesaplanır
+    3. DBSCAN iki geçişte akış halinde çalışır: komşu sayıları -> çekirdek
+       noktalar, sonra çekirdek-çekirdek kenarları union-find ile birleştirilir
+
+Bellek O(N + blok x pencere) kalır; komşu listesi / seyrek graf tutulmaz.
 """
 
-from typing import List, Dict, Tuple
-from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
 import numpy as np
-from sklearn.cluster import DBSCAN
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from ..geo import distance_km, pairwise_distance_km
+from config import Config
 
 
 class DBSCANClusterer:
     """
     DBSCAN algoritması ile zaman ve konum bazlı kümeleme yapar.
+
+    GPS'i olmayan öğeler konum koşulunu köprüleyemez (farklı şehirlerdeki iki
+    kümeyi birleştirmesin diye): zamanca en yakın kümeye eklenir, hiçbir
+    kümeye yakın değillerse kendi aralarında yalnız zamana göre kümelenir.
     """
-    
-    def __init__(self, time_threshold_hours: float = 3.0, 
-                 location_threshold_km: float = 1.0):
+
+    def __init__(self, time_threshold_hours: float = Config.CLUSTER_TIME_THRESHOLD_HOURS,
+                 location_threshold_km: float = Config.CLUSTER_LOCATION_THRESHOLD_KM,
+                 min_samples: int = Config.CLUSTER_MIN_SAMPLES,
+                 block_size: int = Config.CLUSTER_BLOCK_SIZE):
         """
         Args:
             time_threshold_hours: Aynı olay için maksimum zaman farkı (saat)
             location_threshold_km: Aynı olay için maksimum konum farkı (km)
+            min_samples: Çekirdek nokta için komşu sayısı (kendisi dahil)
+            block_size: Komşu taramasında bir seferde işlenen öğe sayısı
         """
         self.time_threshold_hours = time_threshold_hours
         self.location_threshold_km = location_threshold_km
-    
+        self.min_samples = min_samples
+        self.block_size = block_size
+
     def cluster_by_time_and_location(self, items: List[Dict]) -> List[List[int]]:
         """
         Öğeleri zaman ve konuma göre kümele.
-        
+
         Args:
-            items: [{'item_id': int, 'created_at': datetime, 
+            items: [{'item_id': int, 'created_at': datetime,
                     'location_lat': float, 'location_lng': float}, ...]
-            
+                   Konumu olmayan öğelerde lat/lng None olabilir.
+
         Returns:
             Her küme için item_id listesi: [[id1, id2, ...], [id3, id4, ...], ...]
+            Kümeler ve küme içi id'ler zamana göre sıralıdır; gürültü öğeleri dönmez.
         """
-        pass
-    
+        if not items:
+            return []
+        features = self.normalize_features(self.prepare_features(items))
+        order = np.argsort(features[:, 0], kind="stable")
+        times, lats, lngs = features[order].T
+        labels = np.full(len(items), -1, dtype=np.int64)
+
+        located = ~(np.isnan(lats) | np.isnan(lngs))
+        labels[located] = self._dbscan(times[located], lats[located], lngs[located])
+
+        unlocated = np.flatnonzero(~located)
+        if len(unlocated):
+            attached = self._attach_by_time(times[unlocated], times[located], labels[located])
+            labels[unlocated] = attached
+            rest = unlocated[attached < 0]
+            if len(rest):
+                own = self._dbscan(times[rest])
+                labels[rest] = np.where(own >= 0, own + labels.max() + 1, -1)
+
+        clusters: Dict[int, List[int]] = {}
+        for position, label in enumerate(labels):
+            if label >= 0:
+                clusters.setdefault(int(label), []).append(items[order[position]]['item_id'])
+        # Sıralı tarandığı için her kümenin ilk öğesi en erkenidir. Sınır öğeleri
+        # komşu kümeye geçmiş bir çekirdek tek kalabilir; DBSCAN'deki gibi küme sayılır.
+        return list(clusters.values())
+
     def prepare_features(self, items: List[Dict]) -> np.ndarray:
         """
         Öğeleri DBSCAN için feature vektörlerine çevir.
-        
+
         Feature'lar:
         - Zaman (timestamp olarak)
-        - Konum (lat, lng)
-        
+        - Konum (lat, lng); konumu olmayan öğede NaN
+
         Args:
             items: Öğe listesi
-            
+
         Returns:
             (N, 3) shape'inde numpy array: [timestamp, lat, lng]
         """
-        pass
-    
+        return np.array([
+            [item['created_at'].timestamp(),
+             np.nan if item.get('location_lat') is None else item['location_lat'],
+             np.nan if item.get('location_lng') is None else item['location_lng']]
+            for item in items
+        ], dtype=float).reshape(-1, 3)
+
     def normalize_features(self, features: np.ndarray) -> np.ndarray:
         """
         Feature'ları normalize et (DBSCAN için önemli).
-        
+
+        Zaman kolonu eşik birimine çevrilir (1.0 = time_threshold_hours).
+        Enlem/boylam derece olarak kalır; konum mesafesi kilometre cinsinden
+        hesaplanıp location_threshold_km'ye bölünür.
+
         Args:
             features: Ham feature array
-            
+
         Returns:
             Normalize edilmiş feature array
         """
-        pass
-    
+        normalized = np.array(features, dtype=float)
+        normalized[:, 0] /= self.time_threshold_hours * 3600
+        return normalized
+
     def calculate_distance_matrix(self, features: np.ndarray) -> np.ndarray:
         """
         Öğeler arası mesafe matrisini hesapla.
-        
+
+        Zaman farkı time_threshold_hours'a, konum farkı (vektörel elipsoid
+        mesafe, src/geo/distance.py) location_threshold_km'ye bölünür ve
+        büyük olanı alınır: mesafe ≤ 1 ise iki öğe her iki eşiğin de
+        içindedir. Konumu olmayan (NaN) öğelerde yalnızca zaman farkı sayılır.
+
+        N x N bellek ister; yalnızca küçük kümeleri incelemek içindir,
+        cluster_by_time_and_location() bu matrisi kurmaz.
+
         Args:
-            features: Feature array
-            
+            features: prepare_features() çıktısı, ham [timestamp, lat, lng]
+
         Returns:
             (N, N) mesafe matrisi
         """
-        pass
-    
-    def filter_small_clusters(self, clusters: List[List[int]], 
+        features = np.asarray(features, dtype=float)
+        timestamps, lats, lngs = features[:, 0], features[:, 1], features[:, 2]
+        time_dist = np.abs(timestamps[:, None] - timestamps[None, :]) / (self.time_threshold_hours * 3600)
+        geo_dist = pairwise_distance_km(lats, lngs) / self.location_threshold_km
+        return np.maximum(time_dist, np.nan_to_num(geo_dist, nan=0.0))
+
+    def filter_small_clusters(self, clusters: List[List[int]],
                              min_size: int = 2) -> List[List[int]]:
         """
         Çok küçük kümeleri filtrele (gürültü olarak işaretle).
-        
+
         Args:
             clusters: Küme listesi
             min_size: Minimum küme boyutu
-            
+
         Returns:
             Filtrelenmiş küme listesi
         """
-        pass
+        return [cluster for cluster in clusters if len(cluster) >= min_size]
+
+    # =================================================================
+    # Akış halinde DBSCAN
+    # =================================================================
+
+    def _neighbor_pairs(self, times: np.ndarray, lats: Optional[np.ndarray] = None,
+                        lngs: Optional[np.ndarray] = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Zamana göre sıralı (normalize) öğelerde i < j komşu çiftlerini blok
+        blok üretir. lats verilmezse yalnızca zaman koşulu uygulanır.
+        """
+        n = len(times)
+        window_end = np.searchsorted(times, times + 1.0, side="right")
+        block = self.block_size
+        for start in range(0, n, block):
+            stop = min(start + block, n)
+            rows = np.arange(start, stop)
+            # Sütunlar da bloklanır: tek bir kalabalık pencere belleği büyütmesin
+            for col_start in range(start + 1, int(window_end[stop - 1]), block * 16):
+                col_stop = min(col_start + block * 16, int(window_end[stop - 1]))
+                cols = np.arange(col_start, col_stop)
+                ii, jj = np.nonzero((cols[None, :] > rows[:, None])
+                                    & (cols[None, :] < window_end[start:stop, None]))
+                ii, jj = ii + start, jj + col_start
+                if lats is not None and len(ii):
+                    near = distance_km(lats[ii], lngs[ii], lats[jj], lngs[jj]) <= self.location_threshold_km
+                    ii, jj = ii[near], jj[near]
+                if len(ii):
+                    yield ii, jj
+
+    def _dbscan(self, times: np.ndarray, lats: Optional[np.ndarray] = None,
+                lngs: Optional[np.ndarray] = None) -> np.ndarray:
+        """Sıralı öğelerin küme etiketleri (0..k-1, zamanca ilk öğeye göre); gürültü -1."""
+        n = len(times)
+        if n == 0:
+            return np.empty(0, dtype=np.int64)
+
+        # 1. geçiş: komşu sayıları -> çekirdek noktalar
+        counts = np.ones(n, dtype=np.int64)
+        for ii, jj in self._neighbor_pairs(times, lats, lngs):
+            counts += np.bincount(ii, minlength=n) + np.bincount(jj, minlength=n)
+        core = counts >= self.min_samples
+
+        # 2. geçiş: çekirdek-çekirdek kenarları birleştir, sınır öğelerini bir çekirdeğe bağla
+        parent = np.arange(n)
+        border_of = np.full(n, -1, dtype=np.int64)
+        for ii, jj in self._neighbor_pairs(times, lats, lngs):
+            both = core[ii] & core[jj]
+            if both.any():
+                _union(parent, ii[both], jj[both])
+            for c, b in ((ii, jj), (jj, ii)):
+                edge = core[c] & ~core[b]
+                free = b[edge][border_of[b[edge]] < 0]
+                if len(free):
+                    first, idx = np.unique(free, return_index=True)
+                    border_of[first] = c[edge][border_of[b[edge]] < 0][idx]
+
+        roots = _find(parent, np.arange(n))
+        labels = np.full(n, -1, dtype=np.int64)
+        labels[core] = roots[core]
+        attached = border_of >= 0
+        labels[attached] = roots[border_of[attached]]
+
+        # Kök id'lerini zamanca ilk görülme sırasına göre 0..k-1'e indir
+        clustered = labels >= 0
+        _, first_seen, dense = np.unique(labels[clustered], return_index=True, return_inverse=True)
+        rank = np.argsort(np.argsort(first_seen))
+        labels[clustered] = rank[dense]
+        return labels
+
+    def _attach_by_time(self, times: np.ndarray, cluster_times: np.ndarray,
+                        cluster_labels: np.ndarray) -> np.ndarray:
+        """Konumsuz öğeleri zaman eşiği içindeki en yakın kümeli öğenin kümesine ekler."""
+        clustered = cluster_labels >= 0
+        ref_times, ref_labels = cluster_times[clustered], cluster_labels[clustered]
+        labels = np.full(len(times), -1, dtype=np.int64)
+        if not len(ref_times):
+            return labels
+        right = np.clip(np.searchsorted(ref_times, times), 0, len(ref_times) - 1)
+        left = np.clip(right - 1, 0, len(ref_times) - 1)
+        nearest = np.where(np.abs(ref_times[left] - times) <= np.abs(ref_times[right] - times), left, right)
+        close = np.abs(ref_times[nearest] - times) <= 1.0
+        labels[close] = ref_labels[nearest[close]]
+        return labels
+
+
+def _find(parent: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+    """Union-find kökleri (vektörel, yol sıkıştırmalı)."""
+    roots = parent[nodes]
+    while True:
+        next_roots = parent[roots]
+        if np.array_equal(next_roots, roots):
+            break
+        roots = next_roots
+    parent[nodes] = roots
+    return roots
+
 
+def _union(parent: np.ndarray, a: np.ndarray, b: np.ndarray):
+    """Kenar listesinin uçlarını birleştirir; her bileşen en küçük köke bağlanır."""
+    ra, rb = _find(parent, a), _find(parent, b)
+    differ = ra != rb
+    if not differ.any():
+        return
+    nodes, inverse = np.unique(np.concatenate([ra[differ], rb[differ]]), return_inverse=True)
+    half = differ.sum()
+    graph = coo_matrix((np.ones(half), (inverse[:half], inverse[half:])),
+                       shape=(len(nodes), len(nodes)))
+    _, component = connected_components(graph, directed=False)
+    smallest = np.full(component.max() + 1, parent.size)
+    np.minimum.at(smallest, component, nodes)
+    parent[nodes] = smallest[component]
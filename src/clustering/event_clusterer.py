@@ -2,81 +2,291 @@
 Ana Olay Kümeleme Sınıfı (Aşama 6)
 
 Tüm kümeleme adımlarını koordine eder.
+
+İki çalışma biçimi vardır:
+
+    cluster_all_items()  -> tüm kütüphane baştan kümelenir (yalnızca istek üzerine)
+    cluster_new_items()  -> yeni item'ların zaman penceresi ve o pencereye
+                            değen olaylar yerel olarak yeniden kümelenir
+
+Her iki yolda da sonuç mevcut olaylarla eşleştirilir: en çok ortak item'ı
+olan olay korunur (event_id, başlık ve flashcard'lar kalır), birleşen
+olaylardan boşta kalanlar silinir, bölünen parçalar yeni olay olur.
 """
 
-from typing import List, Dict
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Set
+from sqlalchemy import func, select, update
+
+from database.schema import Event, Item
 from .dbscan_clusterer import DBSCANClusterer
 from .refinement_clusterer import RefinementClusterer
 from .cover_photo_selector import CoverPhotoSelector
 
+_MONTHS = ("Ocak", "Şubat", "Mart", "Nisan", "Mayıs", "Haziran",
+           "Temmuz", "Ağustos", "Eylül", "Ekim", "Kasım", "Aralık")
+# SQLite parametre sınırının altında kalmak için IN listeleri parçalanır
+_IN_CHUNK = 500
+
 
 class EventClusterer:
     """
     Tüm kümeleme işlemlerini yönetir.
     """
-    
-    def __init__(self, db_connection, clip_embedder=None):
+
+    def __init__(self, db_connection, clip_embedder=None, geocoder=None):
         """
         Args:
             db_connection: Veritabanı bağlantısı
             clip_embedder: CLIP embedder (kapak fotoğrafı seçimi için)
+            geocoder: Olay konum adları için Geocoder (None ise yerel gazetteer)
         """
         self.db = db_connection
         self.clip_embedder = clip_embedder
+        self.geocoder = geocoder
         self.dbscan_clusterer = DBSCANClusterer()
         self.refinement_clusterer = RefinementClusterer()
         self.cover_selector = CoverPhotoSelector()
-    
+
     def cluster_all_items(self) -> List[Dict]:
         """
         Tüm öğeleri olaylara kümele.
-        
+
         Adımlar:
         1. DBSCAN ile zaman/konum bazlı kümeleme
-        2. Büyük kümeleri embedding bazlı bölme
-        3. Her küme için kapak fotoğrafı seçme
-        4. Veritabanına Events tablosuna kaydetme
-        
+        2. Sonucu mevcut olaylarla eşleştirip Events tablosuna yazma
+        3. Yeni/değişen olaylara konum adı ve başlık verme
+
         Returns:
-            Oluşturulan olayların listesi
+            Dokunulan olayların listesi (bkz. cluster_new_items)
         """
-        pass
-    
+        return self._recluster(self._item_rows())
+
+    def cluster_new_items(self, item_ids: Sequence[int]) -> List[Dict]:
+        """
+        Yeni item'ları mevcut olaylara artımlı yerleştir.
+
+        Yeni item'ların zaman aralığı, zaman eşiği kadar genişletilip bu
+        pencereye değen olayların tamamını kapsayana kadar büyütülür. Yalnızca
+        penceredeki item'lar yeniden kümelenir; pencere dışındaki olaylara
+        dokunulmaz. Yeni item'lar iki olayı birbirine bağlarsa olaylar
+        birleşir, bir olay artık tek küme değilse bölünür.
+
+        Args:
+            item_ids: Yeni eklenen item'lar (rızasızlar yok sayılır)
+
+        Returns:
+            [{'event_id', 'title', 'start_date', 'end_date', 'item_count',
+              'status': 'created' | 'updated' | 'deleted'}, ...]
+        """
+        item_ids = list(item_ids)
+        start = end = None
+        for i in range(0, len(item_ids), _IN_CHUNK):
+            lo, hi = self.db.query(
+                func.min(Item.creation_datetime), func.max(Item.creation_datetime)
+            ).filter(Item.has_consent == True, Item.item_id.in_(item_ids[i:i + _IN_CHUNK])).one()
+            if lo is not None:
+                start = lo if start is None else min(start, lo)
+                end = hi if end is None else max(end, hi)
+        if start is None:
+            return []
+
+        margin = timedelta(hours=self.dbscan_clusterer.time_threshold_hours)
+        while True:
+            touching = select(Item.event_id).where(
+                Item.has_consent == True,
+                Item.creation_datetime.between(start - margin, end + margin),
+                Item.event_id.isnot(None),
+            )
+            span_start, span_end = self.db.query(
+                func.min(Event.start_date), func.max(Event.end_date)
+            ).filter(Event.event_id.in_(touching)).one()
+            if span_start is None or (span_start >= start and span_end <= end):
+                break
+            start, end = min(start, span_start), max(end, span_end)
+
+        return self._recluster(self._item_rows(
+            Item.creation_datetime.between(start - margin, end + margin)))
+
     def create_events_from_clusters(self, clusters: List[List[int]]) -> List[int]:
         """
         Kümeleri Events tablosuna kaydet.
-        
+
         Args:
             clusters: Küme listesi (her küme item_id listesi)
-            
+
         Returns:
             Oluşturulan event_id'lerin listesi
         """
-        pass
-    
+        members = {item_id for cluster in clusters for item_id in cluster}
+        rows = {row.item_id: row for row in self._rows_by_ids(list(members))}
+        events = []
+        for cluster in clusters:
+            times = [rows[item_id].creation_datetime for item_id in cluster if item_id in rows]
+            if not times:
+                continue
+            event = Event(title="", start_date=min(times), end_date=max(times))
+            self.db.add(event)
+            self.db.flush()
+            self._assign_items({item_id: event.event_id for item_id in cluster if item_id in rows})
+            events.append(event)
+        self.db.commit()
+        self._name_events(events, {event.event_id: "" for event in events})
+        return [event.event_id for event in events]
+
     def generate_event_summary(self, cluster_items: List[int]) -> str:
         """
         Bir olay için otomatik özet oluştur.
-        
+
         Args:
             cluster_items: Olay içindeki item_id'ler
-            
+
         Returns:
             Özet metni
         """
         pass
-    
+
     def generate_event_name(self, cluster_items: List[int]) -> str:
         """
         Bir olay için otomatik isim oluştur.
-        
+
         Örnek: "15 Mart 2024 - İstanbul Taksim"
-        
+
         Args:
             cluster_items: Olay içindeki item_id'ler
-            
+
         Returns:
             Olay adı
         """
-        pass
+        rows = self._rows_by_ids(list(cluster_items))
+        if not rows:
+            return ""
+        from ..geo import Geocoder
+        location = (self.geocoder or Geocoder()).main_location(
+            [row.latitude for row in rows if row.latitude is not None],
+            [row.longitude for row in rows if row.latitude is not None],
+        )
+        return _event_name(rows[0].creation_datetime, rows[-1].creation_datetime, location)
+
+    # =================================================================
+    # Yardımcılar
+    # =================================================================
+
+    def _item_rows(self, *criteria) -> list:
+        """Kümelemeye giren (rızalı) item'ların gereken kolonları, zamana göre sıralı."""
+        return (self.db.query(Item.item_id, Item.creation_datetime, Item.latitude,
+                              Item.longitude, Item.event_id)
+                .filter(Item.has_consent == True, *criteria)
+                .order_by(Item.creation_datetime, Item.item_id).all())
+
+    def _rows_by_ids(self, item_ids: List[int]) -> list:
+        rows = []
+        for i in range(0, len(item_ids), _IN_CHUNK):
+            rows += self._item_rows(Item.item_id.in_(item_ids[i:i + _IN_CHUNK]))
+        return sorted(rows, key=lambda row: (row.creation_datetime, row.item_id))
+
+    def _recluster(self, rows: list) -> List[Dict]:
+        """Satırları DBSCAN ile kümeler ve sonucu bu satırların olaylarıyla uzlaştırır."""
+        if not rows:
+            return []
+        clusters = self.dbscan_clusterer.cluster_by_time_and_location([
+            {'item_id': row.item_id, 'created_at': row.creation_datetime,
+             'location_lat': row.latitude, 'location_lng': row.longitude}
+            for row in rows
+        ])
+        by_id = {row.item_id: row for row in rows}
+        old_members: Dict[int, Set[int]] = {}
+        for row in rows:
+            if row.event_id is not None:
+                old_members.setdefault(row.event_id, set()).add(row.item_id)
+        event_ids = list(old_members)
+        events = {event.event_id: event
+                  for i in range(0, len(event_ids), _IN_CHUNK)
+                  for event in self.db.query(Event).filter(Event.event_id.in_(event_ids[i:i + _IN_CHUNK]))}
+
+        # Büyük kümeler önce eşleşir: birleşmede büyük olayın kimliği korunur
+        assignment: Dict[int, int] = {}
+        touched: List[Event] = []
+        old_titles: Dict[int, str] = {}
+        statuses: Dict[int, str] = {}
+        sizes: Dict[int, int] = {}
+        for cluster in sorted(clusters, key=len, reverse=True):
+            overlap = Counter(by_id[item_id].event_id for item_id in cluster
+                              if by_id[item_id].event_id in events)
+            start = by_id[cluster[0]].creation_datetime
+            end = by_id[cluster[-1]].creation_datetime
+            if overlap:
+                event = events.pop(overlap.most_common(1)[0][0])
+                if set(cluster) == old_members[event.event_id] \
+                        and (event.start_date, event.end_date) == (start, end):
+                    continue
+                old_titles[event.event_id] = _event_name(event.start_date, event.end_date,
+                                                         event.main_location)
+                statuses[event.event_id] = "updated"
+                event.start_date, event.end_date = start, end
+            else:
+                event = Event(title="", start_date=start, end_date=end)
+                self.db.add(event)
+                self.db.flush()
+                old_titles[event.event_id] = ""
+                statuses[event.event_id] = "created"
+            touched.append(event)
+            sizes[event.event_id] = len(cluster)
+            assignment.update((item_id, event.event_id) for item_id in cluster
+                              if by_id[item_id].event_id != event.event_id)
+
+        # Eşleşmeyen eski olaylar birleşmiş veya dağılmıştır; item'ları kümesizse boşa çıkar
+        clustered = {item_id for cluster in clusters for item_id in cluster}
+        assignment.update((row.item_id, None) for row in rows
+                          if row.event_id is not None and row.item_id not in clustered)
+        self._assign_items(assignment)
+        removed = []
+        for event in events.values():
+            removed.append(_event_dict(event, 0, "deleted"))
+            self.db.delete(event)
+        self.db.commit()
+
+        self._name_events(touched, old_titles)
+        return [_event_dict(event, sizes[event.event_id], statuses[event.event_id])
+                for event in touched] + removed
+
+    def _assign_items(self, assignment: Dict[int, Optional[int]]):
+        """item_id -> event_id eşlemesini tek toplu UPDATE ile yazar."""
+        if assignment:
+            self.db.execute(update(Item), [{'item_id': item_id, 'event_id': event_id}
+                                           for item_id, event_id in assignment.items()])
+
+    def _name_events(self, events: List[Event], old_titles: Dict[int, str]):
+        """
+        Konum adı eksik olaylara konum verir; başlığı boş ya da eski otomatik
+        başlığıyla aynı olanları (kullanıcı değiştirmemişse) yeniden adlandırır.
+        """
+        if not events:
+            return
+        from ..geo import assign_main_locations
+        assign_main_locations(self.db, self.geocoder,
+                              event_ids=[event.event_id for event in events])
+        for event in events:
+            if event.title in ("", old_titles.get(event.event_id)):
+                event.title = _event_name(event.start_date, event.end_date, event.main_location)
+        self.db.commit()
+
+
+def _event_name(start: datetime, end: datetime, location: Optional[str] = None) -> str:
+    """'15 Mart 2024', '15-17 Mart 2024', '30 Mart - 2 Nisan 2024' (+ ' - konum')."""
+    if start.date() == end.date():
+        name = f"{start.day} {_MONTHS[start.month - 1]} {start.year}"
+    elif (start.year, start.month) == (end.year, end.month):
+        name = f"{start.day}-{end.day} {_MONTHS[start.month - 1]} {start.year}"
+    elif start.year == end.year:
+        name = f"{start.day} {_MONTHS[start.month - 1]} - {end.day} {_MONTHS[end.month - 1]} {end.year}"
+    else:
+        name = (f"{start.day} {_MONTHS[start.month - 1]} {start.year} - "
+                f"{end.day} {_MONTHS[end.month - 1]} {end.year}")
+    return f"{name} - {location}" if location else name
+
 
+def _event_dict(event: Event, item_count: int, status: str) -> Dict:
+    return {'event_id': event.event_id, 'title': event.title, 'start_date': event.start_date,
+            'end_date': event.end_date, 'item_count': item_count, 'status': status}
@@ -8,6 +8,7 @@ Ozetler Event.summary alanina encrypt_string() ile sifrelenerek yazilir.
 
 from typing import List, Dict, Optional
 from datetime import datetime
+from ..geo import Geocoder
 
 
 class Summarizer:
@@ -19,16 +20,19 @@ class Summarizer:
     - LLM-based (opsiyonel, API bagimliligi)
     """
 
-    def __init__(self, db_connection, encryption_manager=None, method: str = "template"):
+    def __init__(self, db_connection, encryption_manager=None, method: str = "template",
+                 geocoder: Optional[Geocoder] = None):
         """
         Args:
             db_connection: Veritabani baglantisi
             encryption_manager: Sifreleme yoneticisi (encrypt_string/decrypt_string icin)
             method: Ozet uretim yontemi ("template" veya "llm")
+            geocoder: Konum adlari icin cevrimdisi kodlayici (varsayilan: yerel gazetteer)
         """
         self.db = db_connection
         self.encryption_manager = encryption_manager
         self.method = method
+        self._geocoder = geocoder
 
     def summarize_event(self, event_id: int) -> str:
         """
@@ -107,14 +111,22 @@ class Summarizer:
     def extract_location_info(self, items: List[Dict]) -> Optional[str]:
         """
         Item listesinden en sik gecen konum bilgisini cikar.
+        Tum koordinatlar tek toplu ters sorguyla yerel gazetteer'den cozulur.
 
         Args:
             items: Item bilgileri listesi
 
         Returns:
-            Konum metni (ornek: "Istanbul, Kadikoy") veya None
-        """
-        pass
+            Konum metni (ornek: "Kadikoy, Istanbul") veya None
+        """
+        located = [item for item in items
+                   if item.get('lat') is not None and item.get('lng') is not None]
+        if not located:
+            return None
+        if self._geocoder is None:
+            self._geocoder = Geocoder()
+        return self._geocoder.main_location([item['lat'] for item in located],
+                                            [item['lng'] for item in located])
 
     def summarize_all_events(self) -> int:
         """
@@ -7,6 +7,8 @@ Fotoğraf ve metinler için embedding vektörleri üretir.
 from .clip_embedder import CLIPEmbedder
 from .sbert_embedder import SBERTEmbedder
 from .faiss_manager import FaissManager
+from .query_cache import QueryEmbeddingCache
+from .embedding_store import EmbeddingStore
 
-__all__ = ['CLIPEmbedder', 'SBERTEmbedder', 'FaissManager']
+__all__ = ['CLIPEmbedder', 'SBERTEmbedder', 'FaissManager', 'QueryEmbeddingCache', 'EmbeddingStore']
 
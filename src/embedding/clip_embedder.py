@@ -1,6 +1,7 @@
 import io
 import logging
 from pathlib import Path
+from concurrent.futures import Executor
 from typing import List, Optional, Union
 import numpy as np
 from PIL import Image
@@ -8,6 +9,7 @@ from sentence_transformers import SentenceTransformer
 import torch
 from security.encryption_manager import EncryptionManager
 from config import Config
+from .query_cache import QueryEmbeddingCache
 
 logger = logging.getLogger(__name__)
 
@@ -17,17 +19,21 @@ class CLIPEmbedder:
     Görsel encode: clip-ViT-B-32 (orijinal CLIP)
     Metin encode: clip-ViT-B-32-multilingual-v1 (68 dil destekli)
     Her iki model de aynı 512 boyutlu uzaya iz düşürür.
+    query_cache verilirse metin embedding'leri cache'lenir (tekrarlanan aramalar
+    modeli çalıştırmaz).
     """
 
     def __init__(self, image_model: str = Config.CLIP_IMAGE_MODEL,
                  text_model: str = Config.CLIP_TEXT_MODEL,
                  encryption_manager: EncryptionManager = None,
-                 batch_size: int = Config.CLIP_BATCH_SIZE):
+                 batch_size: int = Config.CLIP_BATCH_SIZE,
+                 query_cache: Optional[QueryEmbeddingCache] = None):
         self.image_model_name = image_model
         self.text_model_name = text_model
         self.image_model = None
         self.text_model = None
         self.batch_size = batch_size
+        self.query_cache = query_cache
         self.encryptor = encryption_manager or EncryptionManager()
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
 
@@ -44,17 +50,15 @@ class CLIPEmbedder:
             self.text_model = SentenceTransformer(self.text_model_name, device=self.device)
     
     def _open_image(self, image_path: Path) -> Optional[Image.Image]:
-        """Fotoğrafı açar. Şifreliyse önce çözer, değilse direkt açar."""
+        """Fotoğrafı açar. Şifreliyse (başlıktan anlaşılır) önce çözer, değilse direkt açar."""
         try:
-            return Image.open(image_path)
+            if not self.encryptor.is_encrypted(str(image_path)):
+                return Image.open(image_path)
+            decrypted_bytes = self.encryptor.decrypt_file(str(image_path))
+            if decrypted_bytes:
+                return Image.open(io.BytesIO(decrypted_bytes))
         except Exception:
-            # Dosya şifreli olabilir, decrypt edip tekrar dene
-            try:
-                decrypted_bytes = self.encryptor.decrypt_file(str(image_path))
-                if decrypted_bytes:
-                    return Image.open(io.BytesIO(decrypted_bytes))
-            except Exception:
-                pass
+            pass
         return None
 
     def encode_image(self, image_path: Path) -> Optional[np.ndarray]:
@@ -81,37 +85,105 @@ class CLIPEmbedder:
             logger.error(f"Fotoğraf vektöre çevrilemedi ({image_path.name}) -> {e}")
             return None
 
-    def encode_images_batch(self, image_paths: List[Path]) -> np.ndarray:
+    def encode_images(self, image_paths: List[Path],
+                      executor: Optional[Executor] = None) -> List[Optional[np.ndarray]]:
         """
-        Birden fazla fotoğraf için toplu (batch) embedding üretir.
+        Fotoğrafları batch_size'lık mikro-batch'ler halinde encode eder.
+        Sonuç listesi girdi sırasıyla hizalıdır; açılamayan veya encode
+        edilemeyen fotoğraflar için ilgili konumda None döner.
+        executor (thread pool) verilirse şifre çözme ve decode paralel yapılır.
         """
+        results: List[Optional[np.ndarray]] = [None] * len(image_paths)
         if not image_paths:
-            return np.array([], dtype='float32')
+            return results
 
         self._load_image_model()
 
+        for start in range(0, len(image_paths), self.batch_size):
+            positions, images = [], []
+            batch = range(start, min(start + self.batch_size, len(image_paths)))
+            paths = [image_paths[pos] for pos in batch]
+            decoded = executor.map(self._decode_image, paths) if executor else map(self._decode_image, paths)
+            for pos, img in zip(batch, decoded):
+                if img is not None:
+                    positions.append(pos)
+                    images.append(img)
+            if not images:
+                continue
+
+            try:
+                embeddings = self.image_model.encode(
+                    images,
+                    batch_size=self.batch_size,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True
+                ).astype('float32')
+                for pos, embedding in zip(positions, embeddings):
+                    results[pos] = embedding
+            except Exception as e:
+                # Batch bozulduysa hatalı fotoğrafı bulmak için tek tek dene
+                logger.warning(f"Toplu CLIP encode başarısız, tek tek deneniyor -> {e}")
+                for pos, img in zip(positions, images):
+                    results[pos] = self._encode_decoded(img, image_paths[pos])
+
+        return results
+
+    def _decode_image(self, image_path: Path) -> Optional[Image.Image]:
+        """Fotoğrafı açıp RGB olarak belleğe çözer (batch encode için)."""
+        if not image_path.exists():
+            return None
+        img = self._open_image(image_path)
+        if img is None:
+            logger.warning(f"Fotoğraf açılamadı, atlanıyor: {image_path.name}")
+            return None
+        try:
+            return img.convert("RGB")
+        except Exception as e:
+            logger.warning(f"Fotoğraf çözülemedi ({image_path.name}) -> {e}")
+            return None
+
+    def _encode_decoded(self, img: Image.Image, image_path: Path) -> Optional[np.ndarray]:
+        """Çözülmüş tek bir görüntüyü encode eder; hata olursa None döner."""
         try:
-            images = [img for p in image_paths if p.exists() for img in [self._open_image(p)] if img is not None]
-            embeddings = self.image_model.encode(
-                images,
-                batch_size=self.batch_size,
-                show_progress_bar=True,
+            embedding = self.image_model.encode(
+                img,
                 convert_to_numpy=True,
                 normalize_embeddings=True
             )
-            return embeddings.astype('float32')
+            return embedding.astype('float32')
         except Exception as e:
-            logger.error(f"Toplu fotoğraf işleme başarısız -> {e}")
+            logger.error(f"Fotoğraf vektöre çevrilemedi ({image_path.name}) -> {e}")
+            return None
+
+    def encode_images_batch(self, image_paths: List[Path]) -> np.ndarray:
+        """
+        Birden fazla fotoğraf için toplu (batch) embedding üretir.
+        Sadece başarılı fotoğrafların vektörlerini (N, D) matris olarak döner;
+        path ile hizalı sonuç gerekiyorsa encode_images kullanılmalıdır.
+        """
+        embeddings = [e for e in self.encode_images(image_paths) if e is not None]
+        skipped = len(image_paths) - len(embeddings)
+        if skipped:
+            logger.warning(f"Toplu encode: {skipped} fotoğraf atlandı")
+        if not embeddings:
             return np.array([], dtype='float32')
+        return np.vstack(embeddings)
 
     def encode_text(self, text: str) -> Optional[np.ndarray]:
         """
         Arama metni için embedding üretir (multilingual — 68 dil destekli).
         Türkçe, İngilizce ve diğer dillerde arama yapılabilir.
         """
+        # Cache anahtarı ile modele verilen metin aynı olsun diye önce normalize edilir
+        text = QueryEmbeddingCache.normalize_query(text) if text else text
         if not text:
             return None
 
+        if self.query_cache is not None:
+            cached = self.query_cache.get(self.text_model_name, text)
+            if cached is not None:
+                return cached
+
         self._load_text_model()
 
         try:
@@ -119,8 +191,10 @@ class CLIPEmbedder:
                 text,
                 convert_to_numpy=True,
                 normalize_embeddings=True
-            )
-            return embedding.astype('float32')
+            ).astype('float32')
+            if self.query_cache is not None:
+                self.query_cache.put(self.text_model_name, text, embedding)
+            return embedding
         except Exception as e:
             logger.error(f"Metin vektöre çevrilemedi -> {e}")
             return None
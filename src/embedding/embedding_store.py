@@ -0,0 +1,177 @@
+"""
+Kalıcı Embedding Deposu
+
+Import sırasında üretilen CLIP vektörlerini fotoğrafların dosya hash'i ile
+anahtarlayarak diskte saklar. Reindex ve IVF-PQ index'inin yeniden kurulması
+fotoğrafları çözüp yeniden encode etmeden bu depodan beslenir.
+"""
+
+import os
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingStore:
+    """
+    Vektörler başlıksız, append-only bir matris dosyasında (.vectors, varsayılan
+    float16) tutulur ve okunurken memory-map edilir. Hangi satırın hangi
+    dosya hash'ine, item_id'ye ve model sürümüne ait olduğu yanındaki küçük
+    SQLite tablosunda (.db) saklanır.
+
+    Aynı dosya hash'i + model için vektör bir kez yazılır; item tekrar import
+    edilirse sadece item_id güncellenir. Silinen item'ların satırları sıfırlanır.
+    """
+
+    def __init__(self, path: str = Config.EMBEDDING_STORE_PATH, dimension: int = 512,
+                 model_version: str = Config.CLIP_IMAGE_MODEL,
+                 dtype: str = Config.EMBEDDING_STORE_DTYPE):
+        base = Path(path)
+        base.parent.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = base.with_suffix('.vectors')
+        self.table_path = base.with_suffix('.db')
+        self.dimension = dimension
+        self.model_version = model_version
+        self.dtype = np.dtype(dtype)
+        self._row_bytes = self.dimension * self.dtype.itemsize
+        self._lock = threading.RLock()
+        self._memmap = None
+
+        self._db = sqlite3.connect(str(self.table_path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "row INTEGER PRIMARY KEY, file_hash TEXT NOT NULL, model TEXT NOT NULL, "
+            "item_id INTEGER, UNIQUE (file_hash, model))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_item ON embeddings (item_id)")
+        self._db.commit()
+
+    def _row_count(self) -> int:
+        """Matris dosyasındaki tam satır sayısı (yarım kalmış son satır sayılmaz)."""
+        if not self.vectors_path.exists():
+            return 0
+        return self.vectors_path.stat().st_size // self._row_bytes
+
+    def _matrix(self) -> Optional[np.memmap]:
+        """Matris dosyasının güncel boyutta memory-map'i (boşsa None)."""
+        rows = self._row_count()
+        if rows == 0:
+            return None
+        if self._memmap is None or self._memmap.shape[0] != rows:
+            self._memmap = np.memmap(self.vectors_path, dtype=self.dtype, mode='r',
+                                     shape=(rows, self.dimension))
+        return self._memmap
+
+    def put_many(self, file_hashes: List[str], item_ids: List[int], vectors: np.ndarray) -> int:
+        """
+        Vektörleri depoya yazar. Zaten kayıtlı (hash + model) satırlar için
+        vektör tekrar yazılmaz, sadece item_id güncellenir. Yeni yazılan satır sayısını döner.
+        """
+        vectors = np.asarray(vectors, dtype='float32').reshape(-1, self.dimension)
+        with self._lock:
+            existing = {
+                file_hash: row for file_hash, row in self._db.execute(
+                    f"SELECT file_hash, row FROM embeddings WHERE model = ? "
+                    f"AND file_hash IN ({','.join('?' * len(file_hashes))})",
+                    [self.model_version, *file_hashes],
+                )
+            }
+            new = [i for i, file_hash in enumerate(file_hashes) if file_hash not in existing]
+            # Aynı çağrıda tekrarlanan hash'ler tek satır olsun
+            seen = set()
+            new = [i for i in new if not (file_hashes[i] in seen or seen.add(file_hashes[i]))]
+
+            if new:
+                start = self._row_count()
+                # Yarım kalmış son satır varsa üzerine yazılır (satır numaraları kaymasın)
+                with open(self.vectors_path, 'ab') as f:
+                    f.truncate(start * self._row_bytes)
+                    f.write(vectors[new].astype(self.dtype).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._db.executemany(
+                    "INSERT INTO embeddings (row, file_hash, model, item_id) VALUES (?, ?, ?, ?)",
+                    [(start + n, file_hashes[i], self.model_version, int(item_ids[i]))
+                     for n, i in enumerate(new)],
+                )
+            self._db.executemany(
+                "UPDATE embeddings SET item_id = ? WHERE row = ?",
+                [(int(item_ids[i]), existing[file_hashes[i]])
+                 for i in range(len(file_hashes)) if file_hashes[i] in existing],
+            )
+            self._db.commit()
+        return len(new)
+
+    def put(self, file_hash: str, item_id: int, vector: np.ndarray) -> int:
+        return self.put_many([file_hash], [item_id], vector)
+
+    def get(self, file_hash: str) -> Optional[np.ndarray]:
+        """Dosya hash'ine ait vektörü (float32) döner; yoksa None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT row FROM embeddings WHERE file_hash = ? AND model = ?",
+                (file_hash, self.model_version),
+            ).fetchone()
+            if row is None:
+                return None
+            return np.array(self._matrix()[row[0]], dtype='float32')
+
+    def load(self, item_ids: Optional[Iterable[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (item_ids, vectors) döner; vektörler float32 (n, dimension) matrisidir.
+        item_ids verilmezse bu modelin item'a bağlı tüm vektörleri okunur.
+        Depo rıza iptalinde vektörü tutar; bu yüzden FaissManager bunu yalnızca
+        index'te canlı olan item'lar için vector_source olarak çağırır.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT row, item_id FROM embeddings WHERE model = ? AND item_id IS NOT NULL ORDER BY row",
+                (self.model_version,),
+            ).fetchall()
+            if item_ids is not None:
+                wanted = set(item_ids)
+                rows = [r for r in rows if r[1] in wanted]
+            if not rows:
+                return np.zeros(0, dtype='int64'), np.zeros((0, self.dimension), dtype='float32')
+            matrix = self._matrix()
+            vectors = np.asarray(matrix[[r[0] for r in rows]], dtype='float32')
+            return np.array([r[1] for r in rows], dtype='int64'), vectors
+
+    def remove_items(self, item_ids: Iterable[int]) -> int:
+        """Item'ların vektörlerini sıfırlar ve kayıtlarını siler (kalıcı silme)."""
+        item_ids = [int(i) for i in item_ids]
+        if not item_ids:
+            return 0
+        with self._lock:
+            rows = [r[0] for r in self._db.execute(
+                f"SELECT row FROM embeddings WHERE item_id IN ({','.join('?' * len(item_ids))})",
+                item_ids,
+            )]
+            if not rows:
+                return 0
+            self._memmap = None
+            matrix = np.memmap(self.vectors_path, dtype=self.dtype, mode='r+',
+                               shape=(self._row_count(), self.dimension))
+            matrix[rows] = 0
+            matrix.flush()
+            del matrix
+            self._db.execute(
+                f"DELETE FROM embeddings WHERE row IN ({','.join('?' * len(rows))})", rows
+            )
+            self._db.commit()
+        logger.info(f"Embedding deposundan {len(rows)} vektör silindi.")
+        return len(rows)
+
+    def count(self) -> int:
+        """Bu modelin item'a bağlı vektör sayısı."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM embeddings WHERE model = ? AND item_id IS NOT NULL",
+                (self.model_version,),
+            ).fetchone()[0]
@@ -1,9 +1,13 @@
+import os
+import json
+import time
 import logging
+import threading
 import faiss
 import numpy as np
 import pickle
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Callable, Iterable, List, Optional, Set, Tuple
 from config import Config
 
 logger = logging.getLogger(__name__)
@@ -12,100 +16,697 @@ class FaissManager:
     """
     Vektör arama motoru. Embedding'leri saklar ve anlamsal benzerlik
     araması yaparak en yakın sonuçları (Item ID bazlı) döndürür.
+
+    Item ID'leri FAISS'in içinde tutulur (IndexIDMap2): arama sonuçları doğrudan
+    item_id döner.
+
+    Vektörler L2 normalize saklanır ve iç çarpım (METRIC_INNER_PRODUCT) ile
+    aranır: search doğrudan cosine benzerlik skoru döner (yüksek = daha benzer).
+    Eski L2 index'ler olduğu gibi yüklenir (skorlar cosine'e çevrilir) ve
+    migrate_metric ile iç çarpım index'ine dönüştürülür.
+
+    Index katmanları (index_type="auto"): koleksiyon büyüdükçe Flat -> HNSW -> IVF-PQ'ya
+    arka planda yeniden kurularak geçilir (rebuild + atomik swap); her geçişte yeni
+    index'in Flat'e göre recall@k değeri ölçülüp index_stats'a yazılır.
+
+    Silme tombstone ile yapılır: remove_embeddings vektörü hemen aramadan çıkarır
+    (IDSelector ile), fiziksel silme ise tombstone oranı compact_ratio'yu geçince
+    arka planda index yeniden kurularak (compaction) yapılır.
+
+    Index'te zaten olan bir item_id tekrar eklenirse (vektör güncelleme, rıza
+    yeniden verilince reindex, SQLite'ın item_id'yi yeniden kullanması) eski
+    vektör Flat'te remove_ids ile hemen silinir. Silme desteklemeyen HNSW ve
+    IVF-PQ'da eski kopya index'te kalır (gölge kopya): IDMap2.reconstruct her
+    zaman son eklenen vektörü döndüğü için aday sonuçlar bu vektörle yeniden
+    skorlanır ve tekilleştirilir; gölge kopyalar compaction'da çıkarılır.
+
+    IVF-PQ kayıplıdır: vector_source (örn. EmbeddingStore.load) verilirse bu
+    index yeniden kurulurken vektörler index'ten değil kaynaktan (orijinaller)
+    alınır. Kaynak yalnızca vektör sağlar; hangi item'ların index'te olacağı
+    her zaman index'in kendisinden (tombstone'lar hariç) belirlenir.
+
+    Kalıcılık write-behind çalışır: add_embeddings index'i her seferinde diske
+    yazmaz, yeni vektörleri küçük bir append-only journal'a ekler. Index,
+    save_every vektör birikince veya save_interval saniye geçince (ya da
+    flush() çağrılınca) yazılır; journal load_index sırasında yeniden oynatılır.
     """
-    
+
+    # Journal kaydı: item_id (int64) + dimension adet float32
+    _JOURNAL_HEADER = np.dtype([('item_id', '<i8')])
+    # Eski (IDMap öncesi) journal kaydı: faiss_id + item_id + vektör
+    _LEGACY_JOURNAL_HEADER = np.dtype([('faiss_id', '<i8'), ('item_id', '<i8')])
+    # Küçükten büyüğe index katmanları
+    TIERS = ("flat", "hnsw", "ivfpq")
+
     def __init__(self, index_path: str, dimension: int, index_type: str = "flat",
-                 hnsw_neighbors: int = Config.HNSW_NEIGHBORS):
+                 hnsw_neighbors: int = Config.HNSW_NEIGHBORS,
+                 save_every: int = Config.FAISS_SAVE_EVERY,
+                 save_interval: float = Config.FAISS_SAVE_INTERVAL,
+                 compact_ratio: float = Config.FAISS_COMPACT_RATIO,
+                 exact_filter_limit: int = Config.FAISS_EXACT_FILTER_LIMIT,
+                 vector_source: Optional[Callable[[Iterable[int]], Tuple[np.ndarray, np.ndarray]]] = None):
         # Index dosyasının yolu (Örn: database/vector_index.faiss)
         self.index_path = Path(index_path)
+        self.journal_path = self.index_path.with_suffix('.journal')
+        self.tombstone_path = self.index_path.with_suffix('.tombstones')
+        self.stats_path = self.index_path.with_suffix('.stats.json')
         self.dimension = dimension
-        self.index_type = index_type.lower()
+        # "auto": tip koleksiyon boyutuna göre seçilir ve büyüdükçe yükseltilir
+        self.auto_tier = index_type.lower() == "auto"
+        self.index_type = self.tier_for(0) if self.auto_tier else index_type.lower()
         self.hnsw_neighbors = hnsw_neighbors
         self.index = None
-        # Faiss ID -> Database Item ID eşleşmesi
-        self.id_to_item_id = {} 
+
+        # Write-behind durumu: diske yazılmamış değişiklik var mı?
+        self.save_every = save_every
+        self.save_interval = save_interval
+        self.dirty = False
+        self._pending = 0
+        self._last_save = time.monotonic()
+        self._lock = threading.RLock()
+
+        # Tombstone durumu: silinmiş ama index'ten henüz fiziksel çıkarılmamış item_id'ler
+        self.tombstones: Set[int] = set()
+        self.compact_ratio = compact_ratio
+        self.exact_filter_limit = exact_filter_limit
+        self._tombstone_params = None
+        # Yeni vektörü eklenmiş item'ların index'te kalan eski kopyalarının sayısı
+        self._stale = 0
+
+        # Yeniden kurma (compaction / katman yükseltme) durumu
+        self._rebuild_lock = threading.Lock()
+        self._rebuild_thread: Optional[threading.Thread] = None
+        # Rebuild sırasında gelen eklemeler (yeni index'e de uygulanır)
+        self._rebuild_log: Optional[List[Tuple[np.ndarray, np.ndarray]]] = None
+        # item_id'ler -> (item_ids, orijinal vektörler); kayıplı index'in rebuild'inde kullanılır
+        self.vector_source = vector_source
+        self.index_stats = {}
 
         # Klasör yoksa oluştur
         self.index_path.parent.mkdir(parents=True, exist_ok=True)
 
-        if self.index_path.exists():
+        if self.index_path.exists() or self.journal_path.exists():
             self.load_index()
         else:
             self.create_index()
+        self._load_tombstones()
+        self._stale = self._count_stale(self.index)
+        if self.stats_path.exists():
+            self.index_stats = json.loads(self.stats_path.read_text())
+        # Eski L2 index'in dönüşümü tüm index'i yeniden kurar; burada (çağıranın
+        # thread'inde) yapılmaz, bkz. migrate_metric. O zamana kadar skorlar L2'den çevrilir.
+        self._maybe_promote()
 
-    def create_index(self):
-        """Yeni bir boş Faiss index oluşturur."""
-        if self.index_type == "hnsw":
+    def _is_inner_product(self) -> bool:
+        return faiss.downcast_index(self.index.index).metric_type == faiss.METRIC_INNER_PRODUCT
+
+    def needs_migration(self) -> bool:
+        """Index eski L2 metriğinde mi (iç çarpım index'ine dönüştürülmeli mi)?"""
+        with self._lock:
+            return not self._is_inner_product()
+
+    def migrate_metric(self, cancel: Optional[threading.Event] = None) -> dict:
+        """
+        Eski L2 index'i aynı katmanda iç çarpım (cosine) index'ine tek seferlik
+        dönüştürür. Tüm index yeniden kurulduğu için uzun sürebilir; API bunu
+        başlangıçta arka plan işi olarak çalıştırır. Rebuild raporunu, dönüşüm
+        gerekmiyorsa ya da cancel ile yarıda bırakıldıysa boş sözlük döner
+        (index değişmez, sonraki açılışta yeniden denenir).
+        """
+        if not self.needs_migration():
+            return {}
+        logger.info("L2 Faiss index iç çarpım (cosine) index'ine dönüştürülüyor...")
+        return self.rebuild(cancel=cancel)
+
+    @staticmethod
+    def _prepare(vectors: np.ndarray) -> np.ndarray:
+        """
+        Vektörleri FAISS için (n, d) float32 ve birim uzunluklu hale getirir.
+        CLIP/SBERT çıktıları zaten normalize olduğundan bu durumda kopya yapılmaz.
+        """
+        vectors = np.ascontiguousarray(vectors, dtype='float32')
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        norms = np.einsum('ij,ij->i', vectors, vectors)
+        if not np.allclose(norms, 1.0, atol=1e-4):
+            # PDF GEREKSİNİMİ: L2 Normalizasyonu (Cosine Similarity için şart)
+            vectors = vectors.copy()
+            faiss.normalize_L2(vectors)
+        return vectors
+
+    def _record_dtype(self, header: np.dtype) -> np.dtype:
+        return np.dtype(header.descr + [('vector', '<f4', (self.dimension,))])
+
+    @staticmethod
+    def tier_for(size: int) -> str:
+        """Koleksiyon boyutuna göre kullanılacak index tipi."""
+        if size >= Config.FAISS_IVFPQ_THRESHOLD:
+            return "ivfpq"
+        if size >= Config.FAISS_HNSW_THRESHOLD:
+            return "hnsw"
+        return "flat"
+
+    def _create_base_index(self, index_type: Optional[str] = None, size: int = 0):
+        """
+        ID eşlemesi olmayan ham index'i oluşturur.
+        IVF-PQ eğitilmiş olarak kullanılmalıdır; liste sayısı size'a göre seçilir.
+        """
+        index_type = index_type or self.index_type
+        if index_type == "ivfpq":
+            # IVF-PQ: Vektörleri sıkıştırır, milyonlarca vektörde bellek ve hız sağlar.
+            nlist = int(np.clip(4 * np.sqrt(size), 1, max(1, size // 39)))
+            subquantizers = max(1, self.dimension // Config.FAISS_PQ_SUBVECTOR_DIM)
+            index = faiss.IndexIVFPQ(faiss.IndexFlatIP(self.dimension), self.dimension, nlist,
+                                     subquantizers, 8, faiss.METRIC_INNER_PRODUCT)
+            index.nprobe = min(Config.FAISS_IVF_NPROBE, nlist)
+            # IDMap2.reconstruct ve compaction için doğrudan erişim tablosu
+            index.make_direct_map()
+            logger.info(f"IVF-PQ Faiss index oluşturuldu (Boyut: {self.dimension}, nlist: {nlist})")
+            return index
+        if index_type == "hnsw":
             # HNSW: Büyük veri setlerinde çok hızlı arama sağlar.
-            self.index = faiss.IndexHNSWFlat(self.dimension, self.hnsw_neighbors)
             logger.info(f"HNSW Faiss index oluşturuldu (Boyut: {self.dimension})")
-        else:
-            # FlatL2: En hassas, kaba kuvvet arama (Küçük veri setleri için ideal).
-            self.index = faiss.IndexFlatL2(self.dimension)
-            logger.info(f"FlatL2 Faiss index oluşturuldu (Boyut: {self.dimension})")
+            return faiss.IndexHNSWFlat(self.dimension, self.hnsw_neighbors, faiss.METRIC_INNER_PRODUCT)
+        # FlatIP: En hassas, kaba kuvvet arama (Küçük veri setleri için ideal).
+        logger.info(f"FlatIP Faiss index oluşturuldu (Boyut: {self.dimension})")
+        return faiss.IndexFlatIP(self.dimension)
+
+    def create_index(self):
+        """Yeni bir boş Faiss index oluşturur (item_id'ler index içinde saklanır)."""
+        self.index = faiss.IndexIDMap2(self._create_base_index())
 
     def load_index(self):
-        """Index'i ve ID haritasını yükler."""
+        """Index'i yükler, ardından journal'daki bekleyen vektörleri ekler."""
         try:
-            self.index = faiss.read_index(str(self.index_path))
-            map_path = self.index_path.with_suffix('.pkl')
-            if map_path.exists():
-                with open(map_path, 'rb') as f:
-                    self.id_to_item_id = pickle.load(f)
-            logger.info("Mevcut Faiss index başarıyla yüklendi.")
+            if self.index_path.exists():
+                index = faiss.read_index(str(self.index_path))
+                if isinstance(index, faiss.IndexIDMap2):
+                    self.index = index
+                    self.index_type = self._detect_index_type()
+                    logger.info(f"Mevcut Faiss index başarıyla yüklendi ({self.index_type}).")
+                else:
+                    # Eski format: ham index + .pkl sözlüğü -> tek seferlik dönüşüm
+                    self._migrate_legacy_index(index)
+                    return
+            else:
+                self.create_index()
         except Exception as e:
             logger.warning(f"Yükleme hatası: {e}. Yeni index açılıyor.")
             self.create_index()
+        self._replay_journal()
 
-    def save_index(self):
-        """Verileri diske kalıcı olarak yazar."""
-        faiss.write_index(self.index, str(self.index_path))
+    def _detect_index_type(self) -> str:
+        """Yüklenen index'in katmanını ham index tipinden belirler."""
+        base = faiss.downcast_index(self.index.index)
+        if isinstance(base, faiss.IndexIVF):
+            return "ivfpq"
+        if isinstance(base, faiss.IndexHNSW):
+            return "hnsw"
+        return "flat"
+
+    def _migrate_legacy_index(self, legacy_index):
+        """
+        Eski .faiss + .pkl çiftini IndexIDMap2 formatına çevirir.
+        Vektörler ham index'ten geri okunur, item_id'ler pickle sözlüğünden alınır.
+        """
         map_path = self.index_path.with_suffix('.pkl')
-        with open(map_path, 'wb') as f:
-            pickle.dump(self.id_to_item_id, f)
-
-    def add_embeddings(self, embeddings: np.ndarray, item_ids: List[int]):
-        """Yeni vektörleri ekler ve normalizasyon yapar."""
-        # Veri tipini Faiss için float32'ye zorla
-        embeddings = embeddings.astype('float32')
-        
-        # 2D array kontrolü
-        if embeddings.ndim == 1:
-            embeddings = embeddings.reshape(1, -1)
-
-        # PDF GEREKSİNİMİ: L2 Normalizasyonu (Cosine Similarity için şart)
-        faiss.normalize_L2(embeddings)
-
-        start_id = self.index.ntotal
-        self.index.add(embeddings)
-
-        # ID Eşleşmelerini Güncelle
-        for i, item_id in enumerate(item_ids):
-            self.id_to_item_id[start_id + i] = item_id
-        
+        id_to_item_id = {}
+        if map_path.exists():
+            with open(map_path, 'rb') as f:
+                id_to_item_id = pickle.load(f)
+
+        total = legacy_index.ntotal
+        vectors = legacy_index.reconstruct_n(0, total) if total else np.zeros((0, self.dimension), 'float32')
+        item_ids = [id_to_item_id.get(i) for i in range(total)]
+
+        # Eski journal'da kalmış (kaydedilmemiş) vektörler de taşınır
+        if self.journal_path.exists():
+            records = self._read_journal(self._LEGACY_JOURNAL_HEADER)
+            records = records[records['faiss_id'] >= total]
+            vectors = np.vstack([vectors, records['vector']])
+            item_ids += [int(i) for i in records['item_id']]
+
+        keep = [i for i, item_id in enumerate(item_ids) if item_id is not None]
+        self.create_index()
+        if keep:
+            self.index.add_with_ids(
+                np.ascontiguousarray(vectors[keep], dtype='float32'),
+                np.array([item_ids[i] for i in keep], dtype='int64'),
+            )
         self.save_index()
-        return list(range(start_id, self.index.ntotal))
-
-    def search(self, query_embedding: np.ndarray, k: int = 10) -> List[Tuple[int, float]]:
-        """Sorgu vektörüne en benzer sonuçları bulur."""
-        # Sorgu vektörünü hazırla ve normalize et
-        query_embedding = query_embedding.astype('float32')
-        if query_embedding.ndim == 1:
-            query_embedding = query_embedding.reshape(1, -1)
-        
-        faiss.normalize_L2(query_embedding)
-
-        # Arama yap
-        distances, indices = self.index.search(query_embedding, k)
-
-        results = []
-        for dist, f_id in zip(distances[0], indices[0]):
-            if f_id != -1: # -1: Sonuç bulunamadı bayrağı
-                item_id = self.id_to_item_id.get(f_id)
-                # Küçük dist (mesafe) = Yüksek benzerlik
-                results.append((item_id, float(dist)))
-        
-        return results
+        map_path.unlink(missing_ok=True)
+        logger.info(f"Eski Faiss index IDMap formatına taşındı ({len(keep)} vektör).")
+
+    def save_index(self):
+        """Verileri diske kalıcı olarak yazar ve journal'ı sıfırlar."""
+        with self._lock:
+            # Önce geçici dosyaya yaz, sonra atomik olarak değiştir (yarım dosya kalmasın)
+            tmp_path = self.index_path.with_suffix('.faiss.tmp')
+            faiss.write_index(self.index, str(tmp_path))
+            os.replace(tmp_path, self.index_path)
+
+            # Index diskte: journal'daki kayıtlar artık gereksiz
+            if self.journal_path.exists():
+                self.journal_path.unlink()
+            self.dirty = False
+            self._pending = 0
+            self._last_save = time.monotonic()
+
+    def flush(self):
+        """Bekleyen değişiklik varsa index'i hemen diske yazar."""
+        with self._lock:
+            if self.dirty:
+                self.save_index()
+                logger.info(f"Faiss index diske yazıldı ({self.get_index_size()} vektör).")
+
+    def _append_journal(self, embeddings: np.ndarray, item_ids: np.ndarray):
+        """Yeni vektörleri journal dosyasının sonuna ekler (crash sonrası kurtarma için)."""
+        records = np.zeros(len(item_ids), dtype=self._record_dtype(self._JOURNAL_HEADER))
+        records['item_id'] = item_ids
+        records['vector'] = embeddings
+        with open(self.journal_path, 'ab') as f:
+            f.write(records.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _read_journal(self, header: np.dtype) -> np.ndarray:
+        """Journal'ı okur; yarım kalmış son kayıt (crash anında yazılıyordu) atlanır."""
+        dtype = self._record_dtype(header)
+        data = self.journal_path.read_bytes()
+        usable = len(data) - len(data) % dtype.itemsize
+        return np.frombuffer(data[:usable], dtype=dtype)
+
+    def _replay_journal(self):
+        """Son kayıttan sonra journal'a yazılmış vektörleri index'e geri ekler."""
+        if not self.journal_path.exists():
+            return
+        records = self._read_journal(self._JOURNAL_HEADER)
+        # Index kaydedildi ama journal silinemediyse aynı vektörler tekrar eklenmesin;
+        # index'te farklı vektörü olan ID'ler güncellemedir ve yeniden eklenir
+        records = records[[not self._holds(int(i), vector)
+                            for i, vector in zip(records['item_id'], records['vector'])]]
+        if len(records) == 0:
+            return
+
+        self._insert(self.index, np.ascontiguousarray(records['vector']),
+                     np.ascontiguousarray(records['item_id']))
+        self.dirty = True
+        self._pending = len(records)
+        logger.info(f"Journal'dan {len(records)} vektör geri yüklendi.")
+
+    def add_embeddings(self, embeddings: np.ndarray, item_ids: List[int]) -> List[int]:
+        """
+        Yeni vektörleri ekler (normalize değilse normalize edilir).
+        FAISS ID'si item_id'nin kendisidir; eklenen ID'leri döner.
+
+        ID'si index'te zaten olan (canlı ya da tombstone'lu) item'ın vektörü
+        değiştirilir: eski vektör silinir ya da gölge kopya olarak kalır (bkz.
+        sınıf açıklaması); index yeniden kurulmaz. Eski vektör aramada bu item
+        adına dönseydi (SQLite silinen en büyük item_id'yi yeniden kullanır)
+        başka bir fotoğrafın içeriği eşleşirdi.
+        """
+        embeddings = self._prepare(embeddings)
+        ids = np.asarray(item_ids, dtype='int64')
+
+        with self._lock:
+            self._append_journal(embeddings, ids)
+            self._stale += self._insert(self.index, embeddings, ids)
+            if self._rebuild_log is not None:
+                self._rebuild_log.append((embeddings, ids))
+            # Tekrar eklenen item'lar artık silinmiş değil (journal'dan sonra yazılır)
+            revived = self.tombstones.intersection(ids.tolist())
+            if revived:
+                self.tombstones -= revived
+                self._tombstone_params = None
+                self._write_tombstones()
+
+            self.dirty = True
+            self._pending += len(ids)
+            if (self._pending >= self.save_every
+                    or time.monotonic() - self._last_save >= self.save_interval):
+                self.save_index()
+            if self.tombstone_ratio() >= self.compact_ratio:
+                self._start_rebuild()
+            self._maybe_promote()
+        return [int(i) for i in ids]
+
+    def _insert(self, index, embeddings: np.ndarray, ids: np.ndarray) -> int:
+        """
+        Vektörleri index'e ekler; ID'si index'te zaten olanların eski vektörü
+        Flat'te silinir. Gölge kopya sayısındaki değişimi döner.
+        """
+        present = [i for i in set(ids.tolist()) if self._contains(i, index)]
+        change = 0
+        if present:
+            if isinstance(faiss.downcast_index(index.index), faiss.IndexFlat):
+                removed = index.remove_ids(np.asarray(present, dtype='int64'))
+                change = len(present) - removed
+            else:
+                change = len(present)
+        index.add_with_ids(embeddings, ids)
+        return change
+
+    def _holds(self, item_id: int, vector: np.ndarray) -> bool:
+        """Index'te item_id için tam olarak bu vektör mü var?"""
+        try:
+            return np.array_equal(self.index.reconstruct(item_id), vector)
+        except RuntimeError:
+            return False
+
+    @staticmethod
+    def _count_stale(index) -> int:
+        """Index'teki gölge kopya sayısı (aynı ID'li fazladan vektörler)."""
+        ids = faiss.vector_to_array(index.id_map)
+        return len(ids) - len(np.unique(ids))
+
+    def remove_embeddings(self, item_ids: List[int]) -> int:
+        """
+        Verilen item'ların vektörlerini tombstone'lar: aramada hemen görünmez olurlar.
+        Tombstone listesi diske hemen yazılır (silme/rıza iptali kalıcı olmalı);
+        index dosyası ise compaction'a kadar yeniden yazılmaz.
+        Yeni tombstone'lanan vektör sayısını döner.
+        """
+        with self._lock:
+            new_ids = [i for i in set(item_ids) if i not in self.tombstones and self._contains(i)]
+            if not new_ids:
+                return 0
+            with open(self.tombstone_path, 'ab') as f:
+                f.write(np.asarray(new_ids, dtype='<i8').tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            self.tombstones.update(new_ids)
+            self._tombstone_params = None
+            if self.tombstone_ratio() >= self.compact_ratio:
+                self._start_rebuild()
+        return len(new_ids)
+
+    def contains(self, item_id: int) -> bool:
+        """item_id'nin canlı (tombstone'lanmamış) vektörü index'te var mı?"""
+        with self._lock:
+            return int(item_id) not in self.tombstones and self._contains(item_id)
+
+    def _contains(self, item_id: int, index=None) -> bool:
+        """item_id'nin vektörü index'te var mı? (IDMap2 ters haritası ile O(1))"""
+        try:
+            (self.index if index is None else index).reconstruct(int(item_id))
+            return True
+        except RuntimeError:
+            return False
+
+    def _load_tombstones(self):
+        """Diskteki tombstone listesini yükler (index'te olmayan ID'ler atlanır)."""
+        if not self.tombstone_path.exists():
+            return
+        data = self.tombstone_path.read_bytes()
+        ids = np.frombuffer(data[:len(data) - len(data) % 8], dtype='<i8')
+        self.tombstones = {int(i) for i in ids if self._contains(int(i))}
+        self._tombstone_params = None
+        if self.tombstones:
+            logger.info(f"{len(self.tombstones)} tombstone yüklendi.")
+
+    def _write_tombstones(self):
+        """Tombstone dosyasını mevcut kümeyle yeniden yazar."""
+        if not self.tombstones:
+            self.tombstone_path.unlink(missing_ok=True)
+            return
+        tmp_path = self.tombstone_path.with_suffix('.tombstones.tmp')
+        tmp_path.write_bytes(np.asarray(sorted(self.tombstones), dtype='<i8').tobytes())
+        os.replace(tmp_path, self.tombstone_path)
+
+    def tombstone_ratio(self) -> float:
+        """Aramada görünmeyen (tombstone'lanmış ya da gölge) vektörlerin index'teki oranı."""
+        total = self.index.ntotal if self.index else 0
+        return (len(self.tombstones) + self._stale) / total if total else 0.0
+
+    def _maybe_promote(self):
+        """Auto modda koleksiyon bir üst katmanın eşiğini geçtiyse arka planda yükseltir."""
+        if not self.auto_tier:
+            return
+        target = self.tier_for(self.get_index_size())
+        if self.TIERS.index(target) > self.TIERS.index(self.index_type):
+            self._start_rebuild(target)
+
+    def _start_rebuild(self, index_type: Optional[str] = None):
+        """Arka planda (zaten çalışmıyorsa) index'i yeniden kurar."""
+        if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+            return
+        self._rebuild_thread = threading.Thread(
+            target=self._background_rebuild, args=(index_type,), name="faiss-rebuild", daemon=True
+        )
+        self._rebuild_thread.start()
+
+    def _background_rebuild(self, index_type: Optional[str]):
+        try:
+            self.rebuild(index_type)
+        except Exception as e:
+            logger.error(f"Faiss rebuild hatası: {e}")
+
+    def compact(self) -> int:
+        """
+        Tombstone'lanmış ve gölge vektörleri fiziksel olarak çıkarıp index'i
+        yeniden kurar. Çıkarılan vektör sayısını döner.
+        """
+        if not self.tombstones and not self._stale:
+            return 0
+        return self.rebuild()['removed']
+
+    def rebuild(self, index_type: Optional[str] = None,
+                source: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+                cancel: Optional[threading.Event] = None) -> dict:
+        """
+        Index'i (istenirse başka bir katmanda) yeniden kurar ve atomik olarak değiştirir.
+        Tombstone'lar fiziksel olarak çıkarılır. source=(item_ids, vectors) verilirse
+        index'teki item'ların vektörleri oradan alınır; verilmezse ve index kayıplıysa
+        (IVF-PQ) vector_source'tan okunur. Böylece IVF-PQ orijinal vektörlerden
+        yeniden kurulur. Ağır kısım (eğitim, ekleme, recall ölçümü) kilit dışında
+        çalışır; bu sırada gelen eklemeler kaydedilip yeni index'e de uygulanır.
+        Vektörler FAISS_REBUILD_BATCH_SIZE'lık parçalarla eklenir; cancel set
+        edilirse parça sınırında bırakılır, mevcut index korunur ve boş sözlük
+        döner. Aksi halde rebuild raporunu (index_stats) döner.
+        """
+        with self._rebuild_lock:
+            if source is None and self.vector_source is not None and self.index_type == "ivfpq":
+                with self._lock:
+                    live = [i for i in faiss.vector_to_array(self.index.id_map).tolist()
+                            if i not in self.tombstones]
+                # Depo okuması kilit dışında: arama/ekleme beklemez
+                source = self.vector_source(live)
+            with self._lock:
+                target = (index_type or self.index_type).lower()
+                dead = set(self.tombstones)
+                base = faiss.downcast_index(self.index.index)
+                ids = faiss.vector_to_array(self.index.id_map)
+                if source is not None:
+                    vectors = self._source_vectors(ids, base, source)
+                else:
+                    vectors = base.reconstruct_n(0, self.index.ntotal)
+                # Her ID'nin yalnızca son eklenen vektörü kalır (gölge kopyalar çıkar)
+                _, last = np.unique(ids[::-1], return_index=True)
+                keep = np.zeros(len(ids), dtype=bool)
+                keep[len(ids) - 1 - last] = True
+                keep &= ~np.isin(ids, np.fromiter(dead, dtype='int64'))
+                removed = len(ids) - int(keep.sum())
+                ids, vectors = ids[keep], vectors[keep]
+                # Aynı tipte eğitilmiş index: eğitimi koru, sadece içeriği boşalt
+                reuse = target == self.index_type == "ivfpq" and self._is_inner_product()
+                new_base = faiss.clone_index(base) if reuse else None
+                self._rebuild_log = []
+
+            try:
+                if new_base is not None:
+                    new_base.reset()
+                else:
+                    new_base = self._create_base_index(target, len(ids))
+                    if not new_base.is_trained and not (cancel is not None and cancel.is_set()):
+                        new_base.train(np.ascontiguousarray(vectors))
+                new_index = faiss.IndexIDMap2(new_base)
+                for start in range(0, len(ids), Config.FAISS_REBUILD_BATCH_SIZE):
+                    if cancel is not None and cancel.is_set():
+                        break
+                    end = start + Config.FAISS_REBUILD_BATCH_SIZE
+                    new_index.add_with_ids(np.ascontiguousarray(vectors[start:end]),
+                                           np.ascontiguousarray(ids[start:end]))
+                cancelled = cancel is not None and cancel.is_set()
+                recall = (self._measure_recall(new_index, vectors, ids)
+                          if target != "flat" and not cancelled else 1.0)
+            except Exception:
+                with self._lock:
+                    self._rebuild_log = None
+                raise
+            if cancelled:
+                with self._lock:
+                    self._rebuild_log = None
+                logger.info("Faiss rebuild iptal edildi; mevcut index korunuyor.")
+                return {}
+
+            with self._lock:
+                for embeddings, added_ids in self._rebuild_log:
+                    self._insert(new_index, embeddings, added_ids)
+                self._rebuild_log = None
+                previous = self.index_type
+                self.index = new_index
+                self.index_type = target
+                self.tombstones -= dead
+                self._tombstone_params = None
+                self._stale = self._count_stale(new_index)
+                self.save_index()
+                self._write_tombstones()
+                self.index_stats = {
+                    'index_type': target,
+                    'previous_type': previous,
+                    'vectors': self.get_index_size(),
+                    'recall_k': Config.FAISS_RECALL_K,
+                    'recall_at_k': round(recall, 4),
+                    'rebuilt_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                }
+                self.stats_path.write_text(json.dumps(self.index_stats))
+
+        logger.info(f"Faiss index yeniden kuruldu: {previous} -> {target}, "
+                    f"{removed} vektör çıkarıldı, recall@{Config.FAISS_RECALL_K}: {recall:.3f}")
+        return {**self.index_stats, 'removed': removed}
+
+    def _source_vectors(self, ids: np.ndarray, base, source: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+        """
+        Index'teki ids'in (sırasıyla) vektörleri: source'ta olanlar oradan, olmayanlar
+        index'ten yeniden kurulur. Üyelik index'ten gelir; source'taki fazla item'lar
+        (örn. rızası kaldırılıp compaction ile çıkarılmışlar) index'e geri girmez.
+        """
+        source_ids, first = np.unique(np.asarray(source[0], dtype='int64'), return_index=True)
+        source_vectors = self._prepare(np.asarray(source[1]).reshape(-1, self.dimension)[first])
+        found = np.isin(ids, source_ids)
+        vectors = np.empty((len(ids), self.dimension), dtype='float32')
+        vectors[found] = source_vectors[np.searchsorted(source_ids, ids[found])]
+        missing = np.flatnonzero(~found)
+        if len(missing):
+            vectors[missing] = base.reconstruct_batch(missing)
+        return vectors
+
+    @staticmethod
+    def _measure_recall(index, vectors: np.ndarray, ids: np.ndarray) -> float:
+        """
+        Yeni index'in recall@k değerini kaba kuvvet (Flat) sonuçlarına göre ölçer.
+        Sorgu olarak index'teki vektörlerden rastgele bir örneklem kullanılır.
+        """
+        k = min(Config.FAISS_RECALL_K, len(ids))
+        if k == 0:
+            return 1.0
+        rng = np.random.default_rng(0)
+        sample = rng.choice(len(ids), size=min(Config.FAISS_RECALL_QUERIES, len(ids)), replace=False)
+        queries = np.ascontiguousarray(vectors[sample])
+
+        _, exact = faiss.knn(queries, np.ascontiguousarray(vectors), k, metric=faiss.METRIC_INNER_PRODUCT)
+        _, approx = index.search(queries, k)
+        hits = sum(len(set(ids[row]) & set(found)) for row, found in zip(exact, approx))
+        return hits / (len(queries) * k)
+
+    def _search_params(self):
+        """Tombstone'ları dışlayan arama parametreleri (tombstone yoksa None)."""
+        if not self.tombstones:
+            return None
+        if self._tombstone_params is None:
+            batch = faiss.IDSelectorBatch(np.fromiter(self.tombstones, dtype='int64'))
+            selector = faiss.IDSelectorNot(batch)
+            # Selector nesneleri params yaşadığı sürece canlı kalmalı
+            self._tombstone_params = (self._make_params(selector), selector, batch)
+        return self._tombstone_params[0]
+
+    def _make_params(self, selector, selectivity: float = 1.0, k: int = 0):
+        """
+        Index tipine uygun SearchParameters nesnesi oluşturur.
+        Seçici filtrelerde sonuç eksik kalmasın diye HNSW'de efSearch, IVF'de
+        nprobe izin verilen oranla ters orantılı büyütülür.
+        """
+        base = faiss.downcast_index(self.index.index)
+        if isinstance(base, faiss.IndexIVF):
+            params = faiss.SearchParametersIVF()
+            params.nprobe = min(base.nlist, max(base.nprobe, int(base.nprobe / selectivity)))
+        elif isinstance(base, faiss.IndexHNSW):
+            params = faiss.SearchParametersHNSW()
+            params.efSearch = max(base.hnsw.efSearch, min(int(k / selectivity), self.index.ntotal))
+        else:
+            params = faiss.SearchParameters()
+        params.sel = selector
+        return params
+
+    def search(self, query_embedding: np.ndarray, k: int = 10,
+               allowed_ids: Optional[Iterable[int]] = None) -> List[Tuple[int, float]]:
+        """
+        Sorgu vektörüne en benzer sonuçları (item_id, cosine skoru) olarak,
+        skora göre azalan sırada döner.
+
+        allowed_ids verilirse (SQL filtresinden gelen izin listesi) yalnızca bu
+        item'lar skorlanır; seçici filtrelerde de tek geçişte k sonuç döner.
+        Küçük izin listeleri index taranmadan doğrudan (exact) skorlanır.
+        """
+        # Sorgu vektörünü hazırla (normalize değilse normalize et)
+        query_embedding = self._prepare(query_embedding)
+
+        # Arama yap — etiketler doğrudan item_id'dir, tombstone'lar taranmaz.
+        # Gölge kopyalar aynı item'ı tekrar döndürebilir: fazladan aday istenir
+        with self._lock:
+            fetch = min(k + self._stale, max(self.index.ntotal, 1))
+            if allowed_ids is None:
+                scores, labels = self.index.search(query_embedding, fetch, params=self._search_params())
+            else:
+                allowed = [int(i) for i in set(allowed_ids) if i not in self.tombstones]
+                if not allowed:
+                    return []
+                if len(allowed) <= self.exact_filter_limit:
+                    return self._search_subset(query_embedding[0], allowed, k)
+                batch = faiss.IDSelectorBatch(np.asarray(allowed, dtype='int64'))
+                params = self._make_params(batch, len(allowed) / max(self.index.ntotal, 1), fetch)
+                scores, labels = self.index.search(query_embedding, fetch, params=params)
+            if self._stale:
+                return self._rescore(query_embedding[0], labels[0], k)
+            if not self._is_inner_product():
+                # Henüz dönüştürülmemiş L2 index: birim vektörlerde cos = 1 - d²/2
+                scores = 1.0 - scores / 2.0
+
+        # -1: Sonuç bulunamadı bayrağı; skor = cosine benzerlik
+        return [
+            (int(item_id), float(score))
+            for score, item_id in zip(scores[0], labels[0])
+            if item_id != -1
+        ][:k]
+
+    def _rescore(self, query: np.ndarray, labels: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """
+        Adayları tekilleştirip her item'ın güncel (son eklenen) vektörüyle skorlar;
+        gölge kopyanın skoru item'a yazılmaz.
+        """
+        candidates = list(dict.fromkeys(int(i) for i in labels if i != -1))
+        if not candidates:
+            return []
+        scores = np.vstack([self.index.reconstruct(i) for i in candidates]) @ query
+        order = np.argsort(-scores, kind='stable')[:k]
+        return [(candidates[i], float(scores[i])) for i in order]
+
+    def _search_subset(self, query: np.ndarray, item_ids: List[int], k: int) -> List[Tuple[int, float]]:
+        """İzin listesindeki vektörleri tek tek okuyup kesin cosine skoruyla sıralar."""
+        found, vectors = [], []
+        for item_id in item_ids:
+            try:
+                vectors.append(self.index.reconstruct(item_id))
+                found.append(item_id)
+            except RuntimeError:
+                continue  # Vektörü olmayan item
+        if not found:
+            return []
+        scores = np.vstack(vectors) @ query
+        order = np.argsort(-scores, kind='stable')[:k]
+        return [(found[i], float(scores[i])) for i in order]
+
+    def get_item_ids(self) -> List[int]:
+        """Index'te canlı (tombstone'lanmamış) vektörü bulunan tüm item_id'leri döner."""
+        # Kilit: arka plan rebuild'i index'i değiştirirse eski id_map serbest kalır
+        with self._lock:
+            if self.index is None or self.index.ntotal == 0:
+                return []
+            ids = faiss.vector_to_array(self.index.id_map).tolist()
+            if self._stale:
+                ids = list(dict.fromkeys(ids))
+            return [i for i in ids if i not in self.tombstones]
 
     def get_index_size(self) -> int:
-        return self.index.ntotal if self.index else 0
\ No newline at end of file
+        """Canlı vektör sayısı (tombstone'lar ve gölge kopyalar hariç)."""
+        return self.index.ntotal - len(self.tombstones) - self._stale if self.index else 0
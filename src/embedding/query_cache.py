@@ -0,0 +1,182 @@
+"""
+Sorgu Embedding Cache'i
+
+Arama metinlerinin CLIP vektörlerini bellekte (LRU + TTL) ve isteğe bağlı
+olarak diskte (SQLite) saklar. Aynı sorgu tekrar geldiğinde metin modeli
+hiç çalıştırılmaz.
+"""
+
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import numpy as np
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class QueryEmbeddingCache:
+    """
+    Model adı + normalize edilmiş sorgu metni ile anahtarlanan embedding cache'i.
+
+    Bellek katmanı en son kullanılan max_size sorguyu tutar; ttl saniyeden eski
+    kayıtlar kullanılmaz. disk_path verilirse kayıtlar yeniden başlatmalar
+    arasında da korunur. Disk katmanı da aynı şekilde sınırlıdır: süresi dolan
+    kayıtlar silinir, en az yakın zamanda kullanılanlar disk_max_size'a
+    indirilir. Diskte sorgu metni değil, anahtarın SHA-256 özeti saklanır.
+    """
+
+    def __init__(self, max_size: int = Config.QUERY_CACHE_SIZE,
+                 ttl: float = Config.QUERY_CACHE_TTL,
+                 disk_path: Optional[str] = None,
+                 disk_max_size: int = Config.QUERY_CACHE_DISK_SIZE):
+        self.max_size = max_size
+        self.disk_max_size = disk_max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._disk = None
+        if disk_path:
+            Path(disk_path).parent.mkdir(parents=True, exist_ok=True)
+            self._disk = sqlite3.connect(str(disk_path), check_same_thread=False)
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, created REAL NOT NULL, used REAL NOT NULL)"
+            )
+            columns = {row[1] for row in self._disk.execute("PRAGMA table_info(query_embeddings)")}
+            if "used" not in columns:
+                # Son kullanım kolonu olmayan eski tablo: oluşturulma zamanıyla başlatılır
+                self._disk.execute("ALTER TABLE query_embeddings ADD COLUMN used REAL NOT NULL DEFAULT 0")
+                self._disk.execute("UPDATE query_embeddings SET used = created")
+            self._disk.execute(
+                "CREATE INDEX IF NOT EXISTS ix_query_embeddings_used ON query_embeddings (used)")
+            self._prune_disk(time.time())
+            self._disk.commit()
+
+    @staticmethod
+    def normalize_query(text: str) -> str:
+        """
+        Unicode biçimi ve boşluk farklarını yok sayar. Büyük/küçük harf korunur:
+        metin modeli harf duyarlıdır, anahtar modele verilen metinle aynı olmalı
+        (bkz. CLIPEmbedder.encode_text).
+        """
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    def _key(self, model_name: str, text: str) -> str:
+        raw = f"{model_name}\x00{self.normalize_query(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, model_name: str, text: str) -> Optional[np.ndarray]:
+        """Cache'teki vektörün kopyasını döner; yoksa veya süresi dolmuşsa None."""
+        key = self._key(model_name, text)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                vector, created = entry
+                if now - created < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return vector.copy()
+                del self._entries[key]
+
+            vector = self._disk_get(key, now)
+            if vector is not None:
+                self._remember(key, vector, now)
+                self.hits += 1
+                self.disk_hits += 1
+                return vector.copy()
+
+            self.misses += 1
+            return None
+
+    def put(self, model_name: str, text: str, vector: np.ndarray):
+        """Vektörü bellek (ve varsa disk) katmanına yazar."""
+        key = self._key(model_name, text)
+        vector = np.array(vector, dtype='float32')
+        now = time.time()
+        with self._lock:
+            self._remember(key, vector, now)
+            if self._disk is not None:
+                try:
+                    self._disk.execute(
+                        "INSERT OR REPLACE INTO query_embeddings (key, vector, created, used) "
+                        "VALUES (?, ?, ?, ?)",
+                        (key, vector.tobytes(), now, now),
+                    )
+                    self._prune_disk(now)
+                    self._disk.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Sorgu cache diske yazılamadı: {e}")
+
+    def _remember(self, key: str, vector: np.ndarray, created: float):
+        self._entries[key] = (vector, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _prune_disk(self, now: float):
+        """Süresi dolan disk kayıtlarını siler, kalanları en yeni kullanılan disk_max_size'a indirir."""
+        self._disk.execute("DELETE FROM query_embeddings WHERE created <= ?", (now - self.ttl,))
+        self._disk.execute(
+            "DELETE FROM query_embeddings WHERE key IN ("
+            "SELECT key FROM query_embeddings ORDER BY used DESC LIMIT -1 OFFSET ?)",
+            (self.disk_max_size,),
+        )
+
+    def _disk_get(self, key: str, now: float) -> Optional[np.ndarray]:
+        if self._disk is None:
+            return None
+        try:
+            row = self._disk.execute(
+                "SELECT vector, created FROM query_embeddings WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] >= self.ttl:
+                self._disk.execute("DELETE FROM query_embeddings WHERE key = ?", (key,))
+                self._disk.commit()
+                return None
+            self._disk.execute("UPDATE query_embeddings SET used = ? WHERE key = ?", (now, key))
+            self._disk.commit()
+            return np.frombuffer(row[0], dtype='float32').copy()
+        except sqlite3.Error as e:
+            logger.warning(f"Sorgu cache diskten okunamadı: {e}")
+            return None
+
+    def clear(self):
+        """Bellek ve disk katmanını boşaltır, sayaçları sıfırlar."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.disk_hits = 0
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM query_embeddings")
+                self._disk.commit()
+
+    def stats(self) -> Dict:
+        """Hit/miss sayaçları ve doluluk bilgisi."""
+        with self._lock:
+            total = self.hits + self.misses
+            disk_entries = None
+            if self._disk is not None:
+                disk_entries = self._disk.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+            return {
+                'entries': len(self._entries),
+                'max_size': self.max_size,
+                'disk_entries': disk_entries,
+                'disk_max_size': self.disk_max_size if self._disk is not None else None,
+                'hits': self.hits,
+                'misses': self.misses,
+                'disk_hits': self.disk_hits,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            }
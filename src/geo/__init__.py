@@ -0,0 +1,17 @@
+"""
+Coğrafi Yardımcılar
+
+Konum araması ve kümelemenin paylaştığı vektörel mesafe hesabı,
+veritabanındaki konum sorguları ve çevrimdışı coğrafi kodlama.
+"""
+
+from .distance import (distance_km, haversine_km, pairwise_distance_km,
+                       bounding_box, within_radius)
+from .spatial import bounding_box_filter
+from .gazetteer import Gazetteer, Place, load_gazetteer
+from .geocoder import Geocoder, GeocodeCache, assign_main_locations
+
+__all__ = ['distance_km', 'haversine_km', 'pairwise_distance_km',
+           'bounding_box', 'within_radius', 'bounding_box_filter',
+           'Gazetteer', 'Place', 'load_gazetteer',
+           'Geocoder', 'GeocodeCache', 'assign_main_locations']
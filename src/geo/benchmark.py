@@ -0,0 +1,63 @@
+"""
+Mesafe Çekirdeği Mikro-Benchmark'ı
+
+distance.py fonksiyonlarını geopy geodesic ile hız ve doğruluk açısından
+karşılaştırır:
+
+    python -m src.geo.benchmark [n]
+"""
+
+import sys
+import time
+from typing import Dict
+import numpy as np
+from geopy.distance import geodesic
+
+from .distance import distance_km, haversine_km, pairwise_distance_km
+
+# distance_km hata sınırının geçerli olduğu en uzun mesafe
+_MAX_BOUNDED_KM = 15_000.0
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def benchmark(n: int = 100_000, pairwise_n: int = 2_000,
+              geopy_n: int = 2_000, seed: int = 0) -> Dict[str, float]:
+    """
+    Tek merkezden n noktaya mesafe ve pairwise_n noktalık matris süreleri.
+    Hatalar, ilk geopy_n nokta için geodesic'e göre en büyük bağıl hatadır.
+    """
+    rng = np.random.default_rng(seed)
+    lat, lon = 41.0, 29.0
+    lats = rng.uniform(-80, 80, n)
+    lons = rng.uniform(-180, 180, n)
+    geopy_n = min(n, geopy_n)
+
+    exact, geopy_s = _timed(lambda: np.array(
+        [geodesic((lat, lon), (a, b)).kilometers for a, b in zip(lats[:geopy_n], lons[:geopy_n])]))
+    hav, hav_s = _timed(lambda: haversine_km(lat, lon, lats, lons))
+    dist, dist_s = _timed(lambda: distance_km(lat, lon, lats, lons))
+    _, pair_s = _timed(lambda: pairwise_distance_km(lats[:pairwise_n], lons[:pairwise_n]))
+
+    bounded = exact <= _MAX_BOUNDED_KM
+    return {
+        "n": n,
+        "geopy_us_per_pair": geopy_s / geopy_n * 1e6,
+        "haversine_us_per_pair": hav_s / n * 1e6,
+        "distance_us_per_pair": dist_s / n * 1e6,
+        "pairwise_n": pairwise_n,
+        "pairwise_matrix_s": pair_s,
+        "haversine_max_error": float(np.max(np.abs(hav[:geopy_n] - exact) / exact)),
+        "distance_max_error": float(np.max(
+            np.abs(dist[:geopy_n] - exact)[bounded] / exact[bounded])),
+    }
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    for key, value in benchmark(n).items():
+        print(f"{key:>24}: {value:.6g}")
@@ -0,0 +1,164 @@
+"""
+Yerel Gazetteer
+
+GeoNames "cities" düzenindeki (sekmeyle ayrılmış) şehir tablosunu belleğe
+yükler; ağ bağlantısı gerekmez. Yüklemede üç yapı kurulur:
+
+    tam eşleşme  -> normalize isim -> yer listesi (dict, O(1))
+    önek index'i -> sıralı (isim, yer) listesi; bisect ile O(log n) + sonuç
+    ters arama   -> BallTree (haversine), ilk ters sorguda kurulur
+
+İsimler büyük/küçük harf, aksan ve Türkçe ı/İ farkı gözetmeden eşleşir
+("kadikoy" -> Kadıköy). Yerler nüfusa göre sıralıdır: aynı isimli yerlerden
+en kalabalığı döner.
+"""
+
+import logging
+import threading
+import unicodedata
+from bisect import bisect_left
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+import numpy as np
+from sklearn.neighbors import BallTree
+
+from .distance import distance_km
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# GeoNames kolon sırası (geonameid, name, asciiname, alternatenames, latitude, ...)
+_NAME, _ASCII, _ALTERNATES, _LAT, _LNG = 1, 2, 3, 4, 5
+_FEATURE, _COUNTRY, _ADMIN1, _POPULATION = 7, 8, 10, 14
+# İdari bölgenin merkezi sayılan yerleşim türleri (il merkezi / başkent)
+_ADMIN_SEATS = {"PPLA", "PPLC"}
+
+
+class Place(NamedTuple):
+    name: str
+    label: str
+    latitude: float
+    longitude: float
+    country_code: str
+    population: int
+
+
+def normalize_name(text: str) -> str:
+    """Eşleştirme anahtarı: küçük harf, aksansız, tek boşluklu ('İstanbul' -> 'istanbul')."""
+    text = text.replace("ı", "i").replace("İ", "i")
+    text = unicodedata.normalize("NFKD", text.casefold())
+    return " ".join("".join(c for c in text if not unicodedata.combining(c)).split())
+
+
+class Gazetteer:
+    """
+    Yer adı -> koordinat (lookup / search) ve koordinat -> yer (nearest).
+    Yüklendikten sonra salt okunurdur; thread'ler arasında paylaşılabilir.
+    """
+
+    def __init__(self, path: str = Config.GAZETTEER_PATH):
+        self.path = Path(path)
+        self.places: List[Place] = []
+        self._exact: Dict[str, List[int]] = {}
+        self._prefix_keys: List[str] = []
+        self._prefix_ids: List[int] = []
+        self._lats = np.empty(0)
+        self._lngs = np.empty(0)
+        self._tree: Optional[BallTree] = None
+        self._tree_lock = threading.Lock()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.places)
+
+    def _load(self):
+        rows = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip() or line.startswith("#"):
+                    continue
+                cols = line.rstrip("\n").split("\t")
+                try:
+                    rows.append((cols, float(cols[_LAT]), float(cols[_LNG]),
+                                 int(cols[_POPULATION] or 0)))
+                except (IndexError, ValueError):
+                    logger.warning(f"Gazetteer satırı atlandı: {line[:60]!r}")
+
+        # Nüfusa göre sırala: küçük id = daha kalabalık yer
+        rows.sort(key=lambda row: -row[3])
+        seats = {(cols[_COUNTRY], cols[_ADMIN1]): cols[_NAME]
+                 for cols, *_ in reversed(rows)
+                 if cols[_FEATURE] in _ADMIN_SEATS and cols[_ADMIN1]}
+
+        keys = []
+        for place_id, (cols, lat, lng, population) in enumerate(rows):
+            name = cols[_NAME]
+            parent = seats.get((cols[_COUNTRY], cols[_ADMIN1]))
+            label = f"{name}, {parent}" if parent and parent != name else name
+            self.places.append(Place(name, label, lat, lng, cols[_COUNTRY], population))
+
+            names = {normalize_name(n) for n in
+                     [name, cols[_ASCII], *cols[_ALTERNATES].split(",")] if n}
+            for key in names:
+                self._exact.setdefault(key, []).append(place_id)
+                keys.append((key, place_id))
+
+        keys.sort()
+        self._prefix_keys = [key for key, _ in keys]
+        self._prefix_ids = [place_id for _, place_id in keys]
+        self._lats = np.array([p.latitude for p in self.places], dtype=float)
+        self._lngs = np.array([p.longitude for p in self.places], dtype=float)
+        logger.info(f"Gazetteer yüklendi: {len(self.places)} yer, {len(keys)} isim ({self.path.name})")
+
+    def lookup(self, name: str) -> Optional[Place]:
+        """İsmin tam karşılığı (aynı isimliler arasında en kalabalığı) veya None."""
+        ids = self._exact.get(normalize_name(name))
+        return self.places[ids[0]] if ids else None
+
+    def search(self, prefix: str, limit: int = 10) -> List[Place]:
+        """İsmi (veya alternatif ismi) önekle başlayan yerler, nüfusa göre."""
+        prefix = normalize_name(prefix)
+        if not prefix or limit <= 0:
+            return []
+        found = set()
+        i = bisect_left(self._prefix_keys, prefix)
+        while i < len(self._prefix_keys) and self._prefix_keys[i].startswith(prefix):
+            found.add(self._prefix_ids[i])
+            i += 1
+        return [self.places[place_id] for place_id in sorted(found)[:limit]]
+
+    def nearest(self, latitudes, longitudes,
+                max_km: float = Config.REVERSE_GEOCODE_MAX_KM) -> List[Optional[Place]]:
+        """
+        Her koordinat için en yakın yer (toplu). max_km'den uzak veya
+        koordinatı eksik (NaN/None) noktalar için None.
+        """
+        lats = np.asarray(latitudes, dtype=float).reshape(-1)
+        lngs = np.asarray(longitudes, dtype=float).reshape(-1)
+        results: List[Optional[Place]] = [None] * len(lats)
+        valid = np.flatnonzero(~(np.isnan(lats) | np.isnan(lngs)))
+        if not len(valid) or not self.places:
+            return results
+
+        _, nearest = self._ball_tree().query(
+            np.radians(np.column_stack([lats[valid], lngs[valid]])), k=1)
+        nearest = nearest[:, 0]
+        distances = distance_km(lats[valid], lngs[valid], self._lats[nearest], self._lngs[nearest])
+        for i, place_id, dist in zip(valid, nearest, distances):
+            if dist <= max_km:
+                results[i] = self.places[place_id]
+        return results
+
+    def _ball_tree(self) -> BallTree:
+        with self._tree_lock:
+            if self._tree is None:
+                self._tree = BallTree(np.radians(np.column_stack([self._lats, self._lngs])),
+                                      metric="haversine")
+            return self._tree
+
+
+@lru_cache(maxsize=None)
+def load_gazetteer(path: str = Config.GAZETTEER_PATH) -> Gazetteer:
+    """Yol başına tek Gazetteer (dosya süreç boyunca bir kez okunur)."""
+    return Gazetteer(path)
@@ -0,0 +1,204 @@
+"""
+Çevrimdışı Coğrafi Kodlama
+
+İsim -> koordinat ve koordinat -> yer adı dönüşümleri yerel gazetteer'den
+yapılır. Gazetteer'de bulunmayan isimler yalnızca GEOCODER_ONLINE_FALLBACK
+açıksa Nominatim'e sorulur; bu sonuçlar (bulunamadı dahil) kalıcı cache'e
+yazılır, aynı isim ağdan bir daha sorulmaz.
+"""
+
+import time
+import logging
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+from sqlalchemy.orm import Session
+
+from database.schema import Event, Item
+from .gazetteer import Gazetteer, Place, load_gazetteer, normalize_name
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class GeocodeCache:
+    """
+    Normalize isim -> Place (veya bulunamadı) eşlemesi; bellek + SQLite.
+    Disk dosyası ilk yazmada oluşturulur, yoksa okumalar diske dokunmaz.
+    """
+
+    def __init__(self, disk_path: Optional[str] = Config.GEOCODE_CACHE_PATH):
+        self.disk_path = Path(disk_path) if disk_path else None
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Optional[Place]] = {}
+        self._disk = None
+        self._lock = threading.Lock()
+
+    def get(self, name: str):
+        """Cache'teki Place veya None (bulunamadı olarak kayıtlı); hiç yoksa _MISSING."""
+        key = normalize_name(name)
+        with self._lock:
+            if key not in self._entries:
+                row = self._disk_get(key)
+                if row is _MISSING:
+                    self.misses += 1
+                    return _MISSING
+                self._entries[key] = row
+            self.hits += 1
+            return self._entries[key]
+
+    def put(self, name: str, place: Optional[Place]):
+        key = normalize_name(name)
+        with self._lock:
+            self._entries[key] = place
+            db = self._connect(create=True)
+            if db is None:
+                return
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO geocode_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, *(place or (None,) * 5)[:5], time.time()),
+                )
+                db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Geocode cache diske yazılamadı: {e}")
+
+    def _connect(self, create: bool = False):
+        if self._disk is None and self.disk_path is not None:
+            if not create and not self.disk_path.exists():
+                return None
+            self.disk_path.parent.mkdir(parents=True, exist_ok=True)
+            self._disk = sqlite3.connect(str(self.disk_path), check_same_thread=False)
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS geocode_cache ("
+                "query TEXT PRIMARY KEY, name TEXT, label TEXT, latitude REAL, "
+                "longitude REAL, country_code TEXT, created REAL NOT NULL)"
+            )
+            self._disk.commit()
+        return self._disk
+
+    def _disk_get(self, key: str):
+        db = self._connect()
+        if db is None:
+            return _MISSING
+        try:
+            row = db.execute(
+                "SELECT name, label, latitude, longitude, country_code "
+                "FROM geocode_cache WHERE query = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Geocode cache diskten okunamadı: {e}")
+            return _MISSING
+        if row is None:
+            return _MISSING
+        return Place(*row, population=0) if row[0] is not None else None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+class Geocoder:
+    """
+    LocationSearch, arama router'ı ve olay/özet tarafının ortak coğrafi kodlayıcısı.
+    Tüm yerel işlemler ağ bağlantısı olmadan, milisaniyenin altında tamamlanır.
+    """
+
+    def __init__(self, gazetteer: Optional[Gazetteer] = None,
+                 cache: Optional[GeocodeCache] = None,
+                 online: bool = Config.GEOCODER_ONLINE_FALLBACK):
+        self.gazetteer = gazetteer or load_gazetteer()
+        self.cache = cache if cache is not None else GeocodeCache()
+        self.online = online
+        self._nominatim = None
+
+    def geocode(self, name: str) -> Optional[Place]:
+        """İsmi koordinata çevirir: gazetteer -> kalıcı cache -> (açıksa) Nominatim."""
+        place = self.gazetteer.lookup(name)
+        if place is not None:
+            return place
+        cached = self.cache.get(name)
+        if cached is not _MISSING:
+            return cached
+        if not self.online:
+            return None
+        try:
+            place = self._geocode_online(name)
+        except Exception as e:
+            # Ağ hatası kalıcı "bulunamadı" olarak yazılmaz; sonraki aramada tekrar denenir
+            logger.error(f"Geocoding hatası: {e}")
+            return None
+        self.cache.put(name, place)
+        return place
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Place]:
+        """Yazılan önekle başlayan yerler (otomatik tamamlama)."""
+        return self.gazetteer.search(prefix, limit)
+
+    def reverse(self, latitude: float, longitude: float) -> Optional[Place]:
+        """Koordinata en yakın yer (REVERSE_GEOCODE_MAX_KM içinde) veya None."""
+        return self.gazetteer.nearest([latitude], [longitude])[0]
+
+    def reverse_many(self, latitudes: Sequence[float],
+                     longitudes: Sequence[float]) -> List[Optional[Place]]:
+        """Koordinat listesinin yerleri; tek vektörel sorgu."""
+        return self.gazetteer.nearest(latitudes, longitudes)
+
+    def main_location(self, latitudes: Sequence[float],
+                      longitudes: Sequence[float]) -> Optional[str]:
+        """Noktaların en sık düştüğü yerin etiketi (ör. "Kadıköy, İstanbul") veya None."""
+        labels = Counter(place.label for place in self.reverse_many(latitudes, longitudes) if place)
+        return labels.most_common(1)[0][0] if labels else None
+
+    def _geocode_online(self, name: str) -> Optional[Place]:
+        if self._nominatim is None:
+            from geopy.geocoders import Nominatim
+            self._nominatim = Nominatim(user_agent=Config.GEOCODER_USER_AGENT)
+        location = self._nominatim.geocode(name)
+        if location is None:
+            return None
+        return Place(name, location.address, location.latitude, location.longitude, "", 0)
+
+
+def assign_main_locations(db: Session, geocoder: Optional[Geocoder] = None,
+                          only_missing: bool = True,
+                          event_ids: Optional[Sequence[int]] = None) -> int:
+    """
+    Event.main_location alanını olay item'larının konumlarından toplu doldurur
+    (rızalı, konumlu item'lar; tek ters sorgu). event_ids verilirse yalnızca o
+    olaylara bakılır. Güncellenen event sayısını döner.
+    """
+    geocoder = geocoder or Geocoder()
+    query = db.query(Item.event_id, Item.latitude, Item.longitude).join(
+        Event, Event.event_id == Item.event_id
+    ).filter(
+        Item.has_consent == True,
+        Item.latitude.isnot(None),
+        Item.longitude.isnot(None),
+    )
+    if only_missing:
+        query = query.filter(Event.main_location.is_(None))
+    if event_ids is not None:
+        if not event_ids:
+            return 0
+        query = query.filter(Event.event_id.in_(list(event_ids)))
+    rows = query.all()
+    if not rows:
+        return 0
+
+    places = geocoder.reverse_many([row.latitude for row in rows], [row.longitude for row in rows])
+    labels: Dict[int, Counter] = {}
+    for row, place in zip(rows, places):
+        if place is not None:
+            labels.setdefault(row.event_id, Counter())[place.label] += 1
+
+    for event in db.query(Event).filter(Event.event_id.in_(list(labels))):
+        event.main_location = labels[event.event_id].most_common(1)[0][0]
+    db.commit()
+    logger.info(f"{len(labels)} olayın konum adı güncellendi")
+    return len(labels)
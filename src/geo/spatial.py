@@ -0,0 +1,28 @@
+"""
+Konum Sorguları
+
+Yarıçap aramalarının SQL tarafı: sınır kutusu koşulu. Kutu, kesin mesafe
+(distance.py) hesaplanacak adayları daraltır.
+"""
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+from database.schema import Item, items_geo, has_spatial_index
+from .distance import bounding_box
+
+
+def bounding_box_filter(db: Session, latitude: float, longitude: float, radius_km: float):
+    """Sınır kutusu koşulu: R*Tree varsa ondan, yoksa enlem/boylam kolonlarından."""
+    min_lat, max_lat, lng_ranges = bounding_box(latitude, longitude, radius_km)
+    if has_spatial_index(db):
+        return or_(*[
+            Item.item_id.in_(select(items_geo.c.id).where(
+                items_geo.c.max_lat >= min_lat, items_geo.c.min_lat <= max_lat,
+                items_geo.c.max_lng >= min_lng, items_geo.c.min_lng <= max_lng,
+            ))
+            for min_lng, max_lng in lng_ranges
+        ])
+    return and_(
+        Item.latitude.between(min_lat, max_lat),
+        or_(*[Item.longitude.between(min_lng, max_lng) for min_lng, max_lng in lng_ranges]),
+    )
@@ -5,8 +5,11 @@ Fotoğraf ve ses dosyalarını sisteme ekler.
 """
 
 from .photo_importer import PhotoImporter
+from .import_pipeline import ImportPipeline
+from .reindexer import Reindexer
+from .maintenance import LibraryMaintenance
 from .exif_extractor import EXIFExtractor
 from .audio_processor import AudioProcessor
 
-__all__ = ['PhotoImporter', 'EXIFExtractor', 'AudioProcessor']
+__all__ = ['PhotoImporter', 'ImportPipeline', 'Reindexer', 'LibraryMaintenance', 'EXIFExtractor', 'AudioProcessor']
 
@@ -0,0 +1,387 @@
+"""
+Paralel Import Boru Hatti (Asama 2-3)
+
+Klasor import'unu birbirine sinirli kuyruklarla bagli asamalara boler:
+
+    analiz (process pool)  -> hash, dogrulama, EXIF
+    hazirlik (process pool) -> yon duzeltme ve boyutlandirma
+    CLIP (tek thread)       -> embedding'ler CLIP_BATCH_SIZE'lik mikro-batch'lerde uretilir
+    sifreleme (process pool)-> thumbnail/onizleme uretimi + Fernet ile yerinde sifreleme
+    writer (cagiran thread) -> DB satirlari ve FAISS vektorleri batch halinde yazilir
+
+Writer bilerek cagiran thread'de calisir: SQLAlchemy session'i thread-safe
+degildir ve in-memory SQLite baglantisi thread'e baglidir.
+"""
+
+import logging
+import queue
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+from PIL import Image
+
+from database.schema import Item
+from security.encryption_manager import EncryptionManager
+from config import Config
+
+from .exif_extractor import EXIFExtractor
+from .image_processer import ImageProcessor
+from .thumbnail_store import ThumbnailStore
+
+logger = logging.getLogger(__name__)
+
+# Asama sonu isareti (kuyruktan bu cikinca asama kapanir)
+_DONE = object()
+
+
+# =====================================================================
+# WORKER FONKSIYONLARI
+# Process pool'da calisirlar; bu yuzden modul seviyesinde ve picklable
+# argumanlarla tanimlidir. Her worker kendi yardimci nesnelerini bir kez olusturur.
+# =====================================================================
+_exif_extractor: Optional[EXIFExtractor] = None
+_image_processors: Dict[int, ImageProcessor] = {}
+_encryptors: Dict[str, EncryptionManager] = {}
+_thumbnail_stores: Dict[Tuple[str, str], ThumbnailStore] = {}
+
+
+def _analyze_photo(path_str: str) -> Dict:
+    """Hash, goruntu dogrulama ve EXIF cikarma. Dosyaya yazmaz."""
+    global _exif_extractor
+    if _exif_extractor is None:
+        _exif_extractor = EXIFExtractor()
+
+    path = Path(path_str)
+    file_hash = _exif_extractor.calculate_file_hash(path)
+    try:
+        with Image.open(path) as img:
+            img.verify()
+    except Exception:
+        return {"file_hash": file_hash, "valid": False, "metadata": None}
+
+    metadata = _exif_extractor.extract_metadata(path)
+    metadata["file_hash"] = file_hash
+    return {"file_hash": file_hash, "valid": True, "metadata": metadata}
+
+
+def _normalize_photo(path_str: str, max_size: int) -> bool:
+    """Yon duzeltme ve boyutlandirma (dosyanin uzerine yazar)."""
+    processor = _image_processors.get(max_size)
+    if processor is None:
+        processor = _image_processors[max_size] = ImageProcessor(max_size=max_size)
+    return processor.process_image(Path(path_str))
+
+
+def _encrypt_photo(path_str: str, key_path: str, file_hash: Optional[str] = None,
+                   thumbnail_root: Optional[str] = None) -> None:
+    """Thumbnail deposu verildiyse once thumbnail'lari uretir, sonra dosyayi yerinde sifreler."""
+    encryptor = _encryptors.get(key_path)
+    if encryptor is None:
+        encryptor = _encryptors[key_path] = EncryptionManager(key_path=key_path)
+    if thumbnail_root is not None:
+        store = _thumbnail_stores.get((key_path, thumbnail_root))
+        if store is None:
+            store = _thumbnail_stores[(key_path, thumbnail_root)] = ThumbnailStore(thumbnail_root, encryptor)
+        store.generate(file_hash, Path(path_str))
+    encryptor.encrypt_file(path_str)
+
+
+class ImportPipeline:
+    """
+    PhotoImporter icin asamali, paralel import boru hatti.
+
+    Sonuclar dosya bazinda (path, status) olarak uretilir; status degerleri
+    import_single_photo ile aynidir: 'imported', 'duplicate', 'no_consent', 'error'.
+    Sonuc sirasi girdi sirasi ile ayni olmak zorunda degildir.
+    """
+
+    def __init__(self, importer, executor: Optional[Executor] = None,
+                 workers: int = Config.IMPORT_WORKERS,
+                 batch_size: int = Config.IMPORT_BATCH_SIZE,
+                 queue_size: int = Config.IMPORT_QUEUE_SIZE):
+        """
+        Args:
+            importer: DB session, CLIP ve FAISS bagimliliklarini tasiyan PhotoImporter
+            executor: Disaridan verilen havuz (None ise ProcessPoolExecutor acilir)
+            workers: Kendi acilan process pool'un boyutu
+            batch_size: Writer asamasinin batch boyutu (CLIP, embedder'in batch_size'ini kullanir)
+            queue_size: Asamalar arasi kuyruk kapasitesi
+        """
+        self.importer = importer
+        self.executor = executor
+        self.workers = workers
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self._stop = threading.Event()
+
+    def run(self, files: Iterable[Path], user_consent: bool) -> Iterator[Tuple[Path, str]]:
+        """Dosyalari boru hattindan gecirir ve her dosya bittiginde sonucunu uretir."""
+        files = list(files)
+
+        # Riza yoksa hicbir dosyaya dokunulmaz
+        if not user_consent:
+            for path in files:
+                yield path, 'no_consent'
+            return
+        if not files:
+            return
+
+        known_hashes, known_paths = self._load_known_items()
+
+        own_executor = self.executor is None
+        executor = self.executor or ProcessPoolExecutor(max_workers=self.workers)
+        self._stop.clear()
+
+        analyzed = queue.Queue(self.queue_size)
+        normalized = queue.Queue(self.queue_size)
+        encrypted = queue.Queue(self.queue_size)
+        threads = [
+            threading.Thread(target=self._feed_stage, args=(files, executor, analyzed),
+                             name="import-feed", daemon=True),
+            threading.Thread(target=self._prepare_stage,
+                             args=(executor, known_hashes, known_paths, analyzed, normalized),
+                             name="import-prepare", daemon=True),
+            threading.Thread(target=self._clip_stage, args=(executor, normalized, encrypted),
+                             name="import-clip", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            yield from self._write_stage(encrypted)
+            # Import bitti: write-behind FAISS index'ini diske yaz
+            if self.importer.faiss_manager is not None:
+                self.importer.faiss_manager.flush()
+        finally:
+            # Tuketici erken ciktiysa (ornegin SSE istemcisi koptu) asamalari durdur
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            if own_executor:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    # -----------------------------------------------------------------
+    # Kuyruk yardimcilari
+    # -----------------------------------------------------------------
+    def _put(self, q: queue.Queue, item) -> bool:
+        """Kuyruga yazar; pipeline durdurulduysa False doner."""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue, wait: Optional[float] = None):
+        """
+        Kuyruktan okur; pipeline durdurulduysa _DONE doner.
+        wait verilirse en fazla o kadar bekler, eleman gelmezse None doner.
+        """
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1 if wait is None else wait)
+            except queue.Empty:
+                if wait is not None:
+                    return None
+        return _DONE
+
+    # -----------------------------------------------------------------
+    # Asamalar
+    # -----------------------------------------------------------------
+    def _load_known_items(self) -> Tuple[Set[str], Set[str]]:
+        """Duplicate kontrolu icin mevcut hash ve path'leri tek sorguda yukler."""
+        rows = self.importer.db.query(Item.file_hash, Item.file_path).all()
+        return {h for h, _ in rows}, {p for _, p in rows}
+
+    def _feed_stage(self, files: List[Path], executor: Executor, out_q: queue.Queue):
+        """Her dosya icin analiz isini havuza gonderir."""
+        try:
+            for path in files:
+                task = {"path": path, "status": None}
+                try:
+                    task["future"] = executor.submit(_analyze_photo, str(path))
+                except Exception as e:
+                    logger.error(f"Analiz baslatilamadi ({path.name}): {e}")
+                    task["status"] = 'error'
+                if not self._put(out_q, task):
+                    return
+        finally:
+            self._put(out_q, _DONE)
+
+    def _prepare_stage(self, executor: Executor, known_hashes: Set[str], known_paths: Set[str],
+                       in_q: queue.Queue, out_q: queue.Queue):
+        """Duplicate kontrolu yapar, yeni dosyalar icin yon/boyut isini havuza gonderir."""
+        max_size = self.importer.processor.max_size
+        try:
+            while True:
+                task = self._get(in_q)
+                if task is _DONE:
+                    break
+                if task["status"] is None:
+                    try:
+                        probe = task.pop("future").result()
+                        status = self._check_duplicate(task["path"], probe, known_hashes, known_paths)
+                        if status is None:
+                            task["metadata"] = probe["metadata"]
+                            task["future"] = executor.submit(_normalize_photo, str(task["path"]), max_size)
+                        else:
+                            task["status"] = status
+                    except Exception as e:
+                        logger.error(f"Fotoğraf import hatası ({task['path']}): {e}")
+                        task["status"] = 'error'
+                if not self._put(out_q, task):
+                    return
+        finally:
+            self._put(out_q, _DONE)
+
+    def _check_duplicate(self, path: Path, probe: Dict,
+                         known_hashes: Set[str], known_paths: Set[str]) -> Optional[str]:
+        """import_single_photo ile ayni duplicate/gecersiz dosya kurallari."""
+        if probe["file_hash"] in known_hashes:
+            return 'duplicate'
+        if str(path) in known_paths:
+            logger.info(f"Dosya zaten DB'de kayıtlı (path): {path}")
+            return 'duplicate'
+        if not probe["valid"]:
+            logger.warning(f"Geçerli görüntü dosyası değil, atlanıyor: {path}")
+            return 'duplicate'
+        # Ayni klasorde iki kopya varsa ikincisi duplicate sayilsin
+        known_hashes.add(probe["file_hash"])
+        return None
+
+    def _clip_stage(self, executor: Executor, in_q: queue.Queue, out_q: queue.Queue):
+        """
+        Hazir dosyalari CLIP mikro-batch'lerinde encode eder, ardindan sifrelemeye gonderir.
+        Batch, CLIP batch_size'a ulasinca ya da onceki asama CLIP_BATCH_LINGER
+        saniye boyunca yeni dosya getirmezse islenir.
+        """
+        key_path = str(self.importer.encryption.key_path)
+        thumbnails = self.importer.thumbnail_store
+        thumbnail_root = str(thumbnails.root) if thumbnails is not None else None
+        clip = self.importer.clip_embedder
+        clip_batch_size = clip.batch_size if clip is not None else self.batch_size
+        batch = []
+        try:
+            while True:
+                task = self._get(in_q, wait=Config.CLIP_BATCH_LINGER if batch else None)
+                finished = task is _DONE
+                if task is not None and not finished:
+                    batch.append(task)
+                ready = sum(1 for t in batch if t["status"] is None)
+                if batch and (finished or task is None or ready >= clip_batch_size):
+                    self._encode_batch(batch)
+                    for item in batch:
+                        if item["status"] is None:
+                            try:
+                                item["future"] = executor.submit(
+                                    _encrypt_photo, str(item["path"]), key_path,
+                                    item["metadata"]["file_hash"], thumbnail_root,
+                                )
+                            except Exception as e:
+                                logger.error(f"Sifreleme baslatilamadi ({item['path'].name}): {e}")
+                                item["status"] = 'error'
+                        if not self._put(out_q, item):
+                            return
+                    batch = []
+                if finished:
+                    break
+        finally:
+            self._put(out_q, _DONE)
+
+    def _encode_batch(self, batch: List[Dict]):
+        """Batch'teki hazir dosyalar icin tek seferde CLIP embedding uretir (sifrelemeden ONCE)."""
+        ready = []
+        for task in batch:
+            if task["status"] is not None:
+                continue
+            try:
+                task["rotated"] = task.pop("future").result()
+                task["embedding"] = None
+                ready.append(task)
+            except Exception as e:
+                logger.error(f"Fotoğraf import hatası ({task['path']}): {e}")
+                task["status"] = 'error'
+
+        clip = self.importer.clip_embedder
+        if clip is None or not ready:
+            return
+        try:
+            embeddings = clip.encode_images([t["path"] for t in ready])
+        except Exception as e:
+            logger.warning(f"CLIP embedding hatasi ({len(ready)} dosya): {e}")
+            return
+        for task, embedding in zip(ready, embeddings):
+            task["embedding"] = embedding
+            if embedding is None:
+                logger.warning(f"CLIP embedding uretilemedi: {task['path'].name}")
+
+    def _write_stage(self, in_q: queue.Queue) -> Iterator[Tuple[Path, str]]:
+        """Sifrelenen dosyalari batch halinde DB ve FAISS'e yazar."""
+        pending = []
+        while True:
+            task = self._get(in_q)
+            finished = task is _DONE
+            if not finished:
+                if task["status"] is None:
+                    try:
+                        task.pop("future").result()
+                        pending.append(task)
+                    except Exception as e:
+                        logger.error(f"Fotoğraf import hatası ({task['path']}): {e}")
+                        task["status"] = 'error'
+                if task["status"] is not None:
+                    yield task["path"], task["status"]
+            if pending and (finished or len(pending) >= self.batch_size or in_q.empty()):
+                yield from self._commit_batch(pending)
+                pending = []
+            if finished:
+                return
+
+    def _commit_batch(self, tasks: List[Dict]) -> Iterator[Tuple[Path, str]]:
+        """Bir batch'i tek commit ile DB'ye, tek add ile FAISS'e yazar."""
+        db = self.importer.db
+        items = [
+            self.importer.build_item(t["path"], t["metadata"], True, t["rotated"])
+            for t in tasks
+        ]
+        try:
+            db.add_all(items)
+            db.commit()
+        except Exception as e:
+            # Batch'te bozuk bir satir var: tek tek yazarak hatali olani ayikla
+            logger.warning(f"Toplu DB kaydi basarisiz, tek tek deneniyor: {e}")
+            db.rollback()
+            items = []
+            for t in tasks:
+                item_id = self.importer.add_photo_to_database(t["path"], t["metadata"], True, t["rotated"])
+                items.append(db.get(Item, item_id) if item_id is not None else None)
+
+        faiss_manager = self.importer.faiss_manager
+        embedding_store = self.importer.embedding_store
+        indexed = [(t, item) for t, item in zip(tasks, items)
+                   if item is not None and t.get("embedding") is not None]
+        if indexed and embedding_store is not None:
+            try:
+                embedding_store.put_many([item.file_hash for _, item in indexed],
+                                         [item.item_id for _, item in indexed],
+                                         np.vstack([t["embedding"] for t, _ in indexed]))
+            except Exception as e:
+                logger.warning(f"Embedding deposu yazma hatasi ({len(indexed)} item): {e}")
+        if indexed and faiss_manager is not None:
+            try:
+                embeddings = np.vstack([t["embedding"] for t, _ in indexed])
+                faiss_ids = faiss_manager.add_embeddings(embeddings, [item.item_id for _, item in indexed])
+                for (_, item), faiss_id in zip(indexed, faiss_ids):
+                    item.faiss_index_id = faiss_id
+                db.commit()
+                logger.info(f"FAISS index guncellendi: {len(indexed)} vektor")
+            except Exception as e:
+                logger.warning(f"FAISS ekleme hatasi ({len(indexed)} item): {e}")
+                db.rollback()
+
+        for task, item in zip(tasks, items):
+            yield task["path"], 'imported' if item is not None else 'error'
@@ -0,0 +1,153 @@
+"""
+Kutuphane Bakim Isleri
+
+Iki arka plan isi tum kutuphaneyi item_id sirasiyla MAINTENANCE_BATCH_SIZE'lik
+parcalar halinde tarar; ORM nesneleri yerine sadece gereken kolonlar okunur:
+
+    repair   -> cift sifrelenmis dosyalari tek katmana dusurur
+    cleanup  -> dosyasi diskten silinmis (orphan) kayitlari; thumbnail, FAISS
+                vektoru ve embedding deposu kayitlariyla birlikte temizler
+
+Dosya I/O ve sifre islemleri thread pool'da paralel yapilir; her parcadan
+sonra ilerleme sozlugu uretilir ve iptal parca sinirinda kontrol edilir.
+"""
+
+import os
+import logging
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Dict, Iterator, Optional
+
+from cryptography.fernet import InvalidToken
+from sqlalchemy.orm import Session
+
+from database.schema import Item
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class LibraryMaintenance:
+    """
+    repair() ve cleanup() birer ilerleme uretecidir (JobManager hedefi olarak
+    kullanilir). Thumbnail deposu/cache'i, FAISS index'i ve embedding deposu
+    verilirse silinen item'larinkiler de temizlenir.
+    """
+
+    def __init__(self, db_session: Session, encryption_manager,
+                 thumbnail_store=None, thumbnail_cache=None,
+                 faiss_manager=None, embedding_store=None,
+                 executor: Optional[Executor] = None,
+                 batch_size: int = Config.MAINTENANCE_BATCH_SIZE):
+        self.db = db_session
+        self.encryption = encryption_manager
+        self.thumbnail_store = thumbnail_store
+        self.thumbnail_cache = thumbnail_cache
+        self.faiss_manager = faiss_manager
+        self.embedding_store = embedding_store
+        self.executor = executor
+        self.batch_size = batch_size
+
+    def _chunks(self, cancel: Optional[threading.Event], *columns) -> Iterator[list]:
+        """Item kolonlarini item_id sirasiyla parca parca okur (keyset)."""
+        last_id = 0
+        while not (cancel and cancel.is_set()):
+            rows = (self.db.query(Item.item_id, *columns)
+                    .filter(Item.item_id > last_id)
+                    .order_by(Item.item_id).limit(self.batch_size).all())
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1].item_id
+
+    def _run_chunks(self, cancel, columns, process) -> Iterator[Dict]:
+        """Ortak dongu: pool'u yonetir, her parcayi process(rows, pool) ile isler."""
+        total = self.db.query(Item).count()
+        progress = {"current": 0, "total": total, "last_item_id": 0}
+        own_pool = self.executor is None
+        pool = self.executor or ThreadPoolExecutor(max_workers=Config.MAINTENANCE_WORKERS)
+        try:
+            for rows in self._chunks(cancel, *columns):
+                for key, count in process(rows, pool).items():
+                    progress[key] = progress.get(key, 0) + count
+                progress["current"] += len(rows)
+                progress["last_item_id"] = rows[-1].item_id
+                yield dict(progress)
+        finally:
+            if own_pool:
+                pool.shutdown(wait=True)
+
+    # =================================================================
+    # REPAIR
+    # =================================================================
+
+    def repair(self, cancel: Optional[threading.Event] = None) -> Iterator[Dict]:
+        """
+        Cift sifrelenmis dosyalari onarir; her parca sonunda
+        {current, total, repaired, failed, last_item_id} uretir.
+        """
+        def process(rows, pool):
+            results = list(pool.map(self._repair_file, [row.file_path for row in rows]))
+            return {"repaired": results.count("repaired"), "failed": results.count("failed")}
+
+        progress = {"repaired": 0, "failed": 0}
+        for progress in self._run_chunks(cancel, (Item.file_path,), process):
+            yield progress
+        logger.info(f"Repair bitti: {progress['repaired']} dosya onarildi, "
+                    f"{progress['failed']} dosya okunamadi")
+
+    def _repair_file(self, file_path: str) -> str:
+        """Tek dosyayi kontrol eder: 'repaired' | 'ok' | 'failed' | 'missing'."""
+        if not os.path.exists(file_path):
+            return "missing"
+        enc = self.encryption
+        try:
+            if not enc.is_encrypted(file_path):
+                return "failed"
+            # Dis katmanin sadece basi cozulur; ic veri de sifreliyse cift sifrelidir
+            with enc.open_decrypted(file_path) as f:
+                if not enc.is_encrypted_data(f.read(16)):
+                    return "ok"
+            enc.write_encrypted(file_path, enc.decrypt_bytes(enc.decrypt_file(file_path)))
+            logger.info(f"Cift sifreleme duzeltildi: {file_path}")
+            return "repaired"
+        except (InvalidToken, OSError) as e:
+            logger.warning(f"Dosya decrypt edilemedi: {file_path} ({e})")
+            return "failed"
+
+    # =================================================================
+    # CLEANUP
+    # =================================================================
+
+    def cleanup(self, cancel: Optional[threading.Event] = None) -> Iterator[Dict]:
+        """
+        Dosyasi olmayan kayitlari siler; her parca sonunda
+        {current, total, deleted, last_item_id} uretir.
+        """
+        def process(rows, pool):
+            exists = list(pool.map(os.path.exists, [row.file_path for row in rows]))
+            orphans = [row for row, ok in zip(rows, exists) if not ok]
+            if orphans:
+                self._delete_orphans(orphans)
+            return {"deleted": len(orphans)}
+
+        progress = {"deleted": 0}
+        for progress in self._run_chunks(cancel, (Item.file_path, Item.file_hash), process):
+            yield progress
+        logger.info(f"Toplam {progress['deleted']} orphan kayit temizlendi")
+
+    def _delete_orphans(self, rows):
+        ids = [row.item_id for row in rows]
+        for row in rows:
+            logger.info(f"Orphan temizlendi: item {row.item_id} ({row.file_path})")
+            if self.thumbnail_store is not None:
+                self.thumbnail_store.remove(row.file_hash)
+        if self.thumbnail_cache is not None:
+            self.thumbnail_cache.invalidate(ids)
+        # Silinen item_id SQLite'ta yeniden kullanilabilir; eski vektor yeni item'a kalmasin
+        if self.faiss_manager is not None:
+            self.faiss_manager.remove_embeddings(ids)
+        if self.embedding_store is not None:
+            self.embedding_store.remove_items(ids)
+        self.db.query(Item).filter(Item.item_id.in_(ids)).delete(synchronize_session=False)
+        self.db.commit()
@@ -1,7 +1,8 @@
 import os
 import logging
 from pathlib import Path
-from typing import List, Optional, Dict
+from concurrent.futures import Executor
+from typing import List, Optional, Dict, Iterator, Tuple
 from datetime import datetime
 from sqlalchemy.orm import Session
 from PIL import Image
@@ -17,13 +18,15 @@ from config import Config
 # 2. Ingestion Modülleri (Aynı klasörde oldukları için bağıl import)
 from .exif_extractor import EXIFExtractor 
 from .image_processer import ImageProcessor
+from .import_pipeline import ImportPipeline
 
 class PhotoImporter:
     """
     Fotoğrafları toplu olarak içe aktarır, işler ve güvenli şekilde saklar[cite: 28].
     """
 
-    def __init__(self, db_session: Session, clip_embedder=None, faiss_manager=None):
+    def __init__(self, db_session: Session, clip_embedder=None, faiss_manager=None, embedding_store=None,
+                 thumbnail_store=None):
         self.db = db_session
         self.exif_extractor = EXIFExtractor()
         self.processor = ImageProcessor()
@@ -31,6 +34,8 @@ class PhotoImporter:
         self.encryption = EncryptionManager()
         self.clip_embedder = clip_embedder
         self.faiss_manager = faiss_manager
+        self.embedding_store = embedding_store
+        self.thumbnail_store = thumbnail_store
         self.supported_formats = Config.SUPPORTED_IMAGE_FORMATS
 
     def find_image_files(self, folder_path: Path, recursive: bool = True) -> List[Path]:
@@ -45,19 +50,23 @@ class PhotoImporter:
         """Dosya hash'i üzerinden kopya kontrolü yapar[cite: 24, 28]."""
         return self.db.query(Item).filter(Item.file_hash == file_hash).first() is not None
 
+    def build_item(self, image_path: Path, metadata: Dict, has_consent: bool, is_rotated: bool) -> Item:
+        """Metadata'dan (henüz kaydedilmemiş) bir Item nesnesi oluşturur."""
+        return Item(
+            file_path=str(image_path),
+            file_hash=metadata["file_hash"],
+            type="Photo",
+            creation_datetime=metadata["created_at"] or datetime.fromtimestamp(os.path.getmtime(str(image_path))),
+            latitude=metadata.get("location_lat"),
+            longitude=metadata.get("location_lng"),
+            has_consent=has_consent, # Gizlilik bayrağı [cite: 16]
+            is_rotated=is_rotated    # İşleme bayrağı [cite: 16]
+        )
+
     def add_photo_to_database(self, image_path: Path, metadata: Dict, has_consent: bool, is_rotated: bool) -> Optional[int]:
         """Fotoğraf verilerini DB'ye kaydeder[cite: 16, 20]."""
         try:
-            new_item = Item(
-                file_path=str(image_path),
-                file_hash=metadata["file_hash"],
-                type="Photo",
-                creation_datetime=metadata["created_at"] or datetime.fromtimestamp(os.path.getmtime(str(image_path))),
-                latitude=metadata.get("location_lat"),
-                longitude=metadata.get("location_lng"),
-                has_consent=has_consent, # Gizlilik bayrağı [cite: 16]
-                is_rotated=is_rotated    # İşleme bayrağı [cite: 16]
-            )
+            new_item = self.build_item(image_path, metadata, has_consent, is_rotated)
             self.db.add(new_item)
             self.db.commit()
             return new_item.item_id
@@ -119,6 +128,10 @@ class PhotoImporter:
                 except Exception as e:
                     logger.warning(f"CLIP embedding hatasi ({image_path.name}): {e}")
 
+            # 5b. Thumbnail + önizleme: düzeltilmiş görüntüden, şifrelemeden ÖNCE üretilir
+            if self.thumbnail_store is not None:
+                self.thumbnail_store.generate(file_hash, image_path)
+
             # 6. Encryption: Dosyayı diskte şifrele
             self.encryption.encrypt_file(str(image_path))
 
@@ -127,7 +140,14 @@ class PhotoImporter:
             if item_id is None:
                 return 'error'
 
-            # 8. FAISS'e embedding ekle ve faiss_index_id güncelle
+            # 8. Embedding'i kalıcı depoya yaz (yeniden index'leme görüntüye dokunmasın)
+            if embedding is not None and self.embedding_store is not None:
+                try:
+                    self.embedding_store.put(file_hash, item_id, embedding)
+                except Exception as e:
+                    logger.warning(f"Embedding deposu yazma hatasi (item {item_id}): {e}")
+
+            # 9. FAISS'e embedding ekle ve faiss_index_id güncelle
             if embedding is not None and self.faiss_manager is not None:
                 try:
                     faiss_ids = self.faiss_manager.add_embeddings(embedding, [item_id])
@@ -145,6 +165,16 @@ class PhotoImporter:
             logger.error(f"Fotoğraf import hatası ({image_path}): {e}")
             return 'error'
 
+    def import_files(self, files: List[Path], user_consent: bool,
+                     executor: Optional[Executor] = None) -> Iterator[Tuple[Path, str]]:
+        """
+        Dosyaları paralel import pipeline'ından geçirir.
+        Her dosya bittiğinde (path, status) üretir; status değerleri
+        import_single_photo ile aynıdır.
+        """
+        pipeline = ImportPipeline(self, executor=executor)
+        return pipeline.run(files, user_consent)
+
     def import_folder(self, folder_path: str, user_consent: bool, recursive: bool = True) -> Dict:
         """Klasördeki tüm fotoğrafları içe aktarır ve istatistik döner[cite: 28]."""
         folder = Path(folder_path)
@@ -157,8 +187,7 @@ class PhotoImporter:
             'errors': 0
         }
 
-        for file_path in files:
-            result = self.import_single_photo(file_path, user_consent)
+        for _, result in self.import_files(files, user_consent):
             if result == 'imported':
                 stats['imported'] += 1
             elif result == 'duplicate':
@@ -166,4 +195,4 @@ class PhotoImporter:
             else:
                 stats['errors'] += 1
 
-        return stats
\ No newline at end of file
+        return stats
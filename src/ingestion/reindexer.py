@@ -0,0 +1,186 @@
+"""
+Toplu Reindex
+
+faiss_index_id'si NULL olan (rizasi olan) item'lari item_id sirasiyla
+REINDEX_BATCH_SIZE'lik parcalar halinde yeniden index'ler:
+
+    depo      -> vektoru kalici depoda olan item'lar hic cozulmez
+    cozme     -> kalanlar thread pool'da sifresi cozulup decode edilir
+    CLIP      -> decode edilen goruntuler mikro-batch'lerde encode edilir
+    yazma     -> batch basina tek FAISS ekleme ve tek DB commit'i
+
+Her batch'ten sonra devam noktasi (son item_id + sayaclar) REINDEX_STATE_PATH'e
+yazilir. Islem yarida kalirsa (cokme, kapatma) sonraki calistirma kaldigi
+yerden surer; FAISS'e eklenip DB'ye yazilamamis item'lar tekrar eklenmez.
+Kullanici iptalinde durum "cancelled" olur: devam noktasi elle baslatilan
+sonraki reindex icin korunur ama API acilisinda otomatik surdurulmez.
+"""
+
+import os
+import json
+import logging
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from database.schema import Item
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def _read_state(state_path, statuses) -> Optional[Dict]:
+    """Durum dosyasini okur; durumu statuses icindeyse doner."""
+    state_path = Path(state_path)
+    if not state_path.exists():
+        return None
+    try:
+        state = json.loads(state_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        logger.warning(f"Reindex durum dosyasi okunamadi, bastan baslanacak: {e}")
+        return None
+    return state if state.get("status") in statuses else None
+
+
+def load_interrupted_state(state_path=Config.REINDEX_STATE_PATH) -> Optional[Dict]:
+    """
+    Cokme ya da kapanis nedeniyle yarida kalmis bir reindex varsa devam noktasini
+    doner (acilista otomatik surdurulur). Kullanicinin iptal ettigi is donmez.
+    """
+    return _read_state(state_path, ("running",))
+
+
+class Reindexer:
+    """
+    FAISS'te vektoru olmayan item'lari arka planda batch'ler halinde index'ler.
+    run() her batch sonunda ilerleme sozlugu uretir (SSE stream'i bunu yayinlar).
+    """
+
+    def __init__(self, db_session: Session, clip_embedder, faiss_manager,
+                 embedding_store=None, executor: Optional[Executor] = None,
+                 batch_size: int = Config.REINDEX_BATCH_SIZE,
+                 state_path: str = Config.REINDEX_STATE_PATH):
+        self.db = db_session
+        self.clip = clip_embedder
+        self.faiss_manager = faiss_manager
+        self.embedding_store = embedding_store
+        self.executor = executor
+        self.batch_size = batch_size
+        self.state_path = Path(state_path)
+
+    # =================================================================
+    # DEVAM NOKTASI
+    # =================================================================
+
+    def load_state(self) -> Optional[Dict]:
+        """Devam noktasi: yarida kalmis ya da kullanicinin iptal ettigi is."""
+        return _read_state(self.state_path, ("running", "cancelled"))
+
+    def _save_state(self, state: Dict):
+        """Durumu atomik olarak yazar (yarim dosya kalmasin)."""
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(tmp, self.state_path)
+
+    # =================================================================
+    # CALISTIRMA
+    # =================================================================
+
+    def _pending(self, after_id: int):
+        return self.db.query(Item).filter(
+            Item.faiss_index_id.is_(None),
+            Item.has_consent == True,
+            Item.item_id > after_id,
+        )
+
+    def run(self, cancel: Optional[threading.Event] = None) -> Iterator[Dict]:
+        """
+        Reindex'i calistirir; her batch sonunda
+        {current, total, reindexed, failed, last_item_id} uretir.
+        cancel set edilirse mevcut batch bitince durur (devam noktasi korunur);
+        iptal kapanistan gelmiyorsa (cancel.shutdown) durum "cancelled" yazilir.
+        """
+        state = self.load_state()
+        if state:
+            logger.info(f"Reindex kaldigi yerden devam ediyor (item_id > {state['last_item_id']})")
+            state["status"] = "running"
+        else:
+            state = {"status": "running", "last_item_id": 0, "current": 0,
+                     "reindexed": 0, "failed": 0}
+        state["total"] = state["current"] + self._pending(state["last_item_id"]).count()
+        self._save_state(state)
+
+        own_pool = self.executor is None
+        pool = self.executor or ThreadPoolExecutor(max_workers=Config.REINDEX_WORKERS)
+        try:
+            while not (cancel and cancel.is_set()):
+                items = (self._pending(state["last_item_id"])
+                         .order_by(Item.item_id).limit(self.batch_size).all())
+                if not items:
+                    break
+
+                reindexed = self._process_batch(items, pool)
+                state["current"] += len(items)
+                state["reindexed"] += reindexed
+                state["failed"] += len(items) - reindexed
+                state["last_item_id"] = items[-1].item_id
+                self._save_state(state)
+                yield {k: state[k] for k in ("current", "total", "reindexed", "failed", "last_item_id")}
+        finally:
+            if own_pool:
+                pool.shutdown(wait=True)
+            self.faiss_manager.flush()
+
+        if not (cancel and cancel.is_set()):
+            state["status"] = "completed"
+            self._save_state(state)
+            logger.info(f"Reindex tamamlandi: {state['reindexed']} basarili, {state['failed']} basarisiz")
+        elif not getattr(cancel, "shutdown", False):
+            state["status"] = "cancelled"
+            self._save_state(state)
+            logger.info(f"Reindex kullanici tarafindan iptal edildi (item_id {state['last_item_id']})")
+
+    def _process_batch(self, items: List[Item], pool: Executor) -> int:
+        """Bir batch'i index'ler; basariyla index'lenen item sayisini doner."""
+        vectors: Dict[int, np.ndarray] = {}
+        to_encode: List[Item] = []
+
+        for item in items:
+            # FAISS'e eklenmis ama DB'ye yazilamadan kesilmis (cokme sonrasi)
+            if self.faiss_manager.contains(item.item_id):
+                item.faiss_index_id = item.item_id
+                continue
+            embedding = self.embedding_store.get(item.file_hash) if self.embedding_store else None
+            if embedding is not None:
+                vectors[item.item_id] = embedding
+            elif Path(item.file_path).exists():
+                to_encode.append(item)
+
+        if to_encode:
+            try:
+                encoded = self.clip.encode_images([Path(i.file_path) for i in to_encode], executor=pool)
+            except Exception as e:
+                logger.warning(f"Reindex batch encode hatasi: {e}")
+                encoded = [None] * len(to_encode)
+            new = [(item, emb) for item, emb in zip(to_encode, encoded) if emb is not None]
+            if new and self.embedding_store is not None:
+                self.embedding_store.put_many(
+                    [item.file_hash for item, _ in new],
+                    [item.item_id for item, _ in new],
+                    np.stack([emb for _, emb in new]),
+                )
+            vectors.update((item.item_id, emb) for item, emb in new)
+
+        if vectors:
+            ids = list(vectors)
+            by_id = {item.item_id: item for item in items}
+            for faiss_id in self.faiss_manager.add_embeddings(np.stack([vectors[i] for i in ids]), ids):
+                by_id[faiss_id].faiss_index_id = faiss_id
+
+        self.db.commit()
+        return sum(1 for item in items if item.faiss_index_id is not None)
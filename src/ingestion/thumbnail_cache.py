@@ -0,0 +1,93 @@
+"""
+Thumbnail Bellek Cache'i
+
+Şifreli depodan çözülen thumbnail/önizleme JPEG'lerini bellekte tutar.
+Kapasite giriş sayısıyla değil bayt bütçesiyle sınırlanır; değerler ham
+JPEG baytlarıdır (base64 yalnızca yanıt üretilirken yapılır).
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set, Tuple
+from config import Config
+
+
+class ThumbnailCache:
+    """
+    (item_id, tür) anahtarlı, bayt bütçeli, thread-safe LRU cache.
+
+    Bütçe aşılınca en uzun süredir kullanılmayan girişler atılır. Endpoint'ler
+    önce DB'de rızayı kontrol eder, cache'e sonra bakar; yine de rızası
+    kaldırılan veya silinen item'lar invalidate() ile hemen çıkarılmalıdır
+    (çözülmüş baytları bellekte kalmasın).
+    """
+
+    def __init__(self, max_bytes: int = Config.THUMBNAIL_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries: "OrderedDict[Tuple[int, str], bytes]" = OrderedDict()
+        self._kinds: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def get(self, item_id: int, kind: str = "thumb") -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get((item_id, kind))
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((item_id, kind))
+            self.hits += 1
+            return data
+
+    def put(self, item_id: int, data: bytes, kind: str = "thumb"):
+        """Girişi ekler; bütçeden büyük tek bir değer cache'lenmez."""
+        if len(data) > self.max_bytes:
+            return
+        key = (item_id, kind)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = data
+            self._bytes += len(data)
+            self._kinds.add(kind)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def invalidate(self, item_ids: Iterable[int]) -> int:
+        """Item'ların tüm türlerini cache'ten çıkarır; çıkarılan giriş sayısını döner."""
+        removed = 0
+        with self._lock:
+            for item_id in item_ids:
+                for kind in self._kinds:
+                    data = self._entries.pop((item_id, kind), None)
+                    if data is not None:
+                        self._bytes -= len(data)
+                        removed += 1
+        return removed
+
+    def clear(self):
+        """Tüm girişleri siler, sayaçları sıfırlar."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict:
+        """Doluluk ve hit/miss/eviction sayaçları."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            }
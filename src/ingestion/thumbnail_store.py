@@ -0,0 +1,102 @@
+"""
+Şifreli Thumbnail Deposu
+
+Import sırasında her fotoğraf için küçük bir thumbnail ve orta boy bir
+önizleme üretilir, Fernet ile şifrelenip diske yazılır. Galeri bu dosyaları
+okur; tam çözünürlüklü orijinali çözüp yeniden boyutlandırmaz.
+
+Dosyalar içerik adreslidir (dosya hash'i ile), yolu hash'ten hesaplandığı
+için arama O(1)'dir:
+
+    <root>/<tür>/<hash[:2]>/<hash>.enc
+"""
+
+import io
+import os
+import logging
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+from PIL import Image, ImageOps
+from security.encryption_manager import EncryptionManager
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class ThumbnailStore:
+    """
+    Türler: 'thumb' (galeri ızgarası) ve 'preview' (detay ekranı).
+    Aynı içerikli iki fotoğraf aynı dosyaları paylaşır.
+    """
+
+    SIZES: Dict[str, Tuple[Tuple[int, int], int]] = {
+        "thumb": (Config.THUMBNAIL_SIZE, Config.THUMBNAIL_QUALITY),
+        "preview": (Config.PREVIEW_SIZE, Config.PREVIEW_QUALITY),
+    }
+
+    def __init__(self, root: str = Config.THUMBNAIL_STORE_PATH,
+                 encryption_manager: Optional[EncryptionManager] = None):
+        self.root = Path(root)
+        self.encryption = encryption_manager or EncryptionManager()
+
+    def path_for(self, file_hash: str, kind: str = "thumb") -> Path:
+        if kind not in self.SIZES:
+            raise ValueError(f"Bilinmeyen thumbnail türü: {kind}")
+        return self.root / kind / file_hash[:2] / f"{file_hash}.enc"
+
+    def has(self, file_hash: str, kind: str = "thumb") -> bool:
+        return self.path_for(file_hash, kind).exists()
+
+    def generate(self, file_hash: str, source: Union[Path, str, bytes]) -> bool:
+        """
+        Şifrelenmemiş bir görüntüden (dosya yolu veya ham bayt) tüm türleri
+        üretip şifreli olarak yazar. Görüntü bir kez çözülür, önce büyük
+        önizleme sonra ondan thumbnail küçültülür.
+        """
+        try:
+            with Image.open(io.BytesIO(source) if isinstance(source, bytes) else source) as img:
+                img = ImageOps.exif_transpose(img)
+                if img.mode != "RGB":
+                    img = img.convert("RGB")
+                # Büyükten küçüğe: her tür bir öncekinden küçültülür
+                for kind, (size, quality) in sorted(self.SIZES.items(),
+                                                    key=lambda kv: -max(kv[1][0])):
+                    img.thumbnail(size, Image.Resampling.LANCZOS)
+                    buf = io.BytesIO()
+                    img.save(buf, format="JPEG", quality=quality)
+                    self._write(self.path_for(file_hash, kind), buf.getvalue())
+            return True
+        except Exception as e:
+            logger.warning(f"Thumbnail üretilemedi ({file_hash[:12]}): {e}")
+            return False
+
+    def _write(self, path: Path, jpeg_bytes: bytes):
+        """Şifreleyip atomik olarak yazar (yarım dosya kalmasın)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(self.encryption.cipher.encrypt(jpeg_bytes))
+        os.replace(tmp, path)
+
+    def get(self, file_hash: str, kind: str = "thumb") -> Optional[bytes]:
+        """Çözülmüş JPEG baytlarını döner; yoksa veya çözülemezse None."""
+        path = self.path_for(file_hash, kind)
+        try:
+            return self.encryption.cipher.decrypt(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Thumbnail çözülemedi ({path.name}): {e}")
+            return None
+
+    def remove(self, file_hash: str) -> int:
+        """Hash'e ait tüm türleri siler; silinen dosya sayısını döner."""
+        removed = 0
+        for kind in self.SIZES:
+            try:
+                self.path_for(file_hash, kind).unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
@@ -1,63 +1,68 @@
 """
-Konuma Göre Arama (Aşama 5.3) - Geopy Entegrasyonu
+Konuma Göre Arama (Aşama 5.3)
+
+Yarıçap araması iki aşamalıdır:
+    1. Sınır kutusu  -> R*Tree index'i (items_geo) yarıçapı çevreleyen kutudaki adayları verir
+    2. Kesin mesafe  -> adayların hepsi için tek seferde vektörel elipsoid mesafe
+                        (src/geo/distance.py; geodesic'e göre bağıl hata ≤ 1e-5)
+
+Şehir adları yerel gazetteer'den (src/geo/gazetteer.py) koordinata çevrilir;
+arama ağ bağlantısı gerektirmez.
 """
 
 import logging
 from typing import List, Dict, Optional
-from geopy.geocoders import Nominatim
-from geopy.distance import geodesic
+import numpy as np
 from sqlalchemy.orm import Session
 from database.schema import Item
+from ..geo import Geocoder, distance_km, within_radius, bounding_box_filter
 from config import Config
 
 logger = logging.getLogger(__name__)
 
+
 class LocationSearch:
-    def __init__(self, db_connection: Session):
+    def __init__(self, db_connection: Session, geocoder: Optional[Geocoder] = None):
         self.db = db_connection
-        # User-agent kısmına kendi proje adını yazman önemli (OpenStreetMap kuralı)
-        self.geocoder = Nominatim(user_agent=Config.GEOCODER_USER_AGENT)
+        self.geocoder = geocoder or Geocoder()
 
     def calculate_distance(self, lat1: float, lon1: float, 
                           lat2: float, lon2: float) -> float:
         """
-        Geopy'nin 'geodesic' (jeodezik) yöntemini kullanarak mesafe hesaplar.
-        Dünya'nın tam küre olmadığını (elipsoid olduğunu) hesaba katar, daha hassastır.
+        WGS84 elipsoidi üzerinde mesafe (km). Dünya'nın tam küre olmadığını
+        hesaba katar; geopy geodesic ile arasındaki fark 1e-5'ten küçüktür.
         """
-        return geodesic((lat1, lon1), (lat2, lon2)).kilometers
+        return float(distance_km(lat1, lon1, lat2, lon2))
 
     def search_by_location(self, latitude: float, longitude: float, 
                           radius_km: float = Config.DEFAULT_SEARCH_RADIUS_KM) -> List[Dict]:
-        """Koordinat çevresindeki öğeleri getirir."""
-        items = self.db.query(Item).filter(
-            Item.latitude.isnot(None),
-            Item.has_consent == True
+        """Koordinat çevresindeki öğeleri getirir (en yakından uzağa)."""
+        items = self.db.query(Item.item_id, Item.latitude, Item.longitude).filter(
+            Item.has_consent == True,
+            bounding_box_filter(self.db, latitude, longitude, radius_km),
         ).all()
-        results = []
-
-        for item in items:
-            dist = self.calculate_distance(latitude, longitude, item.latitude, item.longitude)
-            if dist <= radius_km:
-                results.append({
-                    'item_id': item.item_id,
-                    'distance_km': round(dist, 2),
-                    'location': (item.latitude, item.longitude)
-                })
+        if not items:
+            return []
+
+        inside, distances = within_radius(
+            latitude, longitude,
+            np.array([item.latitude for item in items], dtype=float),
+            np.array([item.longitude for item in items], dtype=float),
+            radius_km)
+        results = [{
+            'item_id': items[i].item_id,
+            'distance_km': round(float(dist), 2),
+            'location': (items[i].latitude, items[i].longitude)
+        } for i, dist in zip(inside, distances)]
         return sorted(results, key=lambda x: x['distance_km'])
 
     def search_by_city(self, city_name: str, radius_km: float = Config.CITY_SEARCH_RADIUS_KM) -> List[Dict]:
         """
-        Geopy kullanarak şehir adını koordinata çevirir ve arama yapar.
+        Şehir adını yerel gazetteer'den koordinata çevirir ve arama yapar.
         """
-        try:
-            # Şehri buluyoruz
-            location = self.geocoder.geocode(city_name)
-            if location:
-                logger.info(f"Arama merkezi: ({location.latitude}, {location.longitude})")
-                return self.search_by_location(location.latitude, location.longitude, radius_km)
-            else:
-                logger.warning(f"'{city_name}' konumu bulunamadi.")
-                return []
-        except Exception as e:
-            logger.error(f"Geocoding hatasi: {e}")
+        location = self.geocoder.geocode(city_name)
+        if location is None:
+            logger.warning(f"'{city_name}' konumu bulunamadi.")
             return []
+        logger.info(f"Arama merkezi: ({location.latitude}, {location.longitude})")
+        return self.search_by_location(location.latitude, location.longitude, radius_km)
@@ -4,7 +4,7 @@ Metin ile Arama (Aşama 5.1)
 Kullanıcı metin sorgusu ile fotoğraf/metin arama yapar.
 """
 
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional
 import numpy as np
 from sqlalchemy.orm import Session
 from ..embedding.clip_embedder import CLIPEmbedder
@@ -38,7 +38,8 @@ class TextSearch:
         self.db_session = db_session
         self.encryptor = encryption_manager or EncryptionManager()
 
-    def search_images(self, query_text: str, k: int = 10) -> List[Dict]:
+    def search_images(self, query_text: str, k: int = 10,
+                      allowed_ids: Optional[Iterable[int]] = None) -> List[Dict]:
         """
         Metin sorgusu ile fotoğraf ara.
 
@@ -47,6 +48,7 @@ class TextSearch:
         Args:
             query_text: Arama metni
             k: Kaç sonuç döndürülecek
+            allowed_ids: Ek filtre (örn. tarih/konum) sonucu izin verilen item_id'ler
 
         Returns:
             [{'item_id': int, 'score': float, 'file_path': str}, ...]
@@ -56,8 +58,12 @@ class TextSearch:
         if query_vec is None:
             return []
 
-        # 2. FAISS'ten k*2 sonuç al (consent filtresi sonrası yeterli sonuç kalsın)
-        faiss_results = self.image_faiss.search(query_vec, k * 2)
+        # 2. FAISS araması; izin listesi yalnızca ek filtre (tarih/konum) varsa verilir
+        if allowed_ids is not None:
+            allowed_ids = list(allowed_ids)
+            if not allowed_ids:
+                return []
+        faiss_results = self.image_faiss.search(query_vec, k, allowed_ids=allowed_ids)
         if not faiss_results:
             return []
 
@@ -69,11 +75,10 @@ class TextSearch:
         ).all()
         consent_map = {item.item_id: item for item in items}
 
-        # 4. Sonuçları oluştur (distance → score dönüşümü)
+        # 4. Sonuçları oluştur (FAISS skoru doğrudan cosine benzerlik)
         results = []
-        for item_id, distance in faiss_results:
+        for item_id, score in faiss_results:
             if item_id in consent_map:
-                score = 1 - distance / 2
                 results.append({
                     'item_id': item_id,
                     'score': round(score, 4),
@@ -84,13 +89,15 @@ class TextSearch:
 
         return results
 
-    def search_texts(self, query_text: str, k: int = 10) -> List[Dict]:
+    def search_texts(self, query_text: str, k: int = 10,
+                     allowed_ids: Optional[Iterable[int]] = None) -> List[Dict]:
         """
         Metin sorgusu ile metin/transkript ara.
 
         Args:
             query_text: Arama metni
             k: Kaç sonuç döndürülecek
+            allowed_ids: Ek filtre sonucu izin verilen item_id'ler
 
         Returns:
             [{'item_id': int, 'score': float, 'transcript': str}, ...]
@@ -100,8 +107,12 @@ class TextSearch:
         if query_vec is None:
             return []
 
-        # 2. FAISS'ten k*2 sonuç al
-        faiss_results = self.text_faiss.search(query_vec, k * 2)
+        # 2. FAISS araması; izin listesi yalnızca ek filtre varsa verilir
+        if allowed_ids is not None:
+            allowed_ids = list(allowed_ids)
+            if not allowed_ids:
+                return []
+        faiss_results = self.text_faiss.search(query_vec, k, allowed_ids=allowed_ids)
         if not faiss_results:
             return []
 
@@ -115,9 +126,8 @@ class TextSearch:
 
         # 4. Sonuçları oluştur
         results = []
-        for item_id, distance in faiss_results:
+        for item_id, score in faiss_results:
             if item_id in consent_map:
-                score = 1 - distance / 2
                 results.append({
                     'item_id': item_id,
                     'score': round(score, 4),
@@ -2,5 +2,237 @@
 Kümeleme modülü testleri (Aşama 6)
 """
 
-# Test dosyası - şimdilik boş
+import tracemalloc
+from datetime import datetime, timedelta
 
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+from database.schema import Event, Item
+from src.clustering import DBSCANClusterer, EventClusterer
+from src.clustering.event_clusterer import _event_name
+from src.geo import Geocoder, GeocodeCache, distance_km
+
+
+class TestDBSCANDistanceMatrix:
+
+    @pytest.fixture
+    def clusterer(self):
+        return DBSCANClusterer(time_threshold_hours=3.0, location_threshold_km=1.0)
+
+    def test_scaled_by_thresholds(self, clusterer):
+        """Zaman ve konum farkı eşiklere bölünür, büyük olan alınır."""
+        features = np.array([
+            [0.0, 41.0, 29.0],
+            [3600.0, 41.005, 29.0],      # 1 saat, ~0.55 km
+            [0.0, 39.9, 32.9],           # aynı an, Ankara
+        ])
+
+        matrix = clusterer.calculate_distance_matrix(features)
+
+        assert matrix.shape == (3, 3)
+        assert np.allclose(matrix, matrix.T)
+        assert matrix[0, 1] == pytest.approx(max(1 / 3, float(distance_km(41.0, 29.0, 41.005, 29.0))))
+        assert matrix[0, 1] <= 1.0
+        assert matrix[0, 2] == pytest.approx(float(distance_km(41.0, 29.0, 39.9, 32.9)))
+
+    def test_missing_location_uses_time_only(self, clusterer):
+        """Konumu olmayan öğelerde yalnızca zaman farkı sayılır."""
+        features = np.array([
+            [0.0, 41.0, 29.0],
+            [5400.0, np.nan, np.nan],
+        ])
+
+        matrix = clusterer.calculate_distance_matrix(features)
+
+        assert matrix[0, 1] == pytest.approx(0.5)
+
+
+class TestDBSCANClustering:
+
+    @pytest.fixture
+    def clusterer(self):
+        return DBSCANClusterer(time_threshold_hours=3.0, location_threshold_km=1.0,
+                               min_samples=2, block_size=8)
+
+    @staticmethod
+    def _item(item_id, hours, lat=41.0, lng=29.0):
+        return {'item_id': item_id, 'created_at': datetime(2024, 5, 1) + timedelta(hours=hours),
+                'location_lat': lat, 'location_lng': lng}
+
+    def test_empty(self, clusterer):
+        assert clusterer.cluster_by_time_and_location([]) == []
+
+    def test_time_and_location_split(self, clusterer):
+        """Aynı saatte farklı şehir ve aynı yerde farklı gün ayrı kümelerdir; sonuç zamana göre sıralı."""
+        items = [
+            self._item(1, 1.0), self._item(2, 0.0), self._item(3, 2.0),
+            self._item(4, 0.5, 39.9, 32.9), self._item(5, 1.5, 39.9, 32.9),
+            self._item(6, 48.0), self._item(7, 49.0),
+            self._item(8, 200.0),
+        ]
+
+        clusters = clusterer.cluster_by_time_and_location(items)
+
+        assert clusters == [[2, 1, 3], [4, 5], [6, 7]]
+
+    def test_chain_over_time(self, clusterer):
+        """Eşik içindeki ardışık çekimler zincirlenerek tek olay olur."""
+        items = [self._item(i, 2.5 * i) for i in range(40)]
+
+        assert clusterer.cluster_by_time_and_location(items) == [list(range(40))]
+
+    def test_items_without_location(self, clusterer):
+        """Konumsuz öğe zamanca yakın kümeye katılır, iki şehri birbirine bağlamaz."""
+        items = [
+            self._item(1, 0.0), self._item(2, 1.0),
+            self._item(3, 1.5, None, None),
+            self._item(4, 2.0, 39.9, 32.9), self._item(5, 3.0, 39.9, 32.9),
+            self._item(6, 100.0, None, None), self._item(7, 101.0, None, None),
+        ]
+
+        clusters = clusterer.cluster_by_time_and_location(items)
+
+        assert clusters == [[1, 2, 3], [4, 5], [6, 7]]
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_dense_dbscan(self, seed):
+        """Akış halindeki sonuç, yoğun matrisle çalışan sklearn DBSCAN ile aynı kümeleri verir."""
+        from sklearn.cluster import DBSCAN
+
+        rng = np.random.default_rng(seed)
+        clusterer = DBSCANClusterer(min_samples=3, block_size=int(rng.integers(1, 32)))
+        items = [self._item(i, float(rng.uniform(0, 72)),
+                            float(41 + rng.normal(0, 0.01)), float(29 + rng.normal(0, 0.01)))
+                 for i in range(200)]
+
+        clusters = clusterer.cluster_by_time_and_location(items)
+        matrix = clusterer.calculate_distance_matrix(clusterer.prepare_features(items))
+        reference = DBSCAN(eps=1.0, min_samples=3, metric="precomputed").fit(matrix)
+
+        label = {item_id: k for k, cluster in enumerate(clusters) for item_id in cluster}
+        assert set(label) == set(np.flatnonzero(reference.labels_ >= 0))
+        # Çekirdek noktaların bölünmesi birebir aynı olmalı (sınır öğeleri
+        # birden çok kümeye komşuysa DBSCAN'de de sıraya bağlıdır)
+        core = reference.core_sample_indices_
+        pairs = {(reference.labels_[i], label[i]) for i in core}
+        assert len(pairs) == len({a for a, _ in pairs}) == len({b for _, b in pairs})
+        for i in set(label) - set(core):
+            assert any(matrix[i, j] <= 1.0 and label[j] == label[i] for j in core)
+
+    def test_large_input_bounded(self):
+        """50k öğe yoğun matris kurulmadan (N x N ~ 20 GB) kısa sürede kümelenir."""
+        rng = np.random.default_rng(0)
+        n = 50_000
+        hours = np.sort(rng.uniform(0, 2 * 365 * 24, n))
+        items = [self._item(i, float(hours[i]), float(rng.normal(41, 0.2)), float(rng.normal(29, 0.2)))
+                 for i in range(n)]
+
+        tracemalloc.start()
+        try:
+            clusters = DBSCANClusterer().cluster_by_time_and_location(items)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        assert clusters
+        assert peak < 200 * 1024 * 1024
+
+
+class TestEventClusterer:
+
+    @pytest.fixture
+    def clusterer(self, db_session):
+        return EventClusterer(db_session, geocoder=Geocoder(cache=GeocodeCache(None)))
+
+    @staticmethod
+    def _add(db, hours, lat=41.01, lng=28.98, consent=True):
+        """Verilen saatlerde (2024-03-15'ten itibaren) item ekler, id'lerini döner."""
+        items = [Item(file_path=f"/photos/{h}_{lat}.jpg", file_hash=f"h{h}_{lat}", type="Photo",
+                      has_consent=consent, creation_datetime=datetime(2024, 3, 15) + timedelta(hours=h),
+                      latitude=lat, longitude=lng)
+                 for h in hours]
+        db.add_all(items)
+        db.commit()
+        return [item.item_id for item in items]
+
+    @staticmethod
+    def _events(db):
+        return {event.event_id: sorted(item.item_id for item in event.items)
+                for event in db.query(Event).order_by(Event.start_date)}
+
+    def test_cluster_all_items(self, clusterer, db_session):
+        """Tam kümeleme olayları oluşturur; gürültü ve rızasız item'lar olaysız kalır."""
+        first = self._add(db_session, [10, 11, 12])
+        second = self._add(db_session, [72, 73], lat=39.93, lng=32.86)
+        lonely = self._add(db_session, [200])
+        hidden = self._add(db_session, [10.5], consent=False)
+
+        result = clusterer.cluster_all_items()
+
+        assert [r['status'] for r in result] == ["created", "created"]
+        assert sorted(self._events(db_session).values()) == [first, second]
+        assert db_session.get(Item, lonely[0]).event_id is None
+        assert db_session.get(Item, hidden[0]).event_id is None
+        titles = [event.title for event in db_session.query(Event).order_by(Event.start_date)]
+        assert titles[0] == "15 Mart 2024 - İstanbul"
+        assert titles[1].startswith("18 Mart 2024")
+
+    def test_new_items_join_existing_event(self, clusterer, db_session):
+        """Yeni item komşu olaya eklenir; olay kimliği ve başlığın otomatikliği korunur."""
+        ids = self._add(db_session, [10, 11])
+        clusterer.cluster_all_items()
+        event_id = db_session.get(Item, ids[0]).event_id
+
+        new = self._add(db_session, [36])
+        assert clusterer.cluster_new_items(new) == []  # 25 saat uzakta: gürültü
+
+        late = self._add(db_session, [13, 38])
+        result = clusterer.cluster_new_items(late)
+
+        assert {(r['status'], r['item_count']) for r in result} == {("updated", 3), ("created", 2)}
+        assert self._events(db_session)[event_id] == ids + late[:1]
+        assert db_session.get(Event, event_id).title == "15 Mart 2024 - İstanbul"
+
+    def test_bridging_items_merge_events(self, clusterer, db_session):
+        """İki olayı birbirine bağlayan yeni item'lar olayları birleştirir; büyük olay kalır."""
+        big = self._add(db_session, [0, 1, 2])
+        small = self._add(db_session, [8, 9])
+        clusterer.cluster_all_items()
+        big_event = db_session.get(Item, big[0]).event_id
+        db_session.get(Event, big_event).title = "Doğum günü"
+        db_session.commit()
+
+        bridge = self._add(db_session, [5])
+        result = clusterer.cluster_new_items(bridge)
+
+        assert sorted(r['status'] for r in result) == ["deleted", "updated"]
+        assert self._events(db_session) == {big_event: sorted(big + small + bridge)}
+        # Kullanıcının verdiği başlık değişmez
+        assert db_session.get(Event, big_event).title == "Doğum günü"
+
+    def test_incremental_touches_only_nearby_events(self, clusterer, db_session):
+        """Pencere dışındaki olaylar yeniden kümelenmez."""
+        self._add(db_session, [0, 1])
+        far = self._add(db_session, [500, 501])
+        clusterer.cluster_all_items()
+        far_event = db_session.get(Item, far[0]).event_id
+        dbscan = clusterer.dbscan_clusterer
+        dbscan.cluster_by_time_and_location = MagicMock(wraps=dbscan.cluster_by_time_and_location)
+
+        clusterer.cluster_new_items(self._add(db_session, [2]))
+
+        seen = dbscan.cluster_by_time_and_location.call_args[0][0]
+        assert {item['item_id'] for item in seen}.isdisjoint(far)
+        assert self._events(db_session)[far_event] == far
+
+    @pytest.mark.parametrize("start, end, expected", [
+        (datetime(2024, 3, 15, 9), datetime(2024, 3, 15, 18), "15 Mart 2024"),
+        (datetime(2024, 3, 15), datetime(2024, 3, 17), "15-17 Mart 2024"),
+        (datetime(2024, 3, 30), datetime(2024, 4, 2), "30 Mart - 2 Nisan 2024"),
+        (datetime(2024, 12, 31), datetime(2025, 1, 1), "31 Aralık 2024 - 1 Ocak 2025"),
+    ])
+    def test_event_name(self, start, end, expected):
+        assert _event_name(start, end) == expected
+        assert _event_name(start, end, "Kadıköy") == f"{expected} - Kadıköy"
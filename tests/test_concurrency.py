@@ -0,0 +1,145 @@
+# tests/test_concurrency.py
+"""
+API çalıştırma modeli (api/concurrency.py) testleri.
+"""
+
+import time
+import threading
+import anyio
+import pytest
+from fastapi import FastAPI, Depends, Query
+from fastapi.testclient import TestClient
+from api import concurrency
+from api.concurrency import offload, run_blocking, iterate_blocking
+
+
+@pytest.fixture(autouse=True)
+def fresh_limiters(monkeypatch):
+    """Her test kendi limiter'larıyla başlar (limiter'lar event loop'a bağlı)."""
+    monkeypatch.setattr(concurrency, "_limiters", {})
+    monkeypatch.setitem(concurrency._CAPACITIES, "test", 2)
+
+
+class TestRunBlocking:
+
+    def test_event_loop_not_blocked(self):
+        """Bloklayan iş sürerken event loop diğer işleri yürütmeye devam eder."""
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await anyio.sleep(0.02)
+
+        async def main():
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(run_blocking, "test", time.sleep, 0.2)
+                tg.start_soon(ticker)
+
+        anyio.run(main)
+        assert len(ticks) == 5
+        assert ticks[-1] - ticks[0] < 0.2
+
+    def test_capacity_per_subsystem(self):
+        """Aynı alt sistemde aynı anda en fazla kapasite kadar iş çalışır."""
+        running, peak = [0], [0]
+        lock = threading.Lock()
+
+        def work():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+
+        async def main():
+            async with anyio.create_task_group() as tg:
+                for _ in range(6):
+                    tg.start_soon(run_blocking, "test", work)
+
+        anyio.run(main)
+        assert peak[0] == 2
+
+    def test_unknown_subsystem(self):
+        with pytest.raises(KeyError):
+            anyio.run(run_blocking, "yok", time.sleep, 0)
+
+    def test_iterate_blocking(self):
+        """Bloklayan iterator'un tüm elemanları sırayla gelir."""
+        async def main():
+            return [x async for x in iterate_blocking("test", iter(range(4)))]
+
+        assert anyio.run(main) == [0, 1, 2, 3]
+
+    def test_iterator_closed_in_pool_on_cancel(self):
+        """Akış ortasında iptal edilince iterator'un finally bloğu pool'da çalışır."""
+        loop_thread, closed_in = threading.get_ident(), []
+        received = []
+
+        def produce():
+            try:
+                for i in range(100):
+                    time.sleep(0.01)
+                    yield i
+            finally:
+                time.sleep(0.1)  # pipeline thread join / pool shutdown benzeri
+                closed_in.append(threading.get_ident())
+
+        async def consume(task_status=anyio.TASK_STATUS_IGNORED):
+            async for value in iterate_blocking("test", produce()):
+                received.append(value)
+                if len(received) == 2:
+                    task_status.started()
+
+        async def main():
+            async with anyio.create_task_group() as tg:
+                await tg.start(consume)
+                tg.cancel_scope.cancel()
+
+        anyio.run(main)
+        assert 2 <= len(received) < 100
+        assert closed_in and closed_in[0] != loop_thread
+
+    def test_iterator_closed_when_consumer_stops(self):
+        """Tüketici döngüden çıkıp generator'ı kapatınca iterator da kapanır."""
+        loop_thread, closed_in = threading.get_ident(), []
+
+        def produce():
+            try:
+                yield from range(10)
+            finally:
+                closed_in.append(threading.get_ident())
+
+        async def main():
+            stream = iterate_blocking("test", produce())
+            async for value in stream:
+                if value == 1:
+                    break
+            await stream.aclose()
+
+        anyio.run(main)
+        assert closed_in and closed_in[0] != loop_thread
+
+
+class TestOffload:
+
+    def test_fastapi_handler_signature_preserved(self):
+        """offload'lu senkron handler Query/Depends parametrelerini korur ve pool'da çalışır."""
+        app = FastAPI()
+        main_thread = threading.get_ident()
+
+        def get_value():
+            return 10
+
+        @app.get("/items")
+        @offload("test")
+        def items(page: int = Query(1, ge=1), value: int = Depends(get_value)):
+            return {"page": page, "value": value,
+                    "in_pool": threading.get_ident() != main_thread}
+
+        with TestClient(app) as client:
+            assert client.get("/items", params={"page": 3}).json() == {
+                "page": 3, "value": 10, "in_pool": True,
+            }
+            assert client.get("/items", params={"page": 0}).status_code == 422
@@ -2,5 +2,126 @@
 Embedding modülü testleri (Aşama 4)
 """
 
-# Test dosyası - şimdilik boş
+import pytest
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+from PIL import Image
+from src.embedding.clip_embedder import CLIPEmbedder
 
+
+@pytest.fixture
+def clip_with_fake_model(encryption_manager):
+    """Gerçek model yüklemeden, 4 boyutlu sahte vektör üreten CLIPEmbedder."""
+    embedder = CLIPEmbedder(encryption_manager=encryption_manager, batch_size=2)
+    model = MagicMock()
+    model.encode.side_effect = lambda images, **kw: (
+        np.ones((len(images), 4)) if isinstance(images, list) else np.ones(4)
+    )
+    embedder.image_model = model
+    return embedder
+
+
+@pytest.fixture
+def photo_paths(temp_dir):
+    paths = []
+    for i in range(3):
+        path = temp_dir / f"p{i}.jpg"
+        Image.new("RGB", (32, 32), color=(i * 50, 0, 0)).save(path, "JPEG")
+        paths.append(path)
+    return paths
+
+
+class TestEncodeImages:
+    """CLIPEmbedder.encode_images() testleri."""
+
+    def test_results_aligned_with_none(self, clip_with_fake_model, photo_paths, temp_dir):
+        """Bozuk/eksik dosyalar için aynı konumda None döner."""
+        broken = temp_dir / "broken.jpg"
+        broken.write_bytes(b"not an image")
+        paths = [photo_paths[0], broken, photo_paths[1], temp_dir / "missing.jpg", photo_paths[2]]
+
+        results = clip_with_fake_model.encode_images(paths)
+
+        assert len(results) == 5
+        assert results[1] is None and results[3] is None
+        assert all(results[i].dtype == np.float32 for i in (0, 2, 4))
+
+    def test_micro_batches(self, clip_with_fake_model, photo_paths):
+        """Model batch_size kadar görüntüyle çağrılır."""
+        clip_with_fake_model.encode_images(photo_paths)
+
+        sizes = [len(c.args[0]) for c in clip_with_fake_model.image_model.encode.call_args_list]
+        assert sizes == [2, 1]
+
+    def test_batch_failure_falls_back(self, clip_with_fake_model, photo_paths):
+        """Batch encode hatasında görüntüler tek tek denenir."""
+        def encode(images, **kw):
+            if isinstance(images, list):
+                raise RuntimeError("batch hatasi")
+            return np.ones(4)
+        clip_with_fake_model.image_model.encode.side_effect = encode
+
+        results = clip_with_fake_model.encode_images(photo_paths)
+
+        assert all(r is not None for r in results)
+
+    def test_parallel_decode_keeps_order(self, clip_with_fake_model, photo_paths, temp_dir):
+        """Thread pool ile çözülen görüntüler de girdi sırasıyla hizalı döner."""
+        paths = [photo_paths[0], temp_dir / "missing.jpg", photo_paths[1], photo_paths[2]]
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            results = clip_with_fake_model.encode_images(paths, executor=pool)
+
+        assert results[1] is None
+        assert all(results[i] is not None for i in (0, 2, 3))
+
+    def test_encrypted_and_plain_files(self, clip_with_fake_model, photo_paths):
+        """Şifreli dosya başlığından tanınıp çözülür; düz dosya hiç çözülmeye çalışılmaz."""
+        enc = clip_with_fake_model.encryptor
+        enc.encrypt_file(str(photo_paths[0]))
+        enc.decrypt_file = MagicMock(wraps=enc.decrypt_file)
+
+        results = clip_with_fake_model.encode_images(photo_paths)
+
+        assert all(r is not None for r in results)
+        assert [c.args[0] for c in enc.decrypt_file.call_args_list] == [str(photo_paths[0])]
+
+    def test_empty_input(self, clip_with_fake_model):
+        assert clip_with_fake_model.encode_images([]) == []
+
+    def test_encode_images_batch_skips_failures(self, clip_with_fake_model, photo_paths, temp_dir):
+        """encode_images_batch sadece başarılı vektörleri matris olarak döner."""
+        matrix = clip_with_fake_model.encode_images_batch(photo_paths + [temp_dir / "missing.jpg"])
+
+        assert matrix.shape == (3, 4)
+
+
+class TestEncodeTextCache:
+    """encode_text sorgu cache'i ile çalışır."""
+
+    def test_repeated_query_skips_model(self, encryption_manager):
+        from src.embedding.query_cache import QueryEmbeddingCache
+        embedder = CLIPEmbedder(encryption_manager=encryption_manager, query_cache=QueryEmbeddingCache())
+        embedder.text_model = MagicMock()
+        embedder.text_model.encode.return_value = np.ones(4)
+
+        first = embedder.encode_text("deniz  kenarı")
+        second = embedder.encode_text(" deniz kenarı ")
+
+        assert np.array_equal(first, second)
+        assert embedder.text_model.encode.call_count == 1
+        assert embedder.query_cache.stats()['hits'] == 1
+
+    def test_model_encodes_cache_key_text(self, encryption_manager):
+        """Modele, cache anahtarıyla aynı (normalize) metin verilir; harf büyüklüğü korunur."""
+        from src.embedding.query_cache import QueryEmbeddingCache
+        embedder = CLIPEmbedder(encryption_manager=encryption_manager, query_cache=QueryEmbeddingCache())
+        embedder.text_model = MagicMock()
+        embedder.text_model.encode.return_value = np.ones(4)
+
+        embedder.encode_text("  İstanbul   Boğazı ")
+        embedder.encode_text("istanbul boğazı")
+
+        texts = [c.args[0] for c in embedder.text_model.encode.call_args_list]
+        assert texts == ["İstanbul Boğazı", "istanbul boğazı"]
+        assert embedder.encode_text("   ") is None
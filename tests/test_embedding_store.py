@@ -0,0 +1,143 @@
+# tests/test_embedding_store.py
+"""
+EmbeddingStore testleri.
+Gerçek dosyalar geçici klasörde oluşturulur.
+"""
+
+import pytest
+import numpy as np
+from unittest.mock import MagicMock
+from src.embedding.embedding_store import EmbeddingStore
+from src.embedding.faiss_manager import FaissManager
+
+
+@pytest.fixture
+def store(temp_dir):
+    return EmbeddingStore(str(temp_dir / "emb"), dimension=8, model_version="clip-test")
+
+
+def unit_vectors(n, dim=8):
+    vecs = np.random.randn(n, dim).astype('float32')
+    return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+
+class TestEmbeddingStore:
+
+    def test_put_and_get_by_hash(self, store):
+        """Dosya hash'i ile yazılan vektör geri okunur (float16 hassasiyetinde)."""
+        vecs = unit_vectors(2)
+        store.put_many(["h1", "h2"], [1, 2], vecs)
+
+        assert np.allclose(store.get("h2"), vecs[1], atol=1e-3)
+        assert store.get("yok") is None
+        assert store.count() == 2
+
+    def test_same_hash_written_once(self, store):
+        """Aynı hash tekrar yazılınca vektör eklenmez, item_id güncellenir."""
+        vec = unit_vectors(1)
+        assert store.put("h1", 1, vec) == 1
+        assert store.put("h1", 5, vec) == 0
+
+        ids, _ = store.load()
+        assert ids.tolist() == [5]
+        assert store.vectors_path.stat().st_size == 8 * 2
+
+    def test_load_by_item_id(self, store):
+        """load() item_id bazında okur."""
+        vecs = unit_vectors(3)
+        store.put_many(["a", "b", "c"], [10, 20, 30], vecs)
+
+        ids, loaded = store.load([30, 10])
+        assert ids.tolist() == [10, 30]
+        assert loaded.dtype == np.float32
+
+    def test_persisted(self, temp_dir):
+        """Yeni örnek aynı dosyalardan okur."""
+        vecs = unit_vectors(2)
+        EmbeddingStore(str(temp_dir / "emb"), dimension=8).put_many(["a", "b"], [1, 2], vecs)
+
+        ids, loaded = EmbeddingStore(str(temp_dir / "emb"), dimension=8).load()
+        assert ids.tolist() == [1, 2]
+        assert np.allclose(loaded, vecs, atol=1e-3)
+
+    def test_model_version_separated(self, temp_dir):
+        """Farklı model sürümünün vektörleri karışmaz."""
+        EmbeddingStore(str(temp_dir / "emb"), dimension=8, model_version="v1").put("a", 1, unit_vectors(1))
+        other = EmbeddingStore(str(temp_dir / "emb"), dimension=8, model_version="v2")
+
+        assert other.get("a") is None
+        assert other.count() == 0
+
+    def test_remove_items_zeroes_vectors(self, store):
+        """Silinen item'ın vektörü sıfırlanır ve kaydı kalkar."""
+        store.put_many(["a", "b"], [1, 2], unit_vectors(2))
+
+        assert store.remove_items([1]) == 1
+        assert store.get("a") is None
+        raw = np.fromfile(store.vectors_path, dtype='float16').reshape(-1, 8)
+        assert not raw[0].any()
+        assert raw[1].any()
+
+    def test_faiss_rebuild_from_store(self, store, temp_dir):
+        """Depodan rebuild index üyeliğini korur: rızası kaldırılan item'lar geri gelmez."""
+        vecs = unit_vectors(20)
+        store.put_many([f"h{i}" for i in range(20)], list(range(20)), vecs)
+        fm = FaissManager(str(temp_dir / "f.faiss"), dimension=8)
+        fm.add_embeddings(vecs[:18], list(range(18)))
+        fm.remove_embeddings([3, 4])
+        fm.compact()
+
+        fm.rebuild(source=store.load())
+
+        assert sorted(fm.get_item_ids()) == [i for i in range(18) if i not in (3, 4)]
+        assert fm.search(vecs[5], k=1)[0][0] == 5
+        # Depo rıza iptalinde vektörü tutar; yalnızca index üyeliği belirleyicidir
+        assert store.count() == 20
+
+
+class TestLossyRebuildFromStore:
+    """IVF-PQ index'i vector_source (EmbeddingStore.load) ile orijinal vektörlerden yeniden kurulur."""
+
+    @pytest.fixture
+    def setup(self, temp_dir):
+        store = EmbeddingStore(str(temp_dir / "emb"), dimension=16, model_version="clip-test")
+        vecs = unit_vectors(2000, dim=16)
+        store.put_many([f"h{i}" for i in range(2000)], list(range(2000)), vecs)
+        source = MagicMock(side_effect=store.load)
+        fm = FaissManager(str(temp_dir / "pq.faiss"), dimension=16, compact_ratio=1.0,
+                          vector_source=source)
+        fm.add_embeddings(vecs, list(range(2000)))
+        fm.rebuild("ivfpq")
+        assert not source.called
+        return fm, source, vecs
+
+    def test_demotion_uses_original_vectors(self, setup):
+        """IVF-PQ'dan Flat'e geçişte vektörler PQ yaklaşığı değil, depodaki orijinallerdir."""
+        fm, source, vecs = setup
+
+        fm.rebuild("flat")
+
+        assert source.call_count == 1
+        assert np.allclose(fm.index.reconstruct(7), vecs[7], atol=1e-3)
+
+    def test_compaction_loads_only_live_ids(self, setup):
+        """Kaynak sadece canlı (tombstone'suz) id'lerle çağrılır; silinenler geri gelmez."""
+        fm, source, _ = setup
+        fm.remove_embeddings([10, 11])
+
+        assert fm.compact() == 2
+
+        requested = source.call_args[0][0]
+        assert len(requested) == 1998 and not {10, 11} & set(requested)
+        assert fm.index_type == "ivfpq"
+        assert fm.get_index_size() == 1998
+        assert not {10, 11} & set(fm.get_item_ids())
+
+    def test_ids_missing_from_source_reconstructed(self, setup):
+        """Depoda vektörü olmayan item'lar index'ten yeniden kurulur, düşmez."""
+        fm, source, _ = setup
+        source.side_effect = lambda ids: (np.zeros(0, dtype='int64'), np.zeros((0, 16), dtype='float32'))
+
+        fm.rebuild("flat")
+
+        assert fm.get_index_size() == 2000
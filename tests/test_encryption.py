@@ -7,7 +7,9 @@ EncryptionManager testleri.
 import os
 import pytest
 from pathlib import Path
+from unittest.mock import MagicMock
 from security.encryption_manager import EncryptionManager
+from security.stream_cipher import MAGIC
 
 
 class TestEncryptionManager:
@@ -134,3 +136,88 @@ class TestEncryptionManager:
         decrypted = encryption_manager.decrypt_string(encrypted)
 
         assert decrypted == long_text
+
+    # --- SEGMENT'Lİ FORMAT ---
+
+    def test_encrypted_file_is_segmented(self, encryption_manager, temp_dir):
+        """Yeni şifrelenen dosyalar segment'li formatta yazılır."""
+        file_path = temp_dir / "video.bin"
+        file_path.write_bytes(os.urandom(200 * 1024))
+
+        encryption_manager.encrypt_file(str(file_path))
+
+        assert file_path.read_bytes().startswith(MAGIC)
+
+    def test_legacy_fernet_file_readable(self, encryption_manager, temp_dir):
+        """Eski (tek Fernet token'lı) dosyalar okunmaya devam eder."""
+        file_path = temp_dir / "legacy.jpg"
+        original = os.urandom(2048)
+        file_path.write_bytes(encryption_manager.cipher.encrypt(original))
+
+        assert encryption_manager.decrypt_file(str(file_path)) == original
+        assert b"".join(encryption_manager.iter_decrypt_file(str(file_path))) == original
+        with encryption_manager.open_decrypted(str(file_path)) as f:
+            assert f.read() == original
+
+    @pytest.mark.parametrize("legacy", [False, True])
+    def test_no_double_encryption(self, encryption_manager, temp_dir, legacy):
+        """Zaten şifreli dosya (her iki format) tekrar şifrelenmez."""
+        file_path = temp_dir / "once.bin"
+        original = os.urandom(1024)
+        if legacy:
+            file_path.write_bytes(encryption_manager.cipher.encrypt(original))
+        else:
+            file_path.write_bytes(original)
+            encryption_manager.encrypt_file(str(file_path))
+        encrypted = file_path.read_bytes()
+
+        encryption_manager.encrypt_file(str(file_path))
+
+        assert file_path.read_bytes() == encrypted
+        assert encryption_manager.decrypt_file(str(file_path)) == original
+
+    def test_streaming_decrypt(self, encryption_manager, temp_dir):
+        """Büyük dosya segment segment çözülür."""
+        file_path = temp_dir / "audio.bin"
+        original = os.urandom(300 * 1024)
+        file_path.write_bytes(original)
+        encryption_manager.encrypt_file(str(file_path))
+
+        chunks = list(encryption_manager.iter_decrypt_file(str(file_path)))
+
+        assert len(chunks) > 1
+        assert b"".join(chunks) == original
+        with encryption_manager.open_decrypted(str(file_path)) as f:
+            f.seek(100 * 1024)
+            assert f.read(10) == original[100 * 1024:100 * 1024 + 10]
+
+    def test_write_encrypted_and_decrypt_bytes(self, encryption_manager, temp_dir):
+        file_path = temp_dir / "repaired.bin"
+        encryption_manager.write_encrypted(str(file_path), b"onarilmis veri")
+
+        assert encryption_manager.decrypt_file(str(file_path)) == b"onarilmis veri"
+        assert encryption_manager.decrypt_bytes(file_path.read_bytes()) == b"onarilmis veri"
+
+    def test_is_encrypted_from_header(self, encryption_manager, temp_dir):
+        """Şifreleme durumu dosyanın başından anlaşılır; iki format da tanınır."""
+        plain = temp_dir / "plain.jpg"
+        plain.write_bytes(b"\xff\xd8\xff\xe0" + os.urandom(100))
+        legacy = temp_dir / "legacy.enc"
+        legacy.write_bytes(encryption_manager.cipher.encrypt(b"eski"))
+        segmented = temp_dir / "new.enc"
+        encryption_manager.write_encrypted(str(segmented), b"yeni")
+
+        assert not encryption_manager.is_encrypted(str(plain))
+        assert encryption_manager.is_encrypted(str(legacy))
+        assert encryption_manager.is_encrypted(str(segmented))
+
+    def test_encrypt_file_does_not_trial_decrypt(self, encryption_manager, temp_dir):
+        """Çift şifreleme kontrolü için dosya çözülmeye çalışılmaz."""
+        file_path = temp_dir / "photo.jpg"
+        file_path.write_bytes(os.urandom(4096))
+        encryption_manager.cipher = MagicMock(wraps=encryption_manager.cipher)
+
+        encryption_manager.encrypt_file(str(file_path))
+        encryption_manager.encrypt_file(str(file_path))
+
+        encryption_manager.cipher.decrypt.assert_not_called()
@@ -7,6 +7,7 @@ GERÇEK FAISS index kullanır (hafif, mock gerekmez).
 import pytest
 import numpy as np
 from pathlib import Path
+from unittest.mock import patch
 from src.embedding.faiss_manager import FaissManager
 
 
@@ -121,6 +122,104 @@ class TestAddAndSearch:
         assert results[0][0] == 10
 
 
+class TestInnerProduct:
+    """İç çarpım (cosine) metriği testleri."""
+
+    def test_scores_are_cosine(self, faiss_flat):
+        """Skor cosine benzerliktir: aynı vektör 1.0, zıt vektör -1.0."""
+        vec = np.random.randn(384).astype('float32')
+        faiss_flat.add_embeddings(np.vstack([vec, -vec]), [1, 2])
+
+        results = faiss_flat.search(vec, k=2)
+
+        assert results[0] == (1, pytest.approx(1.0, abs=1e-4))
+        assert results[1] == (2, pytest.approx(-1.0, abs=1e-4))
+
+    def test_normalized_input_not_copied(self):
+        """Zaten normalize float32 girdi kopyalanmadan kullanılır."""
+        vecs = np.random.randn(4, 8).astype('float32')
+        vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+        assert FaissManager._prepare(vecs) is vecs
+
+    def test_unnormalized_input_not_modified(self, faiss_flat):
+        """Normalize edilmemiş girdi normalize edilir, çağıranın dizisi değişmez."""
+        vec = np.full((1, 384), 3.0, dtype='float32')
+        faiss_flat.add_embeddings(vec, [1])
+
+        assert vec[0, 0] == 3.0
+        assert faiss_flat.search(vec, k=1)[0][1] == pytest.approx(1.0, abs=1e-4)
+
+    @pytest.mark.parametrize("base", ["flat", "hnsw"])
+    def test_l2_index_migrated(self, temp_dir, base):
+        """
+        Eski L2 IDMap2 index yüklenirken yeniden kurulmaz (kurucu çağıranın
+        thread'ini bloklamaz); skorlar cosine'e çevrilir, migrate_metric dönüştürür.
+        """
+        import faiss
+        path = temp_dir / "l2.faiss"
+        vecs = np.random.randn(5, 8).astype('float32')
+        faiss.normalize_L2(vecs)
+        raw = faiss.IndexFlatL2(8) if base == "flat" else faiss.IndexHNSWFlat(8, 16)
+        legacy = faiss.IndexIDMap2(raw)
+        legacy.add_with_ids(vecs, np.arange(10, 15, dtype='int64'))
+        faiss.write_index(legacy, str(path))
+
+        with patch.object(FaissManager, 'rebuild') as rebuild:
+            FaissManager(index_path=str(path), dimension=8)
+        rebuild.assert_not_called()
+
+        fm = FaissManager(index_path=str(path), dimension=8)
+        assert fm.needs_migration()
+        before = fm.search(vecs[2], k=5)
+        assert before[0] == (12, pytest.approx(1.0, abs=1e-4))
+        expected = sorted((float(vecs[2] @ vecs[i - 10]) for i in range(10, 15)), reverse=True)
+        assert [score for _, score in before] == pytest.approx(expected, abs=1e-4)
+
+        assert fm.migrate_metric()['index_type'] == base
+        assert not fm.needs_migration()
+        assert fm.migrate_metric() == {}
+        assert fm.index_type == base
+        assert faiss.downcast_index(fm.index.index).metric_type == faiss.METRIC_INNER_PRODUCT
+        assert sorted(fm.get_item_ids()) == [10, 11, 12, 13, 14]
+        assert fm.search(vecs[2], k=1)[0] == (12, pytest.approx(1.0, abs=1e-4))
+        reloaded = faiss.read_index(str(path))
+        assert faiss.downcast_index(reloaded.index).metric_type == faiss.METRIC_INNER_PRODUCT
+
+    def test_l2_migration_cancelled_between_batches(self, temp_dir, monkeypatch):
+        """İptal edilen dönüşüm parça sınırında durur; L2 index değişmeden kalır."""
+        import faiss
+        import threading
+        from config import Config
+        monkeypatch.setattr(Config, "FAISS_REBUILD_BATCH_SIZE", 2)
+        path = temp_dir / "l2.faiss"
+        vecs = np.random.randn(10, 8).astype('float32')
+        faiss.normalize_L2(vecs)
+        legacy = faiss.IndexIDMap2(faiss.IndexFlatL2(8))
+        legacy.add_with_ids(vecs, np.arange(10, dtype='int64'))
+        faiss.write_index(legacy, str(path))
+
+        class CancelAfter(threading.Event):
+            """Birkaç kontrolden sonra iptal edilmiş görünür."""
+            def __init__(self, checks):
+                super().__init__()
+                self.checks = checks
+
+            def is_set(self):
+                self.checks -= 1
+                return self.checks < 0
+
+        fm = FaissManager(index_path=str(path), dimension=8)
+        cancel = CancelAfter(3)
+
+        assert fm.migrate_metric(cancel) == {}
+        assert cancel.checks < 0
+        assert fm.needs_migration()
+        assert fm._rebuild_log is None
+        assert sorted(fm.get_item_ids()) == list(range(10))
+        assert fm.search(vecs[4], k=1)[0] == (4, pytest.approx(1.0, abs=1e-4))
+        assert faiss.read_index(str(path)).metric_type == faiss.METRIC_L2
+
+
 class TestSaveLoad:
     """Kaydetme/yükleme testleri."""
 
@@ -147,6 +246,407 @@ class TestSaveLoad:
         fm1.add_embeddings(vecs, [100, 200, 300])
 
         fm2 = FaissManager(index_path=index_path, dimension=384)
-        assert 100 in fm2.id_to_item_id.values()
-        assert 200 in fm2.id_to_item_id.values()
-        assert 300 in fm2.id_to_item_id.values()
+        assert sorted(fm2.get_item_ids()) == [100, 200, 300]
+
+
+class TestIdMapping:
+    """IndexIDMap2 (item_id'ler FAISS içinde) testleri."""
+
+    def test_add_returns_item_ids(self, faiss_flat):
+        """add_embeddings FAISS ID olarak item_id'leri döner."""
+        ids = faiss_flat.add_embeddings(np.random.randn(2, 384).astype('float32'), [7, 9])
+        assert ids == [7, 9]
+
+    def test_remove_embeddings(self, faiss_flat):
+        """Silinen item artık arama sonucunda çıkmaz."""
+        vecs = np.random.randn(3, 384).astype('float32')
+        faiss_flat.add_embeddings(vecs, [1, 2, 3])
+
+        removed = faiss_flat.remove_embeddings([2])
+
+        assert removed == 1
+        assert faiss_flat.get_index_size() == 2
+        assert 2 not in [item_id for item_id, _ in faiss_flat.search(vecs[1], k=3)]
+
+    def test_remove_is_persisted(self, temp_dir):
+        """Silme işlemi hemen diske yazılır."""
+        path = str(temp_dir / "rm.faiss")
+        fm1 = FaissManager(index_path=path, dimension=8)
+        fm1.add_embeddings(np.random.randn(2, 8).astype('float32'), [1, 2])
+        fm1.remove_embeddings([1])
+        # 1/2 tombstone oranı arka plan compaction'ı başlatır; dosyalar yazılırken okunmasın
+        if fm1._rebuild_thread is not None:
+            fm1._rebuild_thread.join(timeout=5)
+
+        assert FaissManager(index_path=path, dimension=8).get_item_ids() == [2]
+
+    def test_legacy_index_migrated(self, temp_dir):
+        """Eski FlatL2 + .pkl çifti IndexIDMap2'ye taşınır ve .pkl silinir."""
+        import faiss
+        import pickle
+        path = temp_dir / "legacy.faiss"
+        vecs = np.random.randn(3, 8).astype('float32')
+        faiss.normalize_L2(vecs)
+        legacy = faiss.IndexFlatL2(8)
+        legacy.add(vecs)
+        faiss.write_index(legacy, str(path))
+        with open(path.with_suffix('.pkl'), 'wb') as f:
+            pickle.dump({0: 10, 1: 20, 2: 30}, f)
+
+        fm = FaissManager(index_path=str(path), dimension=8)
+
+        assert isinstance(fm.index, faiss.IndexIDMap2)
+        assert sorted(fm.get_item_ids()) == [10, 20, 30]
+        assert fm.search(vecs[1], k=1)[0][0] == 20
+        assert not path.with_suffix('.pkl').exists()
+        assert isinstance(faiss.read_index(str(path)), faiss.IndexIDMap2)
+
+
+class TestFilteredSearch:
+    """allowed_ids (izin listesi) ile ön-filtreli arama testleri."""
+
+    @pytest.mark.parametrize("exact_filter_limit", [0, 2048])
+    @pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+    def test_returns_k_allowed_results(self, temp_dir, index_type, exact_filter_limit):
+        """Seçici filtrede de tek geçişte k sonuç döner, hepsi izinli."""
+        fm = FaissManager(index_path=str(temp_dir / "f.faiss"), dimension=16, index_type=index_type,
+                          exact_filter_limit=exact_filter_limit)
+        vecs = np.random.randn(1000, 16).astype('float32')
+        fm.add_embeddings(vecs, list(range(1000)))
+        allowed = list(range(0, 1000, 40))
+
+        results = fm.search(vecs[0], k=10, allowed_ids=allowed)
+
+        assert len(results) == 10
+        assert all(item_id in allowed for item_id, _ in results)
+        assert results[0][0] == 0
+
+    def test_exact_matches_index_search(self, faiss_flat):
+        """Doğrudan skorlama ile index araması aynı sıralamayı verir."""
+        vecs = np.random.randn(50, 384).astype('float32')
+        faiss_flat.add_embeddings(vecs, list(range(50)))
+        allowed = list(range(0, 50, 2))
+
+        exact = faiss_flat.search(vecs[3], k=5, allowed_ids=allowed)
+        faiss_flat.exact_filter_limit = 0
+        scanned = faiss_flat.search(vecs[3], k=5, allowed_ids=allowed)
+
+        assert [i for i, _ in exact] == [i for i, _ in scanned]
+        assert [d for _, d in exact] == pytest.approx([d for _, d in scanned], abs=1e-4)
+
+    def test_empty_and_unknown_allow_list(self, faiss_flat):
+        """Boş veya index'te olmayan izin listesi boş sonuç döner."""
+        faiss_flat.add_embeddings(np.random.randn(3, 384).astype('float32'), [1, 2, 3])
+        query = np.random.randn(384).astype('float32')
+
+        assert faiss_flat.search(query, k=3, allowed_ids=[]) == []
+        assert faiss_flat.search(query, k=3, allowed_ids=[99]) == []
+
+    def test_tombstones_excluded(self, faiss_flat):
+        """İzin listesindeki silinmiş item'lar dönmez."""
+        vecs = np.random.randn(3, 384).astype('float32')
+        faiss_flat.add_embeddings(vecs, [1, 2, 3])
+        faiss_flat.remove_embeddings([2])
+
+        results = faiss_flat.search(vecs[1], k=3, allowed_ids=[1, 2])
+        assert [i for i, _ in results] == [1]
+
+
+class TestTombstones:
+    """Tombstone ile silme ve compaction testleri."""
+
+    def test_remove_keeps_vector_until_compaction(self, temp_dir):
+        """Silme vektörü aramadan çıkarır, fiziksel silme eşik altında yapılmaz."""
+        fm = FaissManager(index_path=str(temp_dir / "ts.faiss"), dimension=8, compact_ratio=0.5)
+        vecs = np.random.randn(4, 8).astype('float32')
+        fm.add_embeddings(vecs, [1, 2, 3, 4])
+
+        fm.remove_embeddings([2])
+
+        assert fm.index.ntotal == 4
+        assert fm.tombstones == {2}
+        assert 2 not in [i for i, _ in fm.search(vecs[1], k=4)]
+
+    def test_remove_unknown_or_twice(self, faiss_flat):
+        """Olmayan ya da zaten silinmiş ID sayılmaz."""
+        faiss_flat.add_embeddings(np.random.randn(2, 384).astype('float32'), [1, 2])
+        assert faiss_flat.remove_embeddings([1, 99]) == 1
+        assert faiss_flat.remove_embeddings([1]) == 0
+
+    def test_tombstones_persisted(self, temp_dir):
+        """Tombstone listesi yeniden açılışta yüklenir."""
+        path = str(temp_dir / "ts.faiss")
+        fm1 = FaissManager(index_path=path, dimension=8, compact_ratio=1.0)
+        vecs = np.random.randn(3, 8).astype('float32')
+        fm1.add_embeddings(vecs, [1, 2, 3])
+        fm1.flush()
+        fm1.remove_embeddings([3])
+
+        fm2 = FaissManager(index_path=path, dimension=8, compact_ratio=1.0)
+        assert fm2.tombstones == {3}
+        assert 3 not in [i for i, _ in fm2.search(vecs[2], k=3)]
+
+    def test_compact(self, temp_dir):
+        """compact() tombstone'ları fiziksel olarak çıkarır ve dosyayı siler."""
+        fm = FaissManager(index_path=str(temp_dir / "ts.faiss"), dimension=8, compact_ratio=1.0)
+        vecs = np.random.randn(4, 8).astype('float32')
+        fm.add_embeddings(vecs, [1, 2, 3, 4])
+        fm.remove_embeddings([1, 3])
+
+        assert fm.compact() == 2
+        assert fm.index.ntotal == 2
+        assert sorted(fm.get_item_ids()) == [2, 4]
+        assert not fm.tombstone_path.exists()
+        assert fm.search(vecs[3], k=1)[0][0] == 4
+
+    def test_background_compaction_on_ratio(self, temp_dir):
+        """Oran eşiği geçilince compaction arka planda çalışır."""
+        fm = FaissManager(index_path=str(temp_dir / "ts.faiss"), dimension=8, compact_ratio=0.5)
+        fm.add_embeddings(np.random.randn(4, 8).astype('float32'), [1, 2, 3, 4])
+        fm.remove_embeddings([1, 2])
+        fm._rebuild_thread.join(timeout=5)
+
+        assert fm.index.ntotal == 2
+        assert not fm.tombstones
+
+    def test_readd_after_remove(self, faiss_flat):
+        """Silinen item tekrar eklenebilir ve yeni vektörüyle bulunur."""
+        vecs = np.random.randn(2, 384).astype('float32')
+        faiss_flat.add_embeddings(vecs[:1], [5])
+        faiss_flat.remove_embeddings([5])
+        faiss_flat.add_embeddings(vecs[1:], [5])
+
+        assert faiss_flat.get_item_ids() == [5]
+        assert faiss_flat.search(vecs[1], k=1)[0] == (5, pytest.approx(1.0, abs=1e-4))
+
+    @pytest.mark.parametrize("index_type", ["flat", "hnsw", "ivfpq"])
+    def test_add_live_id_replaces_vector(self, temp_dir, index_type):
+        """
+        Canlı bir item_id tekrar eklenirse index yeniden kurulmaz; sonuç tek ve
+        yeni içerikle skorlanır (eski vektörün skoru item'a yazılmaz).
+        """
+        fm = FaissManager(index_path=str(temp_dir / f"{index_type}.faiss"), dimension=16,
+                          compact_ratio=1.0, exact_filter_limit=0)
+        vecs = np.random.default_rng(0).standard_normal((2000, 16)).astype('float32')
+        fm.add_embeddings(vecs[:-1], list(range(1999)))
+        if index_type != "flat":
+            fm.rebuild(index_type)
+
+        with patch.object(FaissManager, 'rebuild') as rebuild:
+            fm.add_embeddings(vecs[-1:], [5])
+        rebuild.assert_not_called()
+
+        assert fm.index.ntotal == (1999 if index_type == "flat" else 2000)
+        assert fm.get_index_size() == 1999
+        assert fm.get_item_ids().count(5) == 1
+        new = fm.search(vecs[-1], k=10)
+        if index_type == "ivfpq":
+            # IVF-PQ kayıplı: yeni vektör ilk birkaç sonuç içinde olmalı
+            assert 5 in [i for i, _ in new]
+        else:
+            assert new[0] == (5, pytest.approx(1.0, abs=1e-4))
+        assert [i for i, _ in fm.search(vecs[5], k=20)].count(5) <= 1
+        stale = dict(fm.search(vecs[5], k=20, allowed_ids=range(0, 2000, 5)))
+        assert stale.get(5, 0.0) < 0.9
+
+    def test_readd_without_removal_support_compacted_later(self, temp_dir):
+        """HNSW'de silinip tekrar eklenen item'ın eski kopyası compaction'da çıkar ve sayılır."""
+        path = str(temp_dir / "hnsw.faiss")
+        fm = FaissManager(index_path=path, dimension=8, index_type="hnsw", compact_ratio=1.0)
+        vecs = np.random.randn(4, 8).astype('float32')
+        fm.add_embeddings(vecs[:3], [1, 2, 3])
+        fm.remove_embeddings([2])
+        fm.add_embeddings(vecs[3:], [2])
+        fm.flush()
+
+        assert fm.tombstones == set()
+        assert fm.search(vecs[3], k=1)[0] == (2, pytest.approx(1.0, abs=1e-4))
+
+        reopened = FaissManager(index_path=path, dimension=8, compact_ratio=1.0)
+        assert reopened.get_index_size() == 3
+        assert reopened.compact() == 1
+        assert reopened.index.ntotal == 3
+        assert reopened.search(vecs[3], k=1)[0] == (2, pytest.approx(1.0, abs=1e-4))
+
+    def test_readd_journal_replays_new_vector(self, temp_dir):
+        """Kaydedilmemiş vektör güncellemesi yeniden açılışta journal'dan uygulanır."""
+        path = str(temp_dir / "wb.faiss")
+        fm1 = FaissManager(index_path=path, dimension=8, save_every=100)
+        vecs = np.random.randn(3, 8).astype('float32')
+        fm1.add_embeddings(vecs[:2], [1, 2])
+        fm1.flush()
+        fm1.add_embeddings(vecs[2:], [2])  # sadece journal'da
+
+        fm2 = FaissManager(index_path=path, dimension=8)
+
+        assert fm2.get_index_size() == 2
+        assert fm2.search(vecs[2], k=1)[0] == (2, pytest.approx(1.0, abs=1e-4))
+
+    def test_hnsw_remove_and_compact(self, faiss_hnsw):
+        """HNSW index'te de silme tombstone + compaction ile çalışır."""
+        vecs = np.random.randn(10, 384).astype('float32')
+        faiss_hnsw.add_embeddings(vecs, list(range(10)))
+        faiss_hnsw.remove_embeddings([0])
+
+        assert 0 not in [i for i, _ in faiss_hnsw.search(vecs[0], k=5)]
+        faiss_hnsw.compact()
+        assert faiss_hnsw.get_index_size() == 9
+
+
+class TestIndexTiers:
+    """Index katmanları (Flat -> HNSW -> IVF-PQ) ve rebuild testleri."""
+
+    def test_tier_for(self, monkeypatch):
+        """Koleksiyon boyutuna göre doğru katman seçilir."""
+        from config import Config
+        monkeypatch.setattr(Config, "FAISS_HNSW_THRESHOLD", 100)
+        monkeypatch.setattr(Config, "FAISS_IVFPQ_THRESHOLD", 1000)
+
+        assert FaissManager.tier_for(0) == "flat"
+        assert FaissManager.tier_for(100) == "hnsw"
+        assert FaissManager.tier_for(5000) == "ivfpq"
+
+    @pytest.mark.parametrize("target", ["hnsw", "ivfpq"])
+    def test_rebuild_to_tier(self, temp_dir, target):
+        """Rebuild ID'leri korur, recall raporlar ve yeniden açılışta tip tanınır."""
+        path = str(temp_dir / "tier.faiss")
+        fm = FaissManager(index_path=path, dimension=16)
+        vecs = np.random.randn(2000, 16).astype('float32')
+        fm.add_embeddings(vecs, list(range(2000)))
+
+        report = fm.rebuild(target)
+
+        assert fm.index_type == target
+        assert fm.get_index_size() == 2000
+        assert 0.0 < report['recall_at_k'] <= 1.0
+        # IVF-PQ kayıplı sıkıştırır: vektörün kendisi ilk birkaç sonuç içinde olmalı
+        assert 7 in [item_id for item_id, _ in fm.search(vecs[7], k=5)]
+
+        fm2 = FaissManager(index_path=path, dimension=16)
+        assert fm2.index_type == target
+        assert fm2.index_stats['recall_at_k'] == report['recall_at_k']
+
+    def test_ivfpq_filtered_search_and_compaction(self, temp_dir):
+        """IVF-PQ katmanında izin listesi ve compaction çalışır."""
+        fm = FaissManager(index_path=str(temp_dir / "pq.faiss"), dimension=16, compact_ratio=1.0,
+                          exact_filter_limit=0)
+        vecs = np.random.randn(2000, 16).astype('float32')
+        fm.add_embeddings(vecs, list(range(2000)))
+        fm.rebuild("ivfpq")
+
+        results = fm.search(vecs[10], k=5, allowed_ids=list(range(0, 2000, 10)))
+        assert len(results) == 5
+        assert all(item_id % 10 == 0 for item_id, _ in results)
+
+        fm.remove_embeddings([10])
+        assert fm.compact() == 1
+        assert fm.index_type == "ivfpq"
+        assert fm.get_index_size() == 1999
+
+    def test_adds_during_rebuild_kept(self, temp_dir):
+        """Rebuild sürerken eklenen vektörler yeni index'e de aktarılır."""
+        fm = FaissManager(index_path=str(temp_dir / "r.faiss"), dimension=8)
+        fm.add_embeddings(np.random.randn(20, 8).astype('float32'), list(range(20)))
+        original = FaissManager._measure_recall
+
+        def add_while_rebuilding(index, vectors, ids):
+            fm.add_embeddings(np.random.randn(1, 8).astype('float32'), [99])
+            return original(index, vectors, ids)
+
+        with patch.object(FaissManager, '_measure_recall', side_effect=add_while_rebuilding):
+            fm.rebuild("hnsw")
+
+        assert 99 in fm.get_item_ids()
+        assert fm.get_index_size() == 21
+
+    def test_auto_promotion(self, temp_dir, monkeypatch):
+        """Auto modda eşik geçilince arka planda bir üst katmana geçilir."""
+        from config import Config
+        monkeypatch.setattr(Config, "FAISS_HNSW_THRESHOLD", 50)
+        fm = FaissManager(index_path=str(temp_dir / "auto.faiss"), dimension=8, index_type="auto")
+        assert fm.index_type == "flat"
+
+        fm.add_embeddings(np.random.randn(60, 8).astype('float32'), list(range(60)))
+        fm._rebuild_thread.join(timeout=10)
+
+        assert fm.index_type == "hnsw"
+        assert fm.index_stats['previous_type'] == "flat"
+        assert fm.get_index_size() == 60
+
+
+class TestWriteBehind:
+    """Ertelenmiş (write-behind) kaydetme ve journal testleri."""
+
+    def test_add_does_not_save_below_threshold(self, temp_dir):
+        """Eşik altında index dosyası yazılmaz, sadece journal büyür."""
+        fm = FaissManager(index_path=str(temp_dir / "wb.faiss"), dimension=8, save_every=10)
+        fm.add_embeddings(np.random.randn(3, 8).astype('float32'), [1, 2, 3])
+
+        assert fm.dirty
+        assert not fm.index_path.exists()
+        assert fm.journal_path.exists()
+
+    def test_save_on_count_threshold(self, temp_dir):
+        """save_every vektör birikince index yazılır ve journal silinir."""
+        fm = FaissManager(index_path=str(temp_dir / "wb.faiss"), dimension=8, save_every=4)
+        fm.add_embeddings(np.random.randn(2, 8).astype('float32'), [1, 2])
+        fm.add_embeddings(np.random.randn(2, 8).astype('float32'), [3, 4])
+
+        assert not fm.dirty
+        assert fm.index_path.exists()
+        assert not fm.journal_path.exists()
+
+    def test_save_on_time_threshold(self, temp_dir):
+        """save_interval geçtiyse bir sonraki ekleme index'i yazar."""
+        fm = FaissManager(index_path=str(temp_dir / "wb.faiss"), dimension=8,
+                          save_every=1000, save_interval=0.0)
+        fm.add_embeddings(np.random.randn(1, 8).astype('float32'), [1])
+
+        assert fm.index_path.exists()
+
+    def test_flush(self, temp_dir):
+        """flush() bekleyen değişiklikleri yazar."""
+        fm = FaissManager(index_path=str(temp_dir / "wb.faiss"), dimension=8, save_every=100)
+        fm.add_embeddings(np.random.randn(2, 8).astype('float32'), [1, 2])
+        fm.flush()
+
+        assert not fm.dirty
+        assert FaissManager(index_path=str(temp_dir / "wb.faiss"), dimension=8).get_index_size() == 2
+
+    def test_journal_replayed_after_crash(self, temp_dir):
+        """Kaydedilmemiş vektörler journal'dan geri yüklenir."""
+        path = str(temp_dir / "wb.faiss")
+        fm1 = FaissManager(index_path=path, dimension=8, save_every=2)
+        fm1.add_embeddings(np.random.randn(2, 8).astype('float32'), [1, 2])  # kaydedildi
+        vec = np.random.randn(1, 8).astype('float32')
+        fm1.add_embeddings(vec, [3])  # sadece journal'da
+
+        fm2 = FaissManager(index_path=path, dimension=8)
+
+        assert fm2.get_index_size() == 3
+        assert fm2.search(vec, k=1)[0][0] == 3
+
+    def test_journal_not_replayed_twice(self, temp_dir):
+        """Index kaydedilip journal silinemediyse kayıtlar tekrar eklenmez."""
+        path = str(temp_dir / "wb.faiss")
+        fm1 = FaissManager(index_path=path, dimension=8, save_every=100)
+        fm1.add_embeddings(np.random.randn(2, 8).astype('float32'), [1, 2])
+        journal = fm1.journal_path.read_bytes()
+        fm1.flush()
+        fm1.journal_path.write_bytes(journal)
+
+        fm2 = FaissManager(index_path=path, dimension=8)
+
+        assert fm2.get_index_size() == 2
+
+    def test_truncated_journal_record_ignored(self, temp_dir):
+        """Yarım yazılmış son journal kaydı atlanır."""
+        path = str(temp_dir / "wb.faiss")
+        fm1 = FaissManager(index_path=path, dimension=8, save_every=100)
+        fm1.add_embeddings(np.random.randn(2, 8).astype('float32'), [1, 2])
+        data = fm1.journal_path.read_bytes()
+        fm1.journal_path.write_bytes(data[:-5])
+
+        fm2 = FaissManager(index_path=path, dimension=8)
+
+        assert fm2.get_index_size() == 1
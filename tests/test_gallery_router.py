@@ -0,0 +1,454 @@
+# tests/test_gallery_router.py
+"""
+Galeri endpoint'leri (api/routers/gallery_router.py) testleri:
+keyset sayfalama, toplu thumbnail stream'i, HTTP cache (ETag/304) ve
+fullsize yanitlarinda konum metadata'si.
+"""
+
+import io
+import base64
+import pytest
+from collections import OrderedDict
+from unittest.mock import patch
+from PIL import Image, ExifTags
+from datetime import datetime, timedelta
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api import concurrency
+from api.dependencies import (
+    get_db_session, get_encryption_manager, get_thumbnail_store, get_thumbnail_cache,
+)
+from api.routers import gallery_router
+from database.schema import Base, Item
+from src.ingestion.thumbnail_cache import ThumbnailCache
+from src.ingestion.thumbnail_store import ThumbnailStore
+from config import Config
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False},
+                           poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def store(temp_dir, encryption_manager):
+    return ThumbnailStore(str(temp_dir / "thumbnails"), encryption_manager)
+
+
+@pytest.fixture
+def cache():
+    return ThumbnailCache(10 * 1024 * 1024)
+
+
+@pytest.fixture
+def client(session_factory, encryption_manager, store, cache, monkeypatch):
+    monkeypatch.setattr(concurrency, "_limiters", {})
+    monkeypatch.setattr(gallery_router, "_total_cache", OrderedDict())
+
+    def db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    app.include_router(gallery_router.router)
+    app.dependency_overrides[get_db_session] = db
+    app.dependency_overrides[get_encryption_manager] = lambda: encryption_manager
+    app.dependency_overrides[get_thumbnail_store] = lambda: store
+    app.dependency_overrides[get_thumbnail_cache] = lambda: cache
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def add_items(session_factory, temp_dir):
+    """Verilen tarihlerle (dosyasi diskte olan) item'lar ekler, id'lerini dondurur."""
+    def add(stamps, consent=True):
+        session = session_factory()
+        items = []
+        for stamp in stamps:
+            path = temp_dir / f"{len(list(temp_dir.iterdir()))}.jpg"
+            path.write_bytes(b"x")
+            items.append(Item(file_path=str(path), file_hash=path.stem, type="Photo",
+                              has_consent=consent, creation_datetime=stamp))
+        session.add_all(items)
+        session.commit()
+        ids = [item.item_id for item in items]
+        session.close()
+        return ids
+    return add
+
+
+@pytest.fixture
+def add_photos(session_factory, temp_dir, encryption_manager, store):
+    """Sifreli JPEG'leri (thumbnail'lari depoda) ekler, id'lerini dondurur."""
+    def add(count, consent=True, size=(300, 200), **save_options):
+        session = session_factory()
+        items = []
+        for _ in range(count):
+            path = temp_dir / f"{len(list(temp_dir.iterdir()))}.jpg"
+            buf = io.BytesIO()
+            Image.new("RGB", size, color="red").save(buf, "JPEG", **save_options)
+            encryption_manager.write_encrypted(str(path), buf.getvalue())
+            store.generate(path.stem, buf.getvalue())
+            items.append(Item(file_path=str(path), file_hash=path.stem, type="Photo",
+                              has_consent=consent, creation_datetime=datetime(2024, 1, 1)))
+        session.add_all(items)
+        session.commit()
+        ids = [item.item_id for item in items]
+        session.close()
+        return ids
+    return add
+
+
+def _stored(session_factory, item_id: int) -> Item:
+    """Item'in kolonlarini (oturumdan ayrilmis halde) okur."""
+    session = session_factory()
+    item = session.get(Item, item_id)
+    session.expunge(item)
+    session.close()
+    return item
+
+
+def _set_consent(session_factory, item_id: int, consent: bool):
+    session = session_factory()
+    session.query(Item).filter(Item.item_id == item_id).update({"has_consent": consent})
+    session.commit()
+    session.close()
+
+
+def _frames(body: bytes) -> dict:
+    """Toplu thumbnail stream'ini {item_id: JPEG baytlari} olarak ayristirir."""
+    frames, offset = {}, 0
+    while offset < len(body):
+        item_id, length = gallery_router._FRAME_HEADER.unpack_from(body, offset)
+        offset += gallery_router._FRAME_HEADER.size
+        assert item_id not in frames
+        frames[item_id] = body[offset:offset + length]
+        offset += length
+    assert offset == len(body)
+    return frames
+
+
+def _walk(client, **params):
+    """Tum sayfalari cursor ile gezer; (item_id listesi, sayfa sayisi) doner."""
+    seen, pages, cursor = [], 0, None
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        body = client.get("/api/items", params=query).json()
+        seen += [item["item_id"] for item in body["items"]]
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return seen, pages
+
+
+class TestKeysetPagination:
+
+    @pytest.mark.parametrize("sort", ["desc", "asc"])
+    def test_cursor_across_equal_timestamps(self, client, add_items, sort):
+        """Ayni tarihli item'lar sayfa sinirina denk gelse de atlanmaz/tekrarlanmaz."""
+        base = datetime(2024, 5, 1, 12)
+        ids = add_items([base] * 7 + [base + timedelta(hours=1)] * 3 + [base - timedelta(days=1)] * 4)
+
+        seen, pages = _walk(client, size=3, sort=sort)
+
+        assert sorted(seen) == sorted(ids)
+        assert len(seen) == len(set(seen))
+        assert pages == 5
+        stamps = {item_id: i for i, item_id in enumerate(ids)}
+        keys = [(0 if stamps[i] < 7 else 1 if stamps[i] < 10 else -1, i) for i in seen]
+        assert keys == sorted(keys, reverse=sort == "desc")
+
+    def test_cursor_matches_offset_pages(self, client, add_items):
+        """Cursor'li gezinti, eski page/OFFSET sayfalariyla ayni sirayi verir."""
+        add_items([datetime(2024, 1, 1) + timedelta(hours=i // 2) for i in range(11)])
+
+        seen, _ = _walk(client, size=4)
+        by_offset = [item["item_id"] for page in (1, 2, 3)
+                     for item in client.get("/api/items", params={"size": 4, "page": page}).json()["items"]]
+
+        assert seen == by_offset
+
+    def test_non_consented_items_hidden(self, client, add_items):
+        visible = add_items([datetime(2024, 1, 1)] * 3)
+        add_items([datetime(2024, 1, 1)] * 2, consent=False)
+
+        seen, _ = _walk(client, size=2)
+
+        assert sorted(seen) == visible
+
+    @pytest.mark.parametrize("cursor", [
+        "!!!",
+        base64.urlsafe_b64encode(b"2024-01-01T00:00:00").decode(),
+        base64.urlsafe_b64encode(b"not-a-date|5").decode(),
+        base64.urlsafe_b64encode(b"2024-01-01T00:00:00|abc").decode(),
+        base64.urlsafe_b64encode(b"\xff\xfe|1").decode(),
+    ])
+    def test_malformed_cursor_rejected(self, client, add_items, cursor):
+        add_items([datetime(2024, 1, 1)])
+
+        response = client.get("/api/items", params={"cursor": cursor})
+
+        assert response.status_code == 422
+
+    def test_missing_files_do_not_shorten_pages(self, client, add_items, temp_dir):
+        """Dosya varlığı satır başına kontrol edilmez: sayfalar dolu, toplam tutarlı."""
+        ids = add_items([datetime(2024, 1, 1) + timedelta(hours=i) for i in range(6)])
+        for path in temp_dir.glob("*.jpg"):
+            path.unlink()
+
+        with patch.object(gallery_router.Path, "exists") as exists:
+            body = client.get("/api/items", params={"size": 4}).json()
+        exists.assert_not_called()
+
+        assert len(body["items"]) == 4 and body["total"] == 6
+        seen, _ = _walk(client, size=4)
+        assert sorted(seen) == ids
+
+    def test_type_filter_normalized(self, client, add_items, session_factory):
+        """Tür filtresi büyük/küçük harf duyarsızdır; bilinmeyen tür reddedilir."""
+        photo = add_items([datetime(2024, 1, 1)])
+        session = session_factory()
+        session.add(Item(file_path="note.txt", file_hash="note", type="Note",
+                         has_consent=True, creation_datetime=datetime(2024, 1, 2)))
+        session.commit()
+        session.close()
+
+        for value in ("Photo", "photo", " PHOTO "):
+            body = client.get("/api/items", params={"type": value}).json()
+            assert [item["item_id"] for item in body["items"]] == photo
+        assert client.get("/api/items", params={"type": "x" * 200}).status_code == 422
+        assert list(gallery_router._total_cache) == [(None, None, "Photo")]
+
+    def test_total_cache_bounded(self, client, add_items, monkeypatch):
+        """Toplam cache'i en fazla GALLERY_TOTAL_CACHE_SIZE filtre tutar, süresi dolanları atar."""
+        monkeypatch.setattr(Config, "GALLERY_TOTAL_CACHE_SIZE", 3)
+        add_items([datetime(2024, 1, 1)])
+
+        for year in range(2000, 2010):
+            client.get("/api/items", params={"year": year})
+        assert list(gallery_router._total_cache) == [(year, None, None) for year in (2007, 2008, 2009)]
+
+        monkeypatch.setattr(Config, "GALLERY_TOTAL_CACHE_TTL", 0)
+        client.get("/api/items", params={"year": 2024})
+        assert list(gallery_router._total_cache) == [(2024, None, None)]
+
+    def test_cursor_query_seeks_index_range(self, session_factory):
+        """Cursor filtresi index'te aralik olarak aranir (consent onekini taramaz)."""
+        session = session_factory()
+        cursor = gallery_router._encode_cursor(Item(item_id=5, creation_datetime=datetime(2024, 1, 1)))
+        query = gallery_router._after_cursor(
+            gallery_router._order(gallery_router._gallery_query(session, None, None, None), "desc"),
+            cursor, "desc")
+        compiled = query.statement.compile(session.get_bind())
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+
+        plan = session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).fetchall()
+        session.close()
+
+        assert "ix_items_consent_datetime (has_consent=? AND creation_datetime<?)" in str(plan)
+
+
+class TestThumbnailBatch:
+
+    def test_frame_layout(self, client, add_photos):
+        """Her item icin [int64 id][uint32 uzunluk][JPEG] cercevesi, hepsi bir kez."""
+        ids = add_photos(3)
+
+        response = client.get("/api/items/thumbnails", params={"ids": ",".join(map(str, ids))})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/octet-stream"
+        assert response.headers["x-thumbnail-count"] == "3"
+        frames = _frames(response.content)
+        assert sorted(frames) == sorted(ids)
+        for data in frames.values():
+            with Image.open(io.BytesIO(data)) as img:
+                assert img.format == "JPEG"
+                assert max(img.size) <= max(ThumbnailStore.SIZES["thumb"][0])
+
+    def test_page_mode_matches_gallery_page(self, client, add_photos):
+        add_photos(5)
+        page = [item["item_id"] for item in client.get("/api/items", params={"size": 2}).json()["items"]]
+
+        frames = _frames(client.get("/api/items/thumbnails", params={"size": 2}).content)
+
+        assert sorted(frames) == sorted(page)
+
+    def test_missing_id_gets_empty_frame(self, client, add_photos):
+        [item_id] = add_photos(1)
+
+        frames = _frames(client.get("/api/items/thumbnails", params={"ids": f"{item_id},9999"}).content)
+
+        assert frames[9999] == b""
+        assert frames[item_id]
+
+    def test_cache_hit_served_without_store(self, client, add_photos, cache):
+        [item_id] = add_photos(1)
+        cache.put(item_id, b"cached-jpeg", "thumb")
+
+        frames = _frames(client.get("/api/items/thumbnails", params={"ids": str(item_id)}).content)
+
+        assert frames[item_id] == b"cached-jpeg"
+
+    @pytest.mark.parametrize("cached", [False, True])
+    def test_non_consented_item_not_served(self, client, add_photos, cache, cached):
+        """Rizasiz item'in thumbnail'i cache'te kalmis olsa bile gonderilmez."""
+        [visible] = add_photos(1)
+        [hidden] = add_photos(1, consent=False)
+        if cached:
+            cache.put(hidden, b"stale-jpeg", "thumb")
+
+        frames = _frames(client.get("/api/items/thumbnails",
+                                    params={"ids": f"{hidden},{visible}"}).content)
+
+        assert frames[hidden] == b""
+        assert frames[visible]
+
+    def test_malformed_ids_rejected(self, client):
+        assert client.get("/api/items/thumbnails", params={"ids": "1,x"}).status_code == 422
+
+
+IMAGE_ENDPOINTS = ["thumbnail", "preview", "fullsize"]
+
+
+class TestImageCaching:
+
+    @pytest.fixture
+    def no_decrypt(self, monkeypatch, encryption_manager):
+        """304 yolunda sifre cozme/depo okumasi yapilirsa test patlar."""
+        def fail(*args, **kwargs):
+            raise AssertionError("304 yolunda sifre cozuldu")
+        monkeypatch.setattr(gallery_router, "_load_stored_image", fail)
+        monkeypatch.setattr(encryption_manager, "decrypt_file", fail)
+        monkeypatch.setattr(encryption_manager, "open_decrypted", fail)
+
+    @pytest.mark.parametrize("endpoint", IMAGE_ENDPOINTS)
+    def test_cache_headers(self, client, add_photos, session_factory, endpoint):
+        [item_id] = add_photos(1)
+
+        response = client.get(f"/api/items/{item_id}/{endpoint}")
+
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == f"private, max-age={Config.IMAGE_CACHE_MAX_AGE}"
+        etag = response.headers["etag"]
+        assert etag.startswith('"') and etag.endswith('"') and not etag.startswith("W/")
+        assert etag.startswith(f'"{_stored(session_factory, item_id).file_hash}-')
+
+    def test_etags_differ_per_variant(self, client, add_photos):
+        [item_id] = add_photos(1)
+
+        etags = {client.get(f"/api/items/{item_id}/{endpoint}").headers["etag"] for endpoint in IMAGE_ENDPOINTS}
+
+        assert len(etags) == 3
+
+    @pytest.mark.parametrize("endpoint", IMAGE_ENDPOINTS)
+    def test_not_modified_round_trip(self, client, add_photos, cache, endpoint, request):
+        [item_id] = add_photos(1)
+        first = client.get(f"/api/items/{item_id}/{endpoint}")
+        cache.invalidate([item_id])
+        request.getfixturevalue("no_decrypt")
+
+        second = client.get(f"/api/items/{item_id}/{endpoint}",
+                            headers={"If-None-Match": first.headers["etag"]})
+
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["etag"] == first.headers["etag"]
+        assert second.headers["cache-control"] == first.headers["cache-control"]
+
+    @pytest.mark.parametrize("header, expected", [
+        ("{etag}", 304),
+        ("W/{etag}", 304),
+        ('"other", {etag}', 304),
+        ("*", 304),
+        ('"other"', 200),
+    ])
+    def test_if_none_match_forms(self, client, add_photos, header, expected):
+        [item_id] = add_photos(1)
+        etag = client.get(f"/api/items/{item_id}/preview").headers["etag"]
+
+        response = client.get(f"/api/items/{item_id}/preview",
+                              headers={"If-None-Match": header.format(etag=etag)})
+
+        assert response.status_code == expected
+
+    @pytest.mark.parametrize("endpoint, change", [
+        ("thumbnail", lambda mp: mp.setitem(ThumbnailStore.SIZES, "thumb", ((64, 64), 50))),
+        ("preview", lambda mp: mp.setitem(ThumbnailStore.SIZES, "preview", ((512, 512), 70))),
+        ("fullsize", lambda mp: mp.setattr(gallery_router, "_FULLSIZE_QUALITY", 80)),
+        ("fullsize", lambda mp: mp.setattr(Config, "IMAGE_MAX_SIZE", 1000)),
+    ])
+    def test_etag_changes_after_reencode(self, client, add_photos, monkeypatch, endpoint, change):
+        """Uretim parametreleri degisince eski ETag eslesmez, yeni icerik 200 ile gelir."""
+        [item_id] = add_photos(1)
+        old = client.get(f"/api/items/{item_id}/{endpoint}").headers["etag"]
+
+        change(monkeypatch)
+        response = client.get(f"/api/items/{item_id}/{endpoint}", headers={"If-None-Match": old})
+
+        assert response.status_code == 200
+        assert response.headers["etag"] != old
+
+    @pytest.mark.parametrize("endpoint", IMAGE_ENDPOINTS)
+    def test_revoked_consent_not_revalidated(self, client, add_photos, session_factory, endpoint):
+        """Riza kaldirilinca gecerli ETag ile bile 304 degil 404 doner."""
+        [item_id] = add_photos(1)
+        etag = client.get(f"/api/items/{item_id}/{endpoint}").headers["etag"]
+
+        _set_consent(session_factory, item_id, False)
+        response = client.get(f"/api/items/{item_id}/{endpoint}", headers={"If-None-Match": etag})
+
+        assert response.status_code == 404
+        assert "etag" not in response.headers
+
+
+def _gps_exif() -> Image.Exif:
+    exif = Image.Exif()
+    exif[ExifTags.Base.Make] = "TestCam"
+    exif[ExifTags.IFD.GPSInfo] = {1: "N", 2: (41.0, 0.0, 0.0), 3: "E", 4: (29.0, 0.0, 0.0)}
+    return exif
+
+
+class TestFullsizeMetadata:
+
+    def test_plain_original_passed_through(self, client, add_photos, encryption_manager, session_factory):
+        """Metadata'siz, sinir icindeki JPEG yeniden kodlanmadan (bayt bayt) gonderilir."""
+        [item_id] = add_photos(1)
+        path = _stored(session_factory, item_id).file_path
+
+        response = client.get(f"/api/items/{item_id}/fullsize")
+
+        assert response.content == encryption_manager.decrypt_file(path)
+
+    @pytest.mark.parametrize("save_options", [
+        {"exif": _gps_exif()},
+        {"xmp": b'<x:xmpmeta><rdf:Description exif:GPSLatitude="41,0N"/></x:xmpmeta>'},
+    ])
+    def test_location_metadata_stripped(self, client, add_photos, encryption_manager,
+                                        session_factory, save_options):
+        [item_id] = add_photos(1, **save_options)
+        path = _stored(session_factory, item_id).file_path
+        with Image.open(io.BytesIO(encryption_manager.decrypt_file(path))) as original:
+            assert ExifTags.IFD.GPSInfo in original.getexif() or "xmp" in original.info
+
+        response = client.get(f"/api/items/{item_id}/fullsize")
+
+        assert response.status_code == 200
+        with Image.open(io.BytesIO(response.content)) as img:
+            assert img.format == "JPEG"
+            assert img.size == (300, 200)
+            assert ExifTags.IFD.GPSInfo not in img.getexif()
+            assert "xmp" not in img.info
+        assert b"GPS" not in response.content
@@ -0,0 +1,104 @@
+# tests/test_geo_distance.py
+"""
+Vektörel mesafe çekirdeği (src/geo/distance.py) testleri.
+Hata sınırları geopy geodesic'e karşı doğrulanır.
+"""
+
+import numpy as np
+import pytest
+from geopy.distance import geodesic
+
+from src.geo.distance import (distance_km, haversine_km, pairwise_distance_km, within_radius,
+                              bounding_box, HAVERSINE_MAX_ERROR, DISTANCE_MAX_ERROR)
+from src.geo.benchmark import benchmark
+
+
+def random_pairs(seed, spread, n=500):
+    rng = np.random.default_rng(seed)
+    lat1 = rng.uniform(-89.9, 89.9, n)
+    lon1 = rng.uniform(-180, 180, n)
+    lat2 = np.clip(lat1 + rng.uniform(-spread, spread, n), -90, 90)
+    lon2 = lon1 + rng.uniform(-spread, spread, n)
+    exact = np.array([geodesic((a, b), (c, d)).kilometers
+                      for a, b, c, d in zip(lat1, lon1, lat2, lon2)])
+    return lat1, lon1, lat2, lon2, exact
+
+
+class TestErrorBounds:
+
+    @pytest.mark.parametrize("spread", [0.0001, 0.01, 1.0, 30.0, 120.0])
+    def test_within_stated_bounds(self, spread):
+        """Kısa ve uzun mesafelerde bağıl hata belirtilen sınırların altında."""
+        lat1, lon1, lat2, lon2, exact = random_pairs(int(spread * 1000), spread)
+        mask = (exact > 0) & (exact <= 15_000)
+
+        hav_err = np.abs(haversine_km(lat1, lon1, lat2, lon2) - exact)[mask] / exact[mask]
+        dist_err = np.abs(distance_km(lat1, lon1, lat2, lon2) - exact)[mask] / exact[mask]
+
+        assert hav_err.max() <= HAVERSINE_MAX_ERROR
+        assert dist_err.max() <= DISTANCE_MAX_ERROR
+
+    def test_special_points(self):
+        """Aynı nokta, kutuptan kutba ve scalar girdiler."""
+        assert float(distance_km(41.0, 29.0, 41.0, 29.0)) == 0.0
+        assert float(distance_km(90, 0, -90, 0)) == pytest.approx(
+            geodesic((90, 0), (-90, 0)).kilometers, rel=DISTANCE_MAX_ERROR)
+        # İstanbul - Ankara
+        assert float(distance_km(41.0, 29.0, 39.9, 32.9)) == pytest.approx(
+            geodesic((41.0, 29.0), (39.9, 32.9)).kilometers, rel=DISTANCE_MAX_ERROR)
+
+
+class TestKernels:
+
+    def test_broadcast_one_to_many(self):
+        """Tek merkez - dizi çağrısı eleman eleman hesapla aynı."""
+        lats, lons = np.array([41.01, 39.9, -33.9]), np.array([29.01, 32.9, 151.2])
+        many = distance_km(41.0, 29.0, lats, lons)
+        assert many.shape == (3,)
+        assert np.allclose(many, [float(distance_km(41.0, 29.0, a, b)) for a, b in zip(lats, lons)])
+
+    def test_pairwise_matrix(self):
+        """Matris simetrik, köşegeni sıfır ve tek tek mesafelerle aynı."""
+        rng = np.random.default_rng(3)
+        lats, lons = rng.uniform(-60, 60, 40), rng.uniform(-180, 180, 40)
+
+        matrix = pairwise_distance_km(lats, lons)
+
+        assert matrix.shape == (40, 40)
+        assert np.allclose(matrix, matrix.T)
+        assert np.all(np.diag(matrix) == 0.0)
+        assert matrix[4, 17] == pytest.approx(float(distance_km(lats[4], lons[4], lats[17], lons[17])))
+
+    def test_within_radius(self):
+        """Yarıçap içindeki indeksler ve mesafeleri döner."""
+        lats = np.array([41.01, 39.9, 41.005, 41.2])
+        lons = np.array([29.01, 32.9, 29.005, 29.0])
+
+        inside, distances = within_radius(41.0, 29.0, lats, lons, radius_km=5.0)
+
+        assert inside.tolist() == [0, 2]
+        assert np.all(distances <= 5.0)
+
+    @pytest.mark.parametrize("lat,lon", [(41.0, 29.0), (69.6, 18.9), (-16.5, 179.95), (0.0, -179.99)])
+    def test_bounding_box_contains_radius(self, lat, lon):
+        """Yarıçap çemberindeki noktalar kutunun içinde kalır (yüksek enlem ve 180. meridyen)."""
+        radius = 50.0
+        min_lat, max_lat, lng_ranges = bounding_box(lat, lon, radius)
+        rng = np.random.default_rng(5)
+        lats = np.clip(lat + rng.uniform(-1.5, 1.5, 5000), -90, 90)
+        lons = (lon + rng.uniform(-3, 3, 5000) + 180) % 360 - 180
+        inside, _ = within_radius(lat, lon, lats, lons, radius)
+
+        assert len(inside) > 0
+        for i in inside:
+            assert min_lat <= lats[i] <= max_lat
+            assert any(lo <= lons[i] <= hi for lo, hi in lng_ranges)
+
+
+def test_benchmark_smoke():
+    """Benchmark küçük boyutta çalışır ve ölçülen hatalar sınırların altında."""
+    result = benchmark(n=2_000, pairwise_n=100, geopy_n=200)
+
+    assert result["distance_us_per_pair"] > 0
+    assert result["haversine_max_error"] <= HAVERSINE_MAX_ERROR
+    assert result["distance_max_error"] <= DISTANCE_MAX_ERROR
@@ -0,0 +1,176 @@
+# tests/test_geocoding.py
+"""
+Çevrimdışı coğrafi kodlama testleri: yerel gazetteer, kalıcı geocode
+cache'i, toplu ters kodlama (Event.main_location, Summarizer).
+"""
+
+import time
+import pytest
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from database.schema import Event, Item
+from src.geo import Gazetteer, Geocoder, GeocodeCache, load_gazetteer, assign_main_locations
+from src.geo.gazetteer import normalize_name
+from src.clustering.summarizer import Summarizer
+
+ROWS = [
+    # id, name, ascii, alternates, lat, lng, class, feature, cc, cc2, admin1, ..., population
+    (1, "Paris", "Paris", "", 48.86, 2.35, "PPLC", "FR", "", 2100000),
+    (2, "Paris", "Paris", "", 33.66, -95.56, "PPL", "US", "TX", 25000),
+    (3, "İstanbul", "Istanbul", "Constantinople", 41.01, 28.98, "PPLA", "TR", "34", 15500000),
+    (4, "Kadıköy", "Kadikoy", "", 40.99, 29.03, "PPLA2", "TR", "34", 480000),
+    (5, "Taveuni", "Taveuni", "", -16.86, 179.95, "PPL", "FJ", "", 9000),
+]
+
+
+@pytest.fixture
+def gazetteer(temp_dir):
+    path = temp_dir / "cities.tsv"
+    lines = ["# yorum satiri"]
+    for pid, name, ascii_name, alts, lat, lng, feature, cc, admin1, pop in ROWS:
+        lines.append("\t".join(map(str, [pid, name, ascii_name, alts, lat, lng, "P", feature, cc, "",
+                                         admin1, "", "", "", pop, "", "", "", ""])))
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return Gazetteer(str(path))
+
+
+@pytest.fixture
+def geocoder(gazetteer):
+    return Geocoder(gazetteer=gazetteer, cache=GeocodeCache(None))
+
+
+class TestGazetteer:
+
+    def test_normalize_name(self):
+        """Büyük/küçük harf, aksan ve ı/İ farkı yok sayılır."""
+        assert normalize_name("  KADIKÖY ") == normalize_name("kadikoy") == "kadikoy"
+        assert normalize_name("İstanbul") == normalize_name("ISTANBUL") == "istanbul"
+
+    def test_lookup(self, gazetteer):
+        """Ad, ASCII ad ve alternatif adla bulunur; aynı isimlilerden en kalabalığı döner."""
+        assert gazetteer.lookup("istanbul").name == "İstanbul"
+        assert gazetteer.lookup("constantinople").name == "İstanbul"
+        assert gazetteer.lookup("paris").country_code == "FR"
+        assert gazetteer.lookup("Atlantis") is None
+
+    def test_label_includes_admin_seat(self, gazetteer):
+        """İlçe etiketi bağlı olduğu il merkeziyle birlikte yazılır."""
+        assert gazetteer.lookup("Kadikoy").label == "Kadıköy, İstanbul"
+        assert gazetteer.lookup("Istanbul").label == "İstanbul"
+
+    def test_prefix_search(self, gazetteer):
+        """Önek araması nüfusa göre sıralı ve limitli döner."""
+        assert [p.name for p in gazetteer.search("pa")] == ["Paris", "Paris"]
+        assert [p.country_code for p in gazetteer.search("PA", limit=1)] == ["FR"]
+        assert gazetteer.search("") == []
+        assert gazetteer.search("zz") == []
+
+    def test_nearest_bulk(self, gazetteer):
+        """Toplu ters kodlama; uzak ve eksik koordinatlar None, 180. meridyen doğru."""
+        places = gazetteer.nearest([40.991, 41.02, 0.0, None, -16.86],
+                                   [29.031, 28.97, 0.0, None, -179.95], max_km=50)
+
+        assert [p.name if p else None for p in places] == ["Kadıköy", "İstanbul", None, None, "Taveuni"]
+
+    def test_bundled_gazetteer(self):
+        """Projeyle gelen tablo yüklenir; Türkçe isimler ve sık kullanılan yerler bulunur."""
+        bundled = load_gazetteer()
+
+        assert len(bundled) > 200
+        assert bundled.lookup("izmir").country_code == "TR"
+        assert bundled.lookup("Kapadokya").label == "Göreme, Nevşehir"
+        assert bundled.lookup("münih").name == "Munich"
+
+    def test_lookup_is_sub_millisecond(self):
+        """Şehir araması ağ gerektirmez ve milisaniyenin altındadır."""
+        bundled = load_gazetteer()
+        start = time.perf_counter()
+        for _ in range(1000):
+            bundled.lookup("Kadıköy")
+            bundled.search("ist", 5)
+        assert (time.perf_counter() - start) / 1000 < 1e-3
+
+
+class TestGeocoder:
+
+    def test_offline_by_default(self, geocoder):
+        """Gazetteer'de olmayan isim için ağa çıkılmaz."""
+        geocoder._nominatim = MagicMock()
+
+        assert geocoder.geocode("Atlantis") is None
+        geocoder._nominatim.geocode.assert_not_called()
+
+    def test_online_fallback_is_cached_on_disk(self, gazetteer, temp_dir):
+        """Çevrimiçi sonuç (ve bulunamadı) diske yazılır; yeni süreçte ağa tekrar çıkılmaz."""
+        path = str(temp_dir / "geocode_cache.db")
+        first = Geocoder(gazetteer=gazetteer, cache=GeocodeCache(path), online=True)
+        first._nominatim = MagicMock()
+        first._nominatim.geocode.side_effect = lambda name: (
+            MagicMock(address="Ayvalık, Balıkesir", latitude=39.32, longitude=26.69)
+            if name == "Ayvalik" else None)
+
+        assert first.geocode("Ayvalik").latitude == 39.32
+        assert first.geocode("Atlantis") is None
+
+        second = Geocoder(gazetteer=gazetteer, cache=GeocodeCache(path), online=True)
+        second._nominatim = MagicMock()
+        assert second.geocode("AYVALIK").label == "Ayvalık, Balıkesir"
+        assert second.geocode("atlantis") is None
+        second._nominatim.geocode.assert_not_called()
+
+    def test_network_error_not_cached(self, gazetteer):
+        """Ağ hatası kalıcı 'bulunamadı' olarak kaydedilmez."""
+        geocoder = Geocoder(gazetteer=gazetteer, cache=GeocodeCache(None), online=True)
+        geocoder._nominatim = MagicMock()
+        geocoder._nominatim.geocode.side_effect = [OSError("timeout"), None]
+
+        assert geocoder.geocode("Atlantis") is None
+        assert geocoder.geocode("Atlantis") is None
+        assert geocoder._nominatim.geocode.call_count == 2
+
+    def test_cache_does_not_create_file_on_read(self, temp_dir):
+        """Okuma, olmayan cache dosyasını oluşturmaz."""
+        cache = GeocodeCache(str(temp_dir / "none.db"))
+
+        cache.get("x")
+
+        assert not (temp_dir / "none.db").exists()
+
+    def test_main_location(self, geocoder):
+        """En sık düşülen yerin etiketi döner."""
+        assert geocoder.main_location([40.99, 40.991, 41.02], [29.03, 29.031, 28.97]) == "Kadıköy, İstanbul"
+        assert geocoder.main_location([0.0], [0.0]) is None
+
+
+class TestBulkReverseGeocoding:
+
+    def test_assign_main_locations(self, db_session, geocoder):
+        """Olayların konum adı item koordinatlarından toplu doldurulur (rızasızlar sayılmaz)."""
+        kadikoy = Event(title="a", start_date=datetime(2025, 1, 1), end_date=datetime(2025, 1, 1))
+        named = Event(title="b", start_date=datetime(2025, 1, 2), end_date=datetime(2025, 1, 2),
+                      main_location="Ev")
+        db_session.add_all([kadikoy, named])
+        db_session.flush()
+        coords = [(kadikoy, 40.99, 29.03, True), (kadikoy, 40.991, 29.031, True),
+                  (kadikoy, 41.02, 28.97, False), (named, 41.02, 28.97, True)]
+        db_session.add_all([
+            Item(file_path=f"/e/{i}.jpg", file_hash=f"e{i}", type="Photo", has_consent=consent,
+                 creation_datetime=datetime(2025, 1, 1), event_id=event.event_id,
+                 latitude=lat, longitude=lng)
+            for i, (event, lat, lng, consent) in enumerate(coords)
+        ])
+        db_session.commit()
+
+        assert assign_main_locations(db_session, geocoder) == 1
+        assert kadikoy.main_location == "Kadıköy, İstanbul"
+        assert named.main_location == "Ev"
+
+    def test_summarizer_location_info(self, geocoder):
+        """Summarizer konum bilgisini toplu ters kodlamayla çıkarır."""
+        summarizer = Summarizer(db_connection=MagicMock(), geocoder=geocoder)
+        items = [{'lat': 40.99, 'lng': 29.03}, {'lat': 40.991, 'lng': 29.031},
+                 {'lat': 41.02, 'lng': 28.97}, {'lat': None, 'lng': None}]
+
+        assert summarizer.extract_location_info(items) == "Kadıköy, İstanbul"
+        assert summarizer.extract_location_info([{'lat': None, 'lng': None}]) is None
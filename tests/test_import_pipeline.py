@@ -0,0 +1,159 @@
+# tests/test_import_pipeline.py
+"""
+ImportPipeline testleri.
+Gerçek görüntü, gerçek şifreleme ve in-memory DB kullanır;
+process pool yerine ThreadPoolExecutor verilir (test hızlı ve deterministik kalsın).
+"""
+
+import pytest
+import numpy as np
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+from PIL import Image
+from src.ingestion.photo_importer import PhotoImporter
+from src.ingestion.import_pipeline import ImportPipeline
+from src.embedding.faiss_manager import FaissManager
+from src.embedding.embedding_store import EmbeddingStore
+from src.ingestion.thumbnail_store import ThumbnailStore
+from database.schema import Item
+
+
+@pytest.fixture
+def photo_folder(temp_dir):
+    """Üç farklı renkte fotoğraf + bir bozuk dosya içeren klasör."""
+    folder = temp_dir / "photos"
+    folder.mkdir()
+    for name, color in [("a.jpg", "red"), ("b.jpg", "green"), ("c.jpg", "blue")]:
+        Image.new("RGB", (64, 64), color=color).save(folder / name, "JPEG")
+    (folder / "broken.jpg").write_bytes(b"not an image")
+    return folder
+
+
+@pytest.fixture
+def mock_clip():
+    clip = MagicMock()
+    clip.batch_size = 2
+    clip.encode_images.side_effect = lambda paths: [np.random.randn(16).astype('float32') for _ in paths]
+    return clip
+
+
+@pytest.fixture
+def pipeline_importer(db_session, encryption_manager, mock_clip, temp_dir):
+    """Gerçek bileşenlerle PhotoImporter (şifreleme anahtarı geçici klasörde)."""
+    with patch('src.ingestion.photo_importer.EncryptionManager', return_value=encryption_manager):
+        faiss_mgr = FaissManager(str(temp_dir / "pipe.faiss"), dimension=16)
+        store = EmbeddingStore(str(temp_dir / "pipe_emb"), dimension=16)
+        thumbnails = ThumbnailStore(str(temp_dir / "pipe_thumbs"), encryption_manager)
+        yield PhotoImporter(db_session, clip_embedder=mock_clip, faiss_manager=faiss_mgr,
+                            embedding_store=store, thumbnail_store=thumbnails)
+
+
+def run_pipeline(importer, files, consent=True, batch_size=2):
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        pipeline = ImportPipeline(importer, executor=pool, batch_size=batch_size)
+        return list(pipeline.run(files, consent))
+
+
+class TestImportPipeline:
+
+    def test_every_file_reported_once(self, pipeline_importer, photo_folder):
+        """Her dosya için tam olarak bir sonuç üretilir."""
+        files = pipeline_importer.find_image_files(photo_folder)
+        results = run_pipeline(pipeline_importer, files)
+
+        assert sorted(p.name for p, _ in results) == sorted(p.name for p in files)
+        statuses = {p.name: s for p, s in results}
+        assert statuses["a.jpg"] == "imported"
+        assert statuses["broken.jpg"] == "duplicate"
+
+    def test_rows_vectors_and_encryption(self, pipeline_importer, photo_folder, db_session,
+                                         encryption_manager):
+        """Import edilen dosyalar DB'ye, FAISS'e yazılır ve diskte şifrelenir."""
+        files = pipeline_importer.find_image_files(photo_folder)
+        run_pipeline(pipeline_importer, files)
+
+        items = db_session.query(Item).all()
+        assert len(items) == 3
+        assert all(item.faiss_index_id is not None for item in items)
+        assert pipeline_importer.faiss_manager.get_index_size() == 3
+        for item in items:
+            assert encryption_manager.decrypt_file(item.file_path)
+
+    def test_embeddings_stored_by_hash(self, pipeline_importer, photo_folder, db_session):
+        """Import edilen vektörler dosya hash'i ile kalıcı depoya yazılır."""
+        files = pipeline_importer.find_image_files(photo_folder)
+        run_pipeline(pipeline_importer, files)
+
+        store = pipeline_importer.embedding_store
+        assert store.count() == 3
+        for item in db_session.query(Item).all():
+            assert store.get(item.file_hash) is not None
+
+    def test_thumbnails_generated_before_encryption(self, pipeline_importer, photo_folder, db_session):
+        """Her import edilen fotoğrafın şifreli thumbnail ve önizlemesi yazılır."""
+        files = pipeline_importer.find_image_files(photo_folder)
+        run_pipeline(pipeline_importer, files)
+
+        thumbnails = pipeline_importer.thumbnail_store
+        for item in db_session.query(Item).all():
+            assert thumbnails.get(item.file_hash, "thumb").startswith(b"\xff\xd8")
+            assert thumbnails.has(item.file_hash, "preview")
+
+    def test_second_run_is_duplicate(self, pipeline_importer, photo_folder):
+        """Aynı klasör ikinci kez import edilince hepsi duplicate olur."""
+        files = pipeline_importer.find_image_files(photo_folder)
+        run_pipeline(pipeline_importer, files)
+        results = run_pipeline(pipeline_importer, files)
+
+        assert all(status == "duplicate" for _, status in results)
+
+    def test_same_content_in_one_run(self, pipeline_importer, photo_folder, db_session):
+        """Aynı içerikli iki dosyadan yalnızca biri import edilir."""
+        (photo_folder / "a_copy.jpg").write_bytes((photo_folder / "a.jpg").read_bytes())
+        files = pipeline_importer.find_image_files(photo_folder)
+        results = run_pipeline(pipeline_importer, files)
+
+        statuses = [s for p, s in results if p.name in ("a.jpg", "a_copy.jpg")]
+        assert sorted(statuses) == ["duplicate", "imported"]
+
+    def test_no_consent_touches_nothing(self, pipeline_importer, photo_folder, db_session):
+        """Rıza yoksa dosyalar işlenmez ve DB boş kalır."""
+        files = pipeline_importer.find_image_files(photo_folder)
+        before = (photo_folder / "a.jpg").read_bytes()
+        results = run_pipeline(pipeline_importer, files, consent=False)
+
+        assert all(status == "no_consent" for _, status in results)
+        assert db_session.query(Item).count() == 0
+        assert (photo_folder / "a.jpg").read_bytes() == before
+
+    def test_clip_failure_still_imports(self, pipeline_importer, photo_folder, db_session, mock_clip):
+        """CLIP hatası import'u durdurmaz, sadece vektör eklenmez."""
+        mock_clip.encode_images.side_effect = RuntimeError("model yok")
+        files = pipeline_importer.find_image_files(photo_folder)
+        results = run_pipeline(pipeline_importer, files)
+
+        assert sum(1 for _, s in results if s == "imported") == 3
+        assert pipeline_importer.faiss_manager.get_index_size() == 0
+
+    def test_clip_batches_aligned(self, pipeline_importer, photo_folder, db_session, mock_clip):
+        """CLIP batch sonucundaki None, sadece ilgili dosyanın vektörünü atlar."""
+        mock_clip.encode_images.side_effect = lambda paths: [
+            None if p.name == "b.jpg" else np.random.randn(16).astype('float32') for p in paths
+        ]
+        files = pipeline_importer.find_image_files(photo_folder)
+        run_pipeline(pipeline_importer, files)
+
+        items = {Path(i.file_path).name: i for i in db_session.query(Item).all()}
+        assert items["b.jpg"].faiss_index_id is None
+        assert items["a.jpg"].faiss_index_id is not None
+        assert all(len(call.args[0]) <= 2 for call in mock_clip.encode_images.call_args_list)
+
+    def test_import_folder_stats(self, pipeline_importer, photo_folder):
+        """import_folder pipeline üzerinden istatistik döner."""
+        with ThreadPoolExecutor(max_workers=2) as pool, \
+             patch('src.ingestion.photo_importer.ImportPipeline',
+                   side_effect=lambda imp, executor=None: ImportPipeline(imp, executor=pool)):
+            stats = pipeline_importer.import_folder(str(photo_folder), user_consent=True)
+
+        assert stats == {'total_found': 4, 'imported': 3, 'skipped_duplicates': 1, 'errors': 0}
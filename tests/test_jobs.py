@@ -0,0 +1,147 @@
+# tests/test_jobs.py
+"""
+Arka plan iş yöneticisi (api/jobs.py) testleri.
+"""
+
+import json
+import threading
+import numpy as np
+import pytest
+from api import dependencies
+from api.jobs import JobManager
+from config import Config
+from src.embedding.faiss_manager import FaissManager
+
+
+def counting_job(steps, gate=None):
+    def target(cancel):
+        for i in range(1, steps + 1):
+            if gate is not None:
+                gate.wait(2)
+            if cancel.is_set():
+                return
+            yield {"current": i, "total": steps}
+    return target
+
+
+class TestJobManager:
+
+    def test_job_runs_to_completion(self):
+        """İş arka planda biter, son ilerleme saklanır."""
+        job = JobManager().start("test", counting_job(3))
+
+        assert job.wait(2)
+        assert job.status == "completed"
+        assert job.progress == {"current": 3, "total": 3}
+
+    def test_same_kind_not_started_twice(self):
+        """Aynı türde çalışan iş varsa yenisi başlatılmaz."""
+        gate = threading.Event()
+        manager = JobManager()
+        first = manager.start("test", counting_job(3, gate))
+        second = manager.start("test", counting_job(3, gate))
+
+        assert second is first
+        gate.set()
+        first.wait(2)
+        assert manager.start("test", counting_job(1)) is not first
+
+    def test_cancel(self):
+        """İptal edilen iş 'cancelled' durumuyla biter."""
+        gate = threading.Event()
+        job = JobManager().start("test", counting_job(5, gate))
+        job.cancel()
+        gate.set()
+
+        assert job.wait(2)
+        assert job.status == "cancelled"
+
+    def test_cancel_reason(self):
+        """Kullanıcı iptali ile kapanış (cancel_all) iptali ayırt edilir."""
+        gate = threading.Event()
+        manager = JobManager()
+        user = manager.start("user", counting_job(5, gate))
+        user.cancel()
+        stopped = manager.start("stopped", counting_job(5, gate))
+        manager.cancel_all(timeout=0)
+        gate.set()
+        stopped.wait(2)
+
+        assert user.cancel_event.is_set() and not user.cancel_event.shutdown
+        assert stopped.cancel_event.shutdown
+        assert stopped.status == "cancelled"
+
+    def test_failure_recorded(self):
+        """İşteki hata yakalanır ve duruma yazılır."""
+        def broken(cancel):
+            yield {"current": 1}
+            raise RuntimeError("disk dolu")
+
+        job = JobManager().start("test", broken)
+        job.wait(2)
+
+        assert job.status == "failed"
+        assert job.to_dict()["error"] == "disk dolu"
+
+
+class TestFaissMigrationJob:
+    """Eski L2 FAISS index'inin dönüşümü başlangıçta arka plan işi olarak yapılır."""
+
+    def _manager(self, temp_dir, monkeypatch, l2: bool):
+        import faiss
+        path = temp_dir / "index.faiss"
+        if l2:
+            vecs = np.random.randn(4, 8).astype('float32')
+            faiss.normalize_L2(vecs)
+            legacy = faiss.IndexIDMap2(faiss.IndexFlatL2(8))
+            legacy.add_with_ids(vecs, np.arange(4, dtype='int64'))
+            faiss.write_index(legacy, str(path))
+        monkeypatch.setattr(dependencies, "_faiss_manager", FaissManager(str(path), dimension=8))
+        monkeypatch.setattr(dependencies, "_job_manager", JobManager())
+        return dependencies._faiss_manager
+
+    def test_l2_index_migrated_in_background(self, temp_dir, monkeypatch):
+        fm = self._manager(temp_dir, monkeypatch, l2=True)
+
+        job = dependencies.prepare_faiss_manager()
+
+        assert job.kind == "faiss_migrate"
+        assert job.wait(5)
+        assert job.status == "completed"
+        assert job.progress['index_type'] == "flat"
+        assert not fm.needs_migration()
+        assert sorted(fm.get_item_ids()) == [0, 1, 2, 3]
+
+    def test_migration_receives_job_cancel(self, temp_dir, monkeypatch):
+        """Kapanıştaki cancel_all dönüşüme iletilir (parça arasında durabilir)."""
+        fm = self._manager(temp_dir, monkeypatch, l2=True)
+        received = []
+        monkeypatch.setattr(fm, "migrate_metric", lambda cancel=None: received.append(cancel) or {})
+
+        job = dependencies.prepare_faiss_manager()
+        job.wait(5)
+
+        assert received == [job.cancel_event]
+
+    def test_no_job_for_inner_product_index(self, temp_dir, monkeypatch):
+        self._manager(temp_dir, monkeypatch, l2=False)
+
+        assert dependencies.prepare_faiss_manager() is None
+
+
+class TestResumeInterruptedJobs:
+    """Açılışta yalnızca çökme/kapanışta yarıda kalan reindex sürdürülür."""
+
+    @pytest.mark.parametrize("status,resumed", [("running", True), ("cancelled", False),
+                                                ("completed", False)])
+    def test_resume_by_status(self, temp_dir, monkeypatch, status, resumed):
+        state_path = temp_dir / "reindex_state.json"
+        state_path.write_text(json.dumps({"status": status, "last_item_id": 2, "current": 2,
+                                          "reindexed": 2, "failed": 0}))
+        monkeypatch.setattr(Config, "REINDEX_STATE_PATH", str(state_path))
+        monkeypatch.setattr(dependencies, "run_reindex_job", counting_job(1))
+        monkeypatch.setattr(dependencies, "_job_manager", JobManager())
+
+        dependencies.resume_interrupted_jobs()
+
+        assert bool(dependencies._job_manager._jobs) == resumed
@@ -0,0 +1,99 @@
+# tests/test_maintenance.py
+"""
+Kütüphane bakım işleri (LibraryMaintenance) testleri.
+"""
+
+import os
+import threading
+from datetime import datetime
+import pytest
+from unittest.mock import MagicMock
+from src.ingestion.maintenance import LibraryMaintenance
+from database.schema import Item
+
+
+def add_items(db_session, paths):
+    items = [Item(file_path=str(p), file_hash=f"hash_{i}", type="Photo", has_consent=True,
+                  creation_datetime=datetime(2025, 1, i + 1)) for i, p in enumerate(paths)]
+    db_session.add_all(items)
+    db_session.commit()
+    return items
+
+
+@pytest.fixture
+def maintenance(db_session, encryption_manager):
+    return LibraryMaintenance(db_session, encryption_manager,
+                              thumbnail_store=MagicMock(), thumbnail_cache=MagicMock(),
+                              faiss_manager=MagicMock(), embedding_store=MagicMock(),
+                              batch_size=2)
+
+
+class TestRepair:
+
+    def test_double_encrypted_files_repaired(self, maintenance, db_session, encryption_manager, temp_dir):
+        """Çift şifreli dosyalar tek katmana düşer; diğerleri dokunulmadan kalır."""
+        paths = []
+        for i in range(5):
+            path = temp_dir / f"photo_{i}.jpg"
+            path.write_bytes(os.urandom(256))
+            encryption_manager.encrypt_file(str(path))
+            paths.append(path)
+        originals = {p: encryption_manager.decrypt_file(str(p)) for p in paths}
+        # İki dosyayı bir kat daha şifrele (biri eski Fernet formatında)
+        encryption_manager.write_encrypted(str(paths[1]), paths[1].read_bytes())
+        paths[3].write_bytes(encryption_manager.cipher.encrypt(paths[3].read_bytes()))
+        untouched = paths[0].read_bytes()
+        add_items(db_session, paths + [temp_dir / "missing.jpg"])
+
+        progress = list(maintenance.repair())
+
+        assert [p['current'] for p in progress] == [2, 4, 6]
+        assert progress[-1]['repaired'] == 2 and progress[-1]['failed'] == 0
+        assert all(encryption_manager.decrypt_file(str(p)) == originals[p] for p in paths)
+        assert paths[0].read_bytes() == untouched
+
+    def test_unreadable_files_counted(self, maintenance, db_session, temp_dir):
+        """Şifresiz veya başka anahtarla şifrelenmiş dosyalar başarısız sayılır."""
+        plain = temp_dir / "plain.jpg"
+        plain.write_bytes(b"\xff\xd8\xff" + os.urandom(64))
+        add_items(db_session, [plain])
+
+        progress = list(maintenance.repair())
+
+        assert progress[-1]['failed'] == 1 and progress[-1]['repaired'] == 0
+
+
+class TestCleanup:
+
+    def test_orphans_deleted_in_chunks(self, maintenance, db_session, temp_dir):
+        """Dosyası olmayan kayıtlar silinir, thumbnail'ları da temizlenir."""
+        existing = temp_dir / "var.jpg"
+        existing.write_bytes(b"x")
+        items = add_items(db_session, [temp_dir / "yok1.jpg", existing, temp_dir / "yok2.jpg"])
+        orphan_ids = [items[0].item_id, items[2].item_id]
+
+        progress = list(maintenance.cleanup())
+
+        assert progress[-1]['deleted'] == 2 and progress[-1]['total'] == 3
+        assert [i.item_id for i in db_session.query(Item).all()] == [items[1].item_id]
+        removed = {c.args[0] for c in maintenance.thumbnail_store.remove.call_args_list}
+        assert removed == {"hash_0", "hash_2"}
+        invalidated = [i for c in maintenance.thumbnail_cache.invalidate.call_args_list for i in c.args[0]]
+        assert sorted(invalidated) == orphan_ids
+        # Vektörler de silinir: SQLite silinen item_id'yi yeni item'a verebilir
+        unindexed = [i for c in maintenance.faiss_manager.remove_embeddings.call_args_list for i in c.args[0]]
+        purged = [i for c in maintenance.embedding_store.remove_items.call_args_list for i in c.args[0]]
+        assert sorted(unindexed) == sorted(purged) == orphan_ids
+
+    def test_cancel_stops_at_chunk_boundary(self, maintenance, db_session, temp_dir):
+        """İptal edilen iş mevcut parçayı bitirip durur."""
+        add_items(db_session, [temp_dir / f"yok{i}.jpg" for i in range(5)])
+        cancel = threading.Event()
+
+        progress = []
+        for p in maintenance.cleanup(cancel):
+            progress.append(p)
+            cancel.set()
+
+        assert len(progress) == 1
+        assert db_session.query(Item).count() == 3
@@ -143,3 +143,14 @@ class TestImportSinglePhoto:
 
         count = db_session.query(Item).count()
         assert count == 1
+
+    def test_thumbnails_generated_before_encryption(self, importer, sample_image):
+        """Thumbnail deposu verilirse thumbnail'lar şifrelemeden önce üretilir."""
+        calls = []
+        importer.thumbnail_store = MagicMock()
+        importer.thumbnail_store.generate.side_effect = lambda *a: calls.append("thumbnail")
+        importer.encryption.encrypt_file.side_effect = lambda *a: calls.append("encrypt")
+
+        assert importer.import_single_photo(sample_image, user_consent=True) == 'imported'
+        importer.thumbnail_store.generate.assert_called_once_with("unique_hash_12345", sample_image)
+        assert calls == ["thumbnail", "encrypt"]
@@ -8,8 +8,10 @@ Rıza yönetimi ve güvenli silme testleri.
 
 import os
 import pytest
+import numpy as np
 from pathlib import Path
 from security.security_manager import PrivacyManager
+from src.embedding.faiss_manager import FaissManager
 from database.schema import Item
 
 
@@ -82,6 +84,67 @@ class TestSetConsent:
         assert pm.check_consent(item.item_id) is True
 
 
+class TestEmbeddingRemoval:
+    """Silme / rıza iptalinde vektörlerin index'ten çıkarılması."""
+
+    @pytest.fixture
+    def indexed(self, db_session, sample_items, temp_dir):
+        fm = FaissManager(str(temp_dir / "privacy.faiss"), dimension=8, compact_ratio=1.0)
+        ids = [item.item_id for item in sample_items]
+        fm.add_embeddings(np.random.randn(len(ids), 8).astype('float32'), ids)
+        for item in sample_items:
+            item.faiss_index_id = item.item_id
+        db_session.commit()
+        return fm
+
+    def test_revoke_removes_vector(self, db_session, sample_items, indexed):
+        """Rıza geri alınınca vektör aramadan çıkar ve faiss_index_id temizlenir."""
+        pm = PrivacyManager(db_session, faiss_manager=indexed)
+        item = sample_items[0]
+
+        pm.set_consent(item.item_id, False)
+
+        assert item.item_id not in indexed.get_item_ids()
+        refreshed = db_session.query(Item).filter(Item.item_id == item.item_id).first()
+        assert refreshed.faiss_index_id is None
+
+    def test_grant_keeps_vector(self, db_session, sample_items, indexed):
+        """Rıza verilmesi vektöre dokunmaz."""
+        pm = PrivacyManager(db_session, faiss_manager=indexed)
+        pm.set_consent(sample_items[2].item_id, True)
+
+        assert indexed.get_index_size() == len(sample_items)
+
+    def test_remove_embeddings(self, db_session, sample_items, indexed):
+        """remove_embeddings çıkarılan vektör sayısını döner."""
+        pm = PrivacyManager(db_session, faiss_manager=indexed)
+        ids = [sample_items[1].item_id, sample_items[3].item_id]
+
+        assert pm.remove_embeddings(ids) == 2
+        assert not set(ids) & set(indexed.get_item_ids())
+
+    def test_purge_removes_from_store(self, db_session, sample_items, indexed, temp_dir):
+        """purge=True kalıcı embedding deposundan da siler; rıza iptali silmez."""
+        from src.embedding.embedding_store import EmbeddingStore
+        store = EmbeddingStore(str(temp_dir / "emb"), dimension=8)
+        ids = [item.item_id for item in sample_items]
+        store.put_many([item.file_hash for item in sample_items], ids,
+                       np.random.randn(len(ids), 8).astype('float32'))
+        pm = PrivacyManager(db_session, faiss_manager=indexed, embedding_store=store)
+
+        pm.set_consent(ids[0], False)
+        pm.remove_embeddings([ids[1]], purge=True)
+
+        assert store.get(sample_items[0].file_hash) is not None
+        assert store.get(sample_items[1].file_hash) is None
+
+    def test_without_faiss_manager(self, db_session, sample_items):
+        """FaissManager verilmezse vektör işlemi yapılmaz."""
+        pm = PrivacyManager(db_session)
+        assert pm.remove_embeddings([sample_items[0].item_id]) == 0
+        pm.set_consent(sample_items[0].item_id, False)
+
+
 class TestSecureDelete:
     """secure_delete() testleri."""
 
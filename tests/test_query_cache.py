@@ -0,0 +1,147 @@
+# tests/test_query_cache.py
+"""
+QueryEmbeddingCache testleri.
+Gerçek model gerekmez; vektörler sahte olarak üretilir.
+"""
+
+import time
+import numpy as np
+from unittest.mock import patch
+from src.embedding.query_cache import QueryEmbeddingCache
+
+
+MODEL = "clip-test"
+
+
+def vec(value=1.0):
+    return np.full(4, value, dtype='float32')
+
+
+class TestMemoryTier:
+
+    def test_miss_then_hit(self):
+        """İlk sorgu miss, aynı sorgu tekrarında hit sayılır."""
+        cache = QueryEmbeddingCache()
+        assert cache.get(MODEL, "deniz") is None
+        cache.put(MODEL, "deniz", vec())
+
+        assert np.array_equal(cache.get(MODEL, "deniz"), vec())
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 1
+
+    def test_query_normalized(self):
+        """Boşluk ve Unicode biçimi farkı aynı anahtara düşer."""
+        cache = QueryEmbeddingCache()
+        cache.put(MODEL, "deniz  Kenar\u0131nda", vec())
+        assert cache.get(MODEL, "  deniz Kenarında ") is not None
+        cache.put(MODEL, "cafe\u0301", vec())
+        assert cache.get(MODEL, "caf\u00e9") is not None
+
+    def test_case_not_folded(self):
+        """Metin modeli harf duyarlı: farklı harf büyüklüğü ayrı kayıttır."""
+        cache = QueryEmbeddingCache()
+        cache.put(MODEL, "Deniz", vec())
+        assert cache.get(MODEL, "deniz") is None
+
+    def test_model_in_key(self):
+        """Farklı model adı ayrı kayıt demektir."""
+        cache = QueryEmbeddingCache()
+        cache.put(MODEL, "deniz", vec())
+        assert cache.get("baska-model", "deniz") is None
+
+    def test_lru_eviction(self):
+        """Kapasite aşılınca en az yakın zamanda kullanılan atılır."""
+        cache = QueryEmbeddingCache(max_size=2)
+        cache.put(MODEL, "a", vec(1))
+        cache.put(MODEL, "b", vec(2))
+        cache.get(MODEL, "a")
+        cache.put(MODEL, "c", vec(3))
+
+        assert cache.get(MODEL, "b") is None
+        assert cache.get(MODEL, "a") is not None
+
+    def test_ttl_expiry(self):
+        """TTL geçen kayıt kullanılmaz."""
+        cache = QueryEmbeddingCache(ttl=10)
+        with patch('src.embedding.query_cache.time.time', return_value=1000.0):
+            cache.put(MODEL, "deniz", vec())
+        with patch('src.embedding.query_cache.time.time', return_value=1011.0):
+            assert cache.get(MODEL, "deniz") is None
+
+    def test_returns_copy(self):
+        """Dönen vektörün değiştirilmesi cache'i bozmaz."""
+        cache = QueryEmbeddingCache()
+        cache.put(MODEL, "deniz", vec())
+        cache.get(MODEL, "deniz")[0] = 99
+        assert cache.get(MODEL, "deniz")[0] == 1.0
+
+
+class TestDiskTier:
+
+    def test_persists_across_instances(self, temp_dir):
+        """Disk katmanı yeni bir cache örneğinde de okunur."""
+        path = temp_dir / "qc.db"
+        QueryEmbeddingCache(disk_path=str(path)).put(MODEL, "deniz", vec(0.5))
+
+        cache = QueryEmbeddingCache(disk_path=str(path))
+        assert np.array_equal(cache.get(MODEL, "deniz"), vec(0.5))
+        assert cache.stats()['disk_hits'] == 1
+
+    def test_query_text_not_stored(self, temp_dir):
+        """Diskte sorgu metni düz olarak saklanmaz."""
+        path = temp_dir / "qc.db"
+        QueryEmbeddingCache(disk_path=str(path)).put(MODEL, "gizli sorgu", vec())
+        assert b"gizli sorgu" not in path.read_bytes()
+
+    def test_disk_ttl_expiry_pruned(self, temp_dir):
+        """Süresi dolan disk kayıtları bir sonraki yazmada silinir."""
+        path = temp_dir / "qc.db"
+        cache = QueryEmbeddingCache(ttl=10, disk_path=str(path))
+        with patch('src.embedding.query_cache.time.time', return_value=1000.0):
+            cache.put(MODEL, "eski", vec())
+        with patch('src.embedding.query_cache.time.time', return_value=1011.0):
+            cache.put(MODEL, "yeni", vec())
+
+        assert cache.stats()['disk_entries'] == 1
+
+    def test_disk_size_bounded_lru(self, temp_dir):
+        """Disk katmanı disk_max_size'ı aşmaz; en az yakın zamanda kullanılan atılır."""
+        path = temp_dir / "qc.db"
+        cache = QueryEmbeddingCache(max_size=1, disk_path=str(path), disk_max_size=2)
+        now = time.time()
+        with patch('src.embedding.query_cache.time.time', side_effect=[now, now + 1, now + 2, now + 3]):
+            cache.put(MODEL, "a", vec(1))
+            cache.put(MODEL, "b", vec(2))
+            # "a" bellekte yok (max_size=1), diskten okunur ve son kullanımı güncellenir
+            assert cache.get(MODEL, "a") is not None
+            cache.put(MODEL, "c", vec(3))
+
+        reopened = QueryEmbeddingCache(disk_path=str(path), disk_max_size=2)
+        assert reopened.stats()['disk_entries'] == 2
+        assert reopened.get(MODEL, "b") is None
+        assert reopened.get(MODEL, "a") is not None
+
+    def test_legacy_table_migrated(self, temp_dir):
+        """Son kullanım kolonu olmayan eski tablo açılınca yükseltilir ve okunur."""
+        import sqlite3
+        path = temp_dir / "qc.db"
+        key = QueryEmbeddingCache()._key(MODEL, "deniz")
+        with sqlite3.connect(str(path)) as db:
+            db.execute("CREATE TABLE query_embeddings ("
+                       "key TEXT PRIMARY KEY, vector BLOB NOT NULL, created REAL NOT NULL)")
+            db.execute("INSERT INTO query_embeddings VALUES (?, ?, ?)", (key, vec(0.5).tobytes(), time.time()))
+
+        cache = QueryEmbeddingCache(disk_path=str(path))
+
+        assert np.array_equal(cache.get(MODEL, "deniz"), vec(0.5))
+        cache.put(MODEL, "kum", vec())
+        assert cache.stats()['disk_entries'] == 2
+
+    def test_clear(self, temp_dir):
+        """clear() bellek ve disk katmanını boşaltır."""
+        path = temp_dir / "qc.db"
+        cache = QueryEmbeddingCache(disk_path=str(path))
+        cache.put(MODEL, "deniz", vec())
+        cache.clear()
+
+        assert QueryEmbeddingCache(disk_path=str(path)).get(MODEL, "deniz") is None
@@ -0,0 +1,153 @@
+# tests/test_reindexer.py
+"""
+Reindexer testleri.
+In-memory DB, gerçek FaissManager / EmbeddingStore ve sahte CLIP kullanır.
+"""
+
+import json
+import threading
+from datetime import datetime
+import pytest
+import numpy as np
+from unittest.mock import MagicMock
+from PIL import Image
+from api.jobs import CancelEvent
+from src.ingestion.reindexer import Reindexer, load_interrupted_state
+from src.embedding.faiss_manager import FaissManager
+from src.embedding.embedding_store import EmbeddingStore
+from database.schema import Item
+
+DIM = 16
+
+
+@pytest.fixture
+def pending_items(db_session, temp_dir):
+    """FAISS'te vektörü olmayan 5 fotoğraf + rızası olmayan 1 fotoğraf."""
+    items = []
+    for i in range(6):
+        path = temp_dir / f"photo_{i}.jpg"
+        Image.new("RGB", (32, 32), color=(i * 40, 0, 0)).save(path, "JPEG")
+        items.append(Item(file_path=str(path), file_hash=f"hash_{i}", type="Photo",
+                          has_consent=i < 5, creation_datetime=datetime(2025, 1, i + 1)))
+    db_session.add_all(items)
+    db_session.commit()
+    return items
+
+
+@pytest.fixture
+def mock_clip():
+    clip = MagicMock()
+    clip.encode_images.side_effect = lambda paths, executor=None: [
+        np.random.randn(DIM).astype('float32') for _ in paths
+    ]
+    return clip
+
+
+@pytest.fixture
+def reindexer(db_session, mock_clip, temp_dir):
+    faiss_mgr = FaissManager(str(temp_dir / "re.faiss"), dimension=DIM)
+    store = EmbeddingStore(str(temp_dir / "re_emb"), dimension=DIM)
+    return Reindexer(db_session, mock_clip, faiss_mgr, embedding_store=store,
+                     batch_size=2, state_path=str(temp_dir / "reindex_state.json"))
+
+
+class TestReindexer:
+
+    def test_indexes_all_pending_in_batches(self, reindexer, pending_items, db_session, mock_clip):
+        """Rızası olan tüm item'lar batch'ler halinde FAISS'e ve DB'ye yazılır."""
+        progress = list(reindexer.run())
+
+        assert [p['current'] for p in progress] == [2, 4, 5]
+        assert progress[-1]['reindexed'] == 5 and progress[-1]['total'] == 5
+        assert reindexer.faiss_manager.get_index_size() == 5
+        assert all(len(c.args[0]) <= 2 for c in mock_clip.encode_images.call_args_list)
+        assert db_session.query(Item).filter(Item.faiss_index_id.is_(None)).count() == 1
+        assert reindexer.embedding_store.count() == 5
+        assert load_interrupted_state(reindexer.state_path) is None
+
+    def test_store_hits_skip_encoding(self, reindexer, pending_items, mock_clip):
+        """Vektörü depoda olan item'lar yeniden encode edilmez."""
+        for item in pending_items[:5]:
+            reindexer.embedding_store.put(item.file_hash, item.item_id, np.random.randn(DIM))
+
+        list(reindexer.run())
+
+        mock_clip.encode_images.assert_not_called()
+        assert reindexer.faiss_manager.get_index_size() == 5
+
+    def test_resume_after_interruption(self, reindexer, pending_items, db_session, mock_clip, temp_dir):
+        """Kapanışta kesilen reindex sonraki çalıştırmada kaldığı yerden sürer."""
+        cancel = CancelEvent()
+        cancel.shutdown = True
+        for _ in reindexer.run(cancel):
+            cancel.set()
+
+        state = json.loads(reindexer.state_path.read_text())
+        assert state['status'] == "running" and state['current'] == 2
+        assert load_interrupted_state(reindexer.state_path) is not None
+
+        mock_clip.encode_images.reset_mock()
+        resumed = Reindexer(db_session, mock_clip, reindexer.faiss_manager,
+                            embedding_store=reindexer.embedding_store, batch_size=2,
+                            state_path=str(reindexer.state_path))
+        progress = list(resumed.run())
+
+        assert progress[0]['current'] == 4
+        assert progress[-1] == {**progress[-1], 'current': 5, 'total': 5, 'reindexed': 5}
+        encoded = [p.name for c in mock_clip.encode_images.call_args_list for p in c.args[0]]
+        assert sorted(encoded) == ["photo_2.jpg", "photo_3.jpg", "photo_4.jpg"]
+
+    def test_user_cancel_not_resumed_at_startup(self, reindexer, pending_items, db_session):
+        """
+        Kullanıcı iptali 'cancelled' yazar: açılışta sürdürülmez, elle başlatılan
+        reindex ise devam noktasından sürer.
+        """
+        cancel = threading.Event()
+        for _ in reindexer.run(cancel):
+            cancel.set()
+
+        state = json.loads(reindexer.state_path.read_text())
+        assert state['status'] == "cancelled" and state['current'] == 2
+        assert load_interrupted_state(reindexer.state_path) is None
+
+        progress = list(reindexer.run())
+        assert progress[0]['current'] == 4
+        assert progress[-1]['reindexed'] == 5
+        assert json.loads(reindexer.state_path.read_text())['status'] == "completed"
+
+    def test_vectors_added_before_crash_not_duplicated(self, reindexer, pending_items, db_session, mock_clip):
+        """FAISS'e eklenip DB'ye yazılamamış item tekrar encode/eklenmez."""
+        first = pending_items[0]
+        reindexer.faiss_manager.add_embeddings(np.random.randn(1, DIM), [first.item_id])
+
+        list(reindexer.run())
+
+        db_session.refresh(first)
+        assert first.faiss_index_id == first.item_id
+        assert reindexer.faiss_manager.get_index_size() == 5
+        encoded = [p.name for c in mock_clip.encode_images.call_args_list for p in c.args[0]]
+        assert "photo_0.jpg" not in encoded
+
+    def test_missing_files_counted_as_failed(self, reindexer, pending_items):
+        """Dosyası olmayan item'lar başarısız sayılır, diğerleri index'lenir."""
+        pending_items[1].file_path = "/yok/photo.jpg"
+        progress = list(reindexer.run())
+
+        assert progress[-1]['failed'] == 1
+        assert progress[-1]['reindexed'] == 4
+
+    def test_encode_error_does_not_stop_job(self, reindexer, pending_items, mock_clip):
+        """Bir batch'in encode hatası sonraki batch'leri durdurmaz."""
+        calls = []
+
+        def flaky(paths, executor=None):
+            calls.append(paths)
+            if len(calls) == 1:
+                raise RuntimeError("model yok")
+            return [np.random.randn(DIM).astype('float32') for _ in paths]
+
+        mock_clip.encode_images.side_effect = flaky
+        progress = list(reindexer.run())
+
+        assert progress[-1]['failed'] == 2
+        assert progress[-1]['reindexed'] == 3
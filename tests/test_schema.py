@@ -43,6 +43,18 @@ class TestDatabaseCreation:
         }
         assert expected.issubset(columns)
 
+    def test_gallery_index_added_to_existing_db(self, temp_dir):
+        """Galeri index'i olmayan eski bir veritabanına create_all_tables() ile eklenir."""
+        schema = DatabaseSchema(db_url=f"sqlite:///{temp_dir / 'old.db'}")
+        Base.metadata.create_all(schema.engine)
+        with schema.engine.begin() as conn:
+            conn.exec_driver_sql("DROP INDEX ix_items_consent_datetime")
+
+        schema.create_all_tables()
+
+        indexes = {ix['name']: ix['column_names'] for ix in inspect(schema.engine).get_indexes('items')}
+        assert indexes['ix_items_consent_datetime'] == ['has_consent', 'creation_datetime']
+
 
 class TestItemModel:
     """Item ORM model testleri."""
@@ -127,15 +127,15 @@ class TestTextSearchImages:
         assert text_searcher.search_images("test", k=10) == []
 
     def test_score_calculation(self, text_searcher, mock_db, mock_image_faiss):
-        """Score = 1 - distance/2 formülü doğru çalışır."""
-        mock_image_faiss.search.return_value = [(1, 0.4)]
+        """FAISS'in cosine skoru doğrudan kullanılır."""
+        mock_image_faiss.search.return_value = [(1, 0.81234)]
         mock_db.query.return_value.filter.return_value.all.return_value = [
             make_item(1, "/photos/test.jpg")
         ]
 
         results = text_searcher.search_images("test", k=10)
 
-        assert results[0]['score'] == round(1 - 0.4 / 2, 4)  # 0.8
+        assert results[0]['score'] == 0.8123
 
     def test_k_limit(self, text_searcher, mock_db, mock_image_faiss):
         """k parametresi sonuç sayısını sınırlar."""
@@ -147,11 +147,32 @@ class TestTextSearchImages:
         results = text_searcher.search_images("test", k=3)
         assert len(results) == 3
 
-    def test_faiss_gets_k_times_2(self, text_searcher, mock_image_faiss, mock_db):
-        """FAISS'e k*2 gönderilir (consent filtresi marjı)."""
-        mock_db.query.return_value.filter.return_value.all.return_value = []
-        text_searcher.search_images("test", k=5)
-        assert mock_image_faiss.search.call_args[0][1] == 10
+    def test_unfiltered_search_has_no_allow_list(self, text_searcher, mock_image_faiss, mock_db):
+        """Filtre yoksa rızalı item'lar yüklenmez; FAISS izin listesiz aranır, rıza sonra süzülür."""
+        mock_db.query.return_value.filter.return_value.all.return_value = [
+            make_item(1, "/photos/1.jpg"), make_item(3, "/photos/3.jpg")
+        ]
+        results = text_searcher.search_images("test", k=5)
+
+        assert mock_image_faiss.search.call_args[0][1] == 5
+        assert mock_image_faiss.search.call_args.kwargs['allowed_ids'] is None
+        assert mock_db.query.call_count == 1
+        assert [r['item_id'] for r in results] == [1, 3]
+
+    def test_allowed_ids_passed_through(self, text_searcher, mock_image_faiss, mock_db):
+        """Ek filtrenin izin listesi FAISS'e iletilir; rızasız sonuç elenir."""
+        mock_image_faiss.search.return_value = [(3, 0.9), (4, 0.8)]
+        mock_db.query.return_value.filter.return_value.all.return_value = [make_item(3, "/photos/3.jpg")]
+
+        results = text_searcher.search_images("test", k=5, allowed_ids=[3, 4])
+
+        assert mock_image_faiss.search.call_args.kwargs['allowed_ids'] == [3, 4]
+        assert [r['item_id'] for r in results] == [3]
+
+    def test_empty_allow_list(self, text_searcher, mock_image_faiss):
+        """Filtreye uyan item yoksa FAISS'e hiç gidilmez."""
+        assert text_searcher.search_images("test", k=5, allowed_ids=[]) == []
+        mock_image_faiss.search.assert_not_called()
 
 
 class TestTextSearchTexts:
@@ -211,10 +232,10 @@ class TestTextSearchAll:
         """Her iki arama sonucunu birleştirir."""
         mock_image_faiss.search.return_value = [(1, 0.2)]
         mock_text_faiss.search.return_value = [(10, 0.3)]
-        mock_db.query.return_value.filter.return_value.all.side_effect = [
-            [make_item(1, "/photos/a.jpg")],
-            [make_item(10, transcription="hello")]
-        ]
+        image_rows = [make_item(1, "/photos/a.jpg")]
+        text_rows = [make_item(10, transcription="hello")]
+        # Her arama tek sorgu: FAISS sonuçlarının rızalı item satırları
+        mock_db.query.return_value.filter.return_value.all.side_effect = [image_rows, text_rows]
 
         results = text_searcher.search_all("test", k=5)
 
@@ -321,9 +342,7 @@ class TestTimeSearch:
 
 @pytest.fixture
 def location_searcher(mock_db):
-    with patch('src.search.location_search.Nominatim'):
-        searcher = LocationSearch(db_connection=mock_db)
-    return searcher
+    return LocationSearch(db_connection=mock_db, geocoder=MagicMock())
 
 
 class TestLocationSearch:
@@ -405,6 +424,82 @@ class TestLocationSearch:
         assert 'location' in results[0]
 
 
+@pytest.fixture
+def geo_searcher(db_session):
+    return LocationSearch(db_connection=db_session)
+
+
+def add_geo_items(db_session, coords, has_consent=True):
+    items = [Item(file_path=f"/geo/{i}_{lat}_{lng}.jpg", file_hash=f"geo_{i}_{lat}_{lng}", type="Photo",
+                  has_consent=has_consent, creation_datetime=datetime(2025, 1, 1),
+                  latitude=lat, longitude=lng) for i, (lat, lng) in enumerate(coords)]
+    db_session.add_all(items)
+    db_session.commit()
+    return items
+
+
+class TestLocationSearchSpatialIndex:
+    """Gerçek (in-memory SQLite) veritabanında R*Tree index'i ile arama."""
+
+    @pytest.mark.parametrize("center", [(41.0, 29.0), (69.6, 18.9), (-16.5, 179.95), (89.95, 0.0)])
+    def test_matches_brute_force(self, geo_searcher, db_session, center):
+        """Sonuçlar tüm tabloyu geodesic ile taramakla aynıdır (kutup ve 180. meridyen dahil)."""
+        rng = np.random.default_rng(7)
+        lat, lng = center
+        coords = [(float(np.clip(lat + dy, -90, 90)), float((lng + dx + 180) % 360 - 180))
+                  for dy, dx in rng.uniform(-0.6, 0.6, size=(300, 2))]
+        add_geo_items(db_session, coords)
+
+        results = geo_searcher.search_by_location(lat, lng, radius_km=30.0)
+
+        expected = sorted(i for i, c in enumerate(coords, start=1)
+                          if geo_searcher.calculate_distance(lat, lng, *c) <= 30.0)
+        assert sorted(r['item_id'] for r in results) == expected
+        assert [r['distance_km'] for r in results] == sorted(r['distance_km'] for r in results)
+
+    def test_search_by_city_offline(self, geo_searcher, db_session):
+        """Şehir adı yerel gazetteer'den çözülür (ağ yok)."""
+        near, far = add_geo_items(db_session, [(40.995, 29.035), (39.9, 32.9)])
+
+        results = geo_searcher.search_by_city("kadikoy", radius_km=5.0)
+
+        assert [r['item_id'] for r in results] == [near.item_id]
+
+    def test_index_follows_item_changes(self, geo_searcher, db_session):
+        """Konum güncellenen / silinen item'lar index'te de güncellenir."""
+        moved, deleted, consentless = add_geo_items(
+            db_session, [(39.9, 32.9), (41.001, 29.001), (41.002, 29.002)])
+        consentless.has_consent = False
+        moved.latitude, moved.longitude = 41.003, 29.003
+        db_session.delete(deleted)
+        db_session.commit()
+
+        results = geo_searcher.search_by_location(41.0, 29.0, radius_km=5.0)
+
+        assert [r['item_id'] for r in results] == [moved.item_id]
+
+    def test_index_created_for_existing_database(self, temp_dir):
+        """Index'siz eski veritabanına create_all_tables() index'i ekler ve doldurur."""
+        from sqlalchemy.orm import sessionmaker
+        from database.schema import DatabaseSchema, has_spatial_index
+        schema = DatabaseSchema(db_url=f"sqlite:///{temp_dir / 'old_geo.db'}")
+        schema.create_all_tables()
+        with schema.engine.begin() as conn:
+            for name in ("items_geo_insert", "items_geo_update", "items_geo_delete"):
+                conn.exec_driver_sql(f"DROP TRIGGER {name}")
+            conn.exec_driver_sql("DROP TABLE items_geo")
+        session = sessionmaker(bind=schema.engine)()
+        add_geo_items(session, [(41.001, 29.001)])
+        assert not has_spatial_index(session)
+
+        schema.create_all_tables()
+
+        assert has_spatial_index(session)
+        results = LocationSearch(db_connection=session).search_by_location(41.0, 29.0, 5.0)
+        assert len(results) == 1
+        session.close()
+
+
 # ================================================================
 #                     SEARCH ENGINE TESTLERİ
 # ================================================================
@@ -550,3 +645,49 @@ class TestAdvancedSearch:
         engine.advanced_search({'year': 2025, 'month': 12, 'k': 5})
 
         mock_time_search.search_by_date_range.assert_called_once()
+
+
+# ================================================================
+#                 API SEMANTİK ARAMA TESTLERİ
+# ================================================================
+
+class TestSemanticSearchRouter:
+    """api/routers/search_router._semantic_search: FAISS izin listesi ve rıza süzmesi."""
+
+    @pytest.fixture
+    def indexed(self, db_session, sample_items):
+        for item in sample_items:
+            item.faiss_index_id = item.item_id
+        db_session.commit()
+        return sample_items
+
+    @pytest.fixture
+    def faiss_mgr(self, indexed):
+        mgr = MagicMock()
+        mgr.search.return_value = [(item.item_id, 0.9) for item in indexed]
+        return mgr
+
+    def _search(self, db_session, faiss_mgr, **request):
+        from api.routers.search_router import SearchRequest, _semantic_search
+        return _semantic_search(SearchRequest(query="deniz", **request),
+                                np.zeros(512, dtype=np.float32), faiss_mgr, db_session)
+
+    def test_unfiltered_query_has_no_allow_list(self, db_session, faiss_mgr, indexed):
+        """Filtre yoksa tüm item_id'ler okunmaz; rızasız FAISS sonucu elenir."""
+        response = self._search(db_session, faiss_mgr)
+
+        assert faiss_mgr.search.call_args.kwargs["allowed_ids"] is None
+        returned = {result.item.item_id for result in response.results}
+        assert returned == {item.item_id for item in indexed if item.has_consent}
+
+    def test_time_filter_builds_allow_list(self, db_session, faiss_mgr, indexed):
+        self._search(db_session, faiss_mgr, start_date=date(2025, 3, 1), end_date=date(2025, 6, 30))
+
+        allowed = faiss_mgr.search.call_args.kwargs["allowed_ids"]
+        assert sorted(allowed) == [indexed[0].item_id, indexed[1].item_id]
+
+    def test_location_filter_builds_allow_list(self, db_session, faiss_mgr, indexed):
+        """Rızasız yakın item (no_consent.jpg) izin listesine girmez."""
+        self._search(db_session, faiss_mgr, lat=41.0082, lng=28.9784, radius_km=5.0)
+
+        assert faiss_mgr.search.call_args.kwargs["allowed_ids"] == [indexed[0].item_id]
@@ -0,0 +1,142 @@
+# tests/test_stream_cipher.py
+"""
+Segment'li dosya şifreleme formatı (StreamCipher) testleri.
+"""
+
+import io
+import os
+import pytest
+from cryptography.fernet import Fernet, InvalidToken
+from security import stream_cipher
+from security.stream_cipher import (
+    StreamCipher, MAGIC, VERSION, HEADER_SIZE, SALT_SIZE, TAG_SIZE, is_container,
+)
+
+SEGMENT = 1024
+
+
+@pytest.fixture
+def cipher():
+    return StreamCipher(Fernet.generate_key(), segment_size=SEGMENT)
+
+
+def encrypt(cipher, data: bytes) -> bytes:
+    out = io.BytesIO()
+    cipher.encrypt_stream(io.BytesIO(data), out)
+    return out.getvalue()
+
+
+class TestStreamCipher:
+
+    @pytest.mark.parametrize("size", [0, 1, SEGMENT - 1, SEGMENT, SEGMENT + 1, 5 * SEGMENT + 7])
+    def test_roundtrip(self, cipher, size):
+        """Segment sınırlarındaki boyutlar dahil çözme orijinali verir."""
+        data = os.urandom(size)
+        encrypted = encrypt(cipher, data)
+
+        assert is_container(encrypted)
+        assert b"".join(cipher.decrypt_iter(io.BytesIO(encrypted))) == data
+        assert cipher.plaintext_size(io.BytesIO(encrypted)) == size
+
+    def test_layout(self, cipher):
+        """Her segment kendi etiketini taşır; başlık sabit boyutludur."""
+        encrypted = encrypt(cipher, os.urandom(3 * SEGMENT))
+        assert encrypted.startswith(MAGIC)
+        assert len(encrypted) == HEADER_SIZE + 3 * (SEGMENT + TAG_SIZE)
+
+    def test_random_access(self, cipher):
+        """Tek bir segment diğerleri çözülmeden okunabilir."""
+        data = os.urandom(4 * SEGMENT + 10)
+        f = io.BytesIO(encrypt(cipher, data))
+
+        assert cipher.read_segment(f, 2) == data[2 * SEGMENT:3 * SEGMENT]
+        assert cipher.read_segment(f, 4) == data[4 * SEGMENT:]
+        assert b"".join(cipher.decrypt_iter(f, start_segment=3)) == data[3 * SEGMENT:]
+        with pytest.raises(IndexError):
+            cipher.read_segment(f, 5)
+
+    def test_tampered_segment_rejected(self, cipher):
+        encrypted = bytearray(encrypt(cipher, os.urandom(2 * SEGMENT)))
+        encrypted[HEADER_SIZE + SEGMENT + TAG_SIZE + 5] ^= 1
+        with pytest.raises(InvalidToken):
+            list(cipher.decrypt_iter(io.BytesIO(bytes(encrypted))))
+
+    def test_truncation_rejected(self, cipher):
+        """Son segment'i kesilmiş dosya, önceki segment'in 'son' bayrağı tutmadığı için reddedilir."""
+        encrypted = encrypt(cipher, os.urandom(3 * SEGMENT))
+        truncated = encrypted[:HEADER_SIZE + 2 * (SEGMENT + TAG_SIZE)]
+        with pytest.raises(InvalidToken):
+            list(cipher.decrypt_iter(io.BytesIO(truncated)))
+
+    def test_swapped_segments_rejected(self, cipher):
+        encrypted = encrypt(cipher, os.urandom(3 * SEGMENT))
+        stride = SEGMENT + TAG_SIZE
+        first = encrypted[HEADER_SIZE:HEADER_SIZE + stride]
+        second = encrypted[HEADER_SIZE + stride:HEADER_SIZE + 2 * stride]
+        swapped = encrypted[:HEADER_SIZE] + second + first + encrypted[HEADER_SIZE + 2 * stride:]
+        with pytest.raises(InvalidToken):
+            list(cipher.decrypt_iter(io.BytesIO(swapped)))
+
+    def test_wrong_key_rejected(self, cipher):
+        encrypted = encrypt(cipher, b"gizli")
+        other = StreamCipher(Fernet.generate_key(), segment_size=SEGMENT)
+        with pytest.raises(InvalidToken):
+            list(other.decrypt_iter(io.BytesIO(encrypted)))
+
+    def test_not_a_container(self, cipher):
+        with pytest.raises(InvalidToken):
+            list(cipher.decrypt_iter(io.BytesIO(b"\xff\xd8\xff\xe0 jpeg")))
+
+
+class TestDecryptingReader:
+
+    def test_read_and_seek(self, cipher):
+        """Okuyucu segment sınırlarını aşan okuma ve seek'leri destekler."""
+        data = os.urandom(3 * SEGMENT + 100)
+        reader = cipher.open(io.BytesIO(encrypt(cipher, data)))
+
+        assert reader.read(10) == data[:10]
+        reader.seek(SEGMENT - 5)
+        assert reader.read(10) == data[SEGMENT - 5:SEGMENT + 5]
+        reader.seek(-50, io.SEEK_END)
+        assert reader.read() == data[-50:]
+        reader.seek(0)
+        assert reader.read() == data
+
+
+class TestPerFileKey:
+    """Her dosyanın segment anahtarı başlıktaki rastgele tuzdan türetilir."""
+
+    def test_header_carries_version_and_salt(self, cipher):
+        first, second = encrypt(cipher, b"veri"), encrypt(cipher, b"veri")
+
+        assert first[len(MAGIC)] == VERSION == 2
+        salt = slice(len(MAGIC) + 5, len(MAGIC) + 5 + SALT_SIZE)
+        assert len(first[salt]) == SALT_SIZE
+        assert first[salt] != second[salt]
+
+    def test_same_nonce_prefix_different_keys(self, cipher, monkeypatch):
+        """Nonce öneki çakışsa bile tuzlar farklı olduğu için anahtar/nonce çifti tekrarlanmaz."""
+        salts = iter([b"a" * SALT_SIZE, b"b" * SALT_SIZE])
+        monkeypatch.setattr(stream_cipher.os, "urandom",
+                            lambda n: next(salts) if n == SALT_SIZE else b"\x00" * n)
+        data = os.urandom(2 * SEGMENT)
+
+        first, second = encrypt(cipher, data), encrypt(cipher, data)
+
+        assert first[HEADER_SIZE - 7:HEADER_SIZE] == second[HEADER_SIZE - 7:HEADER_SIZE]
+        assert first[HEADER_SIZE:] != second[HEADER_SIZE:]
+        assert b"".join(cipher.decrypt_iter(io.BytesIO(second))) == data
+
+    def test_tampered_salt_rejected(self, cipher):
+        encrypted = bytearray(encrypt(cipher, os.urandom(SEGMENT)))
+        encrypted[len(MAGIC) + 5] ^= 1
+        with pytest.raises(InvalidToken):
+            list(cipher.decrypt_iter(io.BytesIO(bytes(encrypted))))
+
+    @pytest.mark.parametrize("version", [1, 9])
+    def test_unknown_version_rejected(self, cipher, version):
+        encrypted = bytearray(encrypt(cipher, b"veri"))
+        encrypted[len(MAGIC)] = version
+        with pytest.raises(InvalidToken):
+            list(cipher.decrypt_iter(io.BytesIO(bytes(encrypted))))
@@ -0,0 +1,89 @@
+# tests/test_thumbnail_cache.py
+"""
+ThumbnailCache testleri.
+"""
+
+import threading
+from src.ingestion.thumbnail_cache import ThumbnailCache
+
+
+class TestThumbnailCache:
+
+    def test_hit_and_miss(self):
+        cache = ThumbnailCache(max_bytes=100)
+        cache.put(1, b"jpeg")
+
+        assert cache.get(1) == b"jpeg"
+        assert cache.get(2) is None
+        assert cache.get(1, "preview") is None
+        stats = cache.stats()
+        assert (stats['hits'], stats['misses']) == (1, 2)
+
+    def test_byte_budget_evicts_lru(self):
+        """Bütçe aşılınca en uzun süredir kullanılmayan giriş atılır."""
+        cache = ThumbnailCache(max_bytes=30)
+        cache.put(1, b"a" * 10)
+        cache.put(2, b"b" * 10)
+        cache.put(3, b"c" * 10)
+        cache.get(1)                 # 1 yeniden kullanıldı, en eski artık 2
+        cache.put(4, b"d" * 10)
+
+        assert cache.get(2) is None
+        assert cache.get(1) is not None and cache.get(4) is not None
+        stats = cache.stats()
+        assert stats['bytes'] == 30 and stats['evictions'] == 1
+
+    def test_replace_updates_bytes(self):
+        cache = ThumbnailCache(max_bytes=100)
+        cache.put(1, b"a" * 40)
+        cache.put(1, b"b" * 10)
+
+        assert cache.stats()['bytes'] == 10
+        assert cache.get(1) == b"b" * 10
+
+    def test_oversized_value_not_cached(self):
+        cache = ThumbnailCache(max_bytes=5)
+        cache.put(1, b"x" * 6)
+
+        assert cache.get(1) is None
+        assert cache.stats()['entries'] == 0
+
+    def test_invalidate_all_kinds(self):
+        """Rıza kaldırma / silmede item'ın tüm türleri çıkarılır."""
+        cache = ThumbnailCache(max_bytes=100)
+        cache.put(1, b"thumb")
+        cache.put(1, b"preview", "preview")
+        cache.put(2, b"other")
+
+        assert cache.invalidate([1, 99]) == 2
+        assert cache.get(1) is None and cache.get(1, "preview") is None
+        assert cache.get(2) == b"other"
+        assert cache.stats()['bytes'] == len(b"other")
+
+    def test_clear(self):
+        cache = ThumbnailCache(max_bytes=100)
+        cache.put(1, b"jpeg")
+        cache.get(1)
+        cache.clear()
+
+        assert cache.stats() == {'entries': 0, 'bytes': 0, 'max_bytes': 100, 'hits': 0,
+                                 'misses': 0, 'evictions': 0, 'hit_rate': 0.0}
+
+    def test_concurrent_access_keeps_budget(self):
+        """Eşzamanlı yazma/okumada bayt sayacı tutarlı kalır."""
+        cache = ThumbnailCache(max_bytes=500)
+
+        def worker(offset):
+            for i in range(200):
+                cache.put(offset + i % 50, b"z" * (i % 20 + 1))
+                cache.get(offset + (i * 7) % 50)
+
+        threads = [threading.Thread(target=worker, args=(n * 100,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        stats = cache.stats()
+        assert stats['bytes'] <= 500
+        assert stats['bytes'] == sum(len(v) for v in cache._entries.values())
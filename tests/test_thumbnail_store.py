@@ -0,0 +1,62 @@
+# tests/test_thumbnail_store.py
+"""
+ThumbnailStore testleri.
+Gerçek görüntü ve gerçek şifreleme kullanır.
+"""
+
+import io
+import pytest
+from PIL import Image
+from src.ingestion.thumbnail_store import ThumbnailStore
+from config import Config
+
+
+@pytest.fixture
+def store(temp_dir, encryption_manager):
+    return ThumbnailStore(str(temp_dir / "thumbs"), encryption_manager)
+
+
+class TestThumbnailStore:
+
+    def test_generate_all_kinds(self, store, large_image):
+        """Thumbnail ve önizleme, boyut sınırları içinde üretilir."""
+        assert store.generate("abcdef123", large_image)
+
+        thumb = Image.open(io.BytesIO(store.get("abcdef123", "thumb")))
+        preview = Image.open(io.BytesIO(store.get("abcdef123", "preview")))
+        assert max(thumb.size) <= max(Config.THUMBNAIL_SIZE)
+        assert max(Config.THUMBNAIL_SIZE) < max(preview.size) <= max(Config.PREVIEW_SIZE)
+
+    def test_files_encrypted_and_content_addressed(self, store, sample_image):
+        """Diskteki dosya hash'ten hesaplanan yoldadır ve JPEG olarak okunamaz."""
+        store.generate("ff00aa", sample_image)
+
+        path = store.path_for("ff00aa", "thumb")
+        assert path == store.root / "thumb" / "ff" / "ff00aa.enc"
+        assert not path.read_bytes().startswith(b"\xff\xd8")
+
+    def test_generate_from_bytes(self, store, sample_image):
+        """Çözülmüş orijinal baytlarından da üretilebilir (eski import'lar için)."""
+        assert store.generate("bytes01", sample_image.read_bytes())
+        assert store.has("bytes01", "preview")
+
+    def test_missing_returns_none(self, store):
+        assert store.get("yok", "thumb") is None
+
+    def test_corrupt_source(self, store, temp_dir):
+        """Bozuk görüntü False döner, dosya yazılmaz."""
+        broken = temp_dir / "broken.jpg"
+        broken.write_bytes(b"not an image")
+
+        assert store.generate("bad", broken) is False
+        assert not store.has("bad")
+
+    def test_remove(self, store, sample_image):
+        store.generate("rm01", sample_image)
+
+        assert store.remove("rm01") == 2
+        assert store.get("rm01", "preview") is None
+
+    def test_unknown_kind(self, store):
+        with pytest.raises(ValueError):
+            store.path_for("abc", "poster")